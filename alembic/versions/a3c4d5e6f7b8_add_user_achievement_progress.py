@@ -0,0 +1,70 @@
+"""add user_achievement_progress
+
+Revision ID: a3c4d5e6f7b8
+Revises: f2b3c4d5e6a7
+Create Date: 2025-12-09 15:22:48.904113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3c4d5e6f7b8'
+down_revision: Union[str, Sequence[str], None] = 'f2b3c4d5e6a7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# category -> users column it is backfilled from
+USER_COUNTERS = {
+    'LIFETIME_LIKES': 'lifetime_live_likes',
+    'LIFETIME_DIAMONDS': 'lifetime_diamonds',
+    'DISCORD_MSG_COUNT': 'discord_msg_count',
+    'DISCORD_VOICE_MINS': 'discord_voice_mins',
+    'LIFETIME_LIKES_SENT': 'lifetime_likes_sent',
+    'LIFETIME_GIFTS_SENT': 'lifetime_gifts_sent',
+    'LIFETIME_TIKTOK_COMMENTS': 'lifetime_tiktok_comments',
+    'LIFETIME_TIKTOK_SHARES': 'lifetime_tiktok_shares',
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('user_achievement_progress',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('category', sa.String(), nullable=False),
+    sa.Column('value', sa.BigInteger(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'category')
+    )
+    with op.batch_alter_table('user_achievement_progress', schema=None) as batch_op:
+        batch_op.create_index('ix_user_achievement_progress_user_updated', ['user_id', 'updated_at'], unique=False)
+
+    # Backfill from the counters the achievements API used to read directly
+    for category, column in USER_COUNTERS.items():
+        op.execute(sa.text(
+            f"INSERT INTO user_achievement_progress (user_id, category, value, updated_at) "
+            f"SELECT id, '{category}', {column}, CURRENT_TIMESTAMP FROM users WHERE COALESCE({column}, 0) > 0"
+        ))
+    op.execute(sa.text(
+        "INSERT INTO user_achievement_progress (user_id, category, value, updated_at) "
+        "SELECT user_id, 'SUBMISSION_COUNT', COUNT(*), CURRENT_TIMESTAMP FROM submissions "
+        "WHERE user_id IS NOT NULL GROUP BY user_id"
+    ))
+    op.execute(sa.text(
+        "INSERT INTO user_achievement_progress (user_id, category, value, updated_at) "
+        "SELECT user_id, 'CONCURRENT_VIEWERS', MAX(max_concurrent_viewers), CURRENT_TIMESTAMP FROM live_sessions "
+        "WHERE user_id IS NOT NULL GROUP BY user_id HAVING MAX(max_concurrent_viewers) > 0"
+    ))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('user_achievement_progress', schema=None) as batch_op:
+        batch_op.drop_index('ix_user_achievement_progress_user_updated')
+
+    op.drop_table('user_achievement_progress')
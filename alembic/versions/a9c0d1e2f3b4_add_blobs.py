@@ -0,0 +1,78 @@
+"""add content-addressed blobs index
+
+Revision ID: a9c0d1e2f3b4
+Revises: f8b9c0d1e2a3
+Create Date: 2025-12-14 09:12:37.220915
+
+"""
+from datetime import datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a9c0d1e2f3b4'
+down_revision: Union[str, Sequence[str], None] = 'f8b9c0d1e2a3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    blobs = op.create_table('blobs',
+    sa.Column('sha256', sa.String(length=64), nullable=False),
+    sa.Column('size', sa.BigInteger(), nullable=True),
+    sa.Column('object_key', sa.String(), nullable=False),
+    sa.Column('content_type', sa.String(), nullable=True),
+    sa.Column('refcount', sa.Integer(), nullable=False),
+    sa.Column('dedup_hits', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('sha256'),
+    sa.UniqueConstraint('object_key')
+    )
+    with op.batch_alter_table('blobs', schema=None) as batch_op:
+        batch_op.create_index('ix_blobs_refcount_updated_at', ['refcount', 'updated_at'], unique=False)
+
+    # Index the R2 objects existing submissions already point at (one object
+    # per hash: the most referenced one), so new uploads of the same bytes reuse them
+    bind = op.get_bind()
+    counts = {}
+    for table in ('submissions', 'submissions_archive'):
+        rows = bind.execute(sa.text(
+            f"SELECT file_hash, track_url, COUNT(*) FROM {table} "
+            "WHERE file_hash IS NOT NULL AND track_url LIKE 'r2://%' GROUP BY file_hash, track_url"
+        )).fetchall()
+        for file_hash, track_url, count in rows:
+            key = (file_hash, track_url)
+            counts[key] = counts.get(key, 0) + count
+
+    best = {}
+    for (file_hash, track_url), count in counts.items():
+        if file_hash not in best or count > best[file_hash][1]:
+            best[file_hash] = (track_url, count)
+
+    now = datetime.now(timezone.utc)
+    seen_keys = set()
+    rows = []
+    for file_hash, (track_url, count) in best.items():
+        object_key = track_url[5:]
+        if len(file_hash) != 64 or object_key in seen_keys:
+            continue
+        seen_keys.add(object_key)
+        rows.append({
+            'sha256': file_hash, 'size': None, 'object_key': object_key, 'content_type': None,
+            'refcount': count, 'dedup_hits': 0, 'created_at': now, 'updated_at': now,
+        })
+    if rows:
+        op.bulk_insert(blobs, rows)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('blobs', schema=None) as batch_op:
+        batch_op.drop_index('ix_blobs_refcount_updated_at')
+
+    op.drop_table('blobs')
@@ -0,0 +1,50 @@
+"""add giveaway draw audit records
+
+Revision ID: b0d1e2f3a4c5
+Revises: a9c0d1e2f3b4
+Create Date: 2025-12-16 10:41:05.183422
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b0d1e2f3a4c5'
+down_revision: Union[str, Sequence[str], None] = 'a9c0d1e2f3b4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('giveaway_draws',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('reviewer_id', sa.Integer(), nullable=False),
+    sa.Column('goal_type', sa.String(), nullable=False),
+    sa.Column('round', sa.Integer(), nullable=False),
+    sa.Column('seed', sa.BigInteger(), nullable=False),
+    sa.Column('tickets', sa.JSON(), nullable=False),
+    sa.Column('eligible_holders', sa.JSON(), nullable=False),
+    sa.Column('free_submission_ids', sa.JSON(), nullable=False),
+    sa.Column('winner_holder', sa.String(), nullable=True),
+    sa.Column('winner_user_id', sa.Integer(), nullable=True),
+    sa.Column('winner_submission_id', sa.Integer(), nullable=True),
+    sa.Column('drawn_at', sa.DateTime(timezone=True), nullable=False),
+    sa.ForeignKeyConstraint(['reviewer_id'], ['reviewers.id'], ),
+    sa.ForeignKeyConstraint(['winner_user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('reviewer_id', 'goal_type', 'round', name='uq_giveaway_draws_reviewer_id_goal_type_round')
+    )
+    with op.batch_alter_table('giveaway_draws', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_giveaway_draws_id'), ['id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('giveaway_draws', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_giveaway_draws_id'))
+
+    op.drop_table('giveaway_draws')
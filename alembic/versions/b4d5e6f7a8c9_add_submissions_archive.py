@@ -0,0 +1,73 @@
+"""add submissions_archive
+
+Revision ID: b4d5e6f7a8c9
+Revises: a3c4d5e6f7b8
+Create Date: 2025-12-10 11:05:17.381942
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import models
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b4d5e6f7a8c9'
+down_revision: Union[str, Sequence[str], None] = 'a3c4d5e6f7b8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('submissions_archive',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('reviewer_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('session_id', sa.Integer(), nullable=True),
+    sa.Column('track_url', sa.String(), nullable=False),
+    sa.Column('track_title', sa.String(), nullable=True),
+    sa.Column('artist', sa.String(), nullable=True),
+    sa.Column('archived_url', sa.String(), nullable=True),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('submitted_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('score', sa.Float(), nullable=True),
+    sa.Column('notes', sa.String(), nullable=True),
+    sa.Column('is_priority', sa.Boolean(), nullable=False),
+    sa.Column('priority_value', sa.Integer(), nullable=False),
+    sa.Column('bookmarked', sa.Boolean(), nullable=False),
+    sa.Column('spotlighted', sa.Boolean(), nullable=False),
+    sa.Column('review_score', sa.Numeric(precision=4, scale=2), nullable=True),
+    sa.Column('poll_result_w_percent', sa.Integer(), nullable=True),
+    sa.Column('average_concurrent_viewers', sa.Integer(), nullable=True),
+    sa.Column('start_time', sa.String(), nullable=True),
+    sa.Column('end_time', sa.String(), nullable=True),
+    sa.Column('genre', sa.String(), nullable=True),
+    sa.Column('tags', models.JsonEncodedList(), nullable=True),
+    sa.Column('batch_id', sa.String(), nullable=True),
+    sa.Column('sequence_order', sa.Integer(), nullable=False),
+    sa.Column('hook_start_time', sa.Integer(), nullable=True),
+    sa.Column('hook_end_time', sa.Integer(), nullable=True),
+    sa.Column('file_hash', sa.String(), nullable=True),
+    sa.ForeignKeyConstraint(['reviewer_id'], ['reviewers.id'], ),
+    sa.ForeignKeyConstraint(['session_id'], ['review_sessions.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('submissions_archive', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_submissions_archive_batch_id'), ['batch_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_submissions_archive_file_hash'), ['file_hash'], unique=False)
+        batch_op.create_index(batch_op.f('ix_submissions_archive_id'), ['id'], unique=False)
+        batch_op.create_index('ix_submissions_archive_reviewer_id_status', ['reviewer_id', 'status'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('submissions_archive', schema=None) as batch_op:
+        batch_op.drop_index('ix_submissions_archive_reviewer_id_status')
+        batch_op.drop_index(batch_op.f('ix_submissions_archive_id'))
+        batch_op.drop_index(batch_op.f('ix_submissions_archive_file_hash'))
+        batch_op.drop_index(batch_op.f('ix_submissions_archive_batch_id'))
+
+    op.drop_table('submissions_archive')
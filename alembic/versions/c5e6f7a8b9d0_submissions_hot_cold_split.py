@@ -0,0 +1,46 @@
+"""submissions hot/cold split
+
+Revision ID: c5e6f7a8b9d0
+Revises: b4d5e6f7a8c9
+Create Date: 2025-12-11 09:42:03.518207
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import models
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5e6f7a8b9d0'
+down_revision: Union[str, Sequence[str], None] = 'b4d5e6f7a8c9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+COLUMNS = ", ".join(column.name for column in models.Submission.__table__.columns)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name == 'sqlite':
+        # AUTOINCREMENT so SQLite never hands out an id that now lives in submissions_archive
+        with op.batch_alter_table('submissions', recreate='always', table_kwargs={'sqlite_autoincrement': True}) as batch_op:
+            pass
+
+    with op.batch_alter_table('submissions_archive', schema=None) as batch_op:
+        batch_op.create_index('ix_submissions_archive_user_id_submitted_at', ['user_id', 'submitted_at'], unique=False)
+
+    op.execute(
+        f"CREATE VIEW submissions_all AS "
+        f"SELECT {COLUMNS} FROM submissions UNION ALL SELECT {COLUMNS} FROM submissions_archive"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP VIEW IF EXISTS submissions_all")
+
+    with op.batch_alter_table('submissions_archive', schema=None) as batch_op:
+        batch_op.drop_index('ix_submissions_archive_user_id_submitted_at')
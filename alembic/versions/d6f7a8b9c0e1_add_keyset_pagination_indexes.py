@@ -0,0 +1,40 @@
+"""add keyset pagination indexes
+
+Revision ID: d6f7a8b9c0e1
+Revises: c5e6f7a8b9d0
+Create Date: 2025-12-12 14:20:41.902114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd6f7a8b9c0e1'
+down_revision: Union[str, Sequence[str], None] = 'c5e6f7a8b9d0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('submissions', schema=None) as batch_op:
+        batch_op.create_index('ix_submissions_reviewer_id_status_submitted_at_id', ['reviewer_id', 'status', 'submitted_at', 'id'], unique=False)
+        batch_op.create_index('ix_submissions_user_id_submitted_at_id', ['user_id', 'submitted_at', 'id'], unique=False)
+
+    with op.batch_alter_table('transactions', schema=None) as batch_op:
+        batch_op.create_index('ix_transactions_user_id_timestamp_id', ['user_id', 'timestamp', 'id'], unique=False)
+        batch_op.create_index('ix_transactions_reviewer_id_timestamp_id', ['reviewer_id', 'timestamp', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('transactions', schema=None) as batch_op:
+        batch_op.drop_index('ix_transactions_reviewer_id_timestamp_id')
+        batch_op.drop_index('ix_transactions_user_id_timestamp_id')
+
+    with op.batch_alter_table('submissions', schema=None) as batch_op:
+        batch_op.drop_index('ix_submissions_user_id_submitted_at_id')
+        batch_op.drop_index('ix_submissions_reviewer_id_status_submitted_at_id')
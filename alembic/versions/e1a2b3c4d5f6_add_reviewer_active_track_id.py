@@ -0,0 +1,63 @@
+"""add reviewers.active_track_id
+
+Revision ID: e1a2b3c4d5f6
+Revises: d8e3d47e70ae
+Create Date: 2025-12-08 10:12:41.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e1a2b3c4d5f6'
+down_revision: Union[str, Sequence[str], None] = 'd8e3d47e70ae'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+reviewers = sa.table(
+    'reviewers',
+    sa.column('id', sa.Integer),
+    sa.column('configuration', sa.JSON),
+    sa.column('active_track_id', sa.Integer),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('reviewers', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('active_track_id', sa.Integer(), nullable=True))
+        batch_op.create_index(batch_op.f('ix_reviewers_active_track_id'), ['active_track_id'], unique=False)
+
+    # Move the pointer out of the configuration JSON
+    bind = op.get_bind()
+    rows = bind.execute(sa.select(reviewers.c.id, reviewers.c.configuration)).fetchall()
+    for reviewer_id, config in rows:
+        if not isinstance(config, dict) or 'active_track_id' not in config:
+            continue
+        active_id = config.pop('active_track_id')
+        bind.execute(
+            reviewers.update()
+            .where(reviewers.c.id == reviewer_id)
+            .values(active_track_id=active_id, configuration=config)
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    bind = op.get_bind()
+    rows = bind.execute(
+        sa.select(reviewers.c.id, reviewers.c.configuration, reviewers.c.active_track_id)
+        .where(reviewers.c.active_track_id.isnot(None))
+    ).fetchall()
+    for reviewer_id, config, active_id in rows:
+        config = dict(config or {})
+        config['active_track_id'] = active_id
+        bind.execute(reviewers.update().where(reviewers.c.id == reviewer_id).values(configuration=config))
+
+    with op.batch_alter_table('reviewers', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_reviewers_active_track_id'))
+        batch_op.drop_column('active_track_id')
@@ -0,0 +1,62 @@
+"""add hot query indexes
+
+Revision ID: e7a8b9c0d1f2
+Revises: d6f7a8b9c0e1
+Create Date: 2025-12-13 10:02:55.614380
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7a8b9c0d1f2'
+down_revision: Union[str, Sequence[str], None] = 'd6f7a8b9c0e1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _flag(column: str) -> dict:
+    # Partial index predicate, spelled the way each dialect renders `column == True`
+    return {
+        'postgresql_where': sa.text(f"{column} = true"),
+        'sqlite_where': sa.text(f"{column} = 1"),
+    }
+
+
+INDEXES = [
+    ('ix_submissions_pending_queue', 'submissions', ['reviewer_id', 'status', sa.text('priority_value DESC'), 'submitted_at'], {}),
+    ('ix_submissions_duplicate_hash', 'submissions', ['user_id', 'reviewer_id', 'file_hash', 'submitted_at'], {}),
+    ('ix_submissions_duplicate_url', 'submissions', ['user_id', 'reviewer_id', 'track_url', 'submitted_at'], {}),
+    ('ix_submissions_bookmarked', 'submissions', ['reviewer_id', 'submitted_at', 'id'], _flag('bookmarked')),
+    ('ix_submissions_spotlighted', 'submissions', ['reviewer_id', 'submitted_at', 'id'], _flag('spotlighted')),
+    ('ix_submissions_spotlighted_all', 'submissions', ['submitted_at', 'id'], _flag('spotlighted')),
+    ('ix_tiktok_interactions_host_type_timestamp', 'tiktok_interactions', ['host_handle', 'interaction_type', 'timestamp'], {}),
+    ('ix_tiktok_interactions_type_host_session_value', 'tiktok_interactions', ['interaction_type', 'host_handle', 'session_id', 'value'], {}),
+    ('ix_tiktok_interactions_account_timestamp', 'tiktok_interactions', ['tiktok_account_id', 'timestamp'], {}),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name == 'postgresql':
+        # Build without blocking writes on the live tables
+        with op.get_context().autocommit_block():
+            for name, table, columns, kwargs in INDEXES:
+                op.create_index(name, table, columns, unique=False, postgresql_concurrently=True, if_not_exists=True, **kwargs)
+            # Leading prefix of ix_submissions_reviewer_id_status_submitted_at_id
+            op.drop_index('ix_submission_reviewer_id_status', table_name='submissions', postgresql_concurrently=True, if_exists=True)
+        return
+
+    for name, table, columns, kwargs in INDEXES:
+        op.create_index(name, table, columns, unique=False, **kwargs)
+    op.drop_index('ix_submission_reviewer_id_status', table_name='submissions')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index('ix_submission_reviewer_id_status', 'submissions', ['reviewer_id', 'status'], unique=False)
+    for name, table, _, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,146 @@
+"""move community goals and vote state out of reviewers.configuration
+
+Revision ID: f8b9c0d1e2a3
+Revises: e7a8b9c0d1f2
+Create Date: 2025-12-13 15:40:21.503117
+
+"""
+from datetime import datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f8b9c0d1e2a3'
+down_revision: Union[str, Sequence[str], None] = 'e7a8b9c0d1f2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+reviewers = sa.table(
+    'reviewers',
+    sa.column('id', sa.Integer),
+    sa.column('configuration', sa.JSON),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('reviewer_live_state',
+    sa.Column('reviewer_id', sa.Integer(), nullable=False),
+    sa.Column('fire_votes', sa.BigInteger(), nullable=False),
+    sa.Column('trash_votes', sa.BigInteger(), nullable=False),
+    sa.Column('vote_goal_current', sa.BigInteger(), nullable=False),
+    sa.Column('vote_goal_target', sa.Integer(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+    sa.ForeignKeyConstraint(['reviewer_id'], ['reviewers.id'], ),
+    sa.PrimaryKeyConstraint('reviewer_id')
+    )
+    op.create_table('community_goal',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('reviewer_id', sa.Integer(), nullable=False),
+    sa.Column('goal_type', sa.String(), nullable=False),
+    sa.Column('current', sa.BigInteger(), nullable=False),
+    sa.Column('target', sa.Integer(), nullable=False),
+    sa.Column('description', sa.String(), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=False),
+    sa.Column('cooldown_end', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('round', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+    sa.ForeignKeyConstraint(['reviewer_id'], ['reviewers.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('reviewer_id', 'goal_type', name='uq_community_goal_reviewer_id_goal_type')
+    )
+    with op.batch_alter_table('community_goal', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_community_goal_id'), ['id'], unique=False)
+
+    op.create_table('goal_ticket',
+    sa.Column('goal_id', sa.Integer(), nullable=False),
+    sa.Column('holder', sa.String(), nullable=False),
+    sa.Column('count', sa.BigInteger(), nullable=False),
+    sa.ForeignKeyConstraint(['goal_id'], ['community_goal.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('goal_id', 'holder')
+    )
+
+    # Move the live counters out of the configuration JSON
+    bind = op.get_bind()
+    goals = sa.table(
+        'community_goal',
+        *(sa.column(name) for name in ('id', 'reviewer_id', 'goal_type', 'current', 'target', 'description', 'is_active', 'cooldown_end', 'round', 'updated_at'))
+    )
+    tickets = sa.table('goal_ticket', sa.column('goal_id'), sa.column('holder'), sa.column('count'))
+    states = sa.table('reviewer_live_state', *(sa.column(name) for name in ('reviewer_id', 'fire_votes', 'trash_votes', 'vote_goal_current', 'vote_goal_target', 'updated_at')))
+    now = datetime.now(timezone.utc)
+
+    rows = bind.execute(sa.select(reviewers.c.id, reviewers.c.configuration)).fetchall()
+    for reviewer_id, config in rows:
+        if not isinstance(config, dict) or not ({'community_goals', 'community_goal'} & config.keys()):
+            continue
+        for goal_type, goal in (config.pop('community_goals', None) or {}).items():
+            cooldown_end = goal.get('cooldown_end')
+            goal_id = bind.execute(goals.insert().values(
+                reviewer_id=reviewer_id, goal_type=goal_type, current=goal.get('current', 0),
+                target=goal.get('target', 1000), description=goal.get('description'),
+                is_active=goal.get('is_active', True),
+                cooldown_end=datetime.fromisoformat(cooldown_end) if cooldown_end else None,
+                round=0, updated_at=now
+            ).returning(goals.c.id)).scalar()
+            ticket_rows = [
+                {'goal_id': goal_id, 'holder': str(holder), 'count': count}
+                for holder, count in (goal.get('tickets') or {}).items()
+            ]
+            if ticket_rows:
+                bind.execute(tickets.insert(), ticket_rows)
+
+        vote_goal = config.pop('community_goal', None)
+        if isinstance(vote_goal, dict):
+            bind.execute(states.insert().values(
+                reviewer_id=reviewer_id, fire_votes=0, trash_votes=0,
+                vote_goal_current=vote_goal.get('current', 0), vote_goal_target=vote_goal.get('target', 1000),
+                updated_at=now
+            ))
+        bind.execute(reviewers.update().where(reviewers.c.id == reviewer_id).values(configuration=config))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    bind = op.get_bind()
+    configs = dict(bind.execute(sa.select(reviewers.c.id, reviewers.c.configuration)).fetchall())
+    touched = set()
+
+    goal_rows = bind.execute(sa.text(
+        "SELECT id, reviewer_id, goal_type, current, target, description, is_active, cooldown_end FROM community_goal"
+    )).fetchall()
+    for goal_id, reviewer_id, goal_type, current, target, description, is_active, cooldown_end in goal_rows:
+        ticket_rows = bind.execute(
+            sa.text("SELECT holder, count FROM goal_ticket WHERE goal_id = :goal_id"), {'goal_id': goal_id}
+        ).fetchall()
+        if isinstance(cooldown_end, str): # SQLite
+            cooldown_end = datetime.fromisoformat(cooldown_end)
+        config = configs[reviewer_id] = dict(configs.get(reviewer_id) or {})
+        config.setdefault('community_goals', {})[goal_type] = {
+            'type': goal_type, 'target': target, 'current': current, 'description': description,
+            'is_active': bool(is_active), 'cooldown_end': cooldown_end.isoformat() if cooldown_end else None,
+            'tickets': {holder: count for holder, count in ticket_rows}
+        }
+        touched.add(reviewer_id)
+
+    state_rows = bind.execute(sa.text(
+        "SELECT reviewer_id, vote_goal_current, vote_goal_target FROM reviewer_live_state WHERE vote_goal_target IS NOT NULL"
+    )).fetchall()
+    for reviewer_id, current, target in state_rows:
+        config = configs[reviewer_id] = dict(configs.get(reviewer_id) or {})
+        config['community_goal'] = {'current': current, 'target': target}
+        touched.add(reviewer_id)
+
+    for reviewer_id in touched:
+        bind.execute(reviewers.update().where(reviewers.c.id == reviewer_id).values(configuration=configs[reviewer_id]))
+
+    op.drop_table('goal_ticket')
+    with op.batch_alter_table('community_goal', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_community_goal_id'))
+
+    op.drop_table('community_goal')
+    op.drop_table('reviewer_live_state')
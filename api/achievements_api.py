@@ -3,142 +3,105 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from sqlalchemy.orm import joinedload
 from database import get_db
-from services import user_service
+from services import user_service, achievement_service
 from security import get_current_user
 from schemas import TokenData
 import models
 import schemas
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+from datetime import datetime, timezone
 
 router = APIRouter()
 
+
+def _as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
 @router.get("/user/achievements")
 async def get_user_achievements(
+    since: Optional[datetime] = None,
     db: AsyncSession = Depends(get_db),
     current_user: TokenData = Depends(get_current_user)
 ):
     """
     Returns the user's gamification stats and achievements.
+
+    Read-only: progress comes from the user's progress vector, which the
+    achievement engine keeps current as counters change. Pass the previous
+    response's `as_of` as `since` to get only badges whose progress or unlock
+    changed after it.
     """
+    as_of = datetime.now(timezone.utc)
     user = await user_service.get_user_by_discord_id(db, current_user.discord_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
-    # Fetch all definitions
-    stmt_defs = select(models.AchievementDefinition)
-    result_defs = await db.execute(stmt_defs)
-    definitions = result_defs.scalars().all()
-
-    # Fetch user's unlocked achievements
-    stmt_unlocked = select(models.UserAchievement).filter(models.UserAchievement.user_id == user.id)
-    result_unlocked = await db.execute(stmt_unlocked)
-    unlocked_map = {ua.achievement_id: ua for ua in result_unlocked.scalars().all()}
-
-    # Fetch stats for progress bars
-    # Submission count
-    from sqlalchemy import func
-    count_stmt = select(func.count()).select_from(models.Submission).filter(models.Submission.user_id == user.id)
-    res_count = await db.execute(count_stmt)
-    submission_count = res_count.scalar() or 0
-
-    # Max Viewers
-    max_viewers_stmt = select(models.LiveSession.max_concurrent_viewers)\
-        .filter(models.LiveSession.user_id == user.id)\
-        .order_by(models.LiveSession.max_concurrent_viewers.desc())\
-        .limit(1)
-    res_max = await db.execute(max_viewers_stmt)
-    max_viewers = res_max.scalar_one_or_none() or 0
+    definitions = await achievement_service.get_definitions(db)
+    unlocked_map = {ua.achievement_id: ua for ua in user.achievements}
+    progress_vector = await achievement_service.get_progress(db, user.id)
+    since = _as_utc(since)
+
+    def current(category: str) -> int:
+        return progress_vector.get(category, (0, None))[0] or 0
+
+    submission_count = current("SUBMISSION_COUNT")
+    max_viewers = current("CONCURRENT_VIEWERS")
 
     # Filter definitions based on role
     # If user is NOT a reviewer, hide Streamer specific achievements
     is_reviewer = user.reviewer_profile is not None
-    
-    filtered_definitions = []
     streamer_categories = ["LIFETIME_LIKES", "LIFETIME_DIAMONDS", "CONCURRENT_VIEWERS"]
-    
+
+    badges = []
     for ach in definitions:
-        if not is_reviewer and ach.category in streamer_categories:
+        if not is_reviewer and ach["category"] in streamer_categories:
             continue
-        filtered_definitions.append(ach)
 
-    badges = []
-    for ach in filtered_definitions:
-        is_unlocked = ach.id in unlocked_map
-        unlocked_date = unlocked_map[ach.id].unlocked_at if is_unlocked else None
-        role_status = unlocked_map[ach.id].discord_sync_status if is_unlocked else None
+        unlock = unlocked_map.get(ach["id"])
+        is_unlocked = unlock is not None
+        unlocked_date = unlock.unlocked_at if is_unlocked else None
+        role_status = unlock.discord_sync_status if is_unlocked else None
+        current_value, updated_at = progress_vector.get(ach["category"], (0, None))
 
-        # Calculate Progress
-        progress = 0
-        current_value = 0
-
-        if ach.category == "LIFETIME_LIKES":
-            current_value = user.lifetime_live_likes or 0
-        elif ach.category == "LIFETIME_DIAMONDS":
-            current_value = user.lifetime_diamonds or 0
-        elif ach.category == "CONCURRENT_VIEWERS":
-            current_value = max_viewers
-        elif ach.category == "SUBMISSION_COUNT":
-            current_value = submission_count
-        elif ach.category == "DISCORD_MSG_COUNT":
-            current_value = user.discord_msg_count or 0
-        elif ach.category == "DISCORD_VOICE_MINS":
-            current_value = user.discord_voice_mins or 0
-        elif ach.category == "LIFETIME_LIKES_SENT":
-            current_value = user.lifetime_likes_sent or 0
-        elif ach.category == "LIFETIME_GIFTS_SENT":
-            current_value = user.lifetime_gifts_sent or 0
-        elif ach.category == "LIFETIME_TIKTOK_COMMENTS":
-            current_value = user.lifetime_tiktok_comments or 0
-        elif ach.category == "LIFETIME_TIKTOK_SHARES":
-            current_value = user.lifetime_tiktok_shares or 0
-        elif ach.category == "DISCORD_SCREEN_SHARE_MINS":
-            # TODO: We need to track this in User model too if we want progress bars
-            # For now, assume 0 or handle via separate tracking service
-            current_value = 0 
-        # Boolean types (Poll/Score) are either 0 or 100% effectively for progress bar unless we query max
-        elif ach.category == "POLL_WIN_PERCENT":
-            # Show max poll percent achieved? Too expensive to query max every time?
-            # Just show 0 or 100 for now.
+        if since is not None:
+            changed = (updated_at is not None and _as_utc(updated_at) > since) or \
+                (unlocked_date is not None and _as_utc(unlocked_date) > since)
+            if not changed:
+                continue
+
+        # Boolean types (Poll/Score) are either 0 or 100% effectively for progress bar
+        if ach["category"] == "POLL_WIN_PERCENT":
             current_value = 100 if is_unlocked else 0
-        elif ach.category == "REVIEW_SCORE":
-             current_value = 10 if is_unlocked else 0
-
-        if ach.threshold_value > 0:
-            progress = min((current_value / ach.threshold_value) * 100, 100)
-
-        # Lazy Unlock Check: If we have the stats but no record, unlock it now!
-        if not is_unlocked and current_value >= ach.threshold_value:
-            try:
-                from services import achievement_service
-                # We trigger it to persist the unlock
-                await achievement_service.trigger_achievement(db, user.id, ach.category, value=current_value, specific_slug=ach.slug)
-                
-                # Update local state for the response
-                is_unlocked = True
-                from datetime import datetime
-                unlocked_date = datetime.now()
-                role_status = "PENDING"
-                progress = 100
-            except Exception as e:
-                print(f"Error auto-unlocking {ach.slug}: {e}")
+        elif ach["category"] == "REVIEW_SCORE":
+            current_value = 10 if is_unlocked else 0
+
+        progress = 0
+        if is_unlocked:
+            progress = 100
+        elif ach["threshold_value"] > 0:
+            progress = min((current_value / ach["threshold_value"]) * 100, 100)
 
         badges.append({
-            "slug": ach.slug,
-            "name": ach.display_name,
-            "description": ach.description,
+            "slug": ach["slug"],
+            "name": ach["display_name"],
+            "description": ach["description"],
             "unlocked": is_unlocked,
             "unlocked_at": unlocked_date,
             "role_status": role_status,
-            "reward_role_id": ach.discord_role_id,
+            "reward_role_id": ach["discord_role_id"],
             "progress": round(progress, 1),
             "current_value": current_value,
-            "threshold_value": ach.threshold_value,
-            "category": ach.category,
-            "role_color": ach.role_color,
-            "role_icon": ach.role_icon
+            "threshold_value": ach["threshold_value"],
+            "category": ach["category"],
+            "role_color": ach["role_color"],
+            "role_icon": ach["role_icon"]
         })
 
     response_data = {
+        "as_of": as_of,
         "artist_stats": {
             "submissions": submission_count,
             "avg_score": float(user.average_review_score or 0)
@@ -6,7 +6,7 @@ from sqlalchemy.orm import joinedload, selectinload
 from database import get_db
 import schemas
 import security
-from services import user_service
+from services import user_service, outbox_service, blob_service, audio_cache, prefetcher, rendition_service
 import models
 from pydantic import BaseModel
 from typing import List, Optional
@@ -627,3 +627,33 @@ async def get_platform_fees(db: AsyncSession = Depends(get_db)):
         }
         for fee in fees
     ]
+
+
+@router.get("/outbox/stats")
+async def get_outbox_stats(db: AsyncSession = Depends(get_db)):
+    """Backlog and throughput of the post-commit side-effect workers."""
+    return await outbox_service.stats(db)
+
+
+@router.get("/storage/stats")
+async def get_storage_stats(db: AsyncSession = Depends(get_db)):
+    """Content-addressed blob store: objects, bytes stored and bytes saved by deduplication."""
+    return await blob_service.stats(db)
+
+
+@router.get("/audio-cache/stats")
+async def get_audio_cache_stats():
+    """Proxy disk cache: hit ratio, bytes served from cache, evictions."""
+    return audio_cache.stats()
+
+
+@router.get("/prefetch/stats")
+async def get_prefetch_stats():
+    """Upcoming-track prefetching and time to first byte of the track started by "next"."""
+    return prefetcher.stats()
+
+
+@router.get("/renditions/stats")
+async def get_rendition_stats():
+    """Preview renditions: how many exist and the proxy bytes they saved."""
+    return rendition_service.stats()
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, desc
 from sqlalchemy.orm import selectinload
@@ -7,21 +7,26 @@ import models
 import schemas
 import security
 from database import get_db
-from services import economy_service, queue_service
+from services import economy_service, queue_service, pagination
 
 router = APIRouter(prefix="/economy", tags=["Economy"])
 
 @router.get("/transactions", response_model=List[schemas.Transaction])
 async def get_transactions(
+    response: Response,
     reviewer_id: Optional[int] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(pagination.DEFAULT_LIMIT, ge=1, le=pagination.MAX_LIMIT),
+    legacy: bool = False,
     page: int = 1,
-    limit: int = 50,
     current_user: models.User = Depends(security.get_current_active_user),
     db: AsyncSession = Depends(get_db)
 ):
     """
-    Get transaction logs.
+    Get transaction logs, newest first.
     If reviewer_id is provided, checks if user is authorized to view that reviewer's logs.
+    Pages are keyset-based: pass the X-Next-Cursor header back as `cursor`.
+    `legacy` restores OFFSET paging by `page`.
     """
     
     # Authorization logic
@@ -45,11 +50,16 @@ async def get_transactions(
     if reviewer_id:
         stmt = stmt.filter(models.Transaction.reviewer_id == reviewer_id)
         
-    stmt = stmt.order_by(desc(models.Transaction.timestamp))
-    stmt = stmt.offset((page - 1) * limit).limit(limit)
-    
-    result = await db.execute(stmt)
-    return result.scalars().all()
+    if legacy:
+        stmt = stmt.order_by(desc(models.Transaction.timestamp))
+        stmt = stmt.offset((page - 1) * limit).limit(limit)
+
+        result = await db.execute(stmt)
+        return result.scalars().all()
+
+    transactions = await pagination.paginate(db, stmt, economy_service.TRANSACTION_KEYS, limit, cursor)
+    pagination.set_next_cursor(response, transactions)
+    return transactions.items
 
 @router.get("/balance", response_model=int)
 async def get_balance(
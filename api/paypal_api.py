@@ -8,7 +8,7 @@ import schemas
 import security
 from database import get_db
 from services.payment_service import payment_service
-from services import queue_service, economy_service, user_service
+from services import queue_service, economy_service, user_service, queue_index, blob_service
 from config import settings
 import datetime
 
@@ -181,6 +181,7 @@ async def capture_order(
                                 submitted_at=datetime.datetime.now(datetime.UTC)
                             )
                             db.add(new_submission)
+                            await blob_service.add_reference(db, track_url)
                             
                 # Record 5% Platform Fee
                 fee_amount = int(amount_cents * 0.05)
@@ -196,6 +197,7 @@ async def capture_order(
                     db.add(platform_fee)
                 
                 await db.commit()
+                queue_index.invalidate(reviewer_id)
                 
                 return {"status": "COMPLETED", "details": capture_data}
             else:
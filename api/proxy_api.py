@@ -1,13 +1,12 @@
-import io
 import logging
+import mimetypes
 import re
-import httpx
-import yt_dlp
 import asyncio
-from fastapi import APIRouter, HTTPException, Request
+from fastapi import APIRouter, HTTPException, Request, Response
 from pydantic import BaseModel
-from fastapi.responses import StreamingResponse
+from fastapi.responses import FileResponse
 import bot_instance
+from services import audio_cache, audio_stream, media_resolver, prefetcher, rendition_service
 
 router = APIRouter(prefix="/proxy", tags=["Proxy"])
 
@@ -68,7 +67,22 @@ async def audio_proxy(request: Request):
     url = request.query_params.get("url")
     if not url:
         raise HTTPException(status_code=400, detail="URL parameter is required")
+    track_url = url
 
+    # Uploads with a preview rendition get it unless ?quality=original (or Accept rules it out)
+    rendition = await rendition_service.negotiate(url, request.query_params.get("quality"), request.headers.get("accept"))
+    if rendition is not None:
+        url = rendition.url
+    source_url = url # Cache key: the track URL as submitted (or its rendition)
+
+    response = await _serve_audio(request, url, source_url)
+    response = prefetcher.observe(track_url, response) # Times the first byte after "next"
+    if rendition is not None:
+        response.headers["Vary"] = "Accept"
+    return rendition_service.meter(track_url, rendition, response)
+
+
+async def _serve_audio(request: Request, url: str, source_url: str) -> Response:
     # If it's a Discord jump URL, resolve it first
     if "discord.com/channels" in url:
         try:
@@ -99,98 +113,21 @@ async def audio_proxy(request: Request):
                  local_path = f"uploads/{filename}"
 
         if os.path.exists(local_path):
-            # Serve local file
-            return StreamingResponse(open(local_path, "rb"), media_type="audio/mpeg")
+            # Serve local file (FileResponse answers Range / If-Range with 206 or 416)
+            media_type = mimetypes.guess_type(local_path)[0] or "audio/mpeg"
+            return FileResponse(local_path, media_type=media_type, headers={"Cache-Control": "max-age=3600"})
         else:
              raise HTTPException(status_code=404, detail=f"Local file not found: {local_path}")
 
-    headers_to_forward = {"User-Agent": "Mozilla/5.0"}
-
-    # For non-Discord URLs, use yt-dlp to get a direct streamable URL
-    if "discord.com" not in url:
-        # Check for R2 URL
-        if url.startswith("r2://"):
-            from services.storage_service import storage_service
-            # Instead of redirecting, we get the presigned URL and then stream it ourselves
-            presigned_url = await storage_service.generate_presigned_url(url)
-            if presigned_url:
-                url = presigned_url # Update URL to be the presigned one, and let the httpx client below fetch it
-            else:
-                raise HTTPException(status_code=404, detail="File not found in storage")
-        
-        # Only use yt-dlp if it's NOT an R2 url (which we just converted to http) and NOT a direct http link we trust?
-        # Actually, if we converted R2 to presigned http url, we can skip yt-dlp.
-        # Use yt-dlp for SoundCloud, YouTube, or non-http URLs
-        elif "soundcloud.com" in url or "youtube.com" in url or "youtu.be" in url or not url.startswith("http"):
-            # If it's not http (and not r2:// handled above), try yt-dlp
-            try:
-                ydl_opts = {
-                    'format': 'bestaudio/best',
-                    'quiet': True,
-                    'extractor_args': {'youtube': {'player_client': ['android', 'ios', 'web']}},
-                    'nocheckcertificate': True,
-                }
-                with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                    info = ydl.extract_info(url, download=False)
-                    url = info['url']
-                    # Extract headers if available
-                    if 'http_headers' in info:
-                        headers_to_forward.update(info['http_headers'])
-                    
-                    logging.info(f"Extracted URL: {url}")
-                    logging.info(f"Headers to forward: {headers_to_forward}")
+    if audio_cache.enabled():
+        # Served from the disk cache; only the request that starts a fill resolves the upstream URL
+        return await audio_cache.serve(source_url, lambda: audio_stream.resolve_source(url), request.headers)
 
-            except Exception as e:
-                logging.error(f"yt_dlp extraction failed: {e}")
-                raise HTTPException(status_code=500, detail=f"Failed to extract audio from URL: {e}")
+    stream_url, headers_to_forward = await audio_stream.resolve_source(url)
+    # Range / conditional headers go upstream and the body is streamed back
+    # through the shared client, so a seek only fetches the bytes it needs
+    return await audio_stream.stream(stream_url, request.headers, headers_to_forward)
 
-    async with httpx.AsyncClient() as client:
-        try:
-            r = await client.get(url, headers=headers_to_forward, follow_redirects=True)
-            r.raise_for_status()
-            audio_data = r.content
-            file_size = len(audio_data)
-
-            response_headers = {
-                "Content-Type": r.headers.get("Content-Type", "application/octet-stream"),
-                "Accept-Ranges": "bytes",
-                "Content-Length": str(file_size),
-                "Cache-Control": "max-age=3600",
-            }
-
-            content_to_send = io.BytesIO(audio_data)
-            status_code = 200
-
-            range_header = request.headers.get("range")
-            if range_header:
-                try:
-                    range_value = range_header.strip().split("=")[1]
-                    start_str, end_str = range_value.split("-")
-                    start = int(start_str)
-                    end = int(end_str) if end_str else file_size - 1
-                    end = min(end, file_size - 1)
-                    length = end - start + 1
-
-                    status_code = 206
-                    response_headers["Content-Length"] = str(length)
-                    response_headers["Content-Range"] = f"bytes {start}-{end}/{file_size}"
-                    content_to_send = io.BytesIO(audio_data[start:end+1])
-
-                except (ValueError, IndexError):
-                    pass
-
-            media_type = response_headers.pop("Content-Type")
-            return StreamingResponse(
-                content_to_send,
-                status_code=status_code,
-                headers=response_headers,
-                media_type=media_type,
-            )
-
-        except httpx.HTTPStatusError as e:
-            raise HTTPException(status_code=e.response.status_code, detail=f"Failed to fetch audio: {e}")
-        except httpx.RequestError as e:
-            raise HTTPException(status_code=502, detail=f"Bad Gateway: {e}")
 
 class MetadataRequest(BaseModel):
     url: str
@@ -205,43 +142,27 @@ async def get_metadata(request: MetadataRequest):
         raise HTTPException(status_code=400, detail="URL is required")
 
     try:
-        ydl_opts = {
-            'quiet': True,
-            'skip_download': True,
-            'extract_flat': True, # Don't download, just get metadata
-            'extractor_args': {'youtube': {'player_client': ['android', 'ios', 'web']}},
-            'nocheckcertificate': True,
+        # Full (not flat) extraction, run in the resolver's thread pool and cached
+        info = await media_resolver.metadata(url)
+
+        # Extract relevant fields
+        metadata = {
+            "title": info.get("title"),
+            "artist": info.get("artist") or info.get("uploader"),
+            "genre": info.get("genre") or (info.get("categories")[0] if info.get("categories") else None),
+            "duration": info.get("duration"),
+            "thumbnail": info.get("thumbnail"),
+            "description": info.get("description"),
+            "original_url": url
         }
         
-        # If it's a YouTube URL, we might want more detailed info than 'flat' provides for some fields,
-        # but 'extract_flat' is faster. Let's try without flat first for better metadata if speed is okay,
-        # or use flat and fetch more if needed. For now, standard extraction.
-        # actually 'extract_flat' might miss some details like specific tags/categories depending on the extractor.
-        # Let's use standard extraction but with skip_download=True.
-        
-        ydl_opts['extract_flat'] = False 
-
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            info = ydl.extract_info(url, download=False)
-            
-            # Extract relevant fields
-            metadata = {
-                "title": info.get("title"),
-                "artist": info.get("artist") or info.get("uploader"),
-                "genre": info.get("genre") or (info.get("categories")[0] if info.get("categories") else None),
-                "duration": info.get("duration"),
-                "thumbnail": info.get("thumbnail"),
-                "description": info.get("description"),
-                "original_url": url
-            }
-            
-            # Try to find a better genre if possible (e.g. from tags)
-            if not metadata["genre"] and info.get("tags"):
-                # Simple heuristic: take the first tag that looks like a genre? 
-                # Or just return tags. Let's just return tags as well.
-                metadata["tags"] = info.get("tags")
-
-            return metadata
+        # Try to find a better genre if possible (e.g. from tags)
+        if not metadata["genre"] and info.get("tags"):
+            # Simple heuristic: take the first tag that looks like a genre? 
+            # Or just return tags. Let's just return tags as well.
+            metadata["tags"] = info.get("tags")
+
+        return metadata
 
     except Exception as e:
         logging.error(f"Metadata extraction failed: {e}")
@@ -1,15 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from sqlalchemy import select, func, case, and_
 from sqlalchemy.orm import joinedload
 from sqlalchemy.ext.asyncio import AsyncSession
-from services import queue_service, user_service, giveaway_service
+from services import queue_service, user_service, giveaway_service, state_versions, queue_index
 import security
 from security import get_current_user
 from typing import List, Optional
+from jose import jwt, JWTError
+import hashlib
 import logging
 import models
 import schemas
 from database import get_db
+from config import settings
 
 router = APIRouter(
     prefix="/queue/line",
@@ -18,6 +21,9 @@ router = APIRouter(
 
 logger = logging.getLogger(__name__)
 
+# Per-viewer content (user_status), so only the browser may cache it
+LINE_VIEW_CACHE_CONTROL = "private, max-age=0, stale-while-revalidate=5"
+
 
 async def calculate_estimated_wait_time(db: AsyncSession, reviewer_id: int, position: int) -> int:
     """
@@ -47,42 +53,103 @@ async def find_user_submissions_in_queue(db: AsyncSession, user_discord_id: str,
     """
     Find all of user's submissions in the queue and calculate their positions.
     Returns list of dicts with submission_id, position, and other metadata.
+
+    Positions come from the reviewer's order-statistics index (zipper-merged order),
+    so only the user's own rows are loaded.
     """
-    # Get all pending submissions for this reviewer, sorted by priority desc, then created_at asc
-    stmt = select(models.Submission).options(joinedload(models.Submission.user)).where(
-        models.Submission.reviewer_id == reviewer_id,
-        models.Submission.status.in_(['pending', 'playing']),
-        models.Submission.spotlighted == False
-    ).order_by(
-        models.Submission.priority_value.desc(),
-        models.Submission.submitted_at.asc()
+    user = await user_service.get_user_by_discord_id(db, user_discord_id)
+    if not user:
+        return []
+
+    index = await queue_index.get_index(db, reviewer_id)
+    positions = index.user_positions(user.id)
+    if not positions:
+        return []
+
+    result = await db.execute(
+        select(models.Submission.id, models.Submission.priority_value, models.Submission.track_title)
+        .where(models.Submission.id.in_([sub_id for sub_id, _ in positions]))
     )
-    
-    result = await db.execute(stmt)
-    all_submissions = result.scalars().all()
-    
-    user_submissions = []
-    for idx, sub in enumerate(all_submissions, start=1):
-        if sub.user.discord_id == user_discord_id:
-            user_submissions.append({
-                "submission_id": sub.id,
-                "position": idx,
-                "priority_value": sub.priority_value,
-                "track_title": sub.track_title
-            })
-    
-    return user_submissions
+    details = {row.id: row for row in result.all()}
+
+    return [
+        {
+            "submission_id": sub_id,
+            "position": position,
+            "priority_value": details[sub_id].priority_value,
+            "track_title": details[sub_id].track_title
+        }
+        for sub_id, position in positions
+        if sub_id in details
+    ]
+
+
+@router.get("/{reviewer_id}/me")
+async def get_my_line_position(
+    reviewer_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: schemas.TokenData = Depends(get_current_user)
+):
+    """
+    Lightweight position/ETA lookup for the signed-in user, backed by the
+    order-statistics index instead of the full line view.
+    """
+    submissions = await find_user_submissions_in_queue(db, current_user.discord_id, reviewer_id)
+    for sub in submissions:
+        sub["est_wait_minutes"] = await calculate_estimated_wait_time(db, reviewer_id, sub["position"] - 1)
+
+    index = await queue_index.get_index(db, reviewer_id)
+    if not submissions:
+        return {"is_in_queue": False, "total_in_line": len(index), "submissions": []}
+
+    primary_sub = submissions[0]
+    return {
+        "is_in_queue": True,
+        "position": primary_sub["position"],
+        "est_wait_minutes": primary_sub["est_wait_minutes"],
+        "submission_id": primary_sub["submission_id"],
+        "total_in_line": len(index),
+        "submissions": submissions
+    }
+
+
+def _viewer_key(token: Optional[str]) -> str:
+    """Stable per-viewer ETag component taken from the JWT subject, without a DB lookup."""
+    if not token:
+        return "anon"
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except JWTError:
+        return "anon"
+    subject = payload.get("sub")
+    if not subject:
+        return "anon"
+    return hashlib.sha1(str(subject).encode()).hexdigest()[:12]
 
 
 @router.get("/{reviewer_identifier}", response_model=schemas.LineViewState)
 async def get_line_view(
     reviewer_identifier: str,
+    request: Request,
+    response: Response,
     db: AsyncSession = Depends(get_db),
-    current_user: Optional[models.User] = Depends(security.get_current_user_optional)
+    token: Optional[str] = Depends(security.oauth2_scheme_optional)
 ):
     """
     Public (but restricted) view of the queue line with nightclub aesthetic data structure.
+
+    Supports conditional GET: the ETag is built from the reviewer's in-memory
+    state versions plus the viewer, so unchanged polls get a 304 before any query runs.
     """
+    viewer_key = _viewer_key(token)
+    known_reviewer_id = state_versions.resolve_handle(reviewer_identifier)
+    if known_reviewer_id is not None:
+        etag = state_versions.etag(known_reviewer_id, extra=viewer_key)
+        if state_versions.etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers={"ETag": etag, "Cache-Control": LINE_VIEW_CACHE_CONTROL, "Vary": "Authorization"})
+
+    current_user = await security.get_current_user_optional(token, db)
+
     # 1. Check Access (Optional)
     # If we wanted to enforce server membership, we'd check it here if current_user is set.
     
@@ -103,6 +170,12 @@ async def get_line_view(
     if not reviewer:
         raise HTTPException(status_code=404, detail="Reviewer not found")
 
+    state_versions.remember_handle(reviewer.tiktok_handle, reviewer.id)
+    # Computed before reading so a concurrent mutation can only make the tag older
+    response.headers["ETag"] = state_versions.etag(reviewer.id, extra=viewer_key)
+    response.headers["Cache-Control"] = LINE_VIEW_CACHE_CONTROL
+    response.headers["Vary"] = "Authorization"
+
     # 3. Fetch Queue State
     full_state = await queue_service.get_initial_state(db, reviewer.id)
     
@@ -215,7 +288,7 @@ async def get_line_view(
     
     # 11. Construct Mission Bar (Legacy support + New List)
     mission_bar = None
-    community_goals_states = await giveaway_service.get_giveaway_states(db, reviewer.id)
+    community_goals_states = full_state.community_goals
     
     # For legacy frontend support, pick the first one or LIKES
     primary_goal = next((g for g in community_goals_states if g.type == 'LIKES'), community_goals_states[0] if community_goals_states else None)
@@ -299,44 +372,9 @@ async def vote_on_track(
     if not reviewer:
         raise HTTPException(status_code=404, detail="Reviewer not found")
 
-    # 2. Update Community Goal
-    # We need to load the config, update it, and save it.
-    # This is a bit heavy for high-frequency votes, but fine for now.
-    
-    config = reviewer.configuration or {}
-    if isinstance(config, str):
-        import json
-        try:
-            config = json.loads(config)
-        except:
-            config = {}
-            
-    community_goal = config.get('community_goal')
-    if community_goal:
-        # Increment current
-        community_goal['current'] = community_goal.get('current', 0) + 1
-        
-        # Check if target reached (logic can be expanded)
-        if community_goal['current'] >= community_goal.get('target', 1000):
-            # Reset or trigger event?
-            pass
-            
-        # Save back
-        config['community_goal'] = community_goal
-        
-        # Update reviewer
-        # We need to use a service method or direct DB update
-        # Direct DB update for speed here, but service is better.
-        # Let's use a helper in queue_service if possible, or just do it here.
-        # Since we have the reviewer object attached to session:
-        reviewer.configuration = config
-        from sqlalchemy.orm.attributes import flag_modified
-        flag_modified(reviewer, "configuration")
-        await db.commit()
-        
-        # Emit update?
-        # Ideally yes, but the polling frontend will catch it.
-        
+    # 2. Count the vote and advance the vote goal (single upsert, no config rewrite)
+    await giveaway_service.record_vote(db, reviewer.id, vote_type)
+
     # 3. Send to TikTok Chat (Mock/Placeholder)
     # TODO: Implement actual TikTok chat integration
     # For now, we just log it.
@@ -442,6 +480,7 @@ async def upgrade_submission(
             created_submissions.append(new_sub)
 
     await db.commit()
+    queue_index.invalidate(reviewer.id)
     
     # 7. Broadcast Updates
     # Update priority triggers queue update in queue_service.update_priority, but we did it manually here.
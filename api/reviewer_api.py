@@ -1,7 +1,8 @@
-from fastapi import APIRouter, Depends, Query, File, UploadFile, Form, HTTPException, status, Response
+from fastapi import APIRouter, Depends, Query, File, UploadFile, Form, HTTPException, status, Response, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func, desc
 from sqlalchemy.orm import joinedload, selectinload
+import asyncio
 import json
 import uuid
 from typing import List, Optional
@@ -12,11 +13,18 @@ from collections import defaultdict
 import models
 import schemas
 import security
+import database
+from config import settings
 from database import get_db
-from services import economy_service, user_service, queue_service, media_service
+from services import economy_service, user_service, queue_service, media_service, state_versions, archive_service, pagination, blob_service
+from services.storage_service import iter_file
 
 router = APIRouter(prefix="/reviewer", tags=["Reviewer"])
 
+# Overlays poll these endpoints every few seconds; let caches serve a slightly
+# stale copy while they revalidate with If-None-Match.
+PUBLIC_POLL_CACHE_CONTROL = "public, max-age=1, stale-while-revalidate=5"
+
 async def check_is_reviewer(
     reviewer_id: int,
     current_user: schemas.TokenData = Depends(security.get_current_user),
@@ -65,11 +73,9 @@ async def get_all_reviewers(db: AsyncSession = Depends(get_db)):
     result_live = await db.execute(stmt_live)
     live_user_ids = set(result_live.scalars().all())
 
-    enriched_reviewers = []
-    for r in reviewers:
-        profile = await media_service.enrich_reviewer_profile(r)
+    enriched_reviewers = await media_service.enrich_reviewer_profiles(reviewers)
+    for r, profile in zip(reviewers, enriched_reviewers):
         profile.is_live = r.user_id in live_user_ids
-        enriched_reviewers.append(profile)
         
     return enriched_reviewers
 
@@ -95,8 +101,6 @@ async def submit_smart(
     Handles "Smart-Zone" submissions, including "Double Feature" linked submissions.
     Accepts a JSON payload (submissions_json) and optional files.
     """
-    import hashlib
-
     # Handle Guest User
     if not current_user:
         if not email:
@@ -270,224 +274,134 @@ async def submit_smart(
     # Generate a batch_id if multiple submissions or just for consistency
     batch_id = str(uuid.uuid4()) if len(payload.submissions) > 1 else None
 
-    created_submissions = []
-
-    file_index = 0
-
     # Allowed extensions for security
     ALLOWED_EXTENSIONS = {".mp3", ".wav", ".ogg", ".flac", ".m4a"}
 
     # Pre-fetch reused submission if hash provided
     reused_submission = None
     if reuse_hash:
-        stmt = select(models.Submission).filter(models.Submission.file_hash == reuse_hash).order_by(desc(models.Submission.submitted_at))
+        Submission = archive_service.all_submissions() # The original may have gone cold
+        stmt = select(Submission).filter(Submission.file_hash == reuse_hash).order_by(desc(Submission.submitted_at))
         result = await db.execute(stmt)
         reused_submission = result.scalars().first()
         if not reused_submission:
             raise HTTPException(status_code=404, detail="Original submission for reuse not found")
 
+    # Match every item to its source before anything is uploaded:
+    # None for a link, REUSE for the reused submission, or its UploadFile
+    REUSE = "reuse"
+    sources = []
+    file_index = 0
     for item in payload.submissions:
-        final_track_url = item.track_url
-        final_file_hash = None
-
         # If it's a blob URL (from frontend preview), we expect a file upload OR a reuse
-        if item.track_url.startswith("blob:"):
-            
-            if reused_submission:
-                # Use existing URL and hash
-                final_track_url = reused_submission.track_url
-                final_file_hash = reused_submission.file_hash
-                # Skip file_index increment as we aren't consuming a file (frontend shouldn't send one if reusing)
-            
-            elif files and file_index < len(files):
-                uploaded_file = files[file_index]
-                file_index += 1
-
-                # Check file extension
-                file_ext = os.path.splitext(uploaded_file.filename)[1].lower()
-                if file_ext not in ALLOWED_EXTENSIONS:
-                    raise HTTPException(status_code=400, detail=f"Invalid file type: {file_ext}. Allowed: {', '.join(ALLOWED_EXTENSIONS)}")
-
-                # Calculate Hash
-                file_content = await uploaded_file.read()
-                file_hash = hashlib.sha256(file_content).hexdigest()
-                await uploaded_file.seek(0) # Reset for upload
-                
-                final_file_hash = file_hash
-
-                # Check for duplicates
-                if not force_upload:
-                    stmt = select(models.Submission).options(joinedload(models.Submission.session)).filter(
-                        models.Submission.file_hash == file_hash,
-                        models.Submission.user_id == current_user.id,
-                        models.Submission.reviewer_id == reviewer_id
-                    ).order_by(desc(models.Submission.submitted_at))
-                    result = await db.execute(stmt)
-                    existing = result.scalars().first()
-                    
-                    if existing:
-                        # Check if currently active
-                        # FIXED: Only consider it active if the session is ALSO active (or if it has no session, which shouldn't happen for queue items usually)
-                        is_active = existing.status in ['pending', 'playing']
-                        
-                        import logging
-                        logging.warning(f"DEBUG DUPLICATE CHECK (FILE): ID={existing.id}, Status={existing.status}, Session={existing.session}, SessionActive={existing.session.is_active if existing.session else 'None'}")
-
-                        if is_active:
-                            # Check 1: Explicit Session Inactivity
-                            if existing.session and not existing.session.is_active:
-                                logging.warning("DEBUG: Ignoring duplicate because linked session is inactive.")
-                                is_active = False
-                            
-                            # Check 2: Timestamp (Ghost from previous session)
-                            # If existing has no session (legacy/bug) AND is older than current active session
-                            elif not existing.session and active_session and existing.submitted_at < active_session.created_at:
-                                logging.warning("DEBUG: Ignoring duplicate because it is older than current active session.")
-                                is_active = False
-
-                        if is_active:
-                            # Construct duplicate info
-                            duplicate_info = {
-                                "message": "Track already in queue",
-                                "type": "file",
-                                "hash": file_hash,
-                                "is_active": is_active,
-                                "existing_submission": {
-                                    "id": existing.id,
-                                    "track_title": existing.track_title,
-                                    "status": existing.status,
-                                    "submitted_at": existing.submitted_at.isoformat() if existing.submitted_at else None
-                                }
-                            }
-                            raise HTTPException(status_code=409, detail=json.dumps(duplicate_info))
-                        else:
-                            # Not active? Reuse hash silently!
-                            final_file_hash = file_hash
-                            # Skip R2 upload logic
-                            uploaded_file = None # Prevent upload block from running
-                            final_track_url = existing.track_url # Reuse URL too if possible, or we rely on hash? 
-                            # Actually we need the URL. If we reuse hash, we should reuse the URL associated with that hash if we want to avoid re-uploading.
-                            # But wait, the existing submission has the URL.
-                            final_track_url = existing.track_url
-
-                # Secure filename
-                unique_filename = f"{uuid.uuid4()}{file_ext}"
-                
-                # Upload to R2
-                if uploaded_file:
-                    from services.storage_service import storage_service
-                    try:
-                        # Reset file pointer just in case
-                        await uploaded_file.seek(0)
-                        final_track_url = await storage_service.upload_file(
-                            uploaded_file.file, 
-                            unique_filename, 
-                            uploaded_file.content_type or "application/octet-stream"
-                        )
-                    except Exception as e:
-                        import logging
-                        logging.error(f"R2 Upload failed: {e}")
-                        raise HTTPException(status_code=500, detail="File upload failed. Please contact support.")
-            else:
-                # Blob URL but no file and no reuse?
-                raise HTTPException(status_code=400, detail="Missing file for submission")
-        
+        if not item.track_url.startswith("blob:"):
+            sources.append(None)
+        elif reused_submission:
+            # Skip file_index increment as we aren't consuming a file (frontend shouldn't send one if reusing)
+            sources.append(REUSE)
+        elif files and file_index < len(files):
+            uploaded_file = files[file_index]
+            file_index += 1
+
+            # Check file extension
+            file_ext = os.path.splitext(uploaded_file.filename)[1].lower()
+            if file_ext not in ALLOWED_EXTENSIONS:
+                raise HTTPException(status_code=400, detail=f"Invalid file type: {file_ext}. Allowed: {', '.join(ALLOWED_EXTENSIONS)}")
+            sources.append(uploaded_file)
         else:
-            # Link Submission (not blob)
-            if not force_upload:
-                # Check for duplicate URL for this user
-                stmt = select(models.Submission).options(joinedload(models.Submission.session)).filter(
-                    models.Submission.user_id == current_user.id,
-                    models.Submission.track_url == item.track_url,
-                    models.Submission.reviewer_id == reviewer_id
-                ).order_by(desc(models.Submission.submitted_at))
-                result = await db.execute(stmt)
-                existing = result.scalars().first()
-
-                if existing:
-                    is_active = existing.status in ['pending', 'playing']
-                    
-                    import logging
-                    logging.warning(f"DEBUG DUPLICATE CHECK (LINK): ID={existing.id}, Status={existing.status}, Session={existing.session}, SessionActive={existing.session.is_active if existing.session else 'None'}")
-
-                    # FIXED: Check session activity
-                    if is_active:
-                        # Check 1: Explicit Session Inactivity
-                        if existing.session and not existing.session.is_active:
-                            logging.warning("DEBUG: Ignoring duplicate because linked session is inactive.")
-                            is_active = False
-                        
-                        # Check 2: Timestamp (Ghost from previous session)
-                        elif not existing.session and active_session and existing.submitted_at < active_session.created_at:
-                            logging.warning("DEBUG: Ignoring duplicate because it is older than current active session.")
-                            is_active = False
-                    
-                    if is_active:
-                        duplicate_info = {
-                            "message": "Track already in queue",
-                            "type": "link",
-                            "track_url": item.track_url,
-                            "is_active": is_active,
-                            "existing_submission": {
-                                "id": existing.id,
-                                "track_title": existing.track_title,
-                                "status": existing.status,
-                                "submitted_at": existing.submitted_at.isoformat() if existing.submitted_at else None
-                            }
-                        }
-                        raise HTTPException(status_code=409, detail=json.dumps(duplicate_info))
-                    else:
-                        # Not active? Reuse silently.
-                        # For links, we don't need to do anything special, just let it proceed to create a new submission
-                        # with the same URL.
-                        pass
+            # Blob URL but no file and no reuse?
+            raise HTTPException(status_code=400, detail="Missing file for submission")
+
+    # Everything of this user's at this reviewer that an item could duplicate, newest first
+    by_url = defaultdict(list)
+    by_hash = defaultdict(list)
+    if not force_upload:
+        link_urls = {item.track_url for item, source in zip(payload.submissions, sources) if source is None}
+        candidates = await queue_service.get_duplicate_candidates(
+            db, current_user.id, reviewer_id, link_urls, uploads=any(source is not None for source in sources)
+        )
+        for existing in candidates:
+            by_url[existing.track_url].append(existing)
+            if existing.file_hash:
+                by_hash[existing.file_hash].append(existing)
+
+    for item, source in zip(payload.submissions, sources):
+        # Link Submission (not blob): check for duplicate URL for this user
+        existing = (by_url.get(item.track_url) or [None])[0] if source is None else None
+        if existing and _is_active_duplicate(existing, active_session):
+            raise HTTPException(status_code=409, detail=json.dumps(_duplicate_info(existing, "link", track_url=item.track_url)))
+        # Not active? Reuse silently: a new submission with the same URL is created below.
+
+    async def upload(uploaded_file: UploadFile):
+        reused = {}
+
+        async def check_duplicate(file_hash: str) -> bool:
+            """Runs once the stream is hashed; False abandons the upload and reuses `reused['submission']`."""
+            if force_upload:
+                return True
+            existing = (by_hash.get(file_hash) or [None])[0]
+            if not existing:
+                return True
+            if _is_active_duplicate(existing, active_session):
+                raise HTTPException(status_code=409, detail=json.dumps(_duplicate_info(existing, "file", hash=file_hash)))
+            # Not active? Reuse hash and URL silently, no need to keep the new object
+            reused["submission"] = existing
+            return False
+
+        # Stream to the content-addressed store while hashing; the duplicate
+        # check runs before the upload is completed. Uploads run concurrently,
+        # so each gets its own session for the blob index.
+        async with upload_slots:
+            try:
+                await uploaded_file.seek(0)
+                async with database.AsyncSessionLocal() as upload_db:
+                    uploaded = await blob_service.store(
+                        upload_db,
+                        iter_file(uploaded_file),
+                        uploaded_file.content_type or "application/octet-stream",
+                        before_complete=check_duplicate
+                    )
+                    await upload_db.commit()
+            except HTTPException:
+                raise
+            except Exception as e:
+                logging.error(f"R2 Upload failed: {e}")
+                raise HTTPException(status_code=500, detail="File upload failed. Please contact support.")
+        return uploaded.uri or reused["submission"].track_url, uploaded.sha256
+
+    upload_slots = asyncio.Semaphore(max(1, settings.SUBMIT_UPLOAD_CONCURRENCY))
+    uploads = iter(await _gather_or_cancel(
+        upload(source) for source in sources if source is not None and source is not REUSE
+    ))
+
+    items = []
+    planned = set() # (hash or URL) of the items already accepted in this request
+    for item, source in zip(payload.submissions, sources):
+        final_track_url = item.track_url
+        final_file_hash = None
+        if source is REUSE:
+            # Use existing URL and hash
+            final_track_url = reused_submission.track_url
+            final_file_hash = reused_submission.file_hash
+        elif source is not None:
+            final_track_url, final_file_hash = next(uploads)
 
         # Final check before creating: Ensure we aren't creating a duplicate active submission via reuse/force
         # (If force_upload is True, we allow it, assuming user knows what they are doing or it's a new version)
         # But if reuse_hash is used, we should double check.
-        if reuse_hash or (not files and not item.track_url.startswith("blob:")):
-             # Check if we are about to create a duplicate pending submission
-             check_hash = final_file_hash or (reused_submission.file_hash if reused_submission else None)
-             check_url = final_track_url
-             
-             stmt = select(models.Submission).options(joinedload(models.Submission.session)).filter(
-                models.Submission.user_id == current_user.id,
-                models.Submission.reviewer_id == reviewer_id,
-                models.Submission.status.in_(['pending', 'playing'])
-             )
-             
-             if check_hash:
-                 stmt = stmt.filter(models.Submission.file_hash == check_hash)
-             else:
-                 stmt = stmt.filter(models.Submission.track_url == check_url)
-                 
-             result = await db.execute(stmt)
-             active_dup = result.scalars().first()
-             
-             if active_dup and not force_upload:
-                  # FIXED: Check session activity
-                  is_active_dup = True
-                  if active_dup.session and not active_dup.session.is_active:
-                      is_active_dup = False
-                  elif not active_dup.session and active_session and active_dup.submitted_at < active_session.created_at:
-                      is_active_dup = False
-                  
-                  if is_active_dup:
-                      raise HTTPException(status_code=400, detail="This track is already in the queue.")
+        check_key = final_file_hash or final_track_url
+        if not force_upload and (reuse_hash or (not files and source is None)):
+            previous = by_hash.get(final_file_hash, []) if final_file_hash else by_url.get(final_track_url, [])
+            if check_key in planned or any(_is_active_duplicate(s, active_session) for s in previous):
+                raise HTTPException(status_code=400, detail="This track is already in the queue.")
+        planned.add(check_key)
 
         # Log the hash being saved
-        import logging
         logging.info(f"Creating submission with file_hash: {final_file_hash}")
-
-        submission = await queue_service.create_submission(
-            db=db,
-            reviewer_id=reviewer_id,
-            user_id=current_user.id,
+        items.append(dict(
             track_url=final_track_url,
             track_title=item.track_title or "Untitled",
             archived_url=None,
-            session_id=active_session.id if active_session else None,
-            batch_id=batch_id,
             sequence_order=item.sequence_order,
             hook_start_time=item.hook_start_time,
             hook_end_time=item.hook_end_time,
@@ -495,49 +409,57 @@ async def submit_smart(
             artist=item.artist,
             genre=item.genre,
             file_hash=final_file_hash
-        )
-        
-        created_submissions.append(submission)
-    
-    # --- ACHIEVEMENT TRIGGERS ---
-    # We do this after the loop to batch updates or just check once per batch
-    try:
-        from services import achievement_service
-        
-        # 1. Submission Count
-        # Get total count
-        count_stmt = select(func.count()).select_from(models.Submission).filter(models.Submission.user_id == current_user.id)
-        res_count = await db.execute(count_stmt)
-        total_submissions = res_count.scalar() or 0
-        await achievement_service.trigger_achievement(db, current_user.id, "SUBMISSION_COUNT", value=total_submissions)
-
-        # 2. Metadata Tags & Link Types
-        for item in payload.submissions:
-            title = (item.track_title or "").lower()
-            url = (item.track_url or "").lower()
-
-            # Producer Tag
-            if "(prod." in title:
-                await achievement_service.trigger_achievement(db, current_user.id, "METADATA_TAG", specific_slug="producer_tag")
-            
-            # Collaborator
-            if "feat." in title or "ft." in title:
-                await achievement_service.trigger_achievement(db, current_user.id, "METADATA_TAG", specific_slug="collaborator")
-
-            # SoundCloud Rapper
-            if "soundcloud.com" in url:
-                await achievement_service.trigger_achievement(db, current_user.id, "LINK_TYPE", specific_slug="soundcloud_rapper")
-
-            # DSP Pro
-            if "spotify.com" in url or "music.apple.com" in url:
-                await achievement_service.trigger_achievement(db, current_user.id, "LINK_TYPE", specific_slug="dsp_pro")
+        ))
+
+    # One transaction for every row; achievements, XP and the queue broadcast
+    # are queued once for the request (outbox) and run after it returns.
+    return await queue_service.create_submissions(
+        db, reviewer_id, current_user.id, items,
+        session_id=active_session.id if active_session else None,
+        batch_id=batch_id
+    )
 
-    except Exception as e:
-        import logging
-        logging.error(f"Failed to trigger achievements on submission: {e}")
 
-    # No need to commit here as create_submission commits
-    return created_submissions
+def _is_active_duplicate(existing: models.Submission, active_session: Optional[models.ReviewSession]) -> bool:
+    """A previous submission only blocks a new one while it's still queued in the current session."""
+    if existing.status not in ('pending', 'playing'):
+        return False
+    # FIXED: Check session activity
+    # Check 1: Explicit Session Inactivity
+    if existing.session and not existing.session.is_active:
+        return False
+    # Check 2: Timestamp (Ghost from previous session)
+    # If existing has no session (legacy/bug) AND is older than current active session
+    if not existing.session and active_session and existing.submitted_at < active_session.created_at:
+        return False
+    return True
+
+
+def _duplicate_info(existing: models.Submission, kind: str, **match) -> dict:
+    return {
+        "message": "Track already in queue",
+        "type": kind,
+        **match,
+        "is_active": True,
+        "existing_submission": {
+            "id": existing.id,
+            "track_title": existing.track_title,
+            "status": existing.status,
+            "submitted_at": existing.submitted_at.isoformat() if existing.submitted_at else None
+        }
+    }
+
+
+async def _gather_or_cancel(coros) -> list:
+    """asyncio.gather that cancels the rest as soon as one fails."""
+    tasks = [asyncio.ensure_future(c) for c in coros]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
 
 
 @router.post("/{reviewer_id}/queue/next", response_model=Optional[schemas.Submission], dependencies=[Depends(check_is_reviewer)])
@@ -563,11 +485,23 @@ async def play_track(reviewer_id: int, submission_id: int, db: AsyncSession = De
     return submission
 
 @router.get("/{reviewer_id}/queue/played", response_model=List[schemas.Submission], dependencies=[Depends(check_is_reviewer)])
-async def get_played_queue(reviewer_id: int, db: AsyncSession = Depends(get_db)):
-    return await queue_service.get_played_queue(db, reviewer_id=reviewer_id)
+async def get_played_queue(
+    reviewer_id: int,
+    response: Response,
+    limit: int = Query(pagination.DEFAULT_LIMIT, ge=1, le=pagination.MAX_LIMIT),
+    cursor: Optional[str] = None,
+    legacy: bool = False,
+    db: AsyncSession = Depends(get_db)
+):
+    """Played history, newest first. Pass X-Next-Cursor back as `cursor` for older rows; `legacy` returns everything."""
+    if legacy:
+        return await queue_service.get_played_queue(db, reviewer_id=reviewer_id)
+    page = await queue_service.get_played_page(db, reviewer_id, limit, cursor)
+    pagination.set_next_cursor(response, page)
+    return page.items
 
 @router.get("/{reviewer_id}/queue/current", response_model=Optional[schemas.SubmissionPublic])
-async def get_current_track_public(reviewer_id: int, response: Response, db: AsyncSession = Depends(get_db)):
+async def get_current_track_public(reviewer_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_db)):
     """
     Public endpoint to get the currently playing track for a reviewer.
     Designed for OBS overlays and public widgets.
@@ -575,11 +509,15 @@ async def get_current_track_public(reviewer_id: int, response: Response, db: Asy
     Logic mirrors the frontend dashboard:
     1. Checks for a track explicitly marked as 'playing'.
     2. If none, falls back to the first track in the 'pending' queue.
+
+    Supports conditional GET: the ETag comes from the in-memory queue version,
+    so a poll that matches it is answered with 304 without touching the database.
     """
-    # Set Cache-Control headers to prevent caching
-    response.headers["Cache-Control"] = "no-cache, no-store, must-revalidate"
-    response.headers["Pragma"] = "no-cache"
-    response.headers["Expires"] = "0"
+    etag = state_versions.etag(reviewer_id, state_versions.QUEUE)
+    headers = {"ETag": etag, "Cache-Control": PUBLIC_POLL_CACHE_CONTROL}
+    if state_versions.etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
 
     import logging
     # 1. Try getting explicitly playing track
@@ -597,6 +535,51 @@ async def get_current_track_public(reviewer_id: int, response: Response, db: Asy
     logging.info("get_current_track_public: No active or pending tracks.")
     return None
 
+@router.get("/{reviewer_id}/queue/stream")
+async def stream_overlay_events(reviewer_id: int, request: Request):
+    """
+    Server-sent events stream for OBS overlays and now-playing widgets.
+
+    Emits `now_playing`, `queue_length` and `giveaway_progress` events from the
+    in-process pub/sub (services/live_events.py), so connected overlays cost a
+    single fan-out instead of a database poll each. Supports Last-Event-ID
+    resume and sends a comment heartbeat to keep proxies from closing the stream.
+    """
+    from fastapi.responses import StreamingResponse
+    from config import settings
+    from services import live_events
+
+    # Short-lived session: the stream itself must not hold a connection
+    async with database.AsyncSessionLocal() as db:
+        if await db.scalar(select(models.Reviewer.id).where(models.Reviewer.id == reviewer_id)) is None:
+            raise HTTPException(status_code=404, detail="Reviewer not found")
+
+    last_event_id = request.headers.get("last-event-id") or request.query_params.get("last_event_id")
+    subscription, backlog = await live_events.subscribe(reviewer_id, last_event_id)
+
+    async def event_stream():
+        try:
+            yield "retry: 3000\n\n"
+            for event in backlog:
+                yield event.encode()
+            while True:
+                events = await subscription.next_batch(settings.SSE_HEARTBEAT_SECONDS)
+                if not events:
+                    if await request.is_disconnected():
+                        break
+                    yield ": keepalive\n\n"
+                    continue
+                for event in events:
+                    yield event.encode()
+        finally:
+            live_events.unsubscribe(reviewer_id, subscription)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 @router.post("/{reviewer_id}/queue/review/{submission_id}", response_model=schemas.Submission, dependencies=[Depends(check_is_reviewer)])
 async def review_submission(submission_id: int, review: schemas.ReviewCreate, db: AsyncSession = Depends(get_db)):
     return await queue_service.review_submission(db, submission_id, review)
@@ -632,11 +615,23 @@ async def remove_submission(submission_id: int, db: AsyncSession = Depends(get_d
     return {"status": "success", "message": "Submission removed"}
 
 @router.get("/{reviewer_id}/bookmarks", response_model=List[schemas.Submission], dependencies=[Depends(check_is_reviewer)])
-async def get_bookmarks(reviewer_id: int, db: AsyncSession = Depends(get_db)):
+async def get_bookmarks(
+    reviewer_id: int,
+    response: Response,
+    limit: int = Query(pagination.DEFAULT_LIMIT, ge=1, le=pagination.MAX_LIMIT),
+    cursor: Optional[str] = None,
+    legacy: bool = False,
+    db: AsyncSession = Depends(get_db)
+):
     """
-    Fetches all bookmarked submissions for a reviewer.
+    Fetches a page of bookmarked submissions for a reviewer (X-Next-Cursor
+    continues it). `legacy` returns all of them in one response.
     """
-    return await queue_service.get_bookmarked_submissions(db, reviewer_id)
+    if legacy:
+        return await queue_service.get_bookmarked_submissions(db, reviewer_id)
+    page = await queue_service.get_bookmarked_page(db, reviewer_id, limit, cursor)
+    pagination.set_next_cursor(response, page)
+    return page.items
 
 @router.patch("/{reviewer_id}/queue/{submission_id}", response_model=schemas.Submission, dependencies=[Depends(check_is_reviewer)])
 async def update_submission(reviewer_id: int, submission_id: int, update_data: schemas.SubmissionUpdate, db: AsyncSession = Depends(get_db)):
@@ -719,10 +714,17 @@ async def get_public_reviewer_profile(identifier: str, db: AsyncSession = Depend
     return await media_service.enrich_reviewer_profile(reviewer)
 
 @router.get("/{reviewer_id}/giveaway/state", response_model=Optional[schemas.GiveawayState])
-async def get_public_giveaway_state(reviewer_id: int, db: AsyncSession = Depends(get_db)):
+async def get_public_giveaway_state(reviewer_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_db)):
     """
     Public endpoint to fetch the current giveaway state.
+    Supports conditional GET keyed on the in-memory giveaway version.
     """
+    etag = state_versions.etag(reviewer_id, state_versions.GIVEAWAY)
+    headers = {"ETag": etag, "Cache-Control": PUBLIC_POLL_CACHE_CONTROL}
+    if state_versions.etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+
     # Verify reviewer exists
     reviewer = await queue_service.get_reviewer_by_id(db, reviewer_id)
     if not reviewer:
@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from typing import List, Optional
 
 import models
 import schemas
@@ -113,6 +113,7 @@ async def activate_session(
 async def archive_session(
         session_id: int,
         reviewer_id: int = None,
+        move_to_cold: Optional[bool] = None,
         db: AsyncSession = Depends(get_db),
         token: schemas.TokenData = Depends(get_current_user),
 ):
@@ -131,7 +132,7 @@ async def archive_session(
     if not target_reviewer_id:
          raise HTTPException(status_code=403, detail="User is not a reviewer and no reviewer_id provided")
 
-    return await queue_service.archive_session(db, target_reviewer_id, session_id)
+    return await queue_service.archive_session(db, target_reviewer_id, session_id, move_to_cold=move_to_cold)
 
 @router.patch("/{session_id}", response_model=schemas.ReviewSession)
 async def update_session(
@@ -1,9 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy import desc
 from database import get_db
 from models import Submission, User, Reviewer
+from services import pagination
+from typing import Optional
 
 router = APIRouter(
     prefix="/spotlight",
@@ -11,9 +13,17 @@ router = APIRouter(
 )
 
 @router.get("")
-async def get_spotlight(db: AsyncSession = Depends(get_db)):
+async def get_spotlight(
+    response: Response,
+    limit: int = Query(pagination.DEFAULT_LIMIT, ge=1, le=pagination.MAX_LIMIT),
+    cursor: Optional[str] = None,
+    legacy: bool = False,
+    db: AsyncSession = Depends(get_db)
+):
     """
     Get spotlighted submissions.
+    Pages (X-Next-Cursor) cover `limit` spotlighted submissions, grouped per
+    page; `legacy` groups the whole list at once.
     """
     # Query for submissions that are explicitly spotlighted
     # We join with User to get submitter details
@@ -30,11 +40,19 @@ async def get_spotlight(db: AsyncSession = Depends(get_db)):
         .join(Reviewer, Submission.reviewer_id == Reviewer.id)
         .join(ReviewerUser, Reviewer.user_id == ReviewerUser.id)
         .where(Submission.spotlighted == True)
-        .order_by(desc(Submission.submitted_at))
     )
     
-    result = await db.execute(query)
-    rows = result.all()
+    if legacy:
+        result = await db.execute(query.order_by(desc(Submission.submitted_at)))
+        rows = result.all()
+    else:
+        page = await pagination.paginate(
+            db, query.where(Submission.submitted_at.isnot(None)),
+            ((Submission.submitted_at, True), (Submission.id, True)), limit, cursor,
+            scalars=False, key_of=lambda row: (row[0].submitted_at, row[0].id)
+        )
+        pagination.set_next_cursor(response, page)
+        rows = page.items
     
     # Aggregation Logic
     spotlight_map = {}
@@ -8,7 +8,7 @@ import schemas
 import security
 from database import get_db
 from services.payment_service import payment_service
-from services import queue_service
+from services import queue_service, queue_index, blob_service
 from config import settings
 
 router = APIRouter(prefix="/stripe", tags=["Stripe"])
@@ -229,7 +229,9 @@ async def process_successful_payment(payment_intent):
                         submitted_at=datetime.datetime.now(datetime.UTC)
                     )
                     db.add(new_submission)
+                    await blob_service.add_reference(db, track_url)
                     await db.commit()
+                    queue_index.invalidate(reviewer_id)
 
     elif metadata.get("type") == "wallet_topup" and metadata.get("user_id"):
         user_id = int(metadata["user_id"])
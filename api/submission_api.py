@@ -0,0 +1,37 @@
+import hashlib
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import get_db
+from services import archive_service, state_versions, waveform_service
+
+router = APIRouter(prefix="/submissions", tags=["Submissions"])
+
+
+@router.get("/{submission_id}/peaks")
+async def get_submission_peaks(submission_id: int, request: Request, db: AsyncSession = Depends(get_db)):
+    """
+    Precomputed waveform peaks of an uploaded track (format in
+    services/waveform_service.py). 404 for linked tracks and until the
+    background job has run. Peaks never change for a stored file, so the
+    ETag comes from its location and a revalidation doesn't touch storage.
+    """
+    Submission = archive_service.all_submissions() # Played tracks move to the cold table
+    track_url = await db.scalar(select(Submission.track_url).where(Submission.id == submission_id))
+    if track_url is None:
+        raise HTTPException(status_code=404, detail="Submission not found")
+    location = waveform_service.peaks_location(track_url)
+    if location is None:
+        raise HTTPException(status_code=404, detail="Waveform peaks are only available for uploaded audio")
+
+    etag = f'"{hashlib.sha256(f"{waveform_service.VERSION}:{location}".encode()).hexdigest()[:24]}"'
+    headers = {"ETag": etag, "Cache-Control": "public, max-age=86400"}
+    if state_versions.etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    data = await waveform_service.load(track_url)
+    if data is None:
+        raise HTTPException(status_code=404, detail="Waveform peaks not generated yet")
+    return Response(content=data, media_type=waveform_service.MEDIA_TYPE, headers=headers)
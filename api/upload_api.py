@@ -2,7 +2,7 @@ from fastapi import APIRouter, UploadFile, File, HTTPException, Form, Depends
 import uuid
 import os
 from config import settings
-from services.storage_service import storage_service
+from services.storage_service import storage_service, iter_file
 from security import get_current_active_user as get_current_user
 from models import User
 
@@ -89,8 +89,9 @@ async def stage_upload(
                 bucket_name = settings.R2_PUBLIC_BUCKET_NAME
                 public_url_base = settings.R2_PUBLIC_URL
         
-        # Upload
-        r2_uri = await storage_service.upload_file(file.file, key, content_type, bucket_name=bucket_name)
+        # Upload (streamed in parts; the file is never read into memory whole)
+        uploaded = await storage_service.upload_stream(iter_file(file), key, content_type, bucket_name=bucket_name)
+        r2_uri = uploaded.uri
         
         # Construct Public URL
         public_url = r2_uri
@@ -112,7 +113,7 @@ async def stage_upload(
              if presigned:
                  public_url = presigned
         
-        return {"url": public_url, "filename": filename, "key": key, "r2_uri": r2_uri}
+        return {"url": public_url, "filename": filename, "key": key, "r2_uri": r2_uri, "sha256": uploaded.sha256}
 
     except Exception as e:
         print(f"Upload error: {e}")
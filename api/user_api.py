@@ -1,12 +1,13 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func, desc
+from typing import Optional
 
 import models
 import schemas
 import security
 from database import get_db
-from services import economy_service, user_service, queue_service
+from services import economy_service, user_service, queue_service, archive_service, pagination
 
 router = APIRouter(prefix="/user", tags=["User"])
 
@@ -210,19 +211,32 @@ async def get_my_balance(
 
 @router.get("/me/submissions", response_model=list[schemas.SubmissionWithReviewer])
 async def get_my_submissions(
+    response: Response,
+    limit: int = Query(pagination.DEFAULT_LIMIT, ge=1, le=pagination.MAX_LIMIT),
+    cursor: Optional[str] = None,
+    legacy: bool = False,
     current_user: models.User = Depends(security.get_current_active_user),
     db: AsyncSession = Depends(get_db),
 ):
-    return await queue_service.get_submissions_by_user(db, user_id=current_user.id)
+    if legacy:
+        return await queue_service.get_submissions_by_user(db, user_id=current_user.id)
+    page = await queue_service.get_submissions_by_user_page(db, current_user.id, limit, cursor)
+    pagination.set_next_cursor(response, page)
+    return page.items
 
 @router.get("/recent-tracks", response_model=list[schemas.RecentTrack])
 async def get_recent_tracks(
+    response: Response,
+    limit: int = Query(20, ge=1, le=pagination.MAX_LIMIT),
+    cursor: Optional[str] = None,
+    legacy: bool = False,
     current_user: models.User = Depends(security.get_current_active_user),
     db: AsyncSession = Depends(get_db),
 ):
     """
     Returns the most recent submission data for each unique song title/artist combo
     the user has uploaded. Uses a Window Function to filter duplicates.
+    Paged by X-Next-Cursor; `legacy` returns the fixed latest 20.
     """
     # Subquery to rank submissions by created_at per track_title (case insensitive)
     # Note: We group by track_title. Ideally we should group by artist too,
@@ -230,31 +244,35 @@ async def get_recent_tracks(
     # The spec query says "PARTITION BY LOWER(song_title)".
     # We will assume track_title contains the song name.
 
+    # Reads hot + cold submissions so archived uploads stay reusable
+    Submission = archive_service.all_submissions()
     subquery = (
         select(
-            models.Submission,
+            Submission,
             func.row_number().over(
-                partition_by=func.lower(models.Submission.track_title),
-                order_by=desc(models.Submission.submitted_at)
+                partition_by=func.lower(Submission.track_title),
+                order_by=desc(Submission.submitted_at)
             ).label("rn")
         )
-        .filter(models.Submission.user_id == current_user.id)
-        .filter(models.Submission.track_title.is_not(None))
+        .filter(Submission.user_id == current_user.id)
+        .filter(Submission.track_title.is_not(None))
         .subquery()
     )
 
     # Select from the subquery where row_number (rn) == 1
     # We need to alias the subquery to select columns from it
     # SQLAlchemy Core usage:
-    stmt = (
-        select(subquery)
-        .where(subquery.c.rn == 1)
-        .order_by(subquery.c.submitted_at.desc())
-        .limit(20)
-    )
-
-    result = await db.execute(stmt)
-    rows = result.all()
+    stmt = select(subquery).where(subquery.c.rn == 1)
+    if legacy:
+        result = await db.execute(stmt.order_by(subquery.c.submitted_at.desc()).limit(20))
+        rows = result.all()
+    else:
+        page = await pagination.paginate(
+            db, stmt.where(subquery.c.submitted_at.isnot(None)),
+            ((subquery.c.submitted_at, True), (subquery.c.id, True)), limit, cursor, scalars=False
+        )
+        pagination.set_next_cursor(response, page)
+        rows = page.items
 
     # Map result rows to schema
     # The row contains all columns of Submission plus 'rn'.
@@ -300,16 +318,20 @@ async def update_submission(
 
 @router.get("/me/transactions", response_model=list[schemas.Transaction])
 async def get_my_transactions(
+    response: Response,
+    limit: int = Query(pagination.DEFAULT_LIMIT, ge=1, le=pagination.MAX_LIMIT),
+    cursor: Optional[str] = None,
+    legacy: bool = False,
     current_user: models.User = Depends(security.get_current_active_user),
     db: AsyncSession = Depends(get_db),
 ):
-    from sqlalchemy import select
-    result = await db.execute(
-        select(models.Transaction)
-        .filter(models.Transaction.user_id == current_user.id)
-        .order_by(models.Transaction.timestamp.desc())
-    )
-    return result.scalars().all()
+    stmt = select(models.Transaction).filter(models.Transaction.user_id == current_user.id)
+    if legacy:
+        result = await db.execute(stmt.order_by(models.Transaction.timestamp.desc()))
+        return result.scalars().all()
+    page = await pagination.paginate(db, stmt, economy_service.TRANSACTION_KEYS, limit, cursor)
+    pagination.set_next_cursor(response, page)
+    return page.items
 
 @router.post("/me/create-payment-intent", response_model=schemas.PaymentIntentResponse)
 async def create_payment_intent(
@@ -339,6 +361,10 @@ async def create_payment_intent(
 @router.get("/{user_id}/stats", response_model=schemas.SubmitterStats)
 async def get_submitter_stats(
     user_id: int,
+    response: Response,
+    limit: int = Query(20, ge=1, le=pagination.MAX_LIMIT),
+    cursor: Optional[str] = None,
+    legacy: bool = False,
     db: AsyncSession = Depends(get_db),
 ):
     # 1. Fetch User
@@ -348,17 +374,36 @@ async def get_submitter_stats(
         from fastapi import HTTPException
         raise HTTPException(status_code=404, detail="User not found")
 
+    if not legacy:
+        # Aggregates in SQL; only one page of submissions is loaded (X-Next-Cursor continues the list)
+        Submission = archive_service.all_submissions() # Stats cover cold history too
+        graded = (Submission.user_id == user_id, Submission.status != "pending")
+        avg_poll = (await db.execute(select(func.avg(Submission.poll_result_w_percent)).filter(*graded))).scalar()
+        genres = (await db.execute(
+            select(Submission.genre).filter(*graded, Submission.genre.isnot(None), Submission.genre != "").distinct()
+        )).scalars().all()
+        page = await queue_service.get_submissions_by_user_page(db, user_id, limit, cursor, exclude_pending=True)
+        pagination.set_next_cursor(response, page)
+        return schemas.SubmitterStats(
+            user=user,
+            average_review_score=float(user.average_review_score or 0.0),
+            average_poll_result=float(avg_poll or 0.0),
+            genres=sorted(genres),
+            submissions=page.items
+        )
+
     # 2. Fetch Submissions
     # We need to calculate average poll result and get genres
     # We'll fetch the last 50 submissions for the list, but maybe calculate stats on all?
     # For performance, let's fetch all submissions for stats calculation in Python (or do complex SQL)
     # Given scale, fetching all might be okay for now, or we limit to last 100.
     
+    Submission = archive_service.all_submissions() # Stats cover cold history too
     stmt = (
-        select(models.Submission)
-        .filter(models.Submission.user_id == user_id)
-        .filter(models.Submission.status != "pending") # Only graded/played submissions? Or all?
-        .order_by(models.Submission.submitted_at.desc())
+        select(Submission)
+        .filter(Submission.user_id == user_id)
+        .filter(Submission.status != "pending") # Only graded/played submissions? Or all?
+        .order_by(Submission.submitted_at.desc())
     )
     
     result = await db.execute(stmt)
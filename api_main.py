@@ -31,6 +31,9 @@ def create_app():
     from api import queue_line_api
     app.include_router(queue_line_api.router, prefix="/api")
 
+    from api import submission_api
+    app.include_router(submission_api.router, prefix="/api")
+
     # Serve uploads (local file storage for Smart-Zone)
     from fastapi.staticfiles import StaticFiles
     import os
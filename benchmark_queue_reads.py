@@ -0,0 +1,125 @@
+"""
+Queue read latency with a large submission history, before and after the
+hot/cold split (archive_service).
+
+    python benchmark_queue_reads.py                       # 1M historical rows, temp SQLite file
+    python benchmark_queue_reads.py --rows 200000 --url postgresql+asyncpg://...
+
+Seeds one reviewer with --rows archived/rejected submissions older than
+ARCHIVE_COLD_AFTER_DAYS plus a live queue, times the queue reads, runs the
+cold mover, and times them again. Use an empty database: it creates tables
+and inserts rows.
+"""
+import argparse
+import asyncio
+import datetime
+import os
+import statistics
+import tempfile
+import time
+
+from sqlalchemy import insert, select, func
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+
+import models
+from services import archive_service, queue_service
+
+INSERT_CHUNK = 10000
+
+
+async def seed(factory, rows: int, pending: int, played: int):
+    old = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(days=365)
+    now = datetime.datetime.now(datetime.timezone.utc)
+    async with factory() as db:
+        user = models.User(discord_id="bench", username="bench")
+        db.add(user)
+        await db.flush()
+        reviewer = models.Reviewer(user_id=user.id, tiktok_handle="bench")
+        db.add(reviewer)
+        await db.commit()
+        reviewer_id, user_id = reviewer.id, user.id
+
+        for start in range(0, rows, INSERT_CHUNK):
+            await db.execute(insert(models.Submission), [
+                {
+                    "reviewer_id": reviewer_id, "user_id": user_id, "track_url": f"h{i}",
+                    "status": "rejected" if i % 10 == 0 else "archived",
+                    "submitted_at": old + datetime.timedelta(seconds=i)
+                }
+                for i in range(start, min(start + INSERT_CHUNK, rows))
+            ])
+            await db.commit()
+        await db.execute(insert(models.Submission), [
+            {
+                "reviewer_id": reviewer_id, "user_id": user_id, "track_url": f"q{i}",
+                "status": "pending" if i < pending else "reviewed",
+                "submitted_at": now + datetime.timedelta(seconds=i)
+            }
+            for i in range(pending + played)
+        ])
+        await db.commit()
+    return reviewer_id, user_id
+
+
+async def measure(factory, reviewer_id: int, user_id: int, iterations: int) -> dict:
+    reads = {
+        "pending_queue": lambda db: queue_service.get_pending_queue(db, reviewer_id),
+        "played_queue": lambda db: queue_service.get_played_queue(db, reviewer_id),
+        "user_history_count": lambda db: db.execute(
+            select(func.count()).select_from(archive_service.all_submissions())
+            .filter(archive_service.all_submissions().user_id == user_id)
+        ),
+    }
+    results = {}
+    async with factory() as db:
+        for name, read in reads.items():
+            await read(db) # Warm up
+            samples = []
+            for _ in range(iterations):
+                started = time.perf_counter()
+                await read(db)
+                samples.append((time.perf_counter() - started) * 1000)
+                db.expunge_all()
+            samples.sort()
+            results[name] = (statistics.median(samples), samples[int(len(samples) * 0.95) - 1])
+    return results
+
+
+def report(label: str, results: dict):
+    print(f"\n{label}")
+    for name, (p50, p95) in results.items():
+        print(f"  {name:<20} p50 {p50:8.2f} ms   p95 {p95:8.2f} ms")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000, help="historical (archived/rejected) submissions")
+    parser.add_argument("--pending", type=int, default=50)
+    parser.add_argument("--played", type=int, default=200)
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--url", help="database URL (default: temporary SQLite file)")
+    args = parser.parse_args()
+
+    url = args.url or f"sqlite+aiosqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+    engine = create_async_engine(url)
+    async with engine.begin() as conn:
+        await conn.run_sync(models.Base.metadata.create_all)
+    factory = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False, autoflush=False)
+
+    started = time.perf_counter()
+    reviewer_id, user_id = await seed(factory, args.rows, args.pending, args.played)
+    print(f"Seeded {args.rows} historical submissions in {time.perf_counter() - started:.1f}s ({url})")
+
+    report("All rows in submissions:", await measure(factory, reviewer_id, user_id, args.iterations))
+
+    started = time.perf_counter()
+    archive_service.settings.ARCHIVE_COLD_BATCH_PAUSE_SECONDS = 0 # Nothing else is writing
+    moved = await archive_service.run_cold_mover_once(factory)
+    print(f"\nCold mover moved {moved} rows in {time.perf_counter() - started:.1f}s")
+
+    report("After hot/cold split:", await measure(factory, reviewer_id, user_id, args.iterations))
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
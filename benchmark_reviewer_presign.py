@@ -0,0 +1,91 @@
+"""
+Latency of GET /api/reviewer/all for N reviewers, each with an r2:// avatar
+and banner: one S3 client per presigned URL, signed one after another (the
+previous path), against the pooled client + presign cache + presign_many
+behind media_service.enrich_reviewer_profiles.
+
+    python benchmark_reviewer_presign.py                       # 200 reviewers, local stand-in
+    python benchmark_reviewer_presign.py --endpoint http://127.0.0.1:5000   # e.g. `moto_server` / MinIO
+
+Both paths use real aioboto3 clients. Presigning is computed locally and never
+contacts the endpoint, so any S3-compatible URL works as the stand-in (the
+default points at a port nothing needs to listen on); what's measured is
+client setup and signing, i.e. the app's own cost per listing.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from types import SimpleNamespace
+
+from config import settings
+from services import media_service, storage_service as storage
+
+
+def make_reviewers(count: int) -> list:
+    return [
+        SimpleNamespace(
+            id=i, user_id=i, tiktok_handle=f"reviewer{i}", queue_status="open",
+            avatar_url=f"r2://avatars/{i}.png", configuration={"banner_url": f"r2://banners/{i}.jpg"},
+            payment_configs=[], economy_configs=[], user=None,
+        )
+        for i in range(count)
+    ]
+
+
+async def legacy(service: storage.StorageService, reviewers: list) -> int:
+    """The old enrich_reviewer_profile loop: a fresh client for every URL."""
+    signed = 0
+    for reviewer in reviewers:
+        for uri in (reviewer.avatar_url, reviewer.configuration["banner_url"]):
+            async with service._client() as s3:
+                await s3.generate_presigned_url(
+                    'get_object', Params={'Bucket': settings.R2_BUCKET_NAME, 'Key': uri[5:]}, ExpiresIn=3600
+                )
+            signed += 1
+    return signed
+
+
+async def pooled(service: storage.StorageService, reviewers: list) -> int:
+    profiles = await media_service.enrich_reviewer_profiles(reviewers)
+    return sum(1 for p in profiles if not p.avatar_url.startswith("r2://")) * 2
+
+
+async def timed(run, service, reviewers, repeat: int) -> list:
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        signed = await run(service, reviewers)
+        times.append(time.perf_counter() - started)
+    assert signed == 2 * len(reviewers)
+    return times
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--reviewers", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--endpoint", default="http://127.0.0.1:9", help="S3-compatible endpoint URL")
+    args = parser.parse_args()
+
+    # Local stand-in credentials unless real R2 settings are present
+    for name in ("R2_ACCOUNT_ID", "R2_ACCESS_KEY_ID", "R2_SECRET_ACCESS_KEY", "R2_BUCKET_NAME"):
+        if not getattr(settings, name):
+            setattr(settings, name, "bench")
+    service = storage.storage_service
+    service.endpoint_url = args.endpoint
+    reviewers = make_reviewers(args.reviewers)
+
+    print(f"{args.reviewers} reviewers, {2 * args.reviewers} presigned URLs per listing")
+    print(f"{'path':<16} {'median':>9} {'min':>9}")
+    rows = [("legacy", await timed(legacy, service, reviewers, args.repeat))]
+    await service.close()
+    rows.append(("pooled (cold)", await timed(pooled, service, reviewers, 1)))
+    rows.append(("pooled (cached)", await timed(pooled, service, reviewers, args.repeat)))
+    await service.close()
+    for label, times in rows:
+        print(f"{label:<16} {statistics.median(times) * 1000:>7.1f}ms {min(times) * 1000:>7.1f}ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,138 @@
+"""
+Memory and latency of audio uploads: whole-file read + sha256 + one PUT
+(the previous path) against storage_service.upload_stream.
+
+    python benchmark_uploads.py                    # 10/100/500 MB WAVs, local sink
+    python benchmark_uploads.py --sizes 10 --r2    # real R2 (uses the R2_* settings, writes bench/ keys)
+
+Without --r2 the S3 client is an in-process sink that discards the bytes
+after --part-latency-ms per request, so the numbers show the upload path's
+own cost (memory, hashing, part scheduling) rather than network throughput.
+Peak memory is tracemalloc's peak of Python allocations during the upload.
+"""
+import argparse
+import asyncio
+import hashlib
+import os
+import struct
+import tempfile
+import time
+import tracemalloc
+import uuid
+
+from config import settings
+from services import storage_service as storage
+
+MB = 1024 * 1024
+
+
+class SinkS3:
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    async def _request(self):
+        await asyncio.sleep(self.latency)
+
+    async def put_object(self, **kwargs):
+        await self._request()
+
+    async def create_multipart_upload(self, **kwargs):
+        await self._request()
+        return {"UploadId": "bench"}
+
+    async def upload_part(self, PartNumber, **kwargs):
+        await self._request()
+        return {"ETag": str(PartNumber)}
+
+    async def complete_multipart_upload(self, **kwargs):
+        await self._request()
+
+    async def abort_multipart_upload(self, **kwargs):
+        await self._request()
+
+
+class AsyncFile:
+    """Async read(size) over a file on disk, like the spooled fastapi.UploadFile."""
+
+    def __init__(self, path: str):
+        self.file = open(path, "rb")
+
+    async def read(self, size: int = -1) -> bytes:
+        return await asyncio.to_thread(self.file.read, size)
+
+    def close(self):
+        self.file.close()
+
+
+def write_wav(path: str, size: int) -> None:
+    """A 16-bit stereo 44.1 kHz WAV of roughly `size` bytes (pseudo-random samples)."""
+    data_size = size - 44
+    header = b"RIFF" + struct.pack("<I", 36 + data_size) + b"WAVE"
+    header += b"fmt " + struct.pack("<IHHIIHH", 16, 1, 2, 44100, 44100 * 4, 4, 16)
+    header += b"data" + struct.pack("<I", data_size)
+    block = os.urandom(MB)
+    with open(path, "wb") as f:
+        f.write(header)
+        for start in range(0, data_size, MB):
+            f.write(block[:min(MB, data_size - start)])
+
+
+async def legacy(s3, path: str, key: str):
+    source = AsyncFile(path)
+    try:
+        content = await source.read()
+        file_hash = hashlib.sha256(content).hexdigest()
+        await s3.put_object(Bucket=settings.R2_BUCKET_NAME, Key=key, Body=content, ContentType="audio/wav")
+        return file_hash
+    finally:
+        source.close()
+
+
+async def streamed(s3, path: str, key: str):
+    source = AsyncFile(path)
+    try:
+        uploaded = await storage._stream_to(
+            s3, storage.iter_file(source), settings.R2_BUCKET_NAME, key, "audio/wav",
+            max(settings.R2_UPLOAD_PART_SIZE, storage.MIN_PART_SIZE), max(1, settings.R2_UPLOAD_CONCURRENCY), None
+        )
+        return uploaded.sha256
+    finally:
+        source.close()
+
+
+async def measure(run, s3, path: str) -> tuple:
+    key = f"bench/{uuid.uuid4()}.wav"
+    tracemalloc.start()
+    started = time.perf_counter()
+    digest = await run(s3, path, key)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, digest
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 500], help="file sizes in MB")
+    parser.add_argument("--r2", action="store_true", help="upload to the configured R2 bucket")
+    parser.add_argument("--part-latency-ms", type=float, default=20.0, help="sink latency per request")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    print(f"part size {settings.R2_UPLOAD_PART_SIZE // MB} MiB, {settings.R2_UPLOAD_CONCURRENCY} parts in flight")
+    print(f"{'size':>7} {'path':<9} {'time':>9} {'peak mem':>10}")
+    for size in args.sizes:
+        path = os.path.join(workdir, f"{size}mb.wav")
+        write_wav(path, size * MB)
+        for label, run in (("legacy", legacy), ("streamed", streamed)):
+            if args.r2:
+                async with storage.storage_service._client() as s3:
+                    elapsed, peak, digest = await measure(run, s3, path)
+            else:
+                elapsed, peak, digest = await measure(run, SinkS3(args.part_latency_ms / 1000), path)
+            print(f"{size:>5}MB {label:<9} {elapsed:>8.2f}s {peak / MB:>8.1f}MB")
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
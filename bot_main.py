@@ -14,6 +14,8 @@ from config import settings
 from database import AsyncSessionLocal, init_db
 import bot_instance as bot_instance_module
 from api_main import create_app
+from services import outbox_service, archive_service, goal_engine, blob_service, audio_stream, audio_cache, media_resolver, prefetcher, ffmpeg_runner
+from services.storage_service import storage_service
 
 # Custom Bot class to hold the database session factory
 class UniverseBot(commands.Bot):
@@ -29,6 +31,13 @@ class UniverseBot(commands.Bot):
         await init_db()
         print("Database initialized.")
 
+        # Drains post-commit side effects (achievements, XP, broadcasts)
+        outbox_service.start()
+        archive_service.start() # Moves old archived/rejected submissions to the cold table
+        goal_engine.start() # In-memory community goal counters, checkpointed to the DB
+        await storage_service.start() # Shared S3 client for uploads and presigned URLs
+        blob_service.start() # Removes unreferenced audio blobs from R2
+
         # This is called when the bot is preparing to start
         print("Loading cogs...")
         # In the future, this could auto-discover cogs
@@ -70,6 +79,16 @@ class UniverseBot(commands.Bot):
     async def close(self):
         if self.api_server:
             await self.api_server.shutdown()
+        await outbox_service.stop()
+        await archive_service.stop()
+        await goal_engine.stop() # Writes pending goal progress
+        await blob_service.stop()
+        await ffmpeg_runner.stop() # Peaks and preview jobs in progress; they use the S3 client
+        await storage_service.close()
+        await prefetcher.stop()
+        await audio_cache.close() # Stops audio cache fills
+        await audio_stream.close() # Shared keep-alive pool of the audio proxy
+        media_resolver.shutdown()
         await super().close()
 
 intents = discord.Intents.default()
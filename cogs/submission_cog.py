@@ -1,7 +1,7 @@
 import discord
 from discord.ext import commands
 import yt_dlp
-from services import queue_service, user_service
+from services import queue_service, user_service, media_resolver
 import spotipy
 from spotipy.oauth2 import SpotifyClientCredentials
 from config import settings
@@ -90,13 +90,8 @@ class PassiveSubmissionCog(commands.Cog):
             # 1. Check for URL
             elif "http" in submission_content:
                 try:
-                    # Run yt-dlp in a thread to avoid blocking the event loop
-                    def validate_url():
-                        with yt_dlp.YoutubeDL({'quiet': True, 'extract_flat': True, 'force_generic_extractor': True}) as ydl:
-                            info = ydl.extract_info(submission_content, download=False)
-                            return info
-                    
-                    info = await asyncio.to_thread(validate_url)
+                    # yt-dlp runs in the resolver's thread pool (shared with the proxy, cached)
+                    info = await media_resolver.probe(submission_content)
                     
                     if info:
                         duration = info.get('duration')
@@ -145,28 +140,19 @@ class PassiveSubmissionCog(commands.Cog):
                     # Handle R2 Upload if attachments exist
                     if message.attachments:
                         try:
-                            from services.storage_service import storage_service
-                            import io
-                            import uuid
-                            import os
+                            from services import blob_service
+                            from services.storage_service import iter_url
                             
                             attachment = message.attachments[0]
-                            file_data = await attachment.read()
-                            file_obj = io.BytesIO(file_data)
-                            
-                            file_ext = os.path.splitext(attachment.filename)[1]
-                            unique_filename = f"{uuid.uuid4()}{file_ext}"
-                            
-                            # Calculate Hash
-                            import hashlib
-                            file_hash = hashlib.sha256(file_data).hexdigest()
                             
-                            # Upload
-                            r2_url = await storage_service.upload_file(
-                                file_obj, 
-                                unique_filename, 
+                            # Stream from Discord to R2, hashing on the way (stored once per distinct file)
+                            uploaded = await blob_service.store(
+                                db,
+                                iter_url(attachment.url),
                                 attachment.content_type or "application/octet-stream"
                             )
+                            r2_url = uploaded.uri
+                            file_hash = uploaded.sha256
                             
                             final_track_url = r2_url
                             submission_content = f"{submission_content} (Stored in R2)" # Update content for archive
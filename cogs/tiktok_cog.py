@@ -20,7 +20,7 @@ import os
 
 import models
 from database import AsyncSessionLocal
-from services import economy_service, user_service, giveaway_service, queue_service, achievement_service
+from services import economy_service, user_service, giveaway_service, queue_service, outbox_service, goal_engine
 from services import broadcast as broadcast_service
 
 logger = logging.getLogger(__name__)
@@ -422,8 +422,8 @@ class TikTokCog(commands.Cog):
                             if activity['likes_sent'] > 0:
                                 user_likes_map[uid] = activity['likes_sent']
                         
-                        await giveaway_service.batch_update_community_goal_progress(
-                            db, reviewer_id, 'LIKES', likes_to_add, user_likes_map
+                        await goal_engine.add(
+                            reviewer_id, 'LIKES', likes_to_add, user_likes_map
                         )
 
                     # --- COMMUNITY GOAL BATCH UPDATE (SHARES) ---
@@ -434,8 +434,8 @@ class TikTokCog(commands.Cog):
                             if activity['shares_sent'] > 0:
                                 user_shares_map[uid] = activity['shares_sent']
                         
-                        await giveaway_service.batch_update_community_goal_progress(
-                            db, reviewer_id, 'SHARES', shares_to_add, user_shares_map
+                        await goal_engine.add(
+                            reviewer_id, 'SHARES', shares_to_add, user_shares_map
                         )
 
                     # --- COMMUNITY GOAL BATCH UPDATE (COMMENTS) ---
@@ -446,8 +446,8 @@ class TikTokCog(commands.Cog):
                             if activity['msg_count'] > 0:
                                 user_comments_map[uid] = activity['msg_count']
                         
-                        await giveaway_service.batch_update_community_goal_progress(
-                            db, reviewer_id, 'COMMENTS', comments_to_add, user_comments_map
+                        await goal_engine.add(
+                            reviewer_id, 'COMMENTS', comments_to_add, user_comments_map
                         )
 
                     # --- COMMUNITY GOAL BATCH UPDATE (GIFTS) ---
@@ -457,8 +457,8 @@ class TikTokCog(commands.Cog):
                             if activity['gifts_sent'] > 0:
                                 user_gifts_map[uid] = activity['gifts_sent']
                         
-                        await giveaway_service.batch_update_community_goal_progress(
-                            db, reviewer_id, 'GIFTS', goal_diamonds_to_add, user_gifts_map
+                        await goal_engine.add(
+                            reviewer_id, 'GIFTS', goal_diamonds_to_add, user_gifts_map
                         )
 
                 # 2. Update Active Submission Stats (Average Viewers & Polls)
@@ -515,49 +515,60 @@ class TikTokCog(commands.Cog):
                         live_session.max_concurrent_viewers = window_max
                     db.add(live_session)
 
-                await db.commit()
-
-                # 4. Check Achievements for Reviewer
-                await achievement_service.trigger_achievement(db, user.id, "LIFETIME_LIKES", user.lifetime_live_likes)
-                await achievement_service.trigger_achievement(db, user.id, "LIFETIME_DIAMONDS", user.lifetime_diamonds)
-                await achievement_service.trigger_achievement(db, user.id, "CONCURRENT_VIEWERS", live_session.max_concurrent_viewers if live_session else 0)
-
-                # 5. Check Achievements for Viewers
+                # 4. Queue Achievement Checks for Reviewer (run by the outbox workers after commit)
+                await outbox_service.enqueue(db, "achievements", {
+                    "user_id": user.id,
+                    "triggers": [
+                        {"category": "LIFETIME_LIKES", "value": user.lifetime_live_likes},
+                        {"category": "LIFETIME_DIAMONDS", "value": user.lifetime_diamonds},
+                        {"category": "CONCURRENT_VIEWERS", "value": (live_session.max_concurrent_viewers or 0) if live_session else 0},
+                    ]
+                }, partition=f"user:{user.id}")
+
+                # 5. Update Viewer Stats and Queue Their Achievement Checks
                 for tiktok_username, activity in user_chat_activity_snapshot.items():
                     viewer_user = await user_service.get_user_by_tiktok_username(db, tiktok_username)
                     if not viewer_user:
                         continue
-                        
-                    # Update Viewer Stats
+
+                    triggers = []
                     if activity['likes_sent'] > 0:
                         viewer_user.lifetime_likes_sent = (viewer_user.lifetime_likes_sent or 0) + activity['likes_sent']
-                        await achievement_service.trigger_achievement(db, viewer_user.id, "LIFETIME_LIKES_SENT", viewer_user.lifetime_likes_sent)
-                        
+                        triggers.append({"category": "LIFETIME_LIKES_SENT", "value": viewer_user.lifetime_likes_sent})
+
                     if activity['gifts_sent'] > 0:
                         viewer_user.lifetime_gifts_sent = (viewer_user.lifetime_gifts_sent or 0) + activity['gifts_sent']
-                        await achievement_service.trigger_achievement(db, viewer_user.id, "LIFETIME_GIFTS_SENT", viewer_user.lifetime_gifts_sent)
+                        triggers.append({"category": "LIFETIME_GIFTS_SENT", "value": viewer_user.lifetime_gifts_sent})
 
                     if activity['msg_count'] > 0:
                         viewer_user.lifetime_tiktok_comments = (viewer_user.lifetime_tiktok_comments or 0) + activity['msg_count']
-                        await achievement_service.trigger_achievement(db, viewer_user.id, "LIFETIME_TIKTOK_COMMENTS", viewer_user.lifetime_tiktok_comments)
+                        triggers.append({"category": "LIFETIME_TIKTOK_COMMENTS", "value": viewer_user.lifetime_tiktok_comments})
 
                     if activity['shares_sent'] > 0:
                         viewer_user.lifetime_tiktok_shares = (viewer_user.lifetime_tiktok_shares or 0) + activity['shares_sent']
-                        await achievement_service.trigger_achievement(db, viewer_user.id, "LIFETIME_TIKTOK_SHARES", viewer_user.lifetime_tiktok_shares)
-                        
+                        triggers.append({"category": "LIFETIME_TIKTOK_SHARES", "value": viewer_user.lifetime_tiktok_shares})
+
                     db.add(viewer_user)
 
                     # Rainbow
                     if len(activity['rainbow']) >= 4:
-                        await achievement_service.trigger_achievement(db, viewer_user.id, "CHAT_RAINBOW", specific_slug="rainbow")
+                        triggers.append({"category": "CHAT_RAINBOW", "slug": "rainbow"})
 
                     # Town Crier
                     if activity['all_caps']:
-                        await achievement_service.trigger_achievement(db, viewer_user.id, "CHAT_ALL_CAPS", specific_slug="town_crier")
+                        triggers.append({"category": "CHAT_ALL_CAPS", "slug": "town_crier"})
 
                     # Emoji Chef
                     if activity['emoji_only']:
-                        await achievement_service.trigger_achievement(db, viewer_user.id, "CHAT_EMOJI_ONLY", specific_slug="emoji_chef")
+                        triggers.append({"category": "CHAT_EMOJI_ONLY", "slug": "emoji_chef"})
+
+                    if triggers:
+                        await outbox_service.enqueue(
+                            db, "achievements", {"user_id": viewer_user.id, "triggers": triggers},
+                            partition=f"user:{viewer_user.id}"
+                        )
+
+                await db.commit()
 
         except Exception as e:
             logger.error(f"Flush error for reviewer {reviewer_id}: {e}")
@@ -964,8 +975,7 @@ class TikTokCog(commands.Cog):
                 
             # Community Goal: COMMENTS
             if reviewer_id:
-                async with AsyncSessionLocal() as db:
-                    await giveaway_service.update_community_goal_progress(db, reviewer_id, 'COMMENTS', 1, username=event.user.unique_id, user_id=event.user.unique_id)
+                await goal_engine.add(reviewer_id, 'COMMENTS', 1, {event.user.unique_id: 1})
 
             user_handle = event.user.unique_id
             user_level = getattr(event.user, 'level', 0)
@@ -1261,11 +1271,7 @@ class TikTokCog(commands.Cog):
                 # For now, let's use the reviewer associated with the current interaction if possible, or just 1.
                 # Actually, we can pass None as reviewer_id to economy_service if we update it, but it expects one.
                 # Let's find the most recent reviewer they interacted with.
-                stmt_last_interaction = select(models.TikTokInteraction).where(
-                    models.TikTokInteraction.tiktok_account_id == account.id
-                ).order_by(models.TikTokInteraction.timestamp.desc()).limit(1)
-                result_interaction = await session.execute(stmt_last_interaction)
-                last_interaction = result_interaction.scalar_one_or_none()
+                last_interaction = await user_service.get_latest_tiktok_interaction(session, account.id)
                 
                 reviewer_id_for_coins = 1 # Default fallback
                 if last_interaction:
@@ -67,6 +67,15 @@ class Settings(BaseSettings):
     R2_BUCKET_NAME: Optional[str] = None
     R2_PUBLIC_BUCKET_NAME: Optional[str] = None
     R2_PUBLIC_URL: Optional[str] = None
+    R2_UPLOAD_PART_SIZE: int = 5 * 1024 * 1024 # Multipart part size for streamed uploads (min 5 MiB)
+    R2_UPLOAD_CONCURRENCY: int = 2 # Parts in flight per upload
+    SUBMIT_UPLOAD_CONCURRENCY: int = 3 # Files of one multi-item submission uploaded at once
+    R2_MAX_POOL_CONNECTIONS: int = 50 # HTTP connections kept by the shared S3 client
+    R2_PRESIGN_CACHE_SIZE: int = 4096 # Presigned URLs kept in memory (0 disables the cache)
+    R2_PRESIGN_REFRESH_SECONDS: float = 600 # Re-sign cached URLs this long before they expire
+    BLOB_GC_ENABLED: bool = True # Delete content-addressed blobs nothing references
+    BLOB_GC_GRACE_SECONDS: float = 24 * 60 * 60
+    BLOB_GC_INTERVAL_SECONDS: float = 6 * 60 * 60
 
     # TikTok Settings
     TIKTOK_SIGN_API_KEY: Optional[str] = None
@@ -74,4 +83,66 @@ class Settings(BaseSettings):
     # Security
     ENCRYPTION_KEY: Optional[str] = None # 32 url-safe base64-encoded bytes
 
+    # Caching
+    INITIAL_STATE_CACHE_TTL_SECONDS: float = 30.0 # Safety net; snapshots are invalidated on mutation
+    INITIAL_STATE_PAGE_SIZE: int = 50 # History/bookmarks in the snapshot (0 = unbounded, legacy)
+
+    # Server-sent events (overlay stream)
+    SSE_HEARTBEAT_SECONDS: float = 15.0
+    SSE_MAX_BUFFER_BYTES: int = 64 * 1024 # Per connection
+
+    # Audio proxy (shared upstream client)
+    PROXY_TIMEOUT_SECONDS: float = 30.0
+    PROXY_MAX_CONNECTIONS: int = 100
+    PROXY_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    PROXY_KEEPALIVE_SECONDS: float = 30.0
+    RESOLVER_WORKERS: int = 4 # Threads running yt-dlp extractions
+    RESOLVER_CACHE_SIZE: int = 2048
+    RESOLVER_METADATA_TTL_SECONDS: float = 24 * 60 * 60
+    RESOLVER_STREAM_TTL_SECONDS: float = 5 * 60 # For stream URLs without an embedded expiry
+    RESOLVER_EXPIRY_MARGIN_SECONDS: float = 60 # Stop handing out stream URLs this long before they expire
+    AUDIO_CACHE_DIR: Optional[str] = None # Disk cache for proxied audio (off when unset)
+    AUDIO_CACHE_MAX_BYTES: int = 2 * 1024 * 1024 * 1024
+    PREFETCH_ENABLED: bool = True # Warm metadata and audio for the next tracks in each queue
+    PREFETCH_TOP_K: int = 3
+    PREFETCH_CONCURRENCY: int = 2 # Tracks being prefetched at once, across all reviewers
+    PREFETCH_MAX_BYTES: int = 256 * 1024 * 1024 # Audio fetched per prefetch pass
+    PREFETCH_DELAY_SECONDS: float = 2.0 # Quiet time after a queue change before prefetching
+    FFMPEG_PATH: str = "ffmpeg"
+    FFMPEG_WORKERS: int = 2 # ffmpeg processes run by background media jobs at once
+    FFMPEG_JOB_TIMEOUT_SECONDS: float = 10 * 60 # A media job still running after this is cancelled (ffmpeg killed)
+    PEAKS_ENABLED: bool = True # Waveform peaks for uploaded audio (needs numpy and ffmpeg)
+    PEAKS_SAMPLE_RATE: int = 22050
+    PEAKS_BASE_SAMPLES: int = 256 # Samples per (min, max) pair at the finest level
+    PEAKS_LEVELS: int = 4
+    PEAKS_LEVEL_FACTOR: int = 4 # Each level's pairs cover this many of the previous level's
+    PREVIEW_ENABLED: bool = True # Serve low-bitrate renditions of large uploads through the proxy
+    PREVIEW_CODEC: str = "aac" # "aac" (.m4a, plays everywhere) or "opus" (.ogg)
+    PREVIEW_BITRATE: str = "128k"
+    PREVIEW_MIN_BYTES: int = 4 * 1024 * 1024 # Smaller uploads are only served as they are
+    PREVIEW_MAX_RATIO: float = 0.5 # Keep a rendition only if at most this share of the original's size
+    PREVIEW_MISS_TTL_SECONDS: float = 60 # Recheck tracks without a rendition after this long
+
+    # Outbox (post-commit side effects)
+    OUTBOX_WORKERS: int = 4
+    OUTBOX_MAX_ATTEMPTS: int = 8
+    OUTBOX_POLL_SECONDS: float = 5.0 # Fallback when no commit wakes the pool
+    OUTBOX_LEASE_SECONDS: float = 60.0 # A claimed event is retried if not finished by then
+    OUTBOX_RETENTION_HOURS: float = 72.0
+
+    # Archiving
+    ARCHIVE_CHUNK_SIZE: int = 1000 # Rows per committed chunk
+    ARCHIVE_MOVE_TO_COLD: bool = False # Move archived submissions to submissions_archive
+    ARCHIVE_COLD_ENABLED: bool = True # Background mover for old archived/rejected submissions
+    ARCHIVE_COLD_AFTER_DAYS: float = 30.0 # By submitted_at
+    ARCHIVE_COLD_BATCH_SIZE: int = 5000
+    ARCHIVE_COLD_BATCH_PAUSE_SECONDS: float = 0.5
+    ARCHIVE_COLD_INTERVAL_SECONDS: float = 6 * 60 * 60
+
+    # Community goal engine (in-memory counters)
+    GOAL_ENGINE_ENABLED: bool = True
+    GOAL_CHECKPOINT_SECONDS: float = 5.0 # Pending progress is written at least this often
+    GOAL_BROADCAST_INTERVAL_SECONDS: float = 1.0 # Per goal
+    GOAL_ENGINE_IDLE_SECONDS: float = 600.0 # Drop counters for reviewers with no events
+
 settings = Settings()
@@ -1,14 +1,21 @@
-import React, { useState, useMemo } from 'react';
+import React, { useState, useMemo, useEffect } from 'react';
 import HistoryPanel from './HistoryPanel';
 import BookmarkPanel from './BookmarkPanel';
 import SpotlightPanel from './SpotlightPanel';
 import { Search } from 'lucide-react';
 import { useSubmissionSearch } from '../../hooks/useSubmissionSearch';
-import { useQueueStore } from '../../stores/queueStore';
+import { useQueueStore, type PagedList } from '../../stores/queueStore';
 import { Submission } from '../../types';
 
 type Tab = 'History' | 'Bookmarks' | 'Spotlight';
 
+// The paged store lists each tab draws from (History also shows bookmarks)
+const TAB_LISTS: Record<Tab, PagedList[]> = {
+  History: ['history', 'bookmarks'],
+  Bookmarks: ['bookmarks'],
+  Spotlight: [],
+};
+
 interface RightPanelTabsProps {
   reviewerId?: string;
 }
@@ -16,7 +23,26 @@ interface RightPanelTabsProps {
 const RightPanelTabs: React.FC<RightPanelTabsProps> = ({ reviewerId }) => {
   const [activeTab, setActiveTab] = useState<Tab>('History');
   const [searchQuery, setSearchQuery] = useState('');
-  const { history, bookmarks, spotlight } = useQueueStore();
+  const [isLoadingOlder, setIsLoadingOlder] = useState(false);
+  const { history, bookmarks, spotlight, historyCursor, bookmarksCursor, loadOlder } = useQueueStore();
+  const searching = searchQuery.trim() !== '';
+
+  // Only the newest page of each list comes with the initial state; a search needs the rest
+  // (re-run when a cursor moves, in case a single-page load was in flight)
+  useEffect(() => {
+    if (!searching || !reviewerId) return;
+    TAB_LISTS[activeTab].forEach((list) => loadOlder(reviewerId, list, true));
+  }, [searching, activeTab, reviewerId, historyCursor, bookmarksCursor, loadOlder]);
+
+  const olderList: PagedList | undefined = TAB_LISTS[activeTab][0];
+  const hasOlder = olderList === 'history' ? !!historyCursor : olderList === 'bookmarks' ? !!bookmarksCursor : false;
+
+  const loadOlderPage = async () => {
+    if (!reviewerId || !olderList) return;
+    setIsLoadingOlder(true);
+    await loadOlder(reviewerId, olderList);
+    setIsLoadingOlder(false);
+  };
 
   // Derive the data for the current tab
   // Note: HistoryPanel logic for combining lists is complex (history + bookmarks + spotlight).
@@ -130,6 +156,15 @@ const RightPanelTabs: React.FC<RightPanelTabsProps> = ({ reviewerId }) => {
       {/* Content */}
       <div className="flex-1 p-4 overflow-y-auto">
         {renderContent()}
+        {hasOlder && !searching && reviewerId && (
+          <button
+            onClick={loadOlderPage}
+            disabled={isLoadingOlder}
+            className="w-full p-2 text-sm text-gray-400 hover:text-white transition-colors disabled:opacity-50"
+          >
+            {isLoadingOlder ? 'Loading...' : `Load older ${olderList}`}
+          </button>
+        )}
       </div>
     </div>
   );
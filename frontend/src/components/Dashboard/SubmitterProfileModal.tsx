@@ -1,6 +1,6 @@
 import React, { useEffect, useState } from 'react';
 import { X, Star, BarChart2, Music, Calendar } from 'lucide-react';
-import api from '../../services/api';
+import api, { nextCursor } from '../../services/api';
 import { SubmitterStats } from '../../types';
 import toast from 'react-hot-toast';
 
@@ -13,20 +13,25 @@ interface SubmitterProfileModalProps {
 const SubmitterProfileModal: React.FC<SubmitterProfileModalProps> = ({ isOpen, onClose, userId }) => {
     const [stats, setStats] = useState<SubmitterStats | null>(null);
     const [isLoading, setIsLoading] = useState(false);
+    const [isLoadingMore, setIsLoadingMore] = useState(false);
+    // Opens the next page of submissions; null once they are all shown
+    const [cursor, setCursor] = useState<string | null>(null);
 
     useEffect(() => {
         if (isOpen && userId) {
             fetchStats(userId);
         } else {
             setStats(null);
+            setCursor(null);
         }
     }, [isOpen, userId]);
 
     const fetchStats = async (id: number) => {
         setIsLoading(true);
         try {
-            const { data } = await api.get<SubmitterStats>(`/user/${id}/stats`);
-            setStats(data);
+            const response = await api.get<SubmitterStats>(`/user/${id}/stats`);
+            setStats(response.data);
+            setCursor(nextCursor(response));
         } catch (error) {
             console.error("Failed to fetch submitter stats:", error);
             toast.error("Failed to load profile.");
@@ -36,6 +41,20 @@ const SubmitterProfileModal: React.FC<SubmitterProfileModalProps> = ({ isOpen, o
         }
     };
 
+    const loadMore = async () => {
+        if (!userId || !cursor) return;
+        setIsLoadingMore(true);
+        try {
+            const response = await api.get<SubmitterStats>(`/user/${userId}/stats`, { params: { cursor } });
+            setStats(prev => prev ? { ...prev, submissions: [...prev.submissions, ...response.data.submissions] } : response.data);
+            setCursor(nextCursor(response));
+        } catch (error) {
+            console.error("Failed to fetch more submissions:", error);
+        } finally {
+            setIsLoadingMore(false);
+        }
+    };
+
     if (!isOpen) return null;
 
     return (
@@ -137,6 +156,15 @@ const SubmitterProfileModal: React.FC<SubmitterProfileModalProps> = ({ isOpen, o
                                         </div>
                                     ))
                                 )}
+                                {cursor && (
+                                    <button
+                                        onClick={loadMore}
+                                        disabled={isLoadingMore}
+                                        className="w-full p-2 text-sm text-gray-400 hover:text-white transition-colors disabled:opacity-50"
+                                    >
+                                        {isLoadingMore ? 'Loading...' : 'Load older submissions'}
+                                    </button>
+                                )}
                             </div>
                         </div>
 
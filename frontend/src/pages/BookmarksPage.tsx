@@ -1,7 +1,7 @@
 import React, { useEffect, useState, useMemo } from 'react';
 import { useAuthStore } from '../stores/authStore';
 import { useQueueStore } from '../stores/queueStore';
-import api from '../services/api';
+import api, { fetchAllPages } from '../services/api';
 import { Submission } from '../types';
 import WebPlayer from '../components/Dashboard/WebPlayer';
 import PlaylistModal from '../components/Dashboard/PlaylistModal';
@@ -30,8 +30,8 @@ const BookmarksPage: React.FC = () => {
         const fetchBookmarks = async () => {
             if (!user?.reviewer_profile?.id) return;
             try {
-                const { data } = await api.get<Submission[]>(`/reviewer/${user.reviewer_profile.id}/bookmarks`);
-                setBookmarks(data);
+                // Search and playlist filters run over the whole list
+                setBookmarks(await fetchAllPages<Submission>(`/reviewer/${user.reviewer_profile.id}/bookmarks`));
             } catch (error) {
                 console.error("Failed to fetch bookmarks:", error);
                 toast.error("Failed to load bookmarks.");
@@ -23,13 +23,20 @@ const EconomyLogPage = () => {
     const [transactions, setTransactions] = useState<Transaction[]>([]);
     const [isLoading, setIsLoading] = useState(true);
     const [page, setPage] = useState(1);
+    // cursors[n] opens page n + 1; the API hands out the next one in X-Next-Cursor
+    const [cursors, setCursors] = useState<(string | null)[]>([null]);
     const limit = 50;
 
     const fetchTransactions = async () => {
         setIsLoading(true);
         try {
-            const response = await api.get<Transaction[]>(`/economy/transactions?page=${page}&limit=${limit}`);
+            const cursor = cursors[page - 1];
+            const response = await api.get<Transaction[]>('/economy/transactions', {
+                params: { limit, ...(cursor ? { cursor } : {}) },
+            });
             setTransactions(response.data);
+            const next = response.headers['x-next-cursor'] ?? null;
+            setCursors(prev => [...prev.slice(0, page), next]);
         } catch (error) {
             console.error('Failed to fetch transactions:', error);
         } finally {
@@ -130,7 +137,7 @@ const EconomyLogPage = () => {
                     </span>
                     <button
                         onClick={() => setPage(p => p + 1)}
-                        disabled={transactions.length < limit || isLoading}
+                        disabled={!cursors[page] || isLoading}
                         className="px-4 py-2 bg-gray-800 rounded-lg disabled:opacity-50 hover:bg-gray-700 transition-colors"
                     >
                         Next
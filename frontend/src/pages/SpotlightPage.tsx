@@ -21,7 +21,8 @@ const SpotlightPage = () => {
     useEffect(() => {
         const fetchSpotlight = async () => {
             try {
-                const { data } = await api.get<SpotlightItem[]>("/spotlight");
+                // Grouped across the whole list, not per page
+                const { data } = await api.get<SpotlightItem[]>("/spotlight", { params: { legacy: true } });
                 setItems(data);
             } catch (error) {
                 console.error("Failed to fetch spotlight items:", error);
@@ -1,6 +1,6 @@
 import React, { useEffect, useState } from "react";
 import { Link } from "react-router-dom";
-import api from "../services/api";
+import api, { fetchAllPages } from "../services/api";
 import { useAuthStore } from "../stores/authStore";
 import toast from "react-hot-toast";
 import WalletCard from "../components/WalletCard";
@@ -37,11 +37,12 @@ const UserHubPage = () => {
   const fetchSubmissions = async () => {
     setIsLoading(true);
     try {
-      const response = await api.get<Submission[]>("/user/me/submissions");
-      if (Array.isArray(response.data) && response.data.length > 0) {
-        setSubmissions(response.data);
+      // Grouped by track below, so every page is needed
+      const data = await fetchAllPages<Submission>("/user/me/submissions");
+      if (data.length > 0) {
+        setSubmissions(data);
         // Use the reviewer from the most recent submission
-        const latest = response.data[0];
+        const latest = data[0];
         setActiveReviewerId(latest.reviewer_id);
         fetchBalance(latest.reviewer_id);
       } else {
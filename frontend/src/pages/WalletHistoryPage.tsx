@@ -1,7 +1,7 @@
 import React, { useEffect, useState } from 'react';
 import { Link } from 'react-router-dom';
 import { ArrowLeft, ArrowUpRight, ArrowDownLeft } from 'lucide-react';
-import api from '../services/api';
+import api, { nextCursor } from '../services/api';
 
 interface Transaction {
     id: number;
@@ -13,19 +13,31 @@ interface Transaction {
 const WalletHistoryPage = () => {
     const [transactions, setTransactions] = useState<Transaction[]>([]);
     const [isLoading, setIsLoading] = useState(true);
+    const [isLoadingMore, setIsLoadingMore] = useState(false);
+    // Opens the next (older) page; null once the whole history is shown
+    const [cursor, setCursor] = useState<string | null>(null);
 
-    useEffect(() => {
-        const fetchTransactions = async () => {
-            try {
-                const response = await api.get<Transaction[]>('/user/me/transactions');
-                setTransactions(response.data);
-            } catch (error) {
-                console.error('Failed to fetch transactions:', error);
-            } finally {
-                setIsLoading(false);
-            }
-        };
+    const fetchTransactions = async (after: string | null = null) => {
+        try {
+            const response = await api.get<Transaction[]>('/user/me/transactions', {
+                params: after ? { cursor: after } : {},
+            });
+            setTransactions(prev => after ? [...prev, ...response.data] : response.data);
+            setCursor(nextCursor(response));
+        } catch (error) {
+            console.error('Failed to fetch transactions:', error);
+        } finally {
+            setIsLoading(false);
+        }
+    };
+
+    const loadMore = async () => {
+        setIsLoadingMore(true);
+        await fetchTransactions(cursor);
+        setIsLoadingMore(false);
+    };
 
+    useEffect(() => {
         fetchTransactions();
     }, []);
 
@@ -68,6 +80,15 @@ const WalletHistoryPage = () => {
                                     </div>
                                 </div>
                             ))}
+                            {cursor && (
+                                <button
+                                    onClick={loadMore}
+                                    disabled={isLoadingMore}
+                                    className="w-full p-4 text-sm text-gray-400 hover:text-white hover:bg-gray-800/80 transition-colors disabled:opacity-50"
+                                >
+                                    {isLoadingMore ? 'Loading...' : 'Load older transactions'}
+                                </button>
+                            )}
                         </div>
                     ) : (
                         <div className="p-12 text-center text-gray-500">
@@ -1,4 +1,4 @@
-import axios from 'axios';
+import axios, { AxiosResponse } from 'axios';
 
 const api = axios.create({
   baseURL: '/api', // Use a relative URL for the proxy
@@ -45,4 +45,19 @@ api.interceptors.response.use(
   }
 );
 
+// Paged list endpoints return the cursor of the next page in this header (absent on the last page)
+export const nextCursor = (response: AxiosResponse): string | null =>
+  (response.headers['x-next-cursor'] as string | undefined) ?? null;
+
+// Follows X-Next-Cursor from `cursor` to the end of the list. For views that search or group the whole list.
+export const fetchAllPages = async <T>(url: string, params: Record<string, unknown> = {}, cursor: string | null = null): Promise<T[]> => {
+  const items: T[] = [];
+  do {
+    const response = await api.get<T[]>(url, { params: { ...params, limit: 200, ...(cursor ? { cursor } : {}) } });
+    items.push(...response.data);
+    cursor = nextCursor(response);
+  } while (cursor);
+  return items;
+};
+
 export default api;
@@ -2,7 +2,7 @@ import { create } from 'zustand';
 import { devtools } from 'zustand/middleware';
 import io, { Socket } from 'socket.io-client';
 import { Submission } from '../types';
-import api from '../services/api'; // Make sure api service is imported
+import api, { fetchAllPages, nextCursor } from '../services/api'; // Make sure api service is imported
 
 export type { Submission };
 
@@ -28,14 +28,36 @@ export interface FullQueueState {
   current_track?: Submission | null;
   is_live?: boolean;
   giveaway_state?: GiveawayState | null;
+  // Set when history/bookmarks hold only the newest page; continue with /queue/played and /bookmarks
+  history_cursor?: string | null;
+  bookmarks_cursor?: string | null;
 }
 
+// Appends the rows of `older` that aren't in `list` yet
+const appendNew = (list: Submission[], older: Submission[]) => {
+  const ids = new Set(list.map((s) => s.id));
+  return [...list, ...older.filter((s) => !ids.has(s.id))];
+};
+
+export type PagedList = 'history' | 'bookmarks';
+
+const PAGED_URLS: Record<PagedList, (reviewerId: string) => string> = {
+  history: (reviewerId) => `/reviewer/${reviewerId}/queue/played`,
+  bookmarks: (reviewerId) => `/reviewer/${reviewerId}/bookmarks`,
+};
+
+const loadingOlder = new Set<PagedList>();
+
 interface QueueState {
   socket: Socket | null;
   socketStatus: 'connected' | 'disconnected' | 'connecting' | 'disabled';
   queue: Submission[];
   history: Submission[];
+  olderHistory: Submission[]; // Rows of `history` fetched past the snapshot's page
   bookmarks: Submission[];
+  // Cursors of the pages past what's loaded (null once the whole list is)
+  historyCursor: string | null;
+  bookmarksCursor: string | null;
   spotlight: Submission[];
   currentTrack: Submission | null;
   isLive: boolean;
@@ -43,6 +65,7 @@ interface QueueState {
   giveawayWinner: GiveawayWinner | null;
   connect: (token: string, reviewerId: string) => void;
   fetchInitialStateHttp: (reviewerId: string) => Promise<void>;
+  loadOlder: (reviewerId: string, list: PagedList, all?: boolean) => Promise<void>;
   disconnect: () => void;
   setCurrentTrack: (track: Submission | null) => void;
   updateSubmission: (updatedSubmission: Submission) => void;
@@ -58,7 +81,10 @@ export const useQueueStore = create<QueueState>()(
       socketStatus: 'disconnected',
       queue: [],
       history: [],
+      olderHistory: [],
       bookmarks: [],
+      historyCursor: null,
+      bookmarksCursor: null,
       spotlight: [],
       currentTrack: null,
       isLive: false,
@@ -72,7 +98,10 @@ export const useQueueStore = create<QueueState>()(
           set({
             queue: response.data.queue || [],
             history: response.data.history || [],
+            olderHistory: [],
             bookmarks: response.data.bookmarks || [],
+            historyCursor: response.data.history_cursor || null,
+            bookmarksCursor: response.data.bookmarks_cursor || null,
             spotlight: response.data.spotlight || [],
             // Set the current track from the response, or fallback to first in queue if not provided (legacy behavior, though backend now provides it)
             currentTrack: response.data.current_track || response.data.queue?.[0] || null,
@@ -84,6 +113,32 @@ export const useQueueStore = create<QueueState>()(
         }
       },
 
+      loadOlder: async (reviewerId, list, all = false) => {
+        // The snapshot carries the newest page only; older ones are read when the
+        // reviewer asks for them (or, with `all`, when a search needs the whole list)
+        const cursor = list === 'history' ? get().historyCursor : get().bookmarksCursor;
+        if (!cursor || loadingOlder.has(list)) return;
+        loadingOlder.add(list);
+        try {
+          let older: Submission[];
+          let next: string | null = null;
+          if (all) {
+            older = await fetchAllPages<Submission>(PAGED_URLS[list](reviewerId), {}, cursor);
+          } else {
+            const response = await api.get<Submission[]>(PAGED_URLS[list](reviewerId), { params: { cursor } });
+            older = response.data;
+            next = nextCursor(response);
+          }
+          set((current) => list === 'history'
+            ? { history: appendNew(current.history, older), olderHistory: [...current.olderHistory, ...older], historyCursor: next }
+            : { bookmarks: appendNew(current.bookmarks, older), bookmarksCursor: next });
+        } catch (error) {
+          console.error(`Failed to fetch older ${list}:`, error);
+        } finally {
+          loadingOlder.delete(list);
+        }
+      },
+
       connect: (token, reviewerId) => {
         // Check environment variable or window flag (for testing)
         const disableSocket = import.meta.env.VITE_DISABLE_SOCKETIO === 'true' ||
@@ -115,7 +170,7 @@ export const useQueueStore = create<QueueState>()(
         });
 
         newSocket.on('disconnect', () => {
-          set({ socket: null, socketStatus: 'disconnected', queue: [], history: [], bookmarks: [], spotlight: [], currentTrack: null, isLive: false, giveawayState: null, giveawayWinner: null });
+          set({ socket: null, socketStatus: 'disconnected', queue: [], history: [], olderHistory: [], bookmarks: [], historyCursor: null, bookmarksCursor: null, spotlight: [], currentTrack: null, isLive: false, giveawayState: null, giveawayWinner: null });
         });
 
         newSocket.on('connect_error', (error) => {
@@ -141,7 +196,11 @@ export const useQueueStore = create<QueueState>()(
           set({
             queue: state.queue || [],
             history: state.history || [],
+            olderHistory: [],
             bookmarks: state.bookmarks || [],
+            // Public overlays can't read the reviewer-only lists
+            historyCursor: token ? state.history_cursor || null : null,
+            bookmarksCursor: token ? state.bookmarks_cursor || null : null,
             spotlight: state.spotlight || [],
             currentTrack: state.current_track || state.queue?.[0] || null,
             isLive: state.is_live || false,
@@ -150,8 +209,8 @@ export const useQueueStore = create<QueueState>()(
         });
 
         newSocket.on('queue_updated', (newQueue: Submission[]) => set({ queue: newQueue }));
-        newSocket.on('history_updated', (newHistory: Submission[]) => set({ history: newHistory }));
-        newSocket.on('history_updated', (newHistory: Submission[]) => set({ history: newHistory }));
+        // Updates carry the newest page; rows loaded from older pages are kept behind it
+        newSocket.on('history_updated', (newHistory: Submission[]) => set((state) => ({ history: appendNew(newHistory, state.olderHistory) })));
         newSocket.on('current_track_updated', (track: Submission | null) => {
           // If we receive a null update (clearing player) but we have a track loaded locally,
           // ignore it to prevent interrupting the reviewer's preview/playback.
@@ -175,7 +234,10 @@ export const useQueueStore = create<QueueState>()(
           socketStatus: 'disconnected',
           queue: [],
           history: [],
+          olderHistory: [],
           bookmarks: [],
+          historyCursor: null,
+          bookmarksCursor: null,
           spotlight: [],
           currentTrack: null,
           giveawayState: null,
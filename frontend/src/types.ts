@@ -172,6 +172,8 @@ export interface FullQueueState {
   spotlight: Submission[];
   current_track: Submission | null;
   is_live: boolean;
+  history_cursor?: string | null;
+  bookmarks_cursor?: string | null;
 }
 
 export interface SmartSubmissionItem {
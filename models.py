@@ -8,7 +8,9 @@ from sqlalchemy import (
     Boolean,
     Float,
     BigInteger,
-    Numeric
+    Numeric,
+    Table,
+    UniqueConstraint
 )
 from sqlalchemy.orm import declarative_base, relationship
 from sqlalchemy.sql import func
@@ -101,6 +103,9 @@ class Reviewer(Base):
     avatar_url = Column(String, nullable=True)
     bio = Column(String, nullable=True)
     community_goal_cooldown_minutes = Column(Integer, default=5, nullable=False)
+    # Currently playing submission. Deliberately not a FK: submissions already
+    # reference reviewers, and a cycle would complicate inserts and archiving.
+    active_track_id = Column(Integer, nullable=True, index=True)
 
     user = relationship("User", back_populates="reviewer_profile")
     submissions = relationship("Submission", back_populates="reviewer")
@@ -169,7 +174,60 @@ class Submission(Base):
     user = relationship("User", back_populates="submissions")
     session = relationship("ReviewSession", back_populates="submissions")
 
-    __table_args__ = (Index("ix_submission_reviewer_id_status", "reviewer_id", "status"),)
+    __table_args__ = (
+        # Status lookups and keyset pagination of history (supersedes (reviewer_id, status))
+        Index("ix_submissions_reviewer_id_status_submitted_at_id", "reviewer_id", "status", "submitted_at", "id"),
+        Index("ix_submissions_user_id_submitted_at_id", "user_id", "submitted_at", "id"),
+        # Pending queue: reviewer_id, status IN (...), ORDER BY priority_value DESC, submitted_at
+        Index("ix_submissions_pending_queue", "reviewer_id", "status", priority_value.desc(), "submitted_at"),
+        # Per-user duplicate checks on submit
+        Index("ix_submissions_duplicate_hash", "user_id", "reviewer_id", "file_hash", "submitted_at"),
+        Index("ix_submissions_duplicate_url", "user_id", "reviewer_id", "track_url", "submitted_at"),
+        # Flag lists only ever read flagged rows, so they get small partial indexes
+        Index(
+            "ix_submissions_bookmarked", "reviewer_id", "submitted_at", "id",
+            postgresql_where=bookmarked == True, sqlite_where=bookmarked == True
+        ),
+        Index(
+            "ix_submissions_spotlighted", "reviewer_id", "submitted_at", "id",
+            postgresql_where=spotlighted == True, sqlite_where=spotlighted == True
+        ),
+        Index(
+            "ix_submissions_spotlighted_all", "submitted_at", "id",
+            postgresql_where=spotlighted == True, sqlite_where=spotlighted == True
+        ),
+        # Ids must never be reused once rows move to submissions_archive
+        {"sqlite_autoincrement": True},
+    )
+
+
+class SubmissionArchive(Base):
+    """
+    Cold storage for archived/rejected submissions. Same columns (and ids) as
+    Submission, so rows can be moved with INSERT ... SELECT and read back
+    through the same schemas.
+    """
+    __table__ = Table(
+        "submissions_archive",
+        Base.metadata,
+        *(
+            Column(
+                column.name, column.type, *(ForeignKey(fk.target_fullname) for fk in column.foreign_keys),
+                primary_key=column.primary_key, nullable=column.nullable, index=column.index
+            )
+            for column in Submission.__table__.columns
+        ),
+        Index("ix_submissions_archive_reviewer_id_status", "reviewer_id", "status"),
+        Index("ix_submissions_archive_user_id_submitted_at", "user_id", "submitted_at"),
+    )
+
+    reviewer = relationship("Reviewer")
+    user = relationship("User")
+    session = relationship("ReviewSession")
+
+    @property
+    def is_community_winner(self):
+        return "[Free Skip Winner]" in (self.notes or "")
 
 
 class EconomyConfig(Base):
@@ -190,11 +248,18 @@ class Transaction(Base):
     amount = Column(Integer, nullable=False)
     reason = Column(String, nullable=False)
     meta_data = Column(JSON, nullable=True)
-    timestamp = Column(DateTime(timezone=True), server_default=func.now())
+    # Set client-side too so SQLite stores the same format as cursor values (see services/pagination.py)
+    timestamp = Column(DateTime(timezone=True), default=lambda: datetime.datetime.now(datetime.UTC), server_default=func.now())
 
     reviewer = relationship("Reviewer", back_populates="transactions")
     user = relationship("User", back_populates="transactions")
 
+    __table_args__ = (
+        # Keyset pagination (newest first) per user and per reviewer
+        Index("ix_transactions_user_id_timestamp_id", "user_id", "timestamp", "id"),
+        Index("ix_transactions_reviewer_id_timestamp_id", "reviewer_id", "timestamp", "id"),
+    )
+
 
 class PlatformFee(Base):
     __tablename__ = "platform_fees"
@@ -268,6 +333,15 @@ class TikTokInteraction(Base):
     session = relationship("ReviewSession")
     tiktok_account = relationship("TikTokAccount")
 
+    __table_args__ = (
+        # Per-host event timelines
+        Index("ix_tiktok_interactions_host_type_timestamp", "host_handle", "interaction_type", "timestamp"),
+        # Viewer stats aggregate straight from the index (value included)
+        Index("ix_tiktok_interactions_type_host_session_value", "interaction_type", "host_handle", "session_id", "value"),
+        # Latest interaction per TikTok account
+        Index("ix_tiktok_interactions_account_timestamp", "tiktok_account_id", "timestamp"),
+    )
+
 
 class TikTokRankUpdate(Base):
     __tablename__ = "tiktok_rank_updates"
@@ -329,8 +403,135 @@ class UserAchievement(Base):
 
 
 
+class UserAchievementProgress(Base):
+    """Latest (best) value per achievement category for a user; what progress bars read."""
+    __tablename__ = "user_achievement_progress"
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    category = Column(String, primary_key=True)
+    value = Column(BigInteger, default=0, nullable=False)
+    updated_at = Column(DateTime(timezone=True), default=lambda: datetime.datetime.now(datetime.UTC), nullable=False)
+
+    __table_args__ = (
+        Index('ix_user_achievement_progress_user_updated', 'user_id', 'updated_at'),
+    )
+
+
 class GlobalConfig(Base):
     __tablename__ = "global_configs"
     key = Column(String, primary_key=True, index=True)
     value = Column(JSON, nullable=True)
 
+
+
+class OutboxEvent(Base):
+    """
+    Side effect (achievements, XP, broadcasts...) recorded in the same transaction
+    as the change that caused it, and drained by services.outbox_service workers.
+    """
+    __tablename__ = "outbox_events"
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String, nullable=False)
+    payload = Column(JSON, nullable=False)
+    idempotency_key = Column(String, nullable=False, unique=True)
+    partition_key = Column(String, nullable=True) # Events sharing a key run one at a time, in order
+    status = Column(String, default="pending", nullable=False) # pending, processing, done, dead
+    attempts = Column(Integer, default=0, nullable=False)
+    available_at = Column(DateTime(timezone=True), default=lambda: datetime.datetime.now(datetime.UTC), nullable=False)
+    last_error = Column(String, nullable=True)
+    created_at = Column(DateTime(timezone=True), default=lambda: datetime.datetime.now(datetime.UTC))
+    processed_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index('ix_outbox_events_status_available_at', 'status', 'available_at'),
+    )
+
+
+class ReviewerLiveState(Base):
+    """
+    High-frequency per-reviewer counters (track votes and the vote goal), kept
+    out of Reviewer.configuration so writers can increment in place.
+    """
+    __tablename__ = "reviewer_live_state"
+    reviewer_id = Column(Integer, ForeignKey("reviewers.id"), primary_key=True)
+    fire_votes = Column(BigInteger, default=0, nullable=False)
+    trash_votes = Column(BigInteger, default=0, nullable=False)
+    vote_goal_current = Column(BigInteger, default=0, nullable=False)
+    vote_goal_target = Column(Integer, nullable=True) # None = no vote goal
+    updated_at = Column(DateTime(timezone=True), default=lambda: datetime.datetime.now(datetime.UTC), nullable=False)
+
+
+class CommunityGoal(Base):
+    """One community goal (LIKES, SHARES, ...) per reviewer; see services.giveaway_service."""
+    __tablename__ = "community_goal"
+    id = Column(Integer, primary_key=True, index=True)
+    reviewer_id = Column(Integer, ForeignKey("reviewers.id"), nullable=False)
+    goal_type = Column(String, nullable=False)
+    current = Column(BigInteger, default=0, nullable=False)
+    target = Column(Integer, nullable=False)
+    description = Column(String, nullable=True)
+    is_active = Column(Boolean, default=True, nullable=False)
+    cooldown_end = Column(DateTime(timezone=True), nullable=True)
+    round = Column(Integer, default=0, nullable=False) # Bumped on every reset; guards double lotteries
+    updated_at = Column(DateTime(timezone=True), default=lambda: datetime.datetime.now(datetime.UTC), nullable=False)
+
+    tickets = relationship("GoalTicket", back_populates="goal", cascade="all, delete-orphan")
+
+    __table_args__ = (
+        UniqueConstraint("reviewer_id", "goal_type", name="uq_community_goal_reviewer_id_goal_type"),
+    )
+
+
+class GoalTicket(Base):
+    """A contributor's tally for the current round of a community goal."""
+    __tablename__ = "goal_ticket"
+    goal_id = Column(Integer, ForeignKey("community_goal.id", ondelete="CASCADE"), primary_key=True)
+    holder = Column(String, primary_key=True) # TikTok unique_id
+    count = Column(BigInteger, default=0, nullable=False)
+
+    goal = relationship("CommunityGoal", back_populates="tickets")
+
+
+class GiveawayDraw(Base):
+    """
+    Audit record of one community goal draw: the finished round's tickets,
+    the holders that could win and the seed, so services.lottery.draw_winner()
+    can be replayed. Written in the transaction that clears the tickets.
+    """
+    __tablename__ = "giveaway_draws"
+    id = Column(Integer, primary_key=True, index=True)
+    reviewer_id = Column(Integer, ForeignKey("reviewers.id"), nullable=False)
+    goal_type = Column(String, nullable=False)
+    round = Column(Integer, nullable=False) # The round that finished
+    seed = Column(BigInteger, nullable=False)
+    tickets = Column(JSON, nullable=False) # holder -> ticket count
+    eligible_holders = Column(JSON, nullable=False) # Sorted holders with a free submission
+    free_submission_ids = Column(JSON, nullable=False) # Queue order; the uniform fallback picks from these
+    winner_holder = Column(String, nullable=True) # None when no ticket holder was eligible
+    winner_user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    winner_submission_id = Column(Integer, nullable=True) # No FK: submissions move to the archive table
+    drawn_at = Column(DateTime(timezone=True), default=lambda: datetime.datetime.now(datetime.UTC), nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("reviewer_id", "goal_type", "round", name="uq_giveaway_draws_reviewer_id_goal_type_round"),
+    )
+
+
+class Blob(Base):
+    """
+    A stored object in R2, addressed by the SHA-256 of its bytes (see
+    services.blob_service). refcount is the number of submissions whose
+    track_url points at it; unreferenced blobs are removed by the collector.
+    """
+    __tablename__ = "blobs"
+    sha256 = Column(String(64), primary_key=True)
+    size = Column(BigInteger, nullable=True) # Unknown for blobs backfilled from old submissions
+    object_key = Column(String, unique=True, nullable=False)
+    content_type = Column(String, nullable=True)
+    refcount = Column(Integer, default=0, nullable=False)
+    dedup_hits = Column(Integer, default=0, nullable=False) # Uploads that skipped the R2 write
+    created_at = Column(DateTime(timezone=True), default=lambda: datetime.datetime.now(datetime.UTC), nullable=False)
+    updated_at = Column(DateTime(timezone=True), default=lambda: datetime.datetime.now(datetime.UTC), nullable=False)
+
+    __table_args__ = (
+        Index("ix_blobs_refcount_updated_at", "refcount", "updated_at"),
+    )
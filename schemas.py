@@ -55,8 +55,8 @@ class Transaction(BaseModel):
     id: int
     reviewer_id: Optional[int] = None
     user_id: Optional[int] = None
-    event_name: str
-    coin_amount: int
+    amount: int
+    reason: str
     timestamp: datetime.datetime
     model_config = ConfigDict(from_attributes=True)
 
@@ -536,6 +536,9 @@ class FullQueueState(BaseModel):
     is_live: bool = False
     giveaway_state: Optional[GiveawayState] = None
     community_goals: List[GiveawayState] = []
+    # Continuation cursors for GET .../queue/played and .../bookmarks (None = complete)
+    history_cursor: Optional[str] = None
+    bookmarks_cursor: Optional[str] = None
 
 class FreeQueueData(BaseModel):
     display_limit: int
@@ -4,6 +4,7 @@ import logging
 from sqlalchemy import select
 from database import AsyncSessionLocal
 from models import AchievementDefinition
+from services import achievement_service
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -535,6 +536,9 @@ async def seed_achievements():
                     exists.role_icon = data["role_icon"]
                     # We don't overwrite ID or category typically unless migration needed
 
+            # Running bots/APIs reload their achievement rule index on next use
+            await achievement_service.mark_definitions_changed(db)
+
             await db.commit()
             logger.info("Seeding complete.")
 
@@ -1,12 +1,347 @@
+"""
+Achievement engine.
+
+Definitions are loaded once into a rule index: per category, thresholds are
+kept sorted so "which achievements does value V reach" is one bisect, and each
+definition owns a bit so a user's unlocked set is a single int. Unlocked
+bitsets are cached per user, so a trigger that unlocks nothing costs no queries.
+
+Many (user, category, value) triggers are evaluated in one evaluate() call and
+all resulting unlocks are written with one batched insert and commit. The same
+commit raises the users' progress vectors (user_achievement_progress), which
+is what the achievements API reads.
+
+The index reloads when seed_achievements.py (or anything else calling
+mark_definitions_changed) bumps the version stored in GlobalConfig.
+"""
+import datetime
 import logging
+import time
 import uuid
+from bisect import bisect_right
+from collections import OrderedDict
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
 from sqlalchemy import select, func
-from sqlalchemy.orm import joinedload
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.ext.asyncio import AsyncSession
+
 import models
+from services import archive_service
 
 logger = logging.getLogger(__name__)
 
+DEFINITIONS_VERSION_KEY = "achievement_definitions_version"
+RULES_RECHECK_SECONDS = 30  # How often other processes' seed runs are noticed
+USER_CACHE_SIZE = 10_000
+USER_CACHE_TTL_SECONDS = 600
+TOTAL_CATEGORY = "TOTAL_ACHIEVEMENTS"
+DEFINITION_FIELDS = (
+    "id", "slug", "display_name", "description", "category", "threshold_value", "tier",
+    "is_hidden", "discord_role_id", "icon_url", "role_color", "role_icon",
+)
+
+
+class Trigger(NamedTuple):
+    user_id: int
+    category: str
+    value: Optional[int] = None
+    slug: Optional[str] = None
+
+
+class _Category:
+    __slots__ = ("thresholds", "bits", "prefix_masks")
+
+    def __init__(self, rules: List[Tuple[int, int]]):
+        rules.sort()
+        self.thresholds = [threshold for threshold, _ in rules]
+        self.bits = [bit for _, bit in rules]
+        # prefix_masks[k] = bits of the k lowest thresholds
+        self.prefix_masks = [0]
+        for bit in self.bits:
+            self.prefix_masks.append(self.prefix_masks[-1] | (1 << bit))
+
+    def reached(self, value: int) -> int:
+        return self.prefix_masks[bisect_right(self.thresholds, value)]
+
+
+class RuleIndex:
+    def __init__(self, definitions, version=None):
+        self.version = version
+        self.ids: List[str] = []
+        self.slugs: List[str] = []
+        self.bit_by_id: Dict[str, int] = {}
+        self.slug_bits: Dict[Tuple[str, str], int] = {}  # (category, slug) -> bit
+        self.definitions: List[dict] = []
+        rules: Dict[str, List[Tuple[int, int]]] = {}
+        for bit, ach in enumerate(sorted(definitions, key=lambda d: d.id)):
+            self.definitions.append({column: getattr(ach, column) for column in DEFINITION_FIELDS})
+            self.ids.append(ach.id)
+            self.slugs.append(ach.slug)
+            self.bit_by_id[ach.id] = bit
+            self.slug_bits[(ach.category, ach.slug)] = bit
+            rules.setdefault(ach.category, []).append((ach.threshold_value, bit))
+        self.categories = {category: _Category(r) for category, r in rules.items()}
+
+    def mask_of(self, achievement_ids: Iterable[str]) -> int:
+        mask = 0
+        for achievement_id in achievement_ids:
+            bit = self.bit_by_id.get(achievement_id)
+            if bit is not None:
+                mask |= 1 << bit
+        return mask
+
+    def candidates(self, trigger: Trigger) -> int:
+        """Bits a trigger qualifies for, before removing what the user already has."""
+        if trigger.value is not None:
+            category = self.categories.get(trigger.category)
+            if category is None:
+                return 0
+            mask = category.reached(trigger.value)
+            if trigger.slug:
+                bit = self.slug_bits.get((trigger.category, trigger.slug))
+                mask &= (1 << bit) if bit is not None else 0
+            return mask
+        # No value: the caller verified the condition for this specific achievement
+        if trigger.slug:
+            bit = self.slug_bits.get((trigger.category, trigger.slug))
+            return 1 << bit if bit is not None else 0
+        return 0
+
+
+class _UserState:
+    __slots__ = ("mask", "total", "progress", "loaded_at")
+
+    def __init__(self, mask: int, total: int):
+        self.mask = mask
+        self.total = total  # All unlock rows, including ones for retired definitions
+        self.progress: Dict[str, int] = {}  # Progress values this process has already persisted
+        self.loaded_at = time.monotonic()
+
+
+_rules: Optional[RuleIndex] = None
+_rules_checked_at = 0.0
+_users: "OrderedDict[int, _UserState]" = OrderedDict()
+
+
+def invalidate(user_id: Optional[int] = None) -> None:
+    """Drops cached unlock state (one user, or everything including the rule index)."""
+    global _rules
+    if user_id is None:
+        _rules = None
+        _users.clear()
+    else:
+        _users.pop(user_id, None)
+
+
+async def _definitions_version(db: AsyncSession):
+    result = await db.execute(
+        select(models.GlobalConfig.value).filter(models.GlobalConfig.key == DEFINITIONS_VERSION_KEY)
+    )
+    return result.scalar()
+
+
+async def mark_definitions_changed(db: AsyncSession) -> None:
+    """Bumps the definitions version (in the caller's transaction) so every process reloads its rule index."""
+    config = await db.get(models.GlobalConfig, DEFINITIONS_VERSION_KEY)
+    if config is None:
+        config = models.GlobalConfig(key=DEFINITIONS_VERSION_KEY)
+        db.add(config)
+    config.value = uuid.uuid4().hex
+    invalidate()
+
+
+async def get_rules(db: AsyncSession) -> RuleIndex:
+    global _rules, _rules_checked_at
+    now = time.monotonic()
+    if _rules is not None and now - _rules_checked_at < RULES_RECHECK_SECONDS:
+        return _rules
+    version = await _definitions_version(db)
+    _rules_checked_at = now
+    if _rules is None or _rules.version != version:
+        definitions = (await db.execute(select(models.AchievementDefinition))).scalars().all()
+        _rules = RuleIndex(definitions, version)
+        _users.clear()  # Bit positions changed
+    return _rules
+
+
+async def _load_users(db: AsyncSession, rules: RuleIndex, user_ids: Iterable[int]) -> Dict[int, _UserState]:
+    """Unlock state for existing users; cached states are reused, the rest load in one query."""
+    now = time.monotonic()
+    states: Dict[int, _UserState] = {}
+    missing = []
+    for user_id in set(user_ids):
+        state = _users.get(user_id)
+        if state is not None and now - state.loaded_at < USER_CACHE_TTL_SECONDS:
+            _users.move_to_end(user_id)
+            states[user_id] = state
+        else:
+            missing.append(user_id)
+
+    if missing:
+        rows = await db.execute(
+            select(models.User.id, models.UserAchievement.achievement_id)
+            .outerjoin(models.UserAchievement, models.UserAchievement.user_id == models.User.id)
+            .filter(models.User.id.in_(missing))
+        )
+        unlocked: Dict[int, List[str]] = {}
+        for user_id, achievement_id in rows.all():
+            ids = unlocked.setdefault(user_id, [])
+            if achievement_id is not None:
+                ids.append(achievement_id)
+        for user_id, ids in unlocked.items():
+            state = _UserState(rules.mask_of(ids), len(ids))
+            _users[user_id] = state
+            states[user_id] = state
+        while len(_users) > USER_CACHE_SIZE:
+            _users.popitem(last=False)
+    return states
+
+
+async def _refresh(db: AsyncSession, rules: RuleIndex, states: Dict[int, _UserState], pending: Dict[int, int]) -> None:
+    """
+    Re-reads the unlocks of users about to receive new ones (our cache may be
+    behind another process) and drops what they already have.
+    """
+    rows = await db.execute(
+        select(models.UserAchievement.user_id, models.UserAchievement.achievement_id)
+        .filter(models.UserAchievement.user_id.in_(list(pending)))
+    )
+    unlocked: Dict[int, List[str]] = {user_id: [] for user_id in pending}
+    for user_id, achievement_id in rows.all():
+        unlocked[user_id].append(achievement_id)
+    for user_id, ids in unlocked.items():
+        state = states[user_id]
+        state.mask = rules.mask_of(ids)
+        state.total = len(ids)
+        state.loaded_at = time.monotonic()
+        pending[user_id] &= ~state.mask
+        if not pending[user_id]:
+            del pending[user_id]
+
+
+async def _upsert_progress(db: AsyncSession, progress: Dict[Tuple[int, str], int]) -> None:
+    """Raises each (user, category) progress value to at least the given one."""
+    now = datetime.datetime.now(datetime.timezone.utc)
+    table = models.UserAchievementProgress.__table__
+    rows = [
+        {"user_id": user_id, "category": category, "value": value, "updated_at": now}
+        for (user_id, category), value in progress.items()
+    ]
+    dialect = db.bind.dialect.name if db.bind is not None else None
+    if dialect in ("postgresql", "sqlite"):
+        insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        stmt = insert(table).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["user_id", "category"],
+            set_={"value": stmt.excluded.value, "updated_at": stmt.excluded.updated_at},
+            where=table.c.value < stmt.excluded.value
+        )
+        await db.execute(stmt)
+        return
+    for row in rows:
+        existing = await db.get(models.UserAchievementProgress, (row["user_id"], row["category"]))
+        if existing is None:
+            db.add(models.UserAchievementProgress(**row))
+        elif existing.value < row["value"]:
+            existing.value = row["value"]
+            existing.updated_at = now
+
+
+async def evaluate(db: AsyncSession, triggers: Iterable[Trigger]) -> List[models.UserAchievement]:
+    """
+    Checks many triggers at once, records their values in the users' progress
+    vectors and persists every new unlock, all in one commit.
+    Returns the created UserAchievement rows (empty if nothing unlocked).
+    """
+    triggers = list(triggers)
+    if not triggers:
+        return []
+    rules = await get_rules(db)
+    states = await _load_users(db, rules, (t.user_id for t in triggers))
+
+    progress: Dict[Tuple[int, str], int] = {}
+    pending: Dict[int, int] = {}
+    for trigger in triggers:
+        state = states.get(trigger.user_id)
+        if state is None:
+            continue
+        if trigger.value is not None and trigger.value > state.progress.get(trigger.category, -1):
+            key = (trigger.user_id, trigger.category)
+            progress[key] = max(progress.get(key, 0), trigger.value)
+        new_bits = rules.candidates(trigger) & ~state.mask & ~pending.get(trigger.user_id, 0)
+        if new_bits:
+            pending[trigger.user_id] = pending.get(trigger.user_id, 0) | new_bits
+
+    if pending:
+        await _refresh(db, rules, states, pending)
+
+    now = datetime.datetime.now(datetime.timezone.utc)
+    created: List[models.UserAchievement] = []
+    while pending:
+        for user_id, bits in pending.items():
+            state = states[user_id]
+            while bits:
+                bit = (bits & -bits).bit_length() - 1
+                bits &= bits - 1
+                logger.info(f"Unlocking achievement {rules.slugs[bit]} for user {user_id}")
+                created.append(models.UserAchievement(
+                    id=str(uuid.uuid4()),
+                    user_id=user_id,
+                    achievement_id=rules.ids[bit],
+                    unlocked_at=now,
+                    discord_sync_status="PENDING"
+                ))
+                state.mask |= 1 << bit
+                state.total += 1
+
+        # "Collector" (Total Achievements) depends on what was just unlocked
+        pending = {}
+        total_category = rules.categories.get(TOTAL_CATEGORY)
+        for user_id in {ua.user_id for ua in created}:
+            state = states[user_id]
+            progress[(user_id, TOTAL_CATEGORY)] = state.total
+            if total_category is not None:
+                new_bits = total_category.reached(state.total) & ~state.mask
+                if new_bits:
+                    pending[user_id] = new_bits
+
+    if not progress and not created:
+        return []
+
+    if progress:
+        await _upsert_progress(db, progress)
+    db.add_all(created)
+    try:
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        for user_id in {user_id for user_id, _ in progress} | {ua.user_id for ua in created}:
+            invalidate(user_id)
+        raise
+    for (user_id, category), value in progress.items():
+        state = states[user_id]
+        state.progress[category] = max(state.progress.get(category, 0), value)
+    return created
+
+
+async def get_progress(db: AsyncSession, user_id: int) -> Dict[str, Tuple[int, datetime.datetime]]:
+    """The user's progress vector: category -> (value, updated_at)."""
+    rows = await db.execute(
+        select(
+            models.UserAchievementProgress.category,
+            models.UserAchievementProgress.value,
+            models.UserAchievementProgress.updated_at
+        ).filter(models.UserAchievementProgress.user_id == user_id)
+    )
+    return {category: (value, updated_at) for category, value, updated_at in rows.all()}
+
+
+async def get_definitions(db: AsyncSession) -> List[dict]:
+    """All achievement definitions (cached with the rule index)."""
+    return (await get_rules(db)).definitions
+
+
 async def trigger_achievement(db: AsyncSession, user_id: int, category: str, value: int = None, specific_slug: str = None):
     """
     Checks and unlocks achievements for a given user and category.
@@ -21,66 +356,88 @@ async def trigger_achievement(db: AsyncSession, user_id: int, category: str, val
                        (useful for one-off events like 'Demo Tape' logic handled externally).
     """
     try:
-        user = await db.get(models.User, user_id)
-        if not user:
-            return
-
-        # Fetch all definitions for this category
-        stmt = select(models.AchievementDefinition).filter(models.AchievementDefinition.category == category)
-        if specific_slug:
-            stmt = stmt.filter(models.AchievementDefinition.slug == specific_slug)
-
-        result = await db.execute(stmt)
-        definitions = result.scalars().all()
-
-        if not definitions:
-            return
-
-        # Fetch existing unlocks for this user to avoid duplicates
-        existing_stmt = select(models.UserAchievement.achievement_id)\
-            .filter(models.UserAchievement.user_id == user_id)
-        existing_result = await db.execute(existing_stmt)
-        unlocked_ids = set(existing_result.scalars().all())
-
-        newly_unlocked_count = 0
-
-        for ach in definitions:
-            if ach.id in unlocked_ids:
-                continue
-
-            # Check threshold
-            # If value is provided, we check if value >= threshold
-            # If value is None, we assume the caller has verified the condition (e.g. specific event triggers)
-            should_unlock = False
-            if value is not None:
-                if value >= ach.threshold_value:
-                    should_unlock = True
-            else:
-                # If no value passed, strictly rely on specific_slug or manual logic
-                if specific_slug and ach.slug == specific_slug:
-                    should_unlock = True
-
-            if should_unlock:
-                logger.info(f"Unlocking achievement {ach.slug} for user {user.username}")
-                user_ach = models.UserAchievement(
-                    id=str(uuid.uuid4()),
-                    user_id=user_id,
-                    achievement_id=ach.id,
-                    discord_sync_status="PENDING"
-                )
-                db.add(user_ach)
-                unlocked_ids.add(ach.id) # Add to set to prevent double unlock in same loop if duplicates exist
-                newly_unlocked_count += 1
+        await evaluate(db, [Trigger(user_id, category, value, specific_slug)])
+    except Exception as e:
+        logger.error(f"Error checking achievements for user {user_id}: {e}")
 
-        if newly_unlocked_count > 0:
-            await db.commit()
 
-            # Recursive check for "Collector" (Total Achievements)
-            # Only if we just unlocked something, to prevent infinite loops
-            if category != "TOTAL_ACHIEVEMENTS":
-                total_stmt = select(func.count(models.UserAchievement.id)).filter(models.UserAchievement.user_id == user_id)
-                total = (await db.execute(total_stmt)).scalar()
-                await trigger_achievement(db, user_id, "TOTAL_ACHIEVEMENTS", value=total)
+async def check_submission_created(db: AsyncSession, submission_id: int):
+    """Creation-time (Category A) achievements for a committed submission."""
+    await check_submissions_created(db, [submission_id])
 
-    except Exception as e:
-        logger.error(f"Error checking achievements for user {user_id}: {e}")
+
+async def check_submissions_created(db: AsyncSession, submission_ids: List[int]):
+    """
+    Creation-time achievements for submissions one user made together (e.g. a
+    Double Feature): the counts are read and evaluated once for the whole batch.
+    """
+    Submission = models.Submission
+    submissions = (await db.execute(select(Submission).filter(Submission.id.in_(submission_ids)))).scalars().all()
+    submissions = [s for s in submissions if s.user_id is not None]
+    if not submissions:
+        return
+    user_id = submissions[0].user_id
+    triggers = []
+
+    # 1. Submission count / Demo Tape (the user's first submission, or first batch)
+    Submission = archive_service.all_submissions() # Lifetime counts include cold history
+    count_stmt = select(func.count(Submission.id)).filter(Submission.user_id == user_id)
+    sub_count = (await db.execute(count_stmt)).scalar() or 0
+    triggers.append(Trigger(user_id, "SUBMISSION_COUNT", sub_count))
+    if sub_count == len(submissions):
+        triggers.append(Trigger(user_id, "SUBMISSION_COUNT", slug="demo_tape"))
+
+    for submission in submissions:
+        title = (submission.track_title or "").lower()
+        url = (submission.track_url or "").lower()
+
+        # 2. Producer Tag
+        if "(prod." in title:
+            triggers.append(Trigger(user_id, "METADATA_TAG", slug="producer_tag"))
+
+        # 3. Collaborator
+        if "feat." in title or "ft." in title:
+            triggers.append(Trigger(user_id, "METADATA_TAG", slug="collaborator"))
+
+        # 4. Link Types
+        if "soundcloud.com" in url:
+            triggers.append(Trigger(user_id, "LINK_TYPE", slug="soundcloud_rapper"))
+        elif "spotify.com" in url or "apple.com" in url:
+            triggers.append(Trigger(user_id, "LINK_TYPE", slug="dsp_pro"))
+
+    # 5. Genre Bender (Unique Tags)
+    if any(submission.genre for submission in submissions):
+        genre_stmt = select(func.count(func.distinct(Submission.genre))).filter(
+            Submission.user_id == user_id, Submission.genre.isnot(None), Submission.genre != ""
+        )
+        unique_genres = (await db.execute(genre_stmt)).scalar() or 0
+        triggers.append(Trigger(user_id, "GENRE_COUNT", unique_genres))
+
+    await evaluate(db, dict.fromkeys(triggers))
+
+
+async def check_submission_reviewed(db: AsyncSession, submission_id: int):
+    """Review-time (Category A) achievements for a committed review."""
+    submission = await db.get(models.Submission, submission_id)
+    if not submission or submission.user_id is None or submission.score is None:
+        return
+    user_id = submission.user_id
+    triggers = []
+
+    # 1. Critics Choice
+    if submission.score >= 10:
+        triggers.append(Trigger(user_id, "REVIEW_SCORE", 10)) # Checks threshold
+
+    # 2. The Comeback (Score <4 then >8), against the user's previous scored submission
+    Submission = archive_service.all_submissions()
+    previous_stmt = select(Submission.score).filter(
+        Submission.user_id == user_id,
+        Submission.id != submission.id,
+        Submission.score.isnot(None),
+        Submission.submitted_at <= submission.submitted_at
+    ).order_by(Submission.submitted_at.desc(), Submission.id.desc()).limit(1)
+    previous_score = (await db.execute(previous_stmt)).scalar()
+    if previous_score is not None and previous_score < 4 and submission.score > 8:
+        triggers.append(Trigger(user_id, "SCORE_SWING", 1))
+
+    await evaluate(db, triggers)
@@ -0,0 +1,149 @@
+"""
+Hot/cold split for submissions.
+
+Rows are copied into submissions_archive (same columns and ids) and deleted
+from submissions in one transaction, so the hot table and its
+(reviewer_id, status) index only hold live and recent rows. Queue, bookmark,
+spotlight and duplicate checks keep reading the hot table; history and stats
+read through `all_submissions()`, an ORM alias of Submission over
+`submissions UNION ALL submissions_archive` (also created in the database as
+the `submissions_all` view).
+
+Archived or rejected rows older than ARCHIVE_COLD_AFTER_DAYS are moved by a
+background job in batches. Bookmarked and spotlighted rows always stay hot,
+because those lists are read from the hot table.
+"""
+import asyncio
+import datetime
+import logging
+from typing import Optional, Sequence
+
+from sqlalchemy import delete, insert, select, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+import models
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+SUBMISSION_COLUMNS = [column.name for column in models.Submission.__table__.columns]
+COLD_STATUSES = ('archived', 'rejected')
+
+
+def _union():
+    hot = models.Submission.__table__
+    cold = models.SubmissionArchive.__table__
+    return union_all(
+        select(*(hot.c[name] for name in SUBMISSION_COLUMNS)),
+        select(*(cold.c[name] for name in SUBMISSION_COLUMNS)),
+    ).subquery("submissions_all")
+
+
+_all_submissions = aliased(models.Submission, _union(), name="submissions_all")
+
+
+def all_submissions():
+    """Submission mapped over hot + cold rows. Use like models.Submission in select()/filter()."""
+    return _all_submissions
+
+
+def _movable(ids_filter):
+    # Flagged rows are listed from the hot table, so they never move
+    return (
+        ids_filter,
+        models.Submission.bookmarked == False,
+        models.Submission.spotlighted == False,
+    )
+
+
+async def move_to_archive(db: AsyncSession, submission_ids: Sequence[int]) -> int:
+    """Moves the given (unflagged) submissions to the cold table. Caller commits. Returns rows moved."""
+    if not submission_ids:
+        return 0
+    hot = models.Submission.__table__
+    cold = models.SubmissionArchive.__table__
+    await db.execute(
+        insert(cold).from_select(
+            SUBMISSION_COLUMNS,
+            select(*(hot.c[name] for name in SUBMISSION_COLUMNS)).where(*_movable(hot.c.id.in_(submission_ids)))
+        )
+    )
+    result = await db.execute(
+        delete(models.Submission)
+        .where(*_movable(models.Submission.id.in_(submission_ids)))
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount
+
+
+async def move_cold_batch(db: AsyncSession, older_than: datetime.datetime, batch_size: int) -> int:
+    """Moves one batch of old archived/rejected submissions and commits. Returns rows moved."""
+    ids = (await db.execute(
+        select(models.Submission.id)
+        .filter(
+            models.Submission.status.in_(COLD_STATUSES),
+            models.Submission.submitted_at < older_than,
+            models.Submission.bookmarked == False,
+            models.Submission.spotlighted == False
+        )
+        .order_by(models.Submission.id)
+        .limit(batch_size)
+    )).scalars().all()
+    moved = await move_to_archive(db, ids)
+    await db.commit()
+    return moved
+
+
+def _session_factory():
+    # Imported lazily so tests can point database.AsyncSessionLocal elsewhere
+    import database
+    return database.AsyncSessionLocal
+
+
+async def run_cold_mover_once(session_factory=None) -> int:
+    """Moves everything currently eligible, batch by batch. Returns rows moved."""
+    factory = session_factory or _session_factory()
+    older_than = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(days=settings.ARCHIVE_COLD_AFTER_DAYS)
+    total = 0
+    while True:
+        async with factory() as db:
+            moved = await move_cold_batch(db, older_than, settings.ARCHIVE_COLD_BATCH_SIZE)
+        total += moved
+        if moved < settings.ARCHIVE_COLD_BATCH_SIZE:
+            break
+        logger.info(f"Cold mover: {total} submissions moved so far")
+        await asyncio.sleep(settings.ARCHIVE_COLD_BATCH_PAUSE_SECONDS) # Let other writers in
+    if total:
+        logger.info(f"Cold mover: moved {total} submissions to submissions_archive")
+    return total
+
+
+_task: Optional[asyncio.Task] = None
+
+
+async def _cold_mover_loop():
+    while True:
+        try:
+            await run_cold_mover_once()
+        except Exception as e:
+            logger.error(f"Cold mover failed: {e}")
+        await asyncio.sleep(settings.ARCHIVE_COLD_INTERVAL_SECONDS)
+
+
+def start() -> None:
+    """Starts the background cold mover (idempotent; no-op when disabled)."""
+    global _task
+    if settings.ARCHIVE_COLD_ENABLED and (_task is None or _task.done()):
+        _task = asyncio.create_task(_cold_mover_loop())
+
+
+async def stop() -> None:
+    global _task
+    if _task is not None:
+        _task.cancel()
+        try:
+            await _task
+        except asyncio.CancelledError:
+            pass
+        _task = None
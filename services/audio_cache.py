@@ -0,0 +1,393 @@
+"""
+Disk cache for proxied audio (/api/proxy/audio).
+
+Entries live under AUDIO_CACHE_DIR, one file per normalized source URL plus a
+small .json with its content type and size, and are evicted least recently
+used first once the cached bytes exceed AUDIO_CACHE_MAX_BYTES. The cache is
+off while AUDIO_CACHE_DIR is unset.
+
+The first request for a source starts one background fill that downloads the
+whole file. That request and every concurrent one for the same source read
+the file while it is being written (tailing it), so a track going live costs
+one upstream download however many listeners arrive at once, and a listener
+leaving doesn't stop the fill for the others. Range requests are answered
+from the file: complete entries through an mmap of it, entries still filling
+by waiting for the requested bytes to land.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import mmap
+import os
+import re
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Iterator, Mapping, Optional, Set, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from fastapi import HTTPException
+from fastapi.responses import Response, StreamingResponse
+
+from config import settings
+from services import audio_stream
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 256 * 1024
+
+# Returns the upstream URL to fetch and extra request headers (e.g. from yt-dlp)
+Resolver = Callable[[], Awaitable[Tuple[str, Dict[str, str]]]]
+
+
+class _Entry:
+    def __init__(self, key: str, path: str):
+        self.key = key
+        self.path = path
+        self.content_type = "application/octet-stream"
+        self.size: Optional[int] = None # Total length, once known (Content-Length or completion)
+        self.written = 0
+        self.complete = False
+        self.error: Optional[HTTPException] = None
+        self.ready = asyncio.Event() # Headers are in and the file exists, or the fill failed
+        self.progress = asyncio.Condition()
+
+    @property
+    def etag(self) -> str:
+        return f'"{os.path.basename(self.path)[:16]}-{self.size}"'
+
+
+_entries: "OrderedDict[str, _Entry]" = OrderedDict() # Least recently used first
+_fills: Set[asyncio.Task] = set()
+_stored_bytes = 0
+_loaded = False
+_counters = {"requests": 0, "hits": 0, "misses": 0, "bytes_served": 0, "bytes_from_cache": 0, "upstream_fetches": 0, "evictions": 0}
+
+
+def enabled() -> bool:
+    return bool(settings.AUDIO_CACHE_DIR)
+
+
+def normalize_url(url: str) -> str:
+    """
+    The cache key of a source URL: scheme and host lowercased, default port,
+    fragment and presigning parameters (X-Amz-*) dropped, query sorted.
+    Non-HTTP sources (r2://...) are used as given.
+    """
+    url = url.strip()
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    if scheme not in ("http", "https"):
+        return url.split("#", 1)[0]
+    host = (parts.hostname or "").lower()
+    port = parts.port
+    netloc = host if port is None or (scheme, port) in (("http", 80), ("https", 443)) else f"{host}:{port}"
+    query = sorted(
+        (name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not name.lower().startswith("x-amz-")
+    )
+    return urlunsplit((scheme, netloc, parts.path or "/", urlencode(query), ""))
+
+
+def _path_for(key: str) -> str:
+    digest = hashlib.sha256(key.encode()).hexdigest()
+    return os.path.join(settings.AUDIO_CACHE_DIR, digest[:2], digest)
+
+
+def _scan() -> list:
+    """Complete entries on disk, oldest use first; removes leftovers of interrupted fills."""
+    found = []
+    for root, _, files in os.walk(settings.AUDIO_CACHE_DIR):
+        names = set(files)
+        for name in files:
+            path = os.path.join(root, name)
+            if name.endswith(".json"):
+                continue
+            meta_path = f"{path}.json"
+            try:
+                with open(meta_path) as f:
+                    meta = json.load(f)
+                if os.path.getsize(path) != meta["size"]:
+                    raise ValueError("size mismatch")
+                found.append((os.path.getatime(path), meta, path))
+            except (OSError, ValueError, KeyError):
+                for leftover in (path, meta_path):
+                    if os.path.basename(leftover) in names:
+                        os.remove(leftover)
+    found.sort(key=lambda item: item[0])
+    return found
+
+
+async def _ensure_loaded() -> None:
+    global _loaded, _stored_bytes
+    if _loaded:
+        return
+    _loaded = True
+    os.makedirs(settings.AUDIO_CACHE_DIR, exist_ok=True)
+    for _, meta, path in await asyncio.to_thread(_scan):
+        entry = _Entry(meta["key"], path)
+        entry.content_type = meta.get("content_type") or entry.content_type
+        entry.size = entry.written = meta["size"]
+        entry.complete = True
+        entry.ready.set()
+        _entries[entry.key] = entry
+        _stored_bytes += entry.size
+    _evict()
+
+
+async def serve(source_url: str, resolve: Resolver, request_headers: Mapping[str, str]) -> Response:
+    """
+    Answers a proxy request for `source_url` from the cache, starting the
+    fill (which calls `resolve` for the upstream URL) if it isn't cached.
+    """
+    await _ensure_loaded()
+    key = normalize_url(source_url)
+    _counters["requests"] += 1
+    entry = _entries.get(key)
+    hit = entry is not None
+    if hit:
+        _counters["hits"] += 1
+        _entries.move_to_end(key)
+    else:
+        _counters["misses"] += 1
+        entry = _start_fill(key, resolve)
+
+    await entry.ready.wait()
+    if entry.error is not None:
+        raise entry.error
+
+    status_code, start, end, headers = _plan(entry, request_headers)
+    if status_code == 304:
+        return Response(status_code=304, headers=headers)
+    headers["X-Cache"] = "HIT" if hit else "MISS"
+
+    if entry.complete:
+        try:
+            body = _mapped(entry, start, end, hit)
+            next(body) # Opens and maps the file now, so a later eviction can't pull it away
+        except FileNotFoundError:
+            # Evicted (or removed) underneath us: fetch it again
+            _forget(entry)
+            return await serve(source_url, resolve, request_headers)
+    else:
+        body = _tail(entry, start, end, hit)
+    return StreamingResponse(body, status_code=status_code, headers=headers, media_type=entry.content_type)
+
+
+async def warm(source_url: str, resolve: Resolver) -> int:
+    """
+    Fills the cache for `source_url` (if needed) without serving it and waits
+    for the fill. Returns the bytes this call fetched: 0 when the track was
+    already cached or another request's fill was joined. Raises the fill's error.
+    """
+    await _ensure_loaded()
+    key = normalize_url(source_url)
+    entry = _entries.get(key)
+    started = entry is None
+    if started:
+        entry = _start_fill(key, resolve)
+    async with entry.progress:
+        await entry.progress.wait_for(lambda: entry.complete or entry.error is not None)
+    if entry.error is not None:
+        raise entry.error
+    return entry.size if started else 0
+
+
+def _plan(entry: _Entry, request_headers: Mapping[str, str]) -> Tuple[int, int, Optional[int], Dict[str, str]]:
+    """Status, byte range (end inclusive, None = to the end) and headers for a request."""
+    headers = {"Accept-Ranges": "bytes", "Cache-Control": "max-age=3600"}
+    size = entry.size
+    if size is None:
+        # Length unknown until the fill finishes: stream everything
+        return 200, 0, None, headers
+
+    headers["ETag"] = entry.etag
+    if_none_match = request_headers.get("if-none-match")
+    if if_none_match and (if_none_match.strip() == "*" or entry.etag in if_none_match):
+        return 304, 0, None, headers
+
+    byte_range = request_headers.get("range")
+    if_range = request_headers.get("if-range")
+    if byte_range and (not if_range or if_range.strip() == entry.etag):
+        parsed = _parse_range(byte_range, size)
+        if parsed is not None:
+            start, end = parsed
+            headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+            headers["Content-Length"] = str(end - start + 1)
+            return 206, start, end, headers
+
+    headers["Content-Length"] = str(size)
+    return 200, 0, size - 1 if size else None, headers
+
+
+def _parse_range(value: str, size: int) -> Optional[Tuple[int, int]]:
+    """A single `bytes=` range as (start, end), None to ignore it (e.g. multiple ranges); 416 if unsatisfiable."""
+    match = re.fullmatch(r"\s*bytes\s*=\s*(\d*)\s*-\s*(\d*)\s*", value)
+    if not match or not (match.group(1) or match.group(2)):
+        return None
+    if match.group(1):
+        start = int(match.group(1))
+        end = min(int(match.group(2)), size - 1) if match.group(2) else size - 1
+    else:
+        start, end = max(size - int(match.group(2)), 0), size - 1 # Suffix: the last N bytes
+    if start >= size or start > end:
+        raise HTTPException(status_code=416, detail="Requested range not satisfiable", headers={"Content-Range": f"bytes */{size}"})
+    return start, end
+
+
+def _count(length: int, hit: bool) -> None:
+    _counters["bytes_served"] += length
+    if hit:
+        _counters["bytes_from_cache"] += length
+
+
+def _mapped(entry: _Entry, start: int, end: Optional[int], hit: bool) -> Iterator[bytes]:
+    """
+    Reads a complete entry through an mmap (iterated in Starlette's threadpool,
+    so page faults stay off the event loop). The first next() only opens the
+    file; the mapping stays valid if the entry is evicted meanwhile.
+    """
+    with open(entry.path, "rb") as f:
+        yield b""
+        if end is None or entry.size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            for pos in range(start, end + 1, CHUNK_SIZE):
+                chunk = mapped[pos:min(pos + CHUNK_SIZE, end + 1)]
+                _count(len(chunk), hit)
+                yield chunk
+
+
+async def _tail(entry: _Entry, start: int, end: Optional[int], hit: bool):
+    """Reads an entry that is still being written, waiting for each byte range to land."""
+    fd = os.open(entry.path, os.O_RDONLY)
+    try:
+        pos = start
+        while end is None or pos <= end:
+            if pos >= entry.written and not entry.complete:
+                async with entry.progress:
+                    await entry.progress.wait_for(lambda: entry.written > pos or entry.complete or entry.error is not None)
+            limit = entry.written if end is None else min(entry.written, end + 1)
+            if pos >= limit:
+                if entry.error is not None:
+                    logger.warning(f"Audio cache fill failed mid-stream: {entry.error.detail}")
+                break # Complete (or failed) and nothing left to send
+            chunk = await asyncio.to_thread(os.pread, fd, min(CHUNK_SIZE, limit - pos), pos)
+            if not chunk:
+                break
+            pos += len(chunk)
+            _count(len(chunk), hit)
+            yield chunk
+    finally:
+        os.close(fd)
+
+
+def _start_fill(key: str, resolve: Resolver) -> _Entry:
+    entry = _Entry(key, _path_for(key))
+    _entries[key] = entry
+    _counters["upstream_fetches"] += 1
+    task = asyncio.create_task(_fill(entry, resolve))
+    _fills.add(task)
+    task.add_done_callback(_fills.discard)
+    return entry
+
+
+async def _notify(entry: _Entry) -> None:
+    async with entry.progress:
+        entry.progress.notify_all()
+
+
+async def _fill(entry: _Entry, resolve: Resolver) -> None:
+    upstream = None
+    try:
+        url, headers = await resolve()
+        upstream = await audio_stream.open_upstream(url, {}, headers)
+        if upstream.status_code != 200:
+            raise HTTPException(status_code=502, detail=f"Upstream returned {upstream.status_code} for a full fetch")
+        entry.content_type = upstream.headers.get("content-type", entry.content_type)
+        length = upstream.headers.get("content-length")
+        entry.size = int(length) if length and length.isdigit() else None
+
+        os.makedirs(os.path.dirname(entry.path), exist_ok=True)
+        with open(entry.path, "wb", buffering=0) as f:
+            entry.ready.set()
+            async for chunk in upstream.aiter_raw(CHUNK_SIZE):
+                f.write(chunk) # Page cache write; readers see it as soon as `written` moves
+                entry.written += len(chunk)
+                await _notify(entry)
+
+        if entry.size is not None and entry.written != entry.size:
+            raise HTTPException(status_code=502, detail=f"Upstream body ended at {entry.written} of {entry.size} bytes")
+        entry.size = entry.written
+        with open(f"{entry.path}.json", "w") as f:
+            json.dump({"key": entry.key, "content_type": entry.content_type, "size": entry.size}, f)
+        entry.complete = True
+        await _notify(entry)
+        _admit(entry)
+    except BaseException as e:
+        entry.error = e if isinstance(e, HTTPException) else HTTPException(status_code=502, detail=f"Failed to fetch audio: {e}")
+        if not isinstance(e, (HTTPException, asyncio.CancelledError)):
+            logger.error(f"Audio cache fill for {entry.key} failed: {e}")
+        _forget(entry)
+        entry.ready.set()
+        await _notify(entry)
+        if isinstance(e, asyncio.CancelledError):
+            raise
+    finally:
+        if upstream is not None:
+            await upstream.aclose()
+
+
+def _admit(entry: _Entry) -> None:
+    global _stored_bytes
+    if _entries.get(entry.key) is not entry:
+        return
+    _stored_bytes += entry.size
+    _evict()
+
+
+def _evict() -> None:
+    """Drops complete entries, least recently used first, until the budget fits."""
+    for entry in list(_entries.values()):
+        if _stored_bytes <= settings.AUDIO_CACHE_MAX_BYTES:
+            break
+        if entry.complete:
+            _forget(entry)
+            _counters["evictions"] += 1
+
+
+def _forget(entry: _Entry) -> None:
+    """Removes an entry and its files (open readers keep their file handles)."""
+    global _stored_bytes
+    if _entries.get(entry.key) is entry:
+        del _entries[entry.key]
+        if entry.complete:
+            _stored_bytes -= entry.size
+    for path in (entry.path, f"{entry.path}.json"):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def stats() -> dict:
+    lookups = _counters["hits"] + _counters["misses"]
+    return {
+        "enabled": enabled(),
+        "entries": len(_entries),
+        "stored_bytes": _stored_bytes,
+        "max_bytes": settings.AUDIO_CACHE_MAX_BYTES,
+        "hit_ratio": round(_counters["hits"] / lookups, 4) if lookups else 0.0,
+        "fills_in_progress": len(_fills),
+        **_counters,
+    }
+
+
+async def close() -> None:
+    """Stops fills in progress (their partial files are dropped) and forgets the in-memory index."""
+    global _loaded, _stored_bytes
+    for task in list(_fills):
+        task.cancel()
+    await asyncio.gather(*_fills, return_exceptions=True)
+    _entries.clear()
+    _stored_bytes = 0
+    _loaded = False
@@ -0,0 +1,149 @@
+"""
+Streaming upstream fetches for /api/proxy/audio.
+
+Every request goes through one shared httpx.AsyncClient, so connections to
+R2, the Discord CDN and SoundCloud are kept alive between a player's seeks.
+The player's Range, If-Range and If-None-Match headers are forwarded as-is
+and the upstream status (200/206/304/416) and range headers are relayed, so
+a seek transfers only the requested bytes and a request holds one chunk of
+the body at a time, however large the track.
+"""
+import asyncio
+import logging
+from typing import AsyncIterator, Dict, Mapping, Optional, Tuple
+
+import httpx
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+FORWARDED_REQUEST_HEADERS = ("range", "if-range", "if-none-match")
+RELAYED_RESPONSE_HEADERS = (
+    "content-length", "content-range", "accept-ranges", "etag", "last-modified", "cache-control", "content-encoding"
+)
+STREAM_CHUNK_SIZE = 64 * 1024
+
+_client: Optional[httpx.AsyncClient] = None
+_client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def client() -> httpx.AsyncClient:
+    """The shared client (keep-alive pool). Bound to the event loop that created it."""
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+    if _client is None or _client.is_closed or _client_loop is not loop:
+        _client = httpx.AsyncClient(
+            follow_redirects=True,
+            timeout=httpx.Timeout(settings.PROXY_TIMEOUT_SECONDS),
+            limits=httpx.Limits(
+                max_connections=settings.PROXY_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.PROXY_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.PROXY_KEEPALIVE_SECONDS,
+            ),
+        )
+        _client_loop = loop
+    return _client
+
+
+async def close() -> None:
+    global _client, _client_loop
+    if _client is not None and _client_loop is asyncio.get_running_loop():
+        await _client.aclose()
+    _client = _client_loop = None
+
+
+async def open_upstream(url: str, request_headers: Mapping[str, str], extra_headers: Optional[Mapping[str, str]] = None) -> httpx.Response:
+    """
+    Sends the GET upstream and returns once the headers are in; the body is
+    still unread (the caller must aclose() the response). Errors other than
+    304/416 are raised as HTTPException.
+    """
+    headers = dict(extra_headers or {})
+    headers["Accept-Encoding"] = "identity" # Byte ranges must refer to the stored bytes
+    for name in FORWARDED_REQUEST_HEADERS:
+        value = request_headers.get(name)
+        if value:
+            headers[name] = value
+
+    http = client()
+    try:
+        upstream = await http.send(http.build_request("GET", url, headers=headers), stream=True)
+    except httpx.RequestError as e:
+        raise HTTPException(status_code=502, detail=f"Bad Gateway: {e}")
+    if upstream.status_code >= 400 and upstream.status_code != 416:
+        await upstream.aclose()
+        raise HTTPException(status_code=upstream.status_code, detail=f"Failed to fetch audio: upstream returned {upstream.status_code}")
+    return upstream
+
+
+async def iter_body(upstream: httpx.Response, chunk_size: int = STREAM_CHUNK_SIZE) -> AsyncIterator[bytes]:
+    try:
+        async for chunk in upstream.aiter_raw(chunk_size):
+            yield chunk
+    except httpx.HTTPError as e:
+        # Headers are already sent; all we can do is cut the body short
+        logger.warning(f"Upstream audio stream broke off: {e}")
+    finally:
+        await upstream.aclose()
+
+
+def relay(upstream: httpx.Response) -> StreamingResponse:
+    """Streams an open upstream response through, with its status and range headers."""
+    headers = {name: upstream.headers[name] for name in RELAYED_RESPONSE_HEADERS if name in upstream.headers}
+    headers.setdefault("accept-ranges", "bytes")
+    headers.setdefault("cache-control", "max-age=3600")
+    return StreamingResponse(
+        iter_body(upstream),
+        status_code=upstream.status_code,
+        headers=headers,
+        media_type=upstream.headers.get("content-type", "application/octet-stream"),
+        background=BackgroundTask(upstream.aclose), # In case the body was never started
+    )
+
+
+async def stream(url: str, request_headers: Mapping[str, str], extra_headers: Optional[Mapping[str, str]] = None) -> StreamingResponse:
+    return relay(await open_upstream(url, request_headers, extra_headers))
+
+
+async def resolve_source(url: str) -> Tuple[str, Dict[str, str]]:
+    """
+    The directly fetchable URL for a track URL (R2 presigned URL, yt-dlp
+    extraction for SoundCloud/YouTube) and the headers to fetch it with.
+    """
+    from services import media_resolver # media_resolver -> audio_cache -> this module
+    headers_to_forward = {"User-Agent": "Mozilla/5.0"}
+
+    # For non-Discord URLs, use yt-dlp to get a direct streamable URL
+    if "discord.com" not in url:
+        # Check for R2 URL
+        if url.startswith("r2://"):
+            from services.storage_service import storage_service
+            # Instead of redirecting, we get the presigned URL and then stream it ourselves
+            presigned_url = await storage_service.generate_presigned_url(url)
+            if presigned_url:
+                url = presigned_url # Update URL to be the presigned one, and let the httpx client fetch it
+            else:
+                raise HTTPException(status_code=404, detail="File not found in storage")
+        
+        # Only use yt-dlp if it's NOT an R2 url (which we just converted to http) and NOT a direct http link we trust?
+        # Actually, if we converted R2 to presigned http url, we can skip yt-dlp.
+        # Use yt-dlp for SoundCloud, YouTube, or non-http URLs
+        elif "soundcloud.com" in url or "youtube.com" in url or "youtu.be" in url or not url.startswith("http"):
+            # If it's not http (and not r2:// handled above), try yt-dlp (off the event loop, cached)
+            try:
+                url, extracted_headers = await media_resolver.resolve_stream(url)
+                # Extract headers if available
+                headers_to_forward.update(extracted_headers)
+                
+                logger.info(f"Extracted URL: {url}")
+                logger.info(f"Headers to forward: {headers_to_forward}")
+
+            except Exception as e:
+                logger.error(f"yt_dlp extraction failed: {e}")
+                raise HTTPException(status_code=500, detail=f"Failed to extract audio from URL: {e}")
+
+    return url, headers_to_forward
@@ -0,0 +1,211 @@
+"""
+Content-addressed audio storage.
+
+Uploaded audio is stored once per distinct SHA-256 at
+storage_service.content_key(sha256), and the `blobs` table is the global
+hash index. An upload whose hash is already indexed is aborted before it is
+completed (nothing is written to R2) and reuses the existing object, whoever
+uploaded it and whether or not the original submission has gone cold.
+
+refcount counts the submissions pointing at a blob. queue_service.create_submission
+(and the payment webhooks) add a reference for r2:// track URLs. Submissions
+are never deleted or repointed (rejected ones are kept for history and hash
+reuse, archived ones move to submissions_archive with their track URL), so
+references are never dropped. New blobs are indexed with refcount 0 in their
+own transaction, so an upload whose request fails afterwards is still found
+by the collector, which deletes blobs that have stayed unreferenced for
+BLOB_GC_GRACE_SECONDS, along with the objects derived from them
+(SIDECAR_SUFFIXES).
+"""
+import asyncio
+import datetime
+import logging
+import uuid
+from typing import AsyncIterator, Awaitable, Callable, NamedTuple, Optional
+
+from sqlalchemy import select, update, delete, func
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import database
+import models
+from config import settings
+from services import rendition_service, waveform_service
+from services.storage_service import storage_service
+
+logger = logging.getLogger(__name__)
+
+# Objects derived from a blob and stored next to it (waveform peaks, preview renditions); removed with it
+SIDECAR_SUFFIXES = (waveform_service.SUFFIX, *rendition_service.SIDECAR_SUFFIXES)
+
+
+class StoredBlob(NamedTuple):
+    uri: Optional[str] # None when the caller's before_complete declined the upload
+    sha256: str
+    size: int
+    deduplicated: bool # Existing blob reused; no bytes written to R2
+
+
+def _utcnow() -> datetime.datetime:
+    return datetime.datetime.now(datetime.timezone.utc)
+
+
+def _key(uri: str) -> Optional[str]:
+    return uri[5:] if uri and uri.startswith("r2://") else None
+
+
+async def store(
+    db: AsyncSession,
+    chunks: AsyncIterator[bytes],
+    content_type: str = "application/octet-stream",
+    before_complete: Optional[Callable[[str], Awaitable[bool]]] = None
+) -> StoredBlob:
+    """
+    Streams an upload into the content-addressed store. `before_complete`
+    runs first (e.g. the per-user duplicate check) and may decline it.
+    """
+    found = {}
+
+    async def decide(sha256: str) -> bool:
+        if before_complete is not None and not await before_complete(sha256):
+            return False
+        blob = await db.get(models.Blob, sha256)
+        if blob is not None:
+            found["blob"] = blob
+            return False # Already stored: abort instead of writing it again
+        return True
+
+    uploaded = await storage_service.upload_stream(
+        chunks, f"uploads/{uuid.uuid4()}", content_type,
+        before_complete=decide, key_for=storage_service.content_key
+    )
+
+    if uploaded.uri is None:
+        blob = found.get("blob")
+        if blob is None:
+            return StoredBlob(None, uploaded.sha256, uploaded.size, False)
+        await db.execute(
+            update(models.Blob).where(models.Blob.sha256 == blob.sha256)
+            # A fresh updated_at keeps the collector off it until the caller adds its reference
+            .values(dedup_hits=models.Blob.dedup_hits + 1, updated_at=_utcnow())
+            .execution_options(synchronize_session=False)
+        )
+        logger.info(f"Blob {blob.sha256[:12]} already stored; skipped writing {uploaded.size} bytes")
+        return StoredBlob(f"r2://{blob.object_key}", uploaded.sha256, uploaded.size, True)
+
+    await _index(uploaded.sha256, uploaded.size, _key(uploaded.uri), content_type)
+    return StoredBlob(uploaded.uri, uploaded.sha256, uploaded.size, False)
+
+
+async def _index(sha256: str, size: int, object_key: str, content_type: str) -> None:
+    """Records a new blob (refcount 0) in its own committed transaction."""
+    values = {
+        "sha256": sha256, "size": size, "object_key": object_key, "content_type": content_type,
+        "refcount": 0, "dedup_hits": 0, "created_at": _utcnow(), "updated_at": _utcnow(),
+    }
+    async with database.AsyncSessionLocal() as db:
+        dialect = db.bind.dialect.name if db.bind is not None else None
+        if dialect in ("postgresql", "sqlite"):
+            insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+            # Two concurrent uploads of the same new bytes wrote the same key
+            await db.execute(insert(models.Blob).values(values).on_conflict_do_nothing(index_elements=["sha256"]))
+        elif await db.get(models.Blob, sha256) is None:
+            db.add(models.Blob(**values))
+        await db.commit()
+
+
+async def add_reference(db: AsyncSession, uri: str) -> None:
+    """Counts one more submission pointing at `uri` (no-op unless it's a blob). Caller commits."""
+    key = _key(uri)
+    if key is None:
+        return
+    await db.execute(
+        update(models.Blob).where(models.Blob.object_key == key)
+        .values(refcount=models.Blob.refcount + 1, updated_at=_utcnow())
+        .execution_options(synchronize_session=False)
+    )
+
+
+async def collect_garbage(session_factory=None, limit: int = 500) -> int:
+    """Deletes objects (and rows) of blobs unreferenced for the grace period. Returns how many."""
+    factory = session_factory or database.AsyncSessionLocal
+    cutoff = _utcnow() - datetime.timedelta(seconds=settings.BLOB_GC_GRACE_SECONDS)
+    async with factory() as db:
+        rows = (await db.execute(
+            select(models.Blob.sha256, models.Blob.object_key)
+            .where(models.Blob.refcount <= 0, models.Blob.updated_at < cutoff)
+            .limit(limit)
+        )).all()
+
+        removed = 0
+        for sha256, object_key in rows:
+            # Claim the row first: a reference added or an upload deduplicated meanwhile keeps the blob
+            claimed = await db.execute(
+                delete(models.Blob)
+                .where(models.Blob.sha256 == sha256, models.Blob.refcount <= 0, models.Blob.updated_at < cutoff)
+                .execution_options(synchronize_session=False)
+            )
+            if not claimed.rowcount:
+                continue
+            try:
+                await storage_service.delete_object(object_key)
+                for suffix in SIDECAR_SUFFIXES:
+                    await storage_service.delete_object(f"{object_key}{suffix}")
+            except Exception as e:
+                logger.error(f"Blob GC: failed to delete {object_key}: {e}")
+                await db.rollback()
+                continue
+            await db.commit()
+            removed += 1
+    if removed:
+        logger.info(f"Blob GC: removed {removed} unreferenced blobs")
+    return removed
+
+
+async def stats(db: AsyncSession) -> dict:
+    """Index size and what deduplication has saved."""
+    row = (await db.execute(select(
+        func.count(),
+        func.coalesce(func.sum(models.Blob.size), 0),
+        func.coalesce(func.sum(models.Blob.size * models.Blob.dedup_hits), 0),
+        func.coalesce(func.sum(models.Blob.dedup_hits), 0),
+        func.count().filter(models.Blob.refcount <= 0),
+    ))).one()
+    blobs, stored_bytes, bytes_saved, dedup_hits, unreferenced = row
+    return {
+        "blobs": blobs,
+        "stored_bytes": int(stored_bytes),
+        "bytes_saved": int(bytes_saved),
+        "dedup_hits": int(dedup_hits),
+        "unreferenced": unreferenced,
+    }
+
+
+_task: Optional[asyncio.Task] = None
+
+
+async def _gc_loop():
+    while True:
+        await asyncio.sleep(settings.BLOB_GC_INTERVAL_SECONDS)
+        try:
+            await collect_garbage()
+        except Exception as e:
+            logger.error(f"Blob GC failed: {e}")
+
+
+def start() -> None:
+    """Starts the background collector (idempotent; no-op when disabled or R2 is unavailable)."""
+    global _task
+    if settings.BLOB_GC_ENABLED and storage_service.session and (_task is None or _task.done()):
+        _task = asyncio.create_task(_gc_loop())
+
+
+async def stop() -> None:
+    global _task
+    if _task is not None:
+        _task.cancel()
+        try:
+            await _task
+        except asyncio.CancelledError:
+            pass
+        _task = None
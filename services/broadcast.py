@@ -1,15 +1,22 @@
 from sio_instance import sio
+from services import state_versions
+from services import live_events
+from services import prefetcher
 import logging
 
 async def emit_queue_update(reviewer_id: int, queue_data: list):
     """Emits a queue update to the specified reviewer's room."""
+    state_versions.bump(reviewer_id, state_versions.QUEUE)
     room = f"reviewer_room_{reviewer_id}"
     logging.info(f"Emitting 'queue_updated' to room {room} with data: {queue_data}")
     await sio.emit("queue_updated", queue_data, room=room)
+    live_events.publish_queue(reviewer_id, queue_data)
+    prefetcher.schedule(reviewer_id, queue_data)
     logging.info("'queue_updated' event emitted.")
 
 async def emit_history_update(reviewer_id: int, history_data: list):
     """Emits a history update to the specified reviewer's room."""
+    state_versions.bump(reviewer_id, state_versions.QUEUE)
     room = f"reviewer_room_{reviewer_id}"
     logging.info(f"Emitting 'history_updated' to room {room} with data: {history_data}")
     await sio.emit("history_updated", history_data, room=room)
@@ -26,9 +33,13 @@ async def emit_balance_update(reviewer_id: int, user_id: int, new_balance: int):
 
 async def emit_current_track_update(reviewer_id: int, submission_data: dict | None):
     """Emits a current track update to the specified reviewer's room."""
+    state_versions.bump(reviewer_id, state_versions.QUEUE)
     room = f"reviewer_room_{reviewer_id}"
     logging.info(f"Emitting 'current_track_updated' to room {room} with data: {submission_data}")
     await sio.emit("current_track_updated", submission_data, room=room)
+    live_events.publish_current_track(reviewer_id, submission_data)
+    if submission_data:
+        prefetcher.mark_next(submission_data.get("track_url"))
     logging.info("'current_track_updated' event emitted.")
 
 async def emit_chat_message(reviewer_id: int, message_data: dict):
@@ -39,12 +50,15 @@ async def emit_chat_message(reviewer_id: int, message_data: dict):
 
 async def emit_giveaway_update(reviewer_id: int, giveaway_state: dict):
     """Emits a giveaway state update to the specified reviewer's room."""
+    state_versions.bump(reviewer_id, state_versions.GIVEAWAY)
     room = f"reviewer_room_{reviewer_id}"
     # logging.info(f"Emitting 'giveaway_updated' to room {room} with data: {giveaway_state}")
     await sio.emit("giveaway_updated", giveaway_state, room=room)
+    live_events.publish_giveaway(reviewer_id, giveaway_state)
 
 async def emit_giveaway_winner(reviewer_id: int, winner_data: dict):
     """Emits a giveaway winner announcement to the specified reviewer's room."""
+    state_versions.bump(reviewer_id, state_versions.GIVEAWAY)
     room = f"reviewer_room_{reviewer_id}"
     logging.info(f"Emitting 'giveaway_winner' to room {room} with data: {winner_data}")
     await sio.emit("giveaway_winner", winner_data, room=room)
@@ -53,12 +67,14 @@ async def emit_giveaway_winner(reviewer_id: int, winner_data: dict):
 
 async def emit_reviewer_settings_update(reviewer_id: int, settings_data: dict):
     """Emits a reviewer settings update to the specified reviewer's room."""
+    state_versions.bump(reviewer_id, state_versions.SETTINGS)
     room = f"reviewer_room_{reviewer_id}"
     logging.info(f"Emitting 'reviewer_settings_updated' to room {room}")
     await sio.emit("reviewer_settings_updated", settings_data, room=room)
 
 async def emit_global_reviewer_update(reviewer_id: int, is_live: bool):
     """Emits a global update about a reviewer's live status."""
+    state_versions.bump(reviewer_id, state_versions.SETTINGS)
     room = "global_room"
     data = {"reviewer_id": reviewer_id, "is_live": is_live}
     logging.info(f"Emitting 'global_reviewer_update' to room {room} with data: {data}")
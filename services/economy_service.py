@@ -4,6 +4,9 @@ import models
 from services import broadcast as broadcast_service
 import datetime
 
+# Keyset order for transaction listings (services/pagination.py), newest first
+TRANSACTION_KEYS = ((models.Transaction.timestamp, True), (models.Transaction.id, True))
+
 async def add_coins(db: AsyncSession, reviewer_id: int, user_id: int, amount: int, reason: str, meta_data: dict = None):
     if amount <= 0:
         raise ValueError("Amount must be positive")
@@ -0,0 +1,76 @@
+from typing import List, Sequence
+
+
+class FenwickTree:
+    """
+    Binary indexed tree over positions 0..size-1.
+    Point updates, prefix sums and "find the position holding the k-th unit" are O(log n).
+    """
+
+    def __init__(self, size: int = 0):
+        self._tree: List[int] = [0] * (size + 1)
+        self._values: List[int] = [0] * size
+
+    @classmethod
+    def from_values(cls, values: Sequence[int]) -> "FenwickTree":
+        tree = cls(len(values))
+        tree._values = list(values)
+        # O(n) construction
+        for i, value in enumerate(values, start=1):
+            tree._tree[i] += value
+            parent = i + (i & -i)
+            if parent < len(tree._tree):
+                tree._tree[parent] += tree._tree[i]
+        return tree
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def value(self, index: int) -> int:
+        return self._values[index]
+
+    def grow(self, size: int) -> None:
+        """Extends capacity to at least `size` positions (amortized by doubling)."""
+        if size <= len(self._values):
+            return
+        new_size = max(size, 2 * len(self._values), 16)
+        rebuilt = FenwickTree.from_values(self._values + [0] * (new_size - len(self._values)))
+        self._tree, self._values = rebuilt._tree, rebuilt._values
+
+    def add(self, index: int, delta: int) -> None:
+        self._values[index] += delta
+        i = index + 1
+        while i < len(self._tree):
+            self._tree[i] += delta
+            i += i & -i
+
+    def set(self, index: int, value: int) -> None:
+        self.add(index, value - self._values[index])
+
+    def prefix_sum(self, index: int) -> int:
+        """Sum of positions [0, index)."""
+        total = 0
+        i = index
+        while i > 0:
+            total += self._tree[i]
+            i -= i & -i
+        return total
+
+    def total(self) -> int:
+        return self.prefix_sum(len(self._values))
+
+    def find(self, target: int) -> int:
+        """
+        Smallest position whose prefix sum (inclusive) exceeds `target`,
+        i.e. the position owning unit number `target` (0-based). Requires 0 <= target < total().
+        """
+        position = 0
+        step = 1 << (len(self._tree).bit_length())
+        remaining = target
+        while step:
+            nxt = position + step
+            if nxt < len(self._tree) and self._tree[nxt] <= remaining:
+                position = nxt
+                remaining -= self._tree[nxt]
+            step >>= 1
+        return position
@@ -0,0 +1,157 @@
+"""
+Local ffmpeg subprocesses for background media jobs (waveform peaks, ...).
+
+Jobs are handed over with submit() and run as background tasks of their own,
+so the outbox event that asked for one is marked done without its worker
+(and database connection) waiting on ffmpeg. A job that fails, or runs past
+FFMPEG_JOB_TIMEOUT_SECONDS, is logged; the original upload stays playable
+without its peaks or rendition.
+
+At most FFMPEG_WORKERS processes run at once across all jobs, so a burst of
+uploads queues up instead of taking every core from the API and the bot.
+ffmpeg reads uploads directly: R2 objects through a presigned URL, local
+uploads from disk.
+
+ffmpeg's stderr is drained while it runs (keeping the last STDERR_TAIL bytes
+for the error message), so a damaged upload that logs an error per frame
+can't fill the pipe and stall the process while its output is being read.
+"""
+import asyncio
+import contextlib
+import logging
+import os
+import shutil
+from typing import AsyncIterator, Awaitable, Callable, Dict, Optional, Tuple
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+READ_SIZE = 256 * 1024
+STDERR_TAIL = 4096
+
+Job = Callable[[str], Awaitable[object]]
+
+_slots: Optional[Tuple[asyncio.AbstractEventLoop, asyncio.Semaphore]] = None
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_jobs: Dict[Tuple[Job, str], asyncio.Task] = {}
+
+
+def available() -> bool:
+    return shutil.which(settings.FFMPEG_PATH) is not None
+
+
+def _slot() -> asyncio.Semaphore:
+    global _slots
+    loop = asyncio.get_running_loop()
+    if _slots is None or _slots[0] is not loop:
+        _slots = (loop, asyncio.Semaphore(max(1, settings.FFMPEG_WORKERS)))
+    return _slots[1]
+
+
+def local_path(track_url: str) -> Optional[str]:
+    """The file behind an /api/uploads/ URL, if it exists."""
+    if not track_url.startswith("/api/uploads/"):
+        return None
+    path = os.path.join("uploads", os.path.basename(track_url))
+    return path if os.path.exists(path) else None
+
+
+async def input_for(track_url: str) -> Optional[str]:
+    """What to pass to ffmpeg's -i for an uploaded track, or None if it isn't one we can read."""
+    if track_url.startswith("r2://"):
+        from services.storage_service import storage_service
+        return await storage_service.generate_presigned_url(track_url)
+    return local_path(track_url)
+
+
+@contextlib.asynccontextmanager
+async def process(*args: str):
+    """
+    Runs `ffmpeg <args>` in a worker slot with stdout piped. The process is
+    killed if the block exits before it finishes; call finish() to wait for
+    it and raise on failure.
+    """
+    async with _slot():
+        proc = await asyncio.create_subprocess_exec(
+            settings.FFMPEG_PATH, "-nostdin", "-hide_banner", "-loglevel", "error", *args,
+            stdin=asyncio.subprocess.DEVNULL, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+        )
+        proc.errors = asyncio.create_task(_tail(proc.stderr))
+        try:
+            yield proc
+        finally:
+            if proc.returncode is None:
+                with contextlib.suppress(ProcessLookupError):
+                    proc.kill()
+                await proc.wait()
+            proc.errors.cancel()
+            await asyncio.gather(proc.errors, return_exceptions=True)
+
+
+async def _tail(stream: asyncio.StreamReader) -> bytes:
+    """Reads `stream` to EOF, returning its last STDERR_TAIL bytes."""
+    tail = b""
+    while True:
+        chunk = await stream.read(READ_SIZE)
+        if not chunk:
+            return tail
+        tail = (tail + chunk)[-STDERR_TAIL:]
+
+
+async def read(proc: asyncio.subprocess.Process) -> AsyncIterator[bytes]:
+    while True:
+        chunk = await proc.stdout.read(READ_SIZE)
+        if not chunk:
+            return
+        yield chunk
+
+
+async def finish(proc: asyncio.subprocess.Process) -> None:
+    """Waits for the process; raises RuntimeError with ffmpeg's message if it failed."""
+    if await proc.wait() != 0:
+        errors = await proc.errors
+        raise RuntimeError(f"ffmpeg exited with {proc.returncode}: {errors.decode(errors='replace').strip()[-500:]}")
+
+
+def submit(job: Job, track_url: str) -> None:
+    """Runs `job(track_url)` in the background; a job already running for the same track isn't started twice."""
+    global _loop
+    loop = asyncio.get_running_loop()
+    if loop is not _loop:
+        # Jobs belong to the loop that started them
+        _loop = loop
+        _jobs.clear()
+    key = (job, track_url)
+    if key in _jobs:
+        return
+    task = asyncio.create_task(_run(job, track_url))
+    _jobs[key] = task
+    task.add_done_callback(lambda _: _jobs.pop(key, None))
+
+
+async def _run(job: Job, track_url: str) -> None:
+    try:
+        async with asyncio.timeout(settings.FFMPEG_JOB_TIMEOUT_SECONDS):
+            await job(track_url)
+    except asyncio.CancelledError:
+        raise
+    except TimeoutError:
+        logger.warning(f"Media job {job.__module__}.{job.__name__} for {track_url} timed out")
+    except Exception as e:
+        logger.warning(f"Media job {job.__module__}.{job.__name__} for {track_url} failed: {e}")
+
+
+async def drain() -> None:
+    """Waits for every submitted job. Used by tests."""
+    while _jobs:
+        await asyncio.gather(*list(_jobs.values()), return_exceptions=True)
+
+
+async def stop() -> None:
+    """Cancels the running jobs (their ffmpeg processes are killed)."""
+    tasks = list(_jobs.values())
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    _jobs.clear()
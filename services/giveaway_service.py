@@ -1,14 +1,28 @@
+"""
+Community goals (LIKES, SHARES, GIFTS, COMMENTS) and their giveaway lottery.
+
+Goal counters live in the community_goal table and contributor tallies in
+goal_ticket, so progress is a single UPDATE ... SET current = current + n
+(and an upsert per contributor) instead of a read-modify-write of
+Reviewer.configuration. Only static goal settings (giveaway_settings) stay in
+the JSON. Each reset bumps the goal's round, and the lottery only runs for the
+caller that wins the reset, so concurrent writers can't draw twice. The
+winner is drawn by ticket weight among contributors with a free submission
+(services.lottery); the round's tickets, the eligible holders and the seed
+are kept in giveaway_draws so the draw can be replayed.
+"""
 import logging
 from datetime import datetime, timedelta, timezone
 from typing import Optional, List, Dict
 import random
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from sqlalchemy.orm.attributes import flag_modified
+from sqlalchemy import select, update, delete, case
+from sqlalchemy.dialects import postgresql, sqlite
 
 import models
 import schemas
 from services import broadcast as broadcast_service
+from services import lottery
 
 logger = logging.getLogger(__name__)
 
@@ -58,22 +72,74 @@ def get_reviewer_goal_settings(reviewer: models.Reviewer) -> dict:
             
     return merged
 
-def _initialize_goal_config(goal_type: str, settings: dict, viewer_count: int = 0) -> dict:
-    """Helper to create a fresh goal config."""
+def _new_goal_values(reviewer_id: int, goal_type: str, settings: dict, viewer_count: int = 0) -> dict:
+    """Column values for a fresh goal row."""
     base_target = settings[goal_type]["base_target"]
     target = _get_dynamic_goal_target(base_target, viewer_count)
-    desc = settings[goal_type]["description"].format(target=target)
-    
     return {
-        "type": goal_type,
+        "reviewer_id": reviewer_id,
+        "goal_type": goal_type,
         "target": target,
         "current": 0,
-        "description": desc,
+        "description": settings[goal_type]["description"].format(target=target),
         "is_active": True,
         "cooldown_end": None,
-        "tickets": {} # username -> count
+        "round": 0,
+        "updated_at": datetime.now(timezone.utc),
     }
 
+def _to_state(goal: models.CommunityGoal) -> schemas.GiveawayState:
+    return schemas.GiveawayState(
+        type=goal.goal_type,
+        is_active=goal.is_active,
+        progress=goal.current,
+        target=goal.target,
+        cooldown_end=_aware(goal.cooldown_end),
+        description=goal.description
+    )
+
+def _aware(value: Optional[datetime]) -> Optional[datetime]:
+    # SQLite hands back naive datetimes
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+def _insert(db: AsyncSession):
+    dialect = db.bind.dialect.name if db.bind is not None else None
+    if dialect == "postgresql":
+        return postgresql.insert
+    if dialect == "sqlite":
+        return sqlite.insert
+    return None
+
+async def _load_goals(db: AsyncSession, reviewer_id: int) -> Dict[str, models.CommunityGoal]:
+    result = await db.execute(
+        select(models.CommunityGoal)
+        .filter(models.CommunityGoal.reviewer_id == reviewer_id)
+        .execution_options(populate_existing=True)
+    )
+    return {goal.goal_type: goal for goal in result.scalars().all()}
+
+async def _ensure_goals(db: AsyncSession, reviewer: models.Reviewer) -> Dict[str, models.CommunityGoal]:
+    """Loads the reviewer's goals, creating any missing type. Caller commits."""
+    goals = await _load_goals(db, reviewer.id)
+    missing = [g_type for g_type in DEFAULT_GOAL_TYPES if g_type not in goals]
+    if not missing:
+        return goals
+
+    goal_settings = get_reviewer_goal_settings(reviewer)
+    rows = [_new_goal_values(reviewer.id, g_type, goal_settings) for g_type in missing]
+    insert = _insert(db)
+    if insert is not None:
+        # Concurrent first reads may race to create the same goals
+        await db.execute(insert(models.CommunityGoal).values(rows).on_conflict_do_nothing(
+            index_elements=["reviewer_id", "goal_type"]
+        ))
+    else:
+        db.add_all(models.CommunityGoal(**row) for row in rows)
+        await db.flush()
+    return await _load_goals(db, reviewer.id)
+
 async def get_giveaway_states(db: AsyncSession, reviewer_id: int) -> List[schemas.GiveawayState]:
     """
     Returns the state of ALL community goals. Initializes them if missing.
@@ -81,173 +147,235 @@ async def get_giveaway_states(db: AsyncSession, reviewer_id: int) -> List[schema
     reviewer = await db.get(models.Reviewer, reviewer_id)
     if not reviewer:
         return []
-    
-    config = reviewer.configuration or {}
-    goals_config = config.get("community_goals", {})
-    
-    goal_settings = get_reviewer_goal_settings(reviewer)
-    needs_save = False
-    
-    # Ensure all types exist
-    for g_type in DEFAULT_GOAL_TYPES.keys():
-        if g_type not in goals_config:
-            goals_config[g_type] = _initialize_goal_config(g_type, goal_settings)
-            needs_save = True
-            
-    if needs_save:
-        config["community_goals"] = goals_config
-        reviewer.configuration = config
-        flag_modified(reviewer, "configuration")
-        await db.commit()
-        
-    states = []
-    for g_type, g_config in goals_config.items():
-        states.append(schemas.GiveawayState(
-            type=g_type,
-            is_active=g_config.get("is_active", True),
-            progress=g_config.get("current", 0),
-            target=g_config.get("target", 1000),
-            cooldown_end=datetime.fromisoformat(g_config["cooldown_end"]) if g_config.get("cooldown_end") else None,
-            description=g_config.get("description")
-        ))
-        
-    return states
+
+    goals = await load_goals(db, reviewer_id)
+
+    # Keep DEFAULT_GOAL_TYPES order: callers treat the first goal as the main one
+    states = [_to_state(goals[g_type]) for g_type in DEFAULT_GOAL_TYPES if g_type in goals]
+
+    # Counts the goal engine hasn't checkpointed yet
+    from services import goal_engine
+    return goal_engine.overlay(reviewer_id, states)
 
 async def update_community_goal_progress(db: AsyncSession, reviewer_id: int, event_type: str, amount: int, user_id: str = None, username: str = None):
     """
     Updates the specific community goal progress.
     """
-    reviewer = await db.get(models.Reviewer, reviewer_id)
-    if not reviewer:
-        return
+    await batch_update_community_goal_progress(db, reviewer_id, event_type, amount, {user_id: amount} if user_id else {})
 
-    if not reviewer.configuration:
-        reviewer.configuration = {}
-    
-    config = dict(reviewer.configuration)
-    goals_config = config.get("community_goals", {})
-    
-    # Initialize if missing (lazy init)
-    if event_type not in goals_config:
-        goal_settings = get_reviewer_goal_settings(reviewer)
-        if event_type in goal_settings:
-             goals_config[event_type] = _initialize_goal_config(event_type, goal_settings)
+async def _increment(db: AsyncSession, reviewer_id: int, event_type: str, amount: int):
+    """Atomically adds to a goal that isn't cooling down. Returns (id, current, target, round) or None."""
+    now = datetime.now(timezone.utc)
+    goal = models.CommunityGoal
+    result = await db.execute(
+        update(goal)
+        .where(
+            goal.reviewer_id == reviewer_id,
+            goal.goal_type == event_type,
+            (goal.cooldown_end.is_(None)) | (goal.cooldown_end <= now)
+        )
+        .values(current=goal.current + amount, updated_at=now)
+        .returning(goal.id, goal.current, goal.target, goal.round)
+        .execution_options(synchronize_session=False)
+    )
+    return result.first()
+
+async def _add_tickets(db: AsyncSession, goal_id: int, user_updates: Dict[str, int]):
+    rows = [{"goal_id": goal_id, "holder": str(holder), "count": amount} for holder, amount in user_updates.items() if holder]
+    if not rows:
+        return
+    table = models.GoalTicket.__table__
+    insert = _insert(db)
+    if insert is not None:
+        stmt = insert(table).values(rows)
+        await db.execute(stmt.on_conflict_do_update(
+            index_elements=["goal_id", "holder"],
+            set_={"count": table.c.count + stmt.excluded["count"]}
+        ))
+        return
+    for row in rows:
+        ticket = await db.get(models.GoalTicket, (goal_id, row["holder"]))
+        if ticket is None:
+            db.add(models.GoalTicket(**row))
         else:
-            return # Invalid type
-            
-    goal_config = goals_config[event_type]
+            ticket.count += row["count"]
 
-    # Check Cooldown
-    if goal_config.get("cooldown_end"):
-        cooldown_end = datetime.fromisoformat(goal_config["cooldown_end"])
-        if datetime.now(timezone.utc) < cooldown_end:
-            return
+async def apply_progress(db: AsyncSession, reviewer_id: int, event_type: str, amount: int, user_updates: Dict[str, int]):
+    """
+    Adds `amount` to a goal and the contributors' tickets, and commits.
+    Returns the goal's (id, current, target, round) afterwards, or None if the
+    goal is cooling down or the reviewer doesn't exist.
+    """
+    row = await _increment(db, reviewer_id, event_type, amount)
+    if row is None:
+        # Missing (lazy init) or cooling down
+        reviewer = await db.get(models.Reviewer, reviewer_id)
+        if not reviewer:
+            return None
+        goals = await _ensure_goals(db, reviewer)
+        if event_type not in goals:
+            return None
+        row = await _increment(db, reviewer_id, event_type, amount)
+        if row is None:
+            await db.commit() # Cooling down; keep the created goals
+            return None
 
-    # Calculate Progress
-    progress_amount = amount
-    goal_config["current"] = goal_config.get("current", 0) + progress_amount
-    
-    # Track User Tickets
-    if user_id:
-        tickets = goal_config.get("tickets", {})
-        current_tickets = tickets.get(user_id, 0)
-        tickets[user_id] = current_tickets + progress_amount
-        goal_config["tickets"] = tickets
+    await _add_tickets(db, row[0], user_updates)
+    await db.commit()
+    return row
 
-    # Check for Goal Completion
-    target = goal_config.get("target", 1000)
-    if goal_config["current"] >= target:
-        await trigger_giveaway_lottery(db, reviewer, event_type, goal_config)
-    else:
-        goals_config[event_type] = goal_config
-        config["community_goals"] = goals_config
-        reviewer.configuration = config
-        flag_modified(reviewer, "configuration")
+async def load_goals(db: AsyncSession, reviewer_id: int) -> Dict[str, models.CommunityGoal]:
+    """The reviewer's goal rows by type, created if missing (commits if it creates any)."""
+    goals = await _load_goals(db, reviewer_id)
+    if any(g_type not in goals for g_type in DEFAULT_GOAL_TYPES):
+        reviewer = await db.get(models.Reviewer, reviewer_id)
+        if not reviewer:
+            return goals
+        goals = await _ensure_goals(db, reviewer)
         await db.commit()
-        
-        # Broadcast Update (Single Goal)
-        state = schemas.GiveawayState(
-            type=event_type,
-            is_active=goal_config.get("is_active", True),
-            progress=goal_config["current"],
-            target=target,
-            cooldown_end=None,
-            description=goal_config.get("description")
-        )
-        # We might want to emit a specific event or just the generic update
-        await broadcast_service.emit_giveaway_update(reviewer_id, state.model_dump(mode='json'))
+    return goals
 
-async def trigger_giveaway_lottery(db: AsyncSession, reviewer: models.Reviewer, goal_type: str, goal_config: dict):
+async def batch_update_community_goal_progress(db: AsyncSession, reviewer_id: int, event_type: str, total_amount: int, user_updates: dict[str, int]):
     """
-    Selects a winner, resets THIS goal type, and sets cooldown.
+    Updates the community goal progress in batch.
     """
-    tickets_map = goal_config.get("tickets", {})
-    
+    if event_type not in DEFAULT_GOAL_TYPES:
+        return # Invalid type
+
+    row = await apply_progress(db, reviewer_id, event_type, total_amount, user_updates)
+    if row is None:
+        return
+    goal_id, current, target, goal_round = row
+
+    # Check for Goal Completion
+    if current >= target:
+        reviewer = await db.get(models.Reviewer, reviewer_id)
+        await trigger_giveaway_lottery(db, reviewer, event_type, goal_round)
+        return
+
+    goal = await db.get(models.CommunityGoal, goal_id, populate_existing=True)
+    await broadcast_service.emit_giveaway_update(reviewer_id, _to_state(goal).model_dump(mode='json'))
+
+async def _next_target(db: AsyncSession, reviewer: models.Reviewer, goal_type: str):
+    """Target and description for the next round, scaled by the live viewer count."""
+    goal_settings = get_reviewer_goal_settings(reviewer)
+    type_info = goal_settings[goal_type]
+
+    # Get Viewer Count for Scaling
+    stmt = select(models.LiveSession).filter(
+        models.LiveSession.user_id == reviewer.user_id,
+        models.LiveSession.status == 'LIVE'
+    ).order_by(models.LiveSession.start_time.desc())
+    result = await db.execute(stmt)
+    live_session = result.scalars().first()
+    viewer_count = live_session.max_concurrent_viewers if live_session else 0
+
+    next_target = _get_dynamic_goal_target(type_info["base_target"], viewer_count)
+    return next_target, type_info["description"].format(target=next_target)
+
+async def _holders_to_users(db: AsyncSession, user_ids: set) -> Dict[str, int]:
+    """Ticket holder (TikTok handle) -> user id, for the given users only."""
+    if not user_ids:
+        return {}
+    accounts = await db.execute(
+        select(models.TikTokAccount.handle_name, models.TikTokAccount.user_id)
+        .where(models.TikTokAccount.user_id.in_(user_ids))
+    )
+    linked = await db.execute(
+        select(models.User.tiktok_username, models.User.id)
+        .where(models.User.id.in_(user_ids), models.User.tiktok_username.isnot(None))
+    )
+    return {handle: user_id for handle, user_id in [*accounts.all(), *linked.all()]}
+
+async def trigger_giveaway_lottery(db: AsyncSession, reviewer: models.Reviewer, goal_type: str, goal_round: int):
+    """
+    Resets THIS goal type (round `goal_round` -> next), sets cooldown and, if
+    this caller won the reset, draws a winner weighted by the round's tickets.
+    """
+    next_target, description = await _next_target(db, reviewer, goal_type)
+    cooldown_end = datetime.now(timezone.utc) + timedelta(minutes=GIVEAWAY_COOLDOWN_MINUTES)
+
+    # --- RESET GOAL (only one caller per round gets a row back) ---
+    goal = models.CommunityGoal
+    result = await db.execute(
+        update(goal)
+        .where(
+            goal.reviewer_id == reviewer.id,
+            goal.goal_type == goal_type,
+            goal.round == goal_round,
+            goal.current >= goal.target
+        )
+        .values(
+            current=0, target=next_target, description=description, cooldown_end=cooldown_end,
+            round=goal.round + 1, updated_at=datetime.now(timezone.utc)
+        )
+        .returning(goal.id)
+        .execution_options(synchronize_session=False)
+    )
+    goal_id = result.scalar()
+    if goal_id is None:
+        await db.rollback()
+        return
+    # The finished round's tickets, then clear them for the next one
+    tickets = dict((await db.execute(
+        select(models.GoalTicket.holder, models.GoalTicket.count).where(models.GoalTicket.goal_id == goal_id)
+    )).all())
+    await db.execute(delete(models.GoalTicket).where(models.GoalTicket.goal_id == goal_id))
+
     from services import queue_service
-    
+
     # 1. Get Free Queue
     pending_queue = await queue_service.get_pending_queue(db, reviewer.id)
     free_queue = [s for s in pending_queue if s.priority_value == 0]
-    
+
+    draw = None
     if not free_queue:
         logger.warning(f"Giveaway triggered for {goal_type} but Free Queue is empty. No winner selected.")
-        winner_id = None
-        winner_user_id = None
     else:
-        # Pick random from free queue (ignoring tickets/contributors as requested)
-        random_sub = random.choice(free_queue)
-        winner_id = random_sub.user.username # For display
-        winner_user_id = random_sub.user.id # For logic
-        winner_tickets = 0 
-            
+        # 2. Ticket-weighted draw among holders with a free submission
+        seed = lottery.new_seed()
+        holder_users = await _holders_to_users(db, {s.user_id for s in free_queue})
+        eligible = sorted(holder for holder in tickets if holder in holder_users)
+        winner_holder = lottery.draw_winner(tickets, set(eligible).__contains__, seed)
+        if winner_holder is not None:
+            winner_user_id = holder_users[winner_holder]
+            winner_sub = next(s for s in free_queue if s.user_id == winner_user_id)
+        else:
+            # No contributor is in the free queue: uniform pick, same seed
+            winner_sub = random.Random(seed).choice(free_queue)
+            winner_user_id = winner_sub.user_id
+        # Stored with the ticket reset, so every cleared round can be replayed
+        draw = models.GiveawayDraw(
+            reviewer_id=reviewer.id, goal_type=goal_type, round=goal_round, seed=seed,
+            tickets=tickets, eligible_holders=eligible, free_submission_ids=[s.id for s in free_queue],
+            winner_holder=winner_holder, winner_user_id=winner_user_id, winner_submission_id=winner_sub.id
+        )
+        db.add(draw)
+        await db.flush()
+        draw_id = draw.id
+        winner_id = winner_sub.user.username # For display
+    await db.commit()
+
+    if draw is not None:
+        winner_tickets = tickets.get(winner_holder, 0)
+        logger.info(
+            f"Giveaway {goal_type} round {goal_round} for reviewer {reviewer.id}: draw={draw_id} seed={seed} "
+            f"tickets={sum(tickets.values())} holders={len(tickets)} winner={winner_holder or winner_user_id}"
+        )
+
         # Announce Winner
         if winner_id:
             winner_data = {
                 "username": winner_id,
                 "tickets": winner_tickets,
                 "prize": "Free Skip",
-                "goal_type": goal_type
+                "goal_type": goal_type,
+                "seed": str(seed), # For audits (see services.lottery)
+                "draw_id": draw_id # The GiveawayDraw row to replay it from
             }
             await broadcast_service.emit_giveaway_winner(reviewer.id, winner_data)
             await queue_service.apply_free_skip(db, reviewer.id, winner_user_id)
 
-    # --- RESET GOAL ---
-    goal_settings = get_reviewer_goal_settings(reviewer)
-    type_info = goal_settings[goal_type]
-    
-    # Get Viewer Count for Scaling
-    stmt = select(models.LiveSession).filter(
-        models.LiveSession.user_id == reviewer.user_id, 
-        models.LiveSession.status == 'LIVE'
-    ).order_by(models.LiveSession.start_time.desc())
-    result = await db.execute(stmt)
-    live_session = result.scalars().first()
-    viewer_count = live_session.max_concurrent_viewers if live_session else 0
-    
-    base_target = type_info["base_target"]
-    next_target = _get_dynamic_goal_target(base_target, viewer_count)
-    description = type_info["description"].format(target=next_target)
-    
-    # Set Cooldown
-    cooldown_end = datetime.now(timezone.utc) + timedelta(minutes=GIVEAWAY_COOLDOWN_MINUTES)
-    
-    # Reset Config
-    goal_config["current"] = 0
-    goal_config["target"] = next_target
-    goal_config["description"] = description
-    goal_config["tickets"] = {}
-    goal_config["cooldown_end"] = cooldown_end.isoformat()
-    
-    # Save
-    config = dict(reviewer.configuration)
-    if "community_goals" not in config:
-        config["community_goals"] = {}
-        
-    config["community_goals"][goal_type] = goal_config
-    reviewer.configuration = config
-    flag_modified(reviewer, "configuration")
-    await db.commit()
-    
     # Broadcast New State
     state = schemas.GiveawayState(
         type=goal_type,
@@ -276,123 +404,68 @@ def _get_dynamic_goal_target(base_target: int, viewer_count: int) -> int:
         
     return int(base_target * multiplier)
 
-async def batch_update_community_goal_progress(db: AsyncSession, reviewer_id: int, event_type: str, total_amount: int, user_updates: dict[str, int]):
-    """
-    Updates the community goal progress in batch.
-    """
-    reviewer = await db.get(models.Reviewer, reviewer_id)
-    if not reviewer:
-        return
-
-    if not reviewer.configuration:
-        reviewer.configuration = {}
-    
-    config = dict(reviewer.configuration)
-    goals_config = config.get("community_goals", {})
-    
-    # Initialize if missing
-    if event_type not in goals_config:
-        goal_settings = get_reviewer_goal_settings(reviewer)
-        if event_type in goal_settings:
-             goals_config[event_type] = _initialize_goal_config(event_type, goal_settings)
-        else:
-            return
-
-    goal_config = goals_config[event_type]
-
-    # Check Cooldown
-    if goal_config.get("cooldown_end"):
-        cooldown_end = datetime.fromisoformat(goal_config["cooldown_end"])
-        if datetime.now(timezone.utc) < cooldown_end:
-            return
-
-    # Update Total Progress
-    goal_config["current"] = goal_config.get("current", 0) + total_amount
-    
-    # Update User Tickets
-    tickets = goal_config.get("tickets", {})
-    for user_id, amount in user_updates.items():
-        current_tickets = tickets.get(user_id, 0)
-        tickets[user_id] = current_tickets + amount
-    goal_config["tickets"] = tickets
-
-    # Check for Goal Completion
-    target = goal_config.get("target", 1000)
-    if goal_config["current"] >= target:
-        await trigger_giveaway_lottery(db, reviewer, event_type, goal_config)
-    else:
-        goals_config[event_type] = goal_config
-        config["community_goals"] = goals_config
-        reviewer.configuration = config
-        flag_modified(reviewer, "configuration")
-        await db.commit()
-        
-        # Broadcast Update
-        state = schemas.GiveawayState(
-            type=event_type,
-            is_active=goal_config.get("is_active", True),
-            progress=goal_config["current"],
-            target=target,
-            cooldown_end=None,
-            description=goal_config.get("description")
-        )
-        await broadcast_service.emit_giveaway_update(reviewer_id, state.model_dump(mode='json'))
-
 async def extend_cooldown(db: AsyncSession, reviewer_id: int, minutes: int):
     """
     Extends the cooldown for all community goals.
     """
-    reviewer = await db.get(models.Reviewer, reviewer_id)
-    if not reviewer:
-        return
+    from services import goal_engine
+    # Counts still in memory were earned before the cooldown: write them (and
+    # draw a goal they complete) first, or the cooling goal would refuse them
+    await goal_engine.checkpoint(reviewer_id)
 
-    if not reviewer.configuration:
-        return
-    
-    config = dict(reviewer.configuration)
-    goals_config = config.get("community_goals", {})
-    
-    if not goals_config:
+    goals = await _load_goals(db, reviewer_id)
+    if not goals:
         return
 
-    needs_save = False
     now = datetime.now(timezone.utc)
     new_cooldown_end = now + timedelta(minutes=minutes)
 
-    for g_type, g_config in goals_config.items():
-        current_end_str = g_config.get("cooldown_end")
-        
-        if current_end_str:
-            current_end = datetime.fromisoformat(current_end_str)
-            if current_end > now:
-                # Extend existing
-                updated_end = current_end + timedelta(minutes=minutes)
-                g_config["cooldown_end"] = updated_end.isoformat()
-            else:
-                # Expired, set new
-                g_config["cooldown_end"] = new_cooldown_end.isoformat()
+    for goal in goals.values():
+        current_end = _aware(goal.cooldown_end)
+        if current_end and current_end > now:
+            # Extend existing
+            goal.cooldown_end = current_end + timedelta(minutes=minutes)
         else:
-            # No cooldown, set new
-            g_config["cooldown_end"] = new_cooldown_end.isoformat()
-            
-        goals_config[g_type] = g_config
-        needs_save = True
+            # Expired or no cooldown, set new
+            goal.cooldown_end = new_cooldown_end
+        goal.updated_at = now
+    await db.commit()
+    await goal_engine.reload(reviewer_id)
 
-    if needs_save:
-        config["community_goals"] = goals_config
-        reviewer.configuration = config
-        flag_modified(reviewer, "configuration")
-        await db.commit()
-        
-        # We could broadcast updates, but might be too noisy for just a cooldown extension?
-        # Let's broadcast to be safe so UI updates.
-        for g_type, g_config in goals_config.items():
-             state = schemas.GiveawayState(
-                type=g_type,
-                is_active=g_config.get("is_active", True),
-                progress=g_config.get("current", 0),
-                target=g_config.get("target", 1000),
-                cooldown_end=datetime.fromisoformat(g_config["cooldown_end"]),
-                description=g_config.get("description")
-            )
-             await broadcast_service.emit_giveaway_update(reviewer_id, state.model_dump(mode='json'))
+    # Broadcast so the UI shows the new cooldowns
+    for goal in goals.values():
+        await broadcast_service.emit_giveaway_update(reviewer_id, _to_state(goal).model_dump(mode='json'))
+
+async def record_vote(db: AsyncSession, reviewer_id: int, vote_type: str):
+    """
+    Counts a fire/trash vote and advances the vote goal (if one is set) with a
+    single upsert on reviewer_live_state.
+    """
+    column = {"fire": "fire_votes", "trash": "trash_votes"}.get(vote_type)
+    now = datetime.now(timezone.utc)
+    table = models.ReviewerLiveState.__table__
+    values = {"reviewer_id": reviewer_id, "fire_votes": 0, "trash_votes": 0, "vote_goal_current": 0, "updated_at": now}
+    if column:
+        values[column] = 1
+
+    insert = _insert(db)
+    if insert is not None:
+        stmt = insert(table).values(values)
+        set_ = {
+            "vote_goal_current": table.c.vote_goal_current + case((table.c.vote_goal_target.isnot(None), 1), else_=0),
+            "updated_at": now,
+        }
+        if column:
+            set_[column] = table.c[column] + 1
+        await db.execute(stmt.on_conflict_do_update(index_elements=["reviewer_id"], set_=set_))
+    else:
+        state = await db.get(models.ReviewerLiveState, reviewer_id)
+        if state is None:
+            db.add(models.ReviewerLiveState(**values))
+        else:
+            if column:
+                setattr(state, column, getattr(state, column) + 1)
+            if state.vote_goal_target is not None:
+                state.vote_goal_current += 1
+            state.updated_at = now
+    await db.commit()
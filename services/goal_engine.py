@@ -0,0 +1,295 @@
+"""
+In-memory community goal counters for the live event path.
+
+TikTok likes, comments, shares and gifts arrive far faster than the database
+should be written. While the engine is running, giveaway progress is added to
+per-reviewer counters in memory (O(1), no session), and:
+
+- the threshold is checked on every increment, so a completed goal is
+  checkpointed and its lottery drawn straight away;
+- pending counts and ticket tallies are checkpointed every
+  GOAL_CHECKPOINT_SECONDS with giveaway_service.apply_progress (atomic
+  increments, so other writers are never overwritten);
+- progress is broadcast at most once per GOAL_BROADCAST_INTERVAL_SECONDS
+  per goal, with a trailing update for the last change.
+
+The database stays authoritative: every checkpoint adopts the stored count,
+and goal resets (lottery, cooldown changes) reload the reviewer's counters.
+When the engine isn't running (scripts, API process) add() writes through.
+"""
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+import database
+import models
+import schemas
+from config import settings
+from services import broadcast as broadcast_service
+from services import giveaway_service
+
+logger = logging.getLogger(__name__)
+
+
+class GoalCounter:
+    __slots__ = (
+        "goal_type", "goal_id", "current", "target", "round", "description", "is_active", "cooldown_end",
+        "pending", "tickets", "dirty", "last_emit", "completing"
+    )
+
+    def __init__(self, goal):
+        self.goal_type = goal.goal_type
+        self.goal_id = goal.id
+        self.current = goal.current
+        self.target = goal.target
+        self.round = goal.round
+        self.description = goal.description
+        self.is_active = goal.is_active
+        self.cooldown_end = giveaway_service._aware(goal.cooldown_end)
+        self.pending = 0 # Added since the last checkpoint
+        self.tickets: Dict[str, int] = {}
+        self.dirty = False # Changed since the last broadcast
+        self.last_emit = float("-inf")
+        self.completing = False
+
+    def cooling_down(self, now: datetime) -> bool:
+        return self.cooldown_end is not None and self.cooldown_end > now
+
+    def state(self) -> schemas.GiveawayState:
+        return schemas.GiveawayState(
+            type=self.goal_type,
+            is_active=self.is_active,
+            progress=self.current,
+            target=self.target,
+            cooldown_end=self.cooldown_end,
+            description=self.description
+        )
+
+
+class ReviewerGoals:
+    def __init__(self):
+        self.goals: Dict[str, GoalCounter] = {}
+        self.lock = asyncio.Lock() # Serializes checkpoints, lotteries and reloads
+        self.touched_at = time.monotonic()
+
+
+_reviewers: Dict[int, ReviewerGoals] = {}
+_task: Optional[asyncio.Task] = None
+
+
+def is_running() -> bool:
+    return _task is not None and not _task.done()
+
+
+async def _load(reviewer_id: int, entry: ReviewerGoals) -> None:
+    """Replaces the reviewer's counters with the stored goals. Hold entry.lock."""
+    async with database.AsyncSessionLocal() as db:
+        goals = await giveaway_service.load_goals(db, reviewer_id)
+    counters = {}
+    for g_type, goal in goals.items():
+        counter = counters[g_type] = GoalCounter(goal)
+        old = entry.goals.get(g_type)
+        if old is not None and (old.goal_id, old.round) == (goal.id, goal.round):
+            # Same round: keep what hasn't been written yet
+            counter.pending, counter.tickets = old.pending, old.tickets
+            counter.current += old.pending
+            counter.last_emit = old.last_emit
+    entry.goals = counters
+
+
+async def _entry(reviewer_id: int) -> ReviewerGoals:
+    entry = _reviewers.get(reviewer_id)
+    if entry is None:
+        entry = _reviewers[reviewer_id] = ReviewerGoals()
+        async with entry.lock:
+            await _load(reviewer_id, entry)
+    elif not entry.goals:
+        async with entry.lock:
+            if not entry.goals:
+                await _load(reviewer_id, entry)
+    return entry
+
+
+async def add(reviewer_id: int, event_type: str, amount: int, user_updates: Optional[Dict[str, int]] = None) -> None:
+    """Counts `amount` towards a goal, with per-contributor tickets."""
+    if event_type not in giveaway_service.DEFAULT_GOAL_TYPES or amount <= 0:
+        return
+    user_updates = user_updates or {}
+
+    if not is_running():
+        async with database.AsyncSessionLocal() as db:
+            await giveaway_service.batch_update_community_goal_progress(db, reviewer_id, event_type, amount, user_updates)
+        return
+
+    entry = await _entry(reviewer_id)
+    entry.touched_at = time.monotonic()
+    counter = entry.goals.get(event_type)
+    if counter is None or counter.completing or counter.cooling_down(datetime.now(timezone.utc)):
+        return
+
+    counter.current += amount
+    counter.pending += amount
+    for holder, count in user_updates.items():
+        if holder:
+            counter.tickets[holder] = counter.tickets.get(holder, 0) + count
+
+    if counter.current >= counter.target:
+        counter.completing = True
+        await _complete(reviewer_id, entry, counter)
+    else:
+        counter.dirty = True
+        await _maybe_emit(reviewer_id, counter, time.monotonic())
+
+
+async def _maybe_emit(reviewer_id: int, counter: GoalCounter, now: float) -> None:
+    if counter.dirty and now - counter.last_emit >= settings.GOAL_BROADCAST_INTERVAL_SECONDS:
+        counter.dirty = False
+        counter.last_emit = now
+        await broadcast_service.emit_giveaway_update(reviewer_id, counter.state().model_dump(mode='json'))
+
+
+async def _checkpoint_goal(reviewer_id: int, entry: ReviewerGoals, counter: GoalCounter):
+    """Writes the counter's pending progress. Hold entry.lock. Returns the stored row, if any."""
+    if not counter.pending and not counter.tickets:
+        return None
+    amount, tickets = counter.pending, counter.tickets
+    counter.pending, counter.tickets = 0, {}
+    try:
+        async with database.AsyncSessionLocal() as db:
+            row = await giveaway_service.apply_progress(db, reviewer_id, counter.goal_type, amount, tickets)
+    except Exception:
+        # Keep the counts for the next checkpoint
+        counter.pending += amount
+        for holder, count in tickets.items():
+            counter.tickets[holder] = counter.tickets.get(holder, 0) + count
+        raise
+
+    if row is None or row[0] != counter.goal_id:
+        # Goal reset or cooling down elsewhere: the stored state wins
+        await _load(reviewer_id, entry)
+        return None
+    _, stored, counter.target, counter.round = row
+    if stored + counter.pending != counter.current:
+        counter.current = stored + counter.pending # Adopt other writers' progress
+        counter.dirty = True
+    return row
+
+
+async def _complete(reviewer_id: int, entry: ReviewerGoals, counter: GoalCounter) -> None:
+    async with entry.lock:
+        try:
+            row = await _checkpoint_goal(reviewer_id, entry, counter)
+            if row is None and entry.goals.get(counter.goal_type) is counter:
+                # A concurrent checkpoint already wrote it
+                row = (counter.goal_id, counter.current, counter.target, counter.round)
+            if row is None or row[1] < row[2]:
+                counter.completing = False
+                return
+            async with database.AsyncSessionLocal() as db:
+                reviewer = await db.get(models.Reviewer, reviewer_id)
+                await giveaway_service.trigger_giveaway_lottery(db, reviewer, counter.goal_type, row[3])
+        except Exception as e:
+            counter.completing = False
+            logger.error(f"Goal engine: completing {counter.goal_type} for reviewer {reviewer_id} failed: {e}")
+            return
+        # Counts that arrived during the draw fall into the cooldown, as they would in the DB
+        await _load(reviewer_id, entry)
+
+
+async def checkpoint(reviewer_id: Optional[int] = None) -> None:
+    """Writes pending progress for one reviewer (or all) and draws any completed goals."""
+    for r_id in ([reviewer_id] if reviewer_id is not None else list(_reviewers)):
+        entry = _reviewers.get(r_id)
+        if entry is None:
+            continue
+        completed = []
+        async with entry.lock:
+            for g_type in list(entry.goals):
+                counter = entry.goals.get(g_type) # A reload may have replaced it
+                if counter is None or counter.completing:
+                    continue
+                try:
+                    row = await _checkpoint_goal(r_id, entry, counter)
+                except Exception as e:
+                    logger.error(f"Goal engine: checkpoint for reviewer {r_id} failed: {e}")
+                    continue
+                if row is not None and row[1] >= row[2]:
+                    # Completed by another writer in the meantime
+                    counter.completing = True
+                    completed.append(counter)
+        for counter in completed:
+            await _complete(r_id, entry, counter)
+
+
+async def reload(reviewer_id: int) -> None:
+    """Checkpoints and reloads a reviewer's counters after an out-of-band change (e.g. cooldown)."""
+    entry = _reviewers.get(reviewer_id)
+    if entry is None:
+        return
+    await checkpoint(reviewer_id)
+    async with entry.lock:
+        await _load(reviewer_id, entry)
+
+
+def overlay(reviewer_id: int, states: List[schemas.GiveawayState]) -> List[schemas.GiveawayState]:
+    """Adds counts that haven't been checkpointed yet to stored goal states."""
+    entry = _reviewers.get(reviewer_id)
+    if entry is None:
+        return states
+    for state in states:
+        counter = entry.goals.get(state.type)
+        if counter is not None and counter.pending and counter.target == state.target:
+            state.progress = max(state.progress, counter.current)
+    return states
+
+
+async def _flush_broadcasts() -> None:
+    now = time.monotonic()
+    for reviewer_id, entry in list(_reviewers.items()):
+        for counter in list(entry.goals.values()):
+            await _maybe_emit(reviewer_id, counter, now)
+
+
+def _evict_idle() -> None:
+    cutoff = time.monotonic() - settings.GOAL_ENGINE_IDLE_SECONDS
+    for reviewer_id, entry in list(_reviewers.items()):
+        idle = entry.touched_at < cutoff and not entry.lock.locked()
+        if idle and not any(c.pending or c.tickets or c.dirty for c in entry.goals.values()):
+            del _reviewers[reviewer_id]
+
+
+async def _run() -> None:
+    last_checkpoint = time.monotonic()
+    while True:
+        await asyncio.sleep(settings.GOAL_BROADCAST_INTERVAL_SECONDS)
+        try:
+            await _flush_broadcasts()
+            if time.monotonic() - last_checkpoint >= settings.GOAL_CHECKPOINT_SECONDS:
+                last_checkpoint = time.monotonic()
+                await checkpoint()
+                _evict_idle()
+        except Exception as e:
+            logger.error(f"Goal engine tick failed: {e}")
+
+
+def start() -> None:
+    """Starts the checkpoint/broadcast loop (idempotent; no-op when disabled)."""
+    global _task
+    if settings.GOAL_ENGINE_ENABLED and not is_running():
+        _task = asyncio.create_task(_run())
+
+
+async def stop() -> None:
+    """Stops the loop and writes everything still pending."""
+    global _task
+    if _task is not None:
+        _task.cancel()
+        try:
+            await _task
+        except asyncio.CancelledError:
+            pass
+        _task = None
+    await checkpoint()
+    _reviewers.clear()
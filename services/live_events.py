@@ -0,0 +1,231 @@
+"""
+In-process pub/sub for the server-sent-events overlay stream.
+
+The broadcast helpers publish small state snapshots here (now playing, queue
+length, community goal progress). Every event is serialized once and fanned
+out to all subscribers of that reviewer, so overlay clients never query the
+database themselves.
+
+Events are snapshots rather than deltas. Each subscriber therefore keeps only
+the newest pending event per key. That caps per-connection memory, and lets a
+reconnecting client resume from Last-Event-ID by receiving the latest value of
+every key it missed.
+"""
+import asyncio
+import json
+import logging
+import secrets
+from collections import OrderedDict
+from typing import Dict, List, Optional, Set, Tuple
+
+import schemas
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+NOW_PLAYING = "now_playing"
+QUEUE_LENGTH = "queue_length"
+GIVEAWAY_PROGRESS = "giveaway_progress"
+
+# Event ids look like "<epoch>:<sequence>"; a different epoch means the server restarted
+_EPOCH = secrets.token_hex(4)
+
+
+class Event:
+    __slots__ = ("seq", "name", "key", "data")
+
+    def __init__(self, seq: int, name: str, key: str, data: str):
+        self.seq = seq
+        self.name = name
+        self.key = key
+        self.data = data
+
+    @property
+    def id(self) -> str:
+        return f"{_EPOCH}:{self.seq}"
+
+    def encode(self) -> str:
+        return f"id: {self.id}\nevent: {self.name}\ndata: {self.data}\n\n"
+
+    @property
+    def size(self) -> int:
+        return len(self.data) + len(self.name) + 32
+
+
+class Subscription:
+    """Bounded, coalescing buffer for one connected client."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.pending: "OrderedDict[str, Event]" = OrderedDict()
+        self.pending_bytes = 0
+        self.dropped = 0
+        self._wakeup = asyncio.Event()
+
+    def offer(self, event: Event) -> None:
+        previous = self.pending.pop(event.key, None)
+        if previous is not None:
+            self.pending_bytes -= previous.size
+        self.pending[event.key] = event
+        self.pending_bytes += event.size
+
+        # Slow consumer: shed the oldest snapshots, never more than the cap
+        while self.pending_bytes > self.max_bytes and len(self.pending) > 1:
+            _, oldest = self.pending.popitem(last=False)
+            self.pending_bytes -= oldest.size
+            self.dropped += 1
+        self._wakeup.set()
+
+    async def next_batch(self, timeout: float) -> List[Event]:
+        """Waits up to `timeout` seconds for events; returns [] on timeout (heartbeat time)."""
+        if not self.pending:
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                return []
+        events = sorted(self.pending.values(), key=lambda e: e.seq)
+        self.pending.clear()
+        self.pending_bytes = 0
+        return events
+
+
+class _ReviewerChannel:
+    def __init__(self):
+        self.seq = 0
+        self.latest: Dict[str, Event] = {}
+        self.subscribers: Set[Subscription] = set()
+        self.current_track: Optional[dict] = None
+        self.queue_top: Optional[dict] = None
+        self.seeded = False
+
+
+_channels: Dict[int, _ReviewerChannel] = {}
+
+
+def _channel(reviewer_id: int) -> _ReviewerChannel:
+    channel = _channels.get(reviewer_id)
+    if channel is None:
+        channel = _channels[reviewer_id] = _ReviewerChannel()
+    return channel
+
+
+def publish(reviewer_id: int, name: str, data, key: Optional[str] = None) -> None:
+    """Serializes `data` once and fans it out to every subscriber of the reviewer."""
+    channel = _channel(int(reviewer_id))
+    key = key or name
+    encoded = json.dumps(data, default=str, separators=(",", ":"))
+
+    latest = channel.latest.get(key)
+    if latest is not None and latest.data == encoded:
+        return
+
+    channel.seq += 1
+    event = Event(channel.seq, name, key, encoded)
+    channel.latest[key] = event
+    for subscriber in channel.subscribers:
+        subscriber.offer(event)
+
+
+def _public_submission(submission_data: Optional[dict]) -> Optional[dict]:
+    if not submission_data:
+        return None
+    try:
+        return schemas.SubmissionPublic.model_validate(submission_data).model_dump(mode='json')
+    except Exception as e:
+        logger.warning(f"Could not build public submission payload: {e}")
+        return None
+
+
+def _publish_now_playing(reviewer_id: int, channel: _ReviewerChannel) -> None:
+    # Mirrors get_current_track_public: the active track, else the top of the queue
+    publish(reviewer_id, NOW_PLAYING, channel.current_track or channel.queue_top)
+
+
+def publish_current_track(reviewer_id: int, submission_data: Optional[dict]) -> None:
+    channel = _channel(int(reviewer_id))
+    channel.current_track = _public_submission(submission_data)
+    _publish_now_playing(reviewer_id, channel)
+
+
+def publish_queue(reviewer_id: int, queue_data: list) -> None:
+    channel = _channel(int(reviewer_id))
+    pending = [s for s in queue_data if s.get("status", "pending") == "pending"]
+    publish(reviewer_id, QUEUE_LENGTH, {"length": len(pending)})
+    channel.queue_top = _public_submission(queue_data[0]) if queue_data else None
+    if channel.current_track is None:
+        _publish_now_playing(reviewer_id, channel)
+
+
+def publish_giveaway(reviewer_id: int, giveaway_state: dict) -> None:
+    goal_type = giveaway_state.get("type", "LIKES")
+    publish(reviewer_id, GIVEAWAY_PROGRESS, giveaway_state, key=f"{GIVEAWAY_PROGRESS}:{goal_type}")
+
+
+async def _seed(reviewer_id: int) -> None:
+    """
+    Fills the channel from the cached initial-state snapshot the first time it
+    is needed. Keys published live (before or during the snapshot read) are
+    newer than the snapshot and are kept; only missing ones are filled in.
+    """
+    from services import snapshot_service
+    state = await snapshot_service.get_initial_state(reviewer_id)
+    channel = _channel(reviewer_id)
+    payload = state.model_dump(mode='json')
+    if NOW_PLAYING not in channel.latest and channel.current_track is None and payload["current_track"]:
+        channel.current_track = _public_submission(payload["current_track"])
+    if QUEUE_LENGTH not in channel.latest:
+        publish_queue(reviewer_id, payload["queue"])
+    if NOW_PLAYING not in channel.latest:
+        _publish_now_playing(reviewer_id, channel)
+    for goal in payload.get("community_goals") or []:
+        if f"{GIVEAWAY_PROGRESS}:{goal.get('type', 'LIKES')}" not in channel.latest:
+            publish_giveaway(reviewer_id, goal)
+    channel.seeded = True
+
+
+def _parse_last_event_id(last_event_id: Optional[str]) -> Optional[int]:
+    if not last_event_id:
+        return None
+    epoch, _, seq = last_event_id.partition(":")
+    if epoch != _EPOCH or not seq.isdigit():
+        return None
+    return int(seq)
+
+
+async def subscribe(reviewer_id: int, last_event_id: Optional[str] = None) -> Tuple[Subscription, List[Event]]:
+    """
+    Registers a subscriber and returns it with the events it should be sent first:
+    everything newer than Last-Event-ID, or the full current state.
+    """
+    reviewer_id = int(reviewer_id)
+    channel = _channel(reviewer_id)
+    if not channel.seeded:
+        try:
+            await _seed(reviewer_id)
+        except Exception as e:
+            logger.error(f"Failed to seed live events for reviewer {reviewer_id}: {e}")
+
+    subscription = Subscription(settings.SSE_MAX_BUFFER_BYTES)
+    channel.subscribers.add(subscription)
+
+    since = _parse_last_event_id(last_event_id)
+    backlog = sorted(
+        (e for e in channel.latest.values() if since is None or e.seq > since),
+        key=lambda e: e.seq,
+    )
+    return subscription, backlog
+
+
+def unsubscribe(reviewer_id: int, subscription: Subscription) -> None:
+    channel = _channels.get(int(reviewer_id))
+    if channel is not None:
+        channel.subscribers.discard(subscription)
+        if not channel.subscribers and not channel.latest:
+            # Nothing to resume from: don't keep a channel per reviewer id ever asked for
+            del _channels[int(reviewer_id)]
+
+
+def subscriber_count(reviewer_id: int) -> int:
+    channel = _channels.get(int(reviewer_id))
+    return len(channel.subscribers) if channel else 0
@@ -0,0 +1,82 @@
+"""
+Ticket-weighted giveaway draws.
+
+A TicketSampler holds one weight (ticket count) per holder in a Fenwick tree,
+so adding tickets and drawing are both O(log n). A draw picks ticket number
+`rng.randrange(total)` and returns the holder that owns it; holders that
+can't win (no pending free submission) are set aside and the draw repeats
+over the rest, which is the same as drawing among eligible holders only.
+
+Draws are reproducible for audits: holders are placed in sorted order and the
+only randomness is random.Random(seed), so replaying draw_winner() with the
+round's tickets and the logged seed returns the same winner.
+"""
+import random
+import secrets
+from typing import Callable, Dict, List, Mapping, Optional, Tuple
+
+from services.fenwick import FenwickTree
+
+
+class TicketSampler:
+    def __init__(self):
+        self.tree = FenwickTree(16)
+        self.holders: List[str] = []
+        self.slots: Dict[str, int] = {}
+
+    @classmethod
+    def from_tickets(cls, tickets: Mapping[str, int]) -> "TicketSampler":
+        """Builds a sampler in O(n); holders are sorted so the layout is deterministic."""
+        sampler = cls()
+        sampler.holders = sorted(holder for holder, count in tickets.items() if count > 0)
+        sampler.slots = {holder: slot for slot, holder in enumerate(sampler.holders)}
+        sampler.tree = FenwickTree.from_values([tickets[holder] for holder in sampler.holders])
+        return sampler
+
+    def __len__(self) -> int:
+        return len(self.holders)
+
+    def total(self) -> int:
+        return self.tree.total()
+
+    def weight(self, holder: str) -> int:
+        slot = self.slots.get(holder)
+        return 0 if slot is None else self.tree.value(slot)
+
+    def add(self, holder: str, count: int) -> None:
+        """Adds (or with a negative count, removes) tickets for a holder."""
+        slot = self.slots.get(holder)
+        if slot is None:
+            slot = self.slots[holder] = len(self.holders)
+            self.holders.append(holder)
+            self.tree.grow(slot + 1)
+        self.tree.add(slot, max(count, -self.tree.value(slot)))
+
+    def draw(self, rng: random.Random, eligible: Optional[Callable[[str], bool]] = None) -> Optional[str]:
+        """
+        Picks a holder with probability proportional to their tickets, among
+        holders for which `eligible` is true. Returns None if nobody can win.
+        The sampler's weights are unchanged afterwards.
+        """
+        excluded: List[Tuple[int, int]] = []
+        try:
+            while self.total() > 0:
+                slot = self.tree.find(rng.randrange(self.total()))
+                holder = self.holders[slot]
+                if eligible is None or eligible(holder):
+                    return holder
+                excluded.append((slot, self.tree.value(slot)))
+                self.tree.set(slot, 0)
+            return None
+        finally:
+            for slot, weight in excluded:
+                self.tree.set(slot, weight)
+
+
+def new_seed() -> int:
+    return secrets.randbits(63)
+
+
+def draw_winner(tickets: Mapping[str, int], eligible: Callable[[str], bool], seed: int) -> Optional[str]:
+    """One reproducible draw over a round's tickets (what the lottery runs, and what an audit replays)."""
+    return TicketSampler.from_tickets(tickets).draw(random.Random(seed), eligible)
@@ -0,0 +1,161 @@
+"""
+yt-dlp lookups, off the event loop.
+
+extract_info blocks (network round trips plus parsing, often seconds), so it
+runs in a bounded thread pool of RESOLVER_WORKERS. Concurrent lookups of the
+same URL and profile share one extraction. Results are cached:
+
+- metadata (titles, durations, tags) for RESOLVER_METADATA_TTL_SECONDS;
+- stream URLs until the expiry embedded in them (googlevideo `expire=`,
+  Discord CDN `ex=`, CloudFront `Expires=`, `X-Amz-Date` + `X-Amz-Expires`),
+  less RESOLVER_EXPIRY_MARGIN_SECONDS, or RESOLVER_STREAM_TTL_SECONDS when
+  the URL carries none.
+
+Only the fields callers use are kept. The extractor is a plain blocking
+function (url, options) -> info dict; tests swap it with set_extractor().
+"""
+import asyncio
+import datetime
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from config import settings
+from services.audio_cache import normalize_url
+from services.singleflight import SingleFlight
+
+Extractor = Callable[[str, dict], Optional[dict]]
+
+# yt-dlp options and the info fields kept, per kind of lookup
+PROFILES: Dict[str, Tuple[dict, Tuple[str, ...]]] = {
+    # Direct audio URL for the proxy
+    "stream": ({
+        'format': 'bestaudio/best',
+        'quiet': True,
+        'extractor_args': {'youtube': {'player_client': ['android', 'ios', 'web']}},
+        'nocheckcertificate': True,
+    }, ("url", "http_headers", "duration")),
+    # Track details for the submission form
+    "metadata": ({
+        'quiet': True,
+        'skip_download': True,
+        'extract_flat': False,
+        'extractor_args': {'youtube': {'player_client': ['android', 'ios', 'web']}},
+        'nocheckcertificate': True,
+    }, ("title", "artist", "uploader", "genre", "categories", "duration", "thumbnail", "description", "tags")),
+    # Quick validation of links posted in Discord
+    "probe": ({
+        'quiet': True,
+        'extract_flat': True,
+        'force_generic_extractor': True,
+    }, ("title", "duration")),
+}
+
+
+def _yt_dlp_extract(url: str, options: dict) -> Optional[dict]:
+    import yt_dlp
+    with yt_dlp.YoutubeDL(options) as ydl:
+        return ydl.extract_info(url, download=False)
+
+
+_extractor: Extractor = _yt_dlp_extract
+_executor: Optional[ThreadPoolExecutor] = None
+_flights = SingleFlight()
+_cache: "OrderedDict[Tuple[str, str], Tuple[Optional[dict], float]]" = OrderedDict() # (profile, URL) -> (info, expires at as epoch seconds)
+
+
+def set_extractor(extractor: Optional[Extractor]) -> None:
+    """Replaces yt-dlp (None restores it) and empties the cache."""
+    global _extractor
+    _extractor = extractor or _yt_dlp_extract
+    _cache.clear()
+
+
+def _pool() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=max(1, settings.RESOLVER_WORKERS), thread_name_prefix="resolver")
+    return _executor
+
+
+def stream_expiry(url: str) -> Optional[float]:
+    """The expiry (epoch seconds) a signed media URL carries, if any."""
+    query = {name.lower(): values[0] for name, values in parse_qs(urlsplit(url).query).items()}
+    try:
+        if "expire" in query: # YouTube (googlevideo)
+            return float(query["expire"])
+        if "ex" in query: # Discord CDN, hex timestamp
+            return float(int(query["ex"], 16))
+        if "expires" in query: # CloudFront / signed CDNs (SoundCloud)
+            return float(query["expires"])
+        if "x-amz-date" in query and "x-amz-expires" in query: # S3 / R2 presigned
+            signed = datetime.datetime.strptime(query["x-amz-date"], "%Y%m%dT%H%M%SZ").replace(tzinfo=datetime.timezone.utc)
+            return signed.timestamp() + float(query["x-amz-expires"])
+    except ValueError:
+        return None
+    return None
+
+
+def _expires_at(profile: str, info: Optional[dict]) -> float:
+    now = time.time()
+    if profile != "stream":
+        return now + settings.RESOLVER_METADATA_TTL_SECONDS
+    expiry = stream_expiry(info["url"]) if info and info.get("url") else None
+    if expiry is None:
+        return now + settings.RESOLVER_STREAM_TTL_SECONDS
+    return expiry - settings.RESOLVER_EXPIRY_MARGIN_SECONDS
+
+
+async def extract(url: str, profile: str) -> Optional[dict]:
+    """
+    The kept fields of yt-dlp's info for `url` under `profile` (see PROFILES),
+    from the cache or one shared extraction. Extraction errors propagate
+    (e.g. yt_dlp.utils.DownloadError) and are not cached.
+    """
+    options, fields = PROFILES[profile]
+    key = (profile, normalize_url(url))
+    cached = _cache.get(key)
+    if cached is not None:
+        info, expires_at = cached
+        if expires_at > time.time():
+            _cache.move_to_end(key)
+            return info
+        del _cache[key]
+
+    async def run() -> Optional[dict]:
+        loop = asyncio.get_running_loop()
+        # A copy per call: yt-dlp may modify the options it is given
+        raw = await loop.run_in_executor(_pool(), _extractor, url, dict(options))
+        info = {name: raw[name] for name in fields if name in raw} if raw else None
+        _cache[key] = (info, _expires_at(profile, info))
+        while len(_cache) > settings.RESOLVER_CACHE_SIZE:
+            _cache.popitem(last=False)
+        return info
+
+    return await _flights.do(key, run)
+
+
+async def resolve_stream(url: str) -> Tuple[str, Dict[str, str]]:
+    """A directly fetchable audio URL for a page URL (SoundCloud, YouTube...) and the headers to send."""
+    info = await extract(url, "stream")
+    if not info or not info.get("url"):
+        raise ValueError(f"No stream URL found for {url}")
+    return info["url"], dict(info.get("http_headers") or {})
+
+
+async def metadata(url: str) -> Dict[str, Any]:
+    return await extract(url, "metadata") or {}
+
+
+async def probe(url: str) -> Optional[dict]:
+    """Title and duration from a quick generic extraction, or None."""
+    return await extract(url, "probe")
+
+
+def shutdown() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
@@ -2,6 +2,7 @@ import models
 import schemas
 from services.storage_service import storage_service
 import logging
+from typing import List
 
 logger = logging.getLogger(__name__)
 
@@ -13,32 +14,44 @@ async def enrich_reviewer_profile(reviewer: models.Reviewer) -> schemas.Reviewer
     if not reviewer:
         return None
 
+    return (await enrich_reviewer_profiles([reviewer]))[0]
+
+async def enrich_reviewer_profiles(reviewers: List[models.Reviewer]) -> List[schemas.ReviewerProfile]:
+    """
+    enrich_reviewer_profile for a list, signing every avatar and banner in one
+    storage_service.presign_many call instead of one request per URL.
+    """
     # Convert to Pydantic model first to avoid modifying the DB session object
     # We use model_validate to ensure all fields are correctly mapped
-    profile = schemas.ReviewerProfile.model_validate(reviewer)
-
-    # 1. Enrich Avatar URL
-    if profile.avatar_url and profile.avatar_url.startswith("r2://"):
-        profile.avatar_r2_uri = profile.avatar_url  # Store original URI
-        try:
-            presigned = await storage_service.generate_presigned_url(profile.avatar_url)
-            if presigned:
-                profile.avatar_url = presigned
-        except Exception as e:
-            logger.error(f"Failed to generate presigned URL for avatar {profile.avatar_url}: {e}")
-
-    # 2. Enrich Banner URL (in configuration)
-    if profile.configuration and profile.configuration.banner_url:
-        banner_url = profile.configuration.banner_url
-        if banner_url.startswith("r2://"):
-            profile.configuration.banner_r2_uri = banner_url # Store original URI
-            try:
-                presigned = await storage_service.generate_presigned_url(banner_url)
-                if presigned:
-                    # We need to update the configuration object. 
-                    # Since configuration is a Pydantic model nested in ReviewerProfile, we can modify it directly.
-                    profile.configuration.banner_url = presigned
-            except Exception as e:
-                logger.error(f"Failed to generate presigned URL for banner {banner_url}: {e}")
-
-    return profile
+    profiles = [schemas.ReviewerProfile.model_validate(reviewer) for reviewer in reviewers]
+
+    uris = []
+    for profile in profiles:
+        if profile.avatar_url and profile.avatar_url.startswith("r2://"):
+            uris.append(profile.avatar_url)
+        if profile.configuration and profile.configuration.banner_url and profile.configuration.banner_url.startswith("r2://"):
+            uris.append(profile.configuration.banner_url)
+    if not uris:
+        return profiles
+
+    try:
+        presigned = await storage_service.presign_many(uris)
+    except Exception as e:
+        logger.error(f"Failed to generate presigned URLs for {len(uris)} reviewer images: {e}")
+        presigned = {}
+
+    for profile in profiles:
+        # 1. Enrich Avatar URL
+        if profile.avatar_url and profile.avatar_url.startswith("r2://"):
+            profile.avatar_r2_uri = profile.avatar_url  # Store original URI
+            profile.avatar_url = presigned.get(profile.avatar_url) or profile.avatar_url
+
+        # 2. Enrich Banner URL (in configuration)
+        # Since configuration is a Pydantic model nested in ReviewerProfile, we can modify it directly.
+        if profile.configuration and profile.configuration.banner_url:
+            banner_url = profile.configuration.banner_url
+            if banner_url.startswith("r2://"):
+                profile.configuration.banner_r2_uri = banner_url # Store original URI
+                profile.configuration.banner_url = presigned.get(banner_url) or banner_url
+
+    return profiles
@@ -0,0 +1,67 @@
+"""
+Built-in outbox event kinds. Imported by outbox_service.start().
+
+Payloads are plain JSON; handlers run in the worker's session and may commit.
+"""
+from sqlalchemy import update, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import models
+from services import outbox_service, achievement_service, giveaway_service, ffmpeg_runner, waveform_service, rendition_service
+
+
+@outbox_service.handler("xp")
+async def award_xp(db: AsyncSession, payload: dict):
+    # Single-statement increment (no read-modify-write) so it commits with the done mark
+    await db.execute(
+        update(models.User)
+        .where(models.User.id == payload["user_id"])
+        .values(xp=func.coalesce(models.User.xp, 0) + payload["amount"])
+        .execution_options(synchronize_session=False)
+    )
+
+
+@outbox_service.handler("achievements")
+async def trigger_achievements(db: AsyncSession, payload: dict):
+    """payload: {"user_id": int, "triggers": [{"category": str, "value": int|None, "slug": str|None}]}"""
+    await achievement_service.evaluate(db, [
+        achievement_service.Trigger(payload["user_id"], t["category"], t.get("value"), t.get("slug"))
+        for t in payload.get("triggers", [])
+    ])
+
+
+@outbox_service.handler("submission_created")
+async def submission_created(db: AsyncSession, payload: dict):
+    """payload: {"submission_id": int} or, for a bulk submission, {"submission_ids": [int]}"""
+    await achievement_service.check_submissions_created(db, payload.get("submission_ids") or [payload["submission_id"]])
+
+
+@outbox_service.handler("submission_reviewed")
+async def submission_reviewed(db: AsyncSession, payload: dict):
+    await achievement_service.check_submission_reviewed(db, payload["submission_id"])
+
+
+@outbox_service.handler("giveaway_cooldown")
+async def extend_giveaway_cooldown(db: AsyncSession, payload: dict):
+    await giveaway_service.extend_cooldown(db, payload["reviewer_id"], minutes=payload["minutes"])
+
+
+@outbox_service.handler("queue_broadcast")
+async def broadcast_queue(db: AsyncSession, payload: dict):
+    from services import queue_service
+    await queue_service.broadcast_queue_state(db, payload["reviewer_id"], include_history=payload.get("include_history", False))
+
+
+@outbox_service.handler("waveform_peaks")
+async def generate_waveform_peaks(db: AsyncSession, payload: dict):
+    """payload: {"track_urls": [str]} of uploaded tracks; ones that already have peaks are skipped."""
+    # Only hands the work over: ffmpeg must not run inside the outbox transaction
+    for track_url in payload["track_urls"]:
+        ffmpeg_runner.submit(waveform_service.generate, track_url)
+
+
+@outbox_service.handler("preview_rendition")
+async def create_preview_rendition(db: AsyncSession, payload: dict):
+    """payload: {"track_urls": [str]} of uploaded tracks; small ones and ones already transcoded are skipped."""
+    for track_url in payload["track_urls"]:
+        ffmpeg_runner.submit(rendition_service.generate, track_url)
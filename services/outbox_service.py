@@ -0,0 +1,389 @@
+"""
+Transactional outbox for post-commit side effects.
+
+Request handlers call enqueue() inside the transaction that makes the primary
+change, so the side effect is recorded if and only if that change commits.
+An in-process worker pool drains the table afterwards:
+
+- Claiming is a single UPDATE ... RETURNING over rows picked with
+  FOR UPDATE SKIP LOCKED (Postgres), so several processes can share the table.
+  A claimed row carries a lease; if its worker dies the row is picked up again.
+- The "done" mark is written in the handler's own session, so a handler that
+  commits once (XP, cooldown) is applied exactly once. Multi-commit handlers
+  (achievements) must be idempotent, which trigger_achievement already is.
+- Failures are retried with exponential backoff; after OUTBOX_MAX_ATTEMPTS
+  the row is parked as 'dead' for inspection.
+- Events with the same partition key (e.g. one user's achievements) run one
+  at a time, in id order.
+- enqueue() is idempotent per key: a replayed request cannot queue its side
+  effects twice.
+"""
+import asyncio
+import datetime
+import logging
+import random
+import time
+import uuid
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Set
+
+from sqlalchemy import delete, event, func, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+import models
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[AsyncSession, dict], Awaitable[Any]]
+
+_handlers: Dict[str, Handler] = {}
+
+MAX_BACKOFF_SECONDS = 15 * 60
+PURGE_INTERVAL_SECONDS = 60 * 60
+
+
+def handler(kind: str):
+    """Registers the coroutine that performs events of `kind`."""
+    def decorator(fn: Handler) -> Handler:
+        _handlers[kind] = fn
+        return fn
+    return decorator
+
+
+def _utcnow() -> datetime.datetime:
+    return datetime.datetime.now(datetime.timezone.utc)
+
+
+def _session_factory():
+    # Imported lazily so tests can point database.AsyncSessionLocal elsewhere
+    import database
+    return database.AsyncSessionLocal
+
+
+async def enqueue(db: AsyncSession, kind: str, payload: dict, key: Optional[str] = None, partition: Optional[str] = None) -> None:
+    """
+    Records a side effect in the caller's transaction. Does not commit.
+    A second enqueue with the same key is ignored.
+    """
+    values = dict(
+        kind=kind,
+        payload=payload,
+        idempotency_key=key or f"{kind}:{uuid.uuid4().hex}",
+        partition_key=partition,
+        status="pending",
+        attempts=0,
+        available_at=_utcnow(),
+        created_at=_utcnow(),
+    )
+    dialect = db.bind.dialect.name if db.bind is not None else None
+    if dialect == "postgresql":
+        stmt = postgresql.insert(models.OutboxEvent).values(**values).on_conflict_do_nothing(index_elements=["idempotency_key"])
+    elif dialect == "sqlite":
+        stmt = sqlite.insert(models.OutboxEvent).values(**values).on_conflict_do_nothing(index_elements=["idempotency_key"])
+    else:
+        existing = await db.execute(
+            select(models.OutboxEvent.id).filter(models.OutboxEvent.idempotency_key == values["idempotency_key"])
+        )
+        if existing.first():
+            return
+        stmt = models.OutboxEvent.__table__.insert().values(**values)
+    await db.execute(stmt)
+    db.info["outbox_pending"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _wake_after_commit(session: Session):
+    if session.info.pop("outbox_pending", False):
+        notify()
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_after_rollback(session: Session):
+    session.info.pop("outbox_pending", None)
+
+
+class _Claimed:
+    __slots__ = ("id", "kind", "payload", "attempts", "partition_key", "created_at")
+
+    def __init__(self, row):
+        self.id = row.id
+        self.kind = row.kind
+        self.payload = row.payload or {}
+        self.attempts = row.attempts
+        self.partition_key = row.partition_key
+        self.created_at = row.created_at
+
+
+class OutboxWorkerPool:
+    def __init__(self, concurrency: int, session_factory=None):
+        self.concurrency = max(1, concurrency)
+        self._session_factory = session_factory
+        self._wake = asyncio.Event()
+        self._stopping = False
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._lanes: Dict[str, Deque[_Claimed]] = {}
+        self._lane_tasks: Set[asyncio.Task] = set()
+        self._in_flight = 0
+        self._last_purge = 0.0
+
+        self.started_at = time.monotonic()
+        self.processed = 0
+        self.retried = 0
+        self.dead = 0
+        self.handler_seconds = 0.0
+        self.lag_seconds = 0.0 # Sum of (finished - enqueued) over processed events
+
+    @property
+    def factory(self):
+        return self._session_factory or _session_factory()
+
+    # --- Lifecycle ---
+
+    def start(self) -> None:
+        if self._dispatcher is None or self._dispatcher.done():
+            self._stopping = False
+            self._dispatcher = asyncio.create_task(self._run())
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        self._stopping = True
+        self._wake.set()
+        tasks = [t for t in [self._dispatcher, *self._lane_tasks] if t is not None]
+        if tasks:
+            _, pending = await asyncio.wait(tasks, timeout=timeout)
+            for task in pending:
+                task.cancel()
+        self._dispatcher = None
+
+    def notify(self) -> None:
+        self._wake.set()
+
+    # --- Dispatch ---
+
+    async def _run(self):
+        while not self._stopping:
+            self._wake.clear()
+            claimed: List[_Claimed] = []
+            capacity = 2 * self.concurrency - self._in_flight
+            try:
+                if capacity > 0:
+                    claimed = await self._claim(capacity)
+                if time.monotonic() - self._last_purge > PURGE_INTERVAL_SECONDS:
+                    await self._purge()
+            except Exception as e:
+                logger.error(f"Outbox claim failed: {e}")
+
+            for item in claimed:
+                self._dispatch(item)
+
+            if claimed and len(claimed) == capacity:
+                continue # More may be waiting
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=settings.OUTBOX_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _claim(self, limit: int) -> List[_Claimed]:
+        now = _utcnow()
+        ready = (
+            models.OutboxEvent.status.in_(("pending", "processing")),
+            models.OutboxEvent.available_at <= now,
+        )
+        candidates = (
+            select(models.OutboxEvent.id)
+            .filter(*ready)
+            .order_by(models.OutboxEvent.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        stmt = (
+            update(models.OutboxEvent)
+            .where(models.OutboxEvent.id.in_(candidates), *ready)
+            .values(
+                status="processing",
+                attempts=models.OutboxEvent.attempts + 1,
+                available_at=now + datetime.timedelta(seconds=settings.OUTBOX_LEASE_SECONDS),
+            )
+            .returning(
+                models.OutboxEvent.id,
+                models.OutboxEvent.kind,
+                models.OutboxEvent.payload,
+                models.OutboxEvent.attempts,
+                models.OutboxEvent.partition_key,
+                models.OutboxEvent.created_at,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        async with self.factory() as db:
+            rows = (await db.execute(stmt)).all()
+            await db.commit()
+        return sorted((_Claimed(row) for row in rows), key=lambda c: c.id)
+
+    def _dispatch(self, item: _Claimed) -> None:
+        self._in_flight += 1
+        lane_key = item.partition_key or f"event:{item.id}"
+        lane = self._lanes.get(lane_key)
+        if lane is not None:
+            lane.append(item)
+            return
+        self._lanes[lane_key] = deque([item])
+        task = asyncio.create_task(self._drain_lane(lane_key))
+        self._lane_tasks.add(task)
+        task.add_done_callback(self._lane_done)
+
+    def _lane_done(self, task: asyncio.Task) -> None:
+        self._lane_tasks.discard(task)
+        self._wake.set() # Capacity freed up
+
+    async def _drain_lane(self, lane_key: str):
+        lane = self._lanes[lane_key]
+        try:
+            while lane:
+                item = lane.popleft()
+                try:
+                    await self._process(item)
+                finally:
+                    self._in_flight -= 1
+        finally:
+            self._in_flight -= len(lane)
+            del self._lanes[lane_key]
+
+    # --- Execution ---
+
+    async def _process(self, item: _Claimed) -> None:
+        fn = _handlers.get(item.kind)
+        started = time.monotonic()
+        error: Optional[str] = None
+        async with self.factory() as db:
+            if fn is None:
+                error = f"No handler registered for '{item.kind}'"
+            else:
+                try:
+                    # The done mark commits together with the handler's (first) commit
+                    owned = await db.execute(
+                        update(models.OutboxEvent)
+                        .where(
+                            models.OutboxEvent.id == item.id,
+                            models.OutboxEvent.status == "processing",
+                            models.OutboxEvent.attempts == item.attempts,
+                        )
+                        .values(status="done", processed_at=_utcnow(), last_error=None)
+                        .execution_options(synchronize_session=False)
+                    )
+                    if owned.rowcount == 0:
+                        await db.rollback()
+                        return # Lease expired and someone else took it
+                    await fn(db, item.payload)
+                    await db.commit()
+                except Exception as e:
+                    await db.rollback()
+                    error = f"{type(e).__name__}: {e}"
+
+            self.handler_seconds += time.monotonic() - started
+            if error is None:
+                self.processed += 1
+                if item.created_at is not None:
+                    created = item.created_at if item.created_at.tzinfo else item.created_at.replace(tzinfo=datetime.timezone.utc)
+                    self.lag_seconds += (_utcnow() - created).total_seconds()
+                return
+
+            give_up = fn is None or item.attempts >= settings.OUTBOX_MAX_ATTEMPTS
+            backoff = min(MAX_BACKOFF_SECONDS, 2 ** (item.attempts - 1)) * (0.5 + random.random())
+            if give_up:
+                self.dead += 1
+                logger.error(f"Outbox event {item.id} ({item.kind}) dead after {item.attempts} attempts: {error}")
+            else:
+                self.retried += 1
+                logger.warning(f"Outbox event {item.id} ({item.kind}) failed, retrying in {backoff:.1f}s: {error}")
+            await db.execute(
+                update(models.OutboxEvent)
+                .where(models.OutboxEvent.id == item.id)
+                .values(
+                    status="dead" if give_up else "pending",
+                    available_at=_utcnow() + datetime.timedelta(seconds=backoff),
+                    last_error=error[:1000],
+                )
+                .execution_options(synchronize_session=False)
+            )
+            await db.commit()
+
+    async def _purge(self) -> None:
+        self._last_purge = time.monotonic()
+        cutoff = _utcnow() - datetime.timedelta(hours=settings.OUTBOX_RETENTION_HOURS)
+        async with self.factory() as db:
+            await db.execute(
+                delete(models.OutboxEvent)
+                .where(models.OutboxEvent.status == "done", models.OutboxEvent.processed_at < cutoff)
+                .execution_options(synchronize_session=False)
+            )
+            await db.commit()
+
+    async def drain(self, timeout: float = 10.0) -> None:
+        """Processes everything that is ready now. Used by tests and shutdown paths."""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            claimed = await self._claim(2 * self.concurrency)
+            for item in claimed:
+                self._dispatch(item)
+            if self._lane_tasks:
+                await asyncio.wait(set(self._lane_tasks), timeout=max(0.0, deadline - time.monotonic()))
+            elif not claimed:
+                return
+
+    def counters(self) -> dict:
+        uptime = max(time.monotonic() - self.started_at, 1e-9)
+        return {
+            "workers": self.concurrency,
+            "in_flight": self._in_flight,
+            "processed": self.processed,
+            "retried": self.retried,
+            "dead": self.dead,
+            "events_per_second": round(self.processed / uptime, 3),
+            "avg_handler_ms": round(1000 * self.handler_seconds / max(self.processed + self.retried + self.dead, 1), 2),
+            "avg_lag_ms": round(1000 * self.lag_seconds / max(self.processed, 1), 2),
+        }
+
+
+_pool: Optional[OutboxWorkerPool] = None
+
+
+def start(concurrency: Optional[int] = None) -> OutboxWorkerPool:
+    """Starts the process-wide worker pool (idempotent)."""
+    global _pool
+    from services import outbox_handlers  # noqa: F401 (registers the built-in handlers)
+    if _pool is None:
+        _pool = OutboxWorkerPool(concurrency or settings.OUTBOX_WORKERS)
+    _pool.start()
+    return _pool
+
+
+async def stop() -> None:
+    global _pool
+    if _pool is not None:
+        await _pool.stop()
+        _pool = None
+
+
+def notify() -> None:
+    if _pool is not None:
+        _pool.notify()
+
+
+async def stats(db: AsyncSession) -> dict:
+    """Backlog by status plus this process's worker counters."""
+    rows = await db.execute(
+        select(models.OutboxEvent.status, func.count()).group_by(models.OutboxEvent.status)
+    )
+    backlog = {status: count for status, count in rows.all()}
+    oldest = (await db.execute(
+        select(func.min(models.OutboxEvent.created_at)).filter(models.OutboxEvent.status.in_(("pending", "processing")))
+    )).scalar()
+    if oldest is not None and oldest.tzinfo is None:
+        oldest = oldest.replace(tzinfo=datetime.timezone.utc)
+    return {
+        "backlog": backlog,
+        "oldest_pending_seconds": round((_utcnow() - oldest).total_seconds(), 1) if oldest else 0.0,
+        "pool": _pool.counters() if _pool is not None else None,
+    }
@@ -0,0 +1,205 @@
+"""
+Background warm-up of the tracks about to play.
+
+Every queue broadcast hands the zipper-merged queue to schedule(). After
+PREFETCH_DELAY_SECONDS of quiet (a burst of submissions makes one pass) the
+reviewer's pass walks the first PREFETCH_TOP_K pending tracks, nearest first:
+
+- their metadata is resolved (SoundCloud oEmbed/page, yt-dlp otherwise), and
+- their audio is fetched into the proxy's disk cache, or, with the cache off,
+  their stream URL is resolved so "next" skips the yt-dlp round trip,
+
+until the pass has fetched PREFETCH_MAX_BYTES. At most PREFETCH_CONCURRENCY
+tracks are worked on at once across all reviewers, so prefetching never
+competes with more than that against listeners. When the upcoming tracks
+change the reviewer's pass is cancelled and a new one scheduled; a cache fill
+already started completes (a listener may be tailing it).
+
+Discord jump URLs need the bot to resolve and local uploads are served from
+disk, so neither is prefetched.
+
+For the "next" metric, broadcast marks each track that starts playing and
+observe() records the time from that mark to the first byte the proxy sends
+for it, split by whether it came from the disk cache.
+"""
+import asyncio
+import logging
+import time
+from collections import OrderedDict, deque
+from typing import Deque, Dict, Optional, Sequence, Tuple
+
+from fastapi.responses import Response, StreamingResponse
+
+from config import settings
+from services import audio_cache, audio_stream, media_resolver, rendition_service, soundcloud_service
+
+logger = logging.getLogger(__name__)
+
+NEXT_MARK_SECONDS = 60 # A proxy request this long after the track started isn't its first load
+TTFB_SAMPLES = 500
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_tasks: Dict[int, asyncio.Task] = {}
+_targets: Dict[int, Tuple[str, ...]] = {}
+_slots: Optional[asyncio.Semaphore] = None
+_marks: "OrderedDict[str, float]" = OrderedDict() # Track key -> when it started playing (monotonic)
+_ttfb: Dict[str, Deque[float]] = {"cached": deque(maxlen=TTFB_SAMPLES), "uncached": deque(maxlen=TTFB_SAMPLES)}
+_counters = {
+    "passes": 0, "cancelled": 0, "failures": 0, "metadata_resolved": 0,
+    "streams_resolved": 0, "tracks_warmed": 0, "bytes_warmed": 0, "over_budget": 0,
+}
+
+
+def _prefetchable(url: Optional[str]) -> bool:
+    return bool(url) and not url.startswith("/api/uploads/") and "discord.com/channels" not in url
+
+
+def upcoming(queue: Sequence[dict]) -> Tuple[str, ...]:
+    """The track URLs of the next PREFETCH_TOP_K pending queue items worth prefetching."""
+    urls = []
+    for item in queue:
+        if len(urls) >= settings.PREFETCH_TOP_K:
+            break
+        url = item.get("track_url")
+        if item.get("status", "pending") == "pending" and _prefetchable(url) and url not in urls:
+            urls.append(url)
+    return tuple(urls)
+
+
+def schedule(reviewer_id: int, queue: Sequence[dict]) -> None:
+    """(Re)starts the reviewer's prefetch pass if the upcoming tracks changed."""
+    global _loop, _slots
+    if not settings.PREFETCH_ENABLED:
+        return
+    loop = asyncio.get_running_loop()
+    if loop is not _loop:
+        # Passes (and the semaphore) belong to the loop that made them
+        _loop, _slots = loop, None
+        _tasks.clear()
+        _targets.clear()
+    targets = upcoming(queue)
+    if _targets.get(reviewer_id) == targets:
+        return
+    _targets[reviewer_id] = targets
+    previous = _tasks.pop(reviewer_id, None)
+    if previous is not None and not previous.done():
+        previous.cancel()
+        _counters["cancelled"] += 1
+    if targets:
+        _tasks[reviewer_id] = asyncio.create_task(_run(reviewer_id, targets))
+
+
+def _slot() -> asyncio.Semaphore:
+    global _slots
+    if _slots is None:
+        _slots = asyncio.Semaphore(max(1, settings.PREFETCH_CONCURRENCY))
+    return _slots
+
+
+async def _run(reviewer_id: int, urls: Tuple[str, ...]) -> None:
+    await asyncio.sleep(settings.PREFETCH_DELAY_SECONDS)
+    _counters["passes"] += 1
+    fetched = 0
+    for position, url in enumerate(urls):
+        if fetched >= settings.PREFETCH_MAX_BYTES:
+            _counters["over_budget"] += len(urls) - position
+            break
+        async with _slot():
+            try:
+                await _metadata(url)
+                fetched += await _audio(url)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                _counters["failures"] += 1
+                logger.info(f"Prefetch of {url} for reviewer {reviewer_id} failed: {e}")
+
+
+async def _metadata(url: str) -> None:
+    if "soundcloud.com" in url:
+        await soundcloud_service.get_track_metadata(url)
+    elif "youtube.com" in url or "youtu.be" in url:
+        await media_resolver.metadata(url)
+    else:
+        return # Uploads and direct links carry no page metadata
+    _counters["metadata_resolved"] += 1
+
+
+async def _audio(url: str) -> int:
+    """Fetches the track (its preview rendition, if any) into the disk cache; returns the bytes fetched."""
+    rendition = await rendition_service.negotiate(url, None, None)
+    if rendition is not None:
+        url = rendition.url # What the proxy will serve by default
+    if not audio_cache.enabled():
+        await audio_stream.resolve_source(url) # Cached by media_resolver / the presign cache
+        _counters["streams_resolved"] += 1
+        return 0
+    fetched = await audio_cache.warm(url, lambda: audio_stream.resolve_source(url))
+    if fetched:
+        _counters["tracks_warmed"] += 1
+        _counters["bytes_warmed"] += fetched
+    return fetched
+
+
+def mark_next(track_url: Optional[str]) -> None:
+    """Notes that `track_url` just started playing; its first proxied byte is timed by observe()."""
+    if not track_url:
+        return
+    key = audio_cache.normalize_url(track_url)
+    _marks[key] = time.monotonic()
+    _marks.move_to_end(key)
+    while len(_marks) > 1000:
+        _marks.popitem(last=False)
+
+
+def observe(source_url: str, response: Response) -> Response:
+    """Times the first body byte of the proxy response for a track that just started playing."""
+    started = _marks.pop(audio_cache.normalize_url(source_url), None)
+    if started is None or time.monotonic() - started > NEXT_MARK_SECONDS or not isinstance(response, StreamingResponse):
+        return response
+    samples = _ttfb["cached" if response.headers.get("x-cache") == "HIT" else "uncached"]
+    body = response.body_iterator
+
+    async def timed():
+        first = True
+        async for chunk in body:
+            if chunk and first:
+                samples.append(time.monotonic() - started)
+                first = False
+            yield chunk
+
+    response.body_iterator = timed()
+    return response
+
+
+def _summary(samples: Deque[float]) -> dict:
+    ordered = sorted(samples)
+    if not ordered:
+        return {"count": 0, "avg_ms": None, "p50_ms": None, "p95_ms": None}
+    return {
+        "count": len(ordered),
+        "avg_ms": round(sum(ordered) / len(ordered) * 1000, 1),
+        "p50_ms": round(ordered[len(ordered) // 2] * 1000, 1),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 1),
+    }
+
+
+def stats() -> dict:
+    return {
+        "enabled": settings.PREFETCH_ENABLED,
+        "active_passes": sum(1 for task in _tasks.values() if not task.done()),
+        **_counters,
+        "next_ttfb": {kind: _summary(samples) for kind, samples in _ttfb.items()},
+    }
+
+
+async def stop() -> None:
+    """Cancels every pass (fills they started run on in the audio cache)."""
+    global _slots
+    tasks = list(_tasks.values())
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    _tasks.clear()
+    _targets.clear()
+    _slots = None
@@ -0,0 +1,209 @@
+"""
+Per-reviewer order-statistics index over the live queue.
+
+Answers "where is submission X in the line" and "which of user U's tracks are
+queued, and where" in O(log n), without loading the queue. Positions follow
+the zipper-merged order produced by queue_service.apply_zipper_merge
+(3 priority : 1 free). Spotlighted tracks are shown separately and are left
+out, as they are in the line view.
+
+How it works: each track gets a slot number in submitted_at order. One
+Fenwick tree per priority value counts the occupied slots, so the rank of a
+track inside its priority list is (tracks in higher tiers) + (earlier slots in
+its own tier). The zipper position is then a closed-form function of that rank.
+
+Queue mutations in queue_service keep the index current through sync().
+Writers outside that module call invalidate(), and the next read rebuilds
+the index from one narrow query.
+"""
+import datetime
+import logging
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import models
+from services import state_versions
+from services.fenwick import FenwickTree
+
+logger = logging.getLogger(__name__)
+
+# Safety net for writers that bypass sync()/invalidate()
+MAX_INDEX_AGE_SECONDS = 300
+PRIORITY_RUN = 3  # Must match apply_zipper_merge
+
+
+def _as_utc(value: Optional[datetime.datetime]) -> datetime.datetime:
+    if value is None:
+        return datetime.datetime.min.replace(tzinfo=datetime.timezone.utc)
+    if value.tzinfo is None:
+        return value.replace(tzinfo=datetime.timezone.utc)
+    return value
+
+
+def _is_queued(submission) -> bool:
+    return (
+        submission.status in ('pending', 'playing')
+        and not submission.spotlighted
+        and submission.submitted_at is not None
+        and submission.user_id is not None
+    )
+
+
+class ReviewerQueueIndex:
+    def __init__(self):
+        self.entries: Dict[int, Tuple[int, int, int]] = {}  # submission_id -> (priority, slot, user_id)
+        self.by_user: Dict[int, Set[int]] = {}
+        self.tiers: Dict[int, FenwickTree] = {}
+        self.next_slot = 0
+        self.last_key: Tuple[datetime.datetime, int] = (_as_utc(None), 0)
+        self.built_at = time.monotonic()
+
+    # --- Maintenance ---
+
+    def insert(self, submission_id: int, priority: int, user_id: int, submitted_at) -> bool:
+        """Adds a track. Returns False if it would break slot order (caller should rebuild)."""
+        key = (_as_utc(submitted_at), submission_id)
+        if key < self.last_key:
+            return False
+        self.last_key = key
+        slot = self.next_slot
+        self.next_slot += 1
+        self._place(submission_id, priority, slot, user_id)
+        return True
+
+    def _place(self, submission_id: int, priority: int, slot: int, user_id: int) -> None:
+        tree = self.tiers.get(priority)
+        if tree is None:
+            tree = self.tiers[priority] = FenwickTree(max(16, self.next_slot))
+        tree.grow(slot + 1)
+        tree.add(slot, 1)
+        self.entries[submission_id] = (priority, slot, user_id)
+        self.by_user.setdefault(user_id, set()).add(submission_id)
+
+    def remove(self, submission_id: int) -> None:
+        entry = self.entries.pop(submission_id, None)
+        if entry is None:
+            return
+        priority, slot, user_id = entry
+        self.tiers[priority].add(slot, -1)
+        user_subs = self.by_user.get(user_id)
+        if user_subs is not None:
+            user_subs.discard(submission_id)
+            if not user_subs:
+                del self.by_user[user_id]
+
+    def change_priority(self, submission_id: int, priority: int) -> None:
+        entry = self.entries.get(submission_id)
+        if entry is None or entry[0] == priority:
+            return
+        _, slot, user_id = entry
+        self.remove(submission_id)
+        self._place(submission_id, priority, slot, user_id)
+
+    # --- Queries ---
+
+    def _count(self, priority: int) -> int:
+        tree = self.tiers.get(priority)
+        return tree.total() if tree else 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def position(self, submission_id: int) -> Optional[int]:
+        """1-based position of a track in the zipper-merged line, or None if not queued."""
+        entry = self.entries.get(submission_id)
+        if entry is None:
+            return None
+        priority, slot, _ = entry
+        free_count = self._count(0)
+        paid_count = len(self.entries) - free_count
+
+        rank = self.tiers[priority].prefix_sum(slot)
+        if priority > 0:
+            rank += sum(self._count(p) for p in self.tiers if p > priority)
+            position = rank + min(rank // PRIORITY_RUN, free_count)
+        else:
+            position = rank + min(PRIORITY_RUN * (rank + 1), paid_count)
+        return position + 1
+
+    def user_positions(self, user_id: int) -> List[Tuple[int, int]]:
+        """[(submission_id, position)] for a user's queued tracks, soonest first."""
+        positions = [(sub_id, self.position(sub_id)) for sub_id in self.by_user.get(user_id, ())]
+        return sorted(positions, key=lambda item: item[1])
+
+
+_indexes: Dict[int, ReviewerQueueIndex] = {}
+
+
+async def _build(db: AsyncSession, reviewer_id: int) -> ReviewerQueueIndex:
+    result = await db.execute(
+        select(
+            models.Submission.id,
+            models.Submission.priority_value,
+            models.Submission.user_id,
+            models.Submission.submitted_at,
+        )
+        .filter(
+            models.Submission.reviewer_id == reviewer_id,
+            models.Submission.status.in_(['pending', 'playing']),
+            models.Submission.spotlighted == False,
+            models.Submission.submitted_at.isnot(None),
+            models.Submission.user_id.isnot(None)
+        )
+    )
+    rows = sorted(result.all(), key=lambda r: (_as_utc(r.submitted_at), r.id))
+    index = ReviewerQueueIndex()
+    for row in rows:
+        index.insert(row.id, row.priority_value or 0, row.user_id, row.submitted_at)
+    return index
+
+
+async def get_index(db: AsyncSession, reviewer_id: int) -> ReviewerQueueIndex:
+    index = _indexes.get(reviewer_id)
+    if index is None or time.monotonic() - index.built_at > MAX_INDEX_AGE_SECONDS:
+        version = state_versions.get(reviewer_id, state_versions.QUEUE)
+        index = await _build(db, reviewer_id)
+        # A mutation that committed while we were reading may be missing; don't keep it
+        if state_versions.get(reviewer_id, state_versions.QUEUE) == version:
+            _indexes[reviewer_id] = index
+    return index
+
+
+def invalidate(reviewer_id: Optional[int] = None) -> None:
+    if reviewer_id is None:
+        _indexes.clear()
+    else:
+        _indexes.pop(int(reviewer_id), None)
+
+
+def discard(reviewer_id: int, submission_ids) -> None:
+    """Removes tracks that left the line (e.g. moved to 'played') from a loaded index."""
+    index = _indexes.get(reviewer_id)
+    if index is None:
+        return
+    for submission_id in submission_ids:
+        index.remove(submission_id)
+
+
+def sync(submission: models.Submission) -> None:
+    """
+    Applies a committed change of one submission to its reviewer's index (if loaded).
+    Handles inserts, removals (played/reviewed/rejected/spotlighted) and priority changes.
+    """
+    index = _indexes.get(submission.reviewer_id)
+    if index is None:
+        return
+    queued = _is_queued(submission)
+    priority = submission.priority_value or 0
+    if submission.id in index.entries:
+        if not queued:
+            index.remove(submission.id)
+        else:
+            index.change_priority(submission.id, priority)
+    elif queued:
+        if not index.insert(submission.id, priority, submission.user_id, submission.submitted_at):
+            # Out-of-order insert (e.g. an old track returned to the line): rebuild lazily
+            invalidate(submission.reviewer_id)
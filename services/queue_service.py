@@ -1,130 +1,152 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update, func
+from sqlalchemy import select, update, func, or_
 from sqlalchemy.orm import joinedload, selectinload
 from sqlalchemy.orm.attributes import flag_modified
 import models
 import schemas
-from typing import Optional, List
+from typing import Optional, List, Callable, Awaitable
 from services import broadcast as broadcast_service
 from services import giveaway_service
 from services import user_service
-from services import achievement_service
+from services import state_versions
+from services import queue_index
+from services import outbox_service
+from services import archive_service
+from services import pagination
+from services import blob_service
+from services import waveform_service
+from config import settings
 import datetime
 import uuid
 
 AVERAGE_REVIEW_TIME_MINUTES = 4
 
 async def create_submission(db: AsyncSession, reviewer_id: int, user_id: int, track_url: str, track_title: str, archived_url: str, session_id: Optional[int] = None, batch_id: Optional[str] = None, sequence_order: int = 1, hook_start_time: Optional[int] = None, hook_end_time: Optional[int] = None, priority_value: int = 0, artist: Optional[str] = None, genre: Optional[str] = None, file_hash: Optional[str] = None) -> models.Submission:
+    return (await create_submissions(db, reviewer_id, user_id, [dict(
+        track_url=track_url, track_title=track_title, archived_url=archived_url,
+        sequence_order=sequence_order, hook_start_time=hook_start_time, hook_end_time=hook_end_time,
+        priority_value=priority_value, artist=artist, genre=genre, file_hash=file_hash
+    )], session_id=session_id, batch_id=batch_id))[0]
+
+async def create_submissions(db: AsyncSession, reviewer_id: int, user_id: int, items: List[dict], session_id: Optional[int] = None, batch_id: Optional[str] = None) -> List[models.Submission]:
+    """
+    Inserts one user's submissions in a single transaction. Each item holds the
+    create_submission fields (track_url, track_title, archived_url, sequence_order,
+    hook_start_time, hook_end_time, priority_value, artist, genre, file_hash).
+    Side effects are queued once for the whole batch. Returns them in order.
+    """
     # Check for existing flags (Spotlight/Bookmark) from previous submissions
-    # We check by file_hash (if available) or track_url
+    # We check by file_hash (if available) or track_url, for all items in one query
+    hashes = {item["file_hash"] for item in items if item.get("file_hash")}
+    urls = {item["track_url"] for item in items if not item.get("file_hash")}
+    matches = []
+    if hashes:
+        matches.append(models.Submission.file_hash.in_(hashes))
+    if urls:
+        matches.append(models.Submission.track_url.in_(urls))
     existing_flags_stmt = select(models.Submission).filter(
         models.Submission.reviewer_id == reviewer_id,
         models.Submission.user_id == user_id,
-        (models.Submission.bookmarked == True) | (models.Submission.spotlighted == True)
-    )
-    
-    if file_hash:
-        existing_flags_stmt = existing_flags_stmt.filter(models.Submission.file_hash == file_hash)
-    else:
-        existing_flags_stmt = existing_flags_stmt.filter(models.Submission.track_url == track_url)
-        
-    existing_flags_stmt = existing_flags_stmt.limit(1)
-    existing_flags_result = await db.execute(existing_flags_stmt)
-    existing_flagged_sub = existing_flags_result.scalars().first()
-    
-    is_bookmarked = False
-    is_spotlighted = False
-    
-    if existing_flagged_sub:
-        is_bookmarked = existing_flagged_sub.bookmarked
-        is_spotlighted = existing_flagged_sub.spotlighted
-
-    new_submission = models.Submission(
-        reviewer_id=reviewer_id,
-        user_id=user_id,
-        track_url=track_url,
-        track_title=track_title,
-        artist=artist,
-        genre=genre,
-        archived_url=archived_url,
-        status='pending',
-        session_id=session_id,
-        priority_value=priority_value,
-        # Smart-Zone fields
-        batch_id=batch_id,
-        sequence_order=sequence_order,
-        hook_start_time=hook_start_time,
-        hook_end_time=hook_end_time,
-        is_priority=priority_value > 0,
-        file_hash=file_hash,
-        bookmarked=is_bookmarked,
-        spotlighted=is_spotlighted
-    )
-    db.add(new_submission)
-
-    # Award XP for submission
-    await user_service.add_xp(db, user_id, 10) # Award 10 XP per submission
-
-    # --- CATEGORY A ACHIEVEMENTS CHECK (Creation Time) ---
-    # 1. Demo Tape (1st Submission)
-    stmt_count = select(models.Submission).filter(models.Submission.user_id == user_id)
-    count_res = await db.execute(stmt_count)
-    sub_count = len(count_res.scalars().all()) + 1 # +1 for this one (not yet committed but added)
-
-    await achievement_service.trigger_achievement(db, user_id, "SUBMISSION_COUNT", sub_count)
-    if sub_count == 1:
-         await achievement_service.trigger_achievement(db, user_id, "SUBMISSION_COUNT", specific_slug="demo_tape")
-
-    # 2. Producer Tag
-    if track_title and "(prod." in track_title.lower():
-         await achievement_service.trigger_achievement(db, user_id, "METADATA_TAG", specific_slug="producer_tag")
-
-    # 3. Collaborator
-    if track_title and "feat." in track_title.lower():
-         await achievement_service.trigger_achievement(db, user_id, "METADATA_TAG", specific_slug="collaborator")
-
-    # 4. Link Types
-    if "soundcloud.com" in track_url.lower():
-        await achievement_service.trigger_achievement(db, user_id, "LINK_TYPE", specific_slug="soundcloud_rapper")
-    elif "spotify.com" in track_url.lower() or "apple.com" in track_url.lower():
-        await achievement_service.trigger_achievement(db, user_id, "LINK_TYPE", specific_slug="dsp_pro")
-
-    # 5. Genre Bender (Unique Tags)
-    # This requires checking history. We'll do a query.
-    if genre:
-        # Get all distinct genres for this user
-        genre_stmt = select(models.Submission.genre).filter(models.Submission.user_id == user_id).distinct()
-        genres = (await db.execute(genre_stmt)).scalars().all()
-        # Add current if not present (since not committed yet)
-        unique_genres = set([g for g in genres if g])
-        unique_genres.add(genre)
-        await achievement_service.trigger_achievement(db, user_id, "GENRE_COUNT", len(unique_genres))
+        (models.Submission.bookmarked == True) | (models.Submission.spotlighted == True),
+        or_(*matches)
+    ).order_by(models.Submission.id)
+    flags_by_hash = {}
+    flags_by_url = {}
+    for flagged in (await db.execute(existing_flags_stmt)).scalars().all():
+        flags_by_hash.setdefault(flagged.file_hash, flagged)
+        flags_by_url.setdefault(flagged.track_url, flagged)
+
+    new_submissions = []
+    for item in items:
+        file_hash = item.get("file_hash")
+        existing_flagged_sub = flags_by_hash.get(file_hash) if file_hash else flags_by_url.get(item["track_url"])
+        priority_value = item.get("priority_value") or 0
+        new_submission = models.Submission(
+            reviewer_id=reviewer_id,
+            user_id=user_id,
+            track_url=item["track_url"],
+            track_title=item.get("track_title"),
+            artist=item.get("artist"),
+            genre=item.get("genre"),
+            archived_url=item.get("archived_url"),
+            status='pending',
+            session_id=session_id,
+            priority_value=priority_value,
+            # Smart-Zone fields
+            batch_id=batch_id,
+            sequence_order=item.get("sequence_order", 1),
+            hook_start_time=item.get("hook_start_time"),
+            hook_end_time=item.get("hook_end_time"),
+            is_priority=priority_value > 0,
+            file_hash=file_hash,
+            bookmarked=existing_flagged_sub.bookmarked if existing_flagged_sub else False,
+            spotlighted=existing_flagged_sub.spotlighted if existing_flagged_sub else False
+        )
+        db.add(new_submission)
+        await blob_service.add_reference(db, item["track_url"])
+        new_submissions.append(new_submission)
+    await db.flush()
 
-    # Anti-Cannibalization: Paid Override
-    # If this is a paid submission (priority > 0), extend the giveaway cooldown
-    if priority_value > 0:
-        # Extend by 5 minutes (or whatever rule)
-        await giveaway_service.extend_cooldown(db, reviewer_id, minutes=5)
+    # Side effects (XP, achievements, cooldown, broadcast) are recorded in this
+    # transaction and run by the outbox workers once it commits.
+    await enqueue_submission_side_effects(db, *new_submissions)
 
     await db.commit()
 
-    # FIXED: Re-fetch the submission to eager-load the 'user' relationship for the API response
-    stmt = select(models.Submission).options(joinedload(models.Submission.user)).filter(models.Submission.id == new_submission.id)
+    # FIXED: Re-fetch the submissions to eager-load the 'user' relationship for the API response
+    ids = [s.id for s in new_submissions]
+    stmt = select(models.Submission).options(joinedload(models.Submission.user)).filter(models.Submission.id.in_(ids))
     result = await db.execute(stmt)
-    loaded_submission = result.scalars().first()
+    loaded = {s.id: s for s in result.scalars().all()}
+    loaded_submissions = [loaded[i] for i in ids]
+    for loaded_submission in loaded_submissions:
+        queue_index.sync(loaded_submission)
+    state_versions.bump(reviewer_id, state_versions.QUEUE)
 
-    # Emit a queue update
-    try:
-        new_queue = await get_pending_queue(db, reviewer_id)
-        # Apply Zipper Merge
-        zipped_queue = apply_zipper_merge(new_queue)
-        queue_schemas = [schemas.Submission.model_validate(s) for s in zipped_queue]
-        await broadcast_service.emit_queue_update(reviewer_id, [s.model_dump(mode='json') for s in queue_schemas])
-    except Exception as e:
-        import logging
-        logging.error(f"Failed to emit queue update: {e}")
+    return loaded_submissions
+
+async def enqueue_submission_side_effects(db: AsyncSession, submission: models.Submission, *more: models.Submission):
+    """
+    Queues the post-commit work for new (flushed) submissions of one user at
+    one reviewer. A batch gets one event of each kind. Does not commit.
+    """
+    batch = [submission, *more]
+    key = f"submission:{submission.id}" if not more else f"submissions:{submission.id}-{batch[-1].id}"
+    user_partition = f"user:{submission.user_id}"
+    # Award XP for submission
+    await outbox_service.enqueue(db, "xp", {"user_id": submission.user_id, "amount": 10 * len(batch)}, key=f"{key}:xp", partition=user_partition)
+    # Category A achievements (creation time)
+    payload = {"submission_id": submission.id} if not more else {"submission_ids": [s.id for s in batch]}
+    await outbox_service.enqueue(db, "submission_created", payload, key=f"{key}:achievements", partition=user_partition)
+    # Anti-Cannibalization: Paid Override
+    # If this is a paid submission (priority > 0), extend the giveaway cooldown
+    if any((s.priority_value or 0) > 0 for s in batch):
+        await outbox_service.enqueue(
+            db, "giveaway_cooldown", {"reviewer_id": submission.reviewer_id, "minutes": 5},
+            key=f"{key}:cooldown", partition=f"reviewer:{submission.reviewer_id}"
+        )
+    await outbox_service.enqueue(
+        db, "queue_broadcast", {"reviewer_id": submission.reviewer_id},
+        key=f"{key}:broadcast", partition=f"reviewer:{submission.reviewer_id}"
+    )
+    # Waveform peaks and preview renditions for uploaded audio (in the background)
+    uploads = [s.track_url for s in batch if waveform_service.peaks_location(s.track_url)]
+    if uploads:
+        await outbox_service.enqueue(db, "waveform_peaks", {"track_urls": uploads}, key=f"{key}:peaks")
+        await outbox_service.enqueue(db, "preview_rendition", {"track_urls": uploads}, key=f"{key}:preview")
+
+async def broadcast_queue_state(db: AsyncSession, reviewer_id: int, include_history: bool = False):
+    """Emits the reviewer's current queue (and optionally history) to their room."""
+    if include_history:
+        if settings.INITIAL_STATE_PAGE_SIZE > 0:
+            # Same first page as the snapshot; older rows are fetched by cursor
+            new_history = (await get_played_page(db, reviewer_id, settings.INITIAL_STATE_PAGE_SIZE)).items
+        else:
+            new_history = await get_played_queue(db, reviewer_id)
+        history_schemas = [schemas.Submission.model_validate(s) for s in new_history]
+        await broadcast_service.emit_history_update(reviewer_id, [s.model_dump(mode='json') for s in history_schemas])
 
-    return loaded_submission
+    await _emit_queue(db, reviewer_id)
 
 async def get_pending_queue(db: AsyncSession, reviewer_id: int) -> list[models.Submission]:
     result = await db.execute(
@@ -173,138 +195,159 @@ async def set_queue_status(db: AsyncSession, reviewer_id: int, status: str):
         reviewer.queue_status = status
         await db.commit()
         await db.refresh(reviewer)
+        state_versions.bump(reviewer_id, state_versions.SETTINGS)
     return reviewer
 
-async def _update_reviewer_active_track(db: AsyncSession, reviewer_id: int, submission_id: Optional[int]):
-    """Helper to update the reviewer's active track configuration."""
-    result = await db.execute(select(models.Reviewer).filter(models.Reviewer.id == reviewer_id))
-    reviewer = result.scalars().first()
-    if reviewer:
-        # Ensure configuration dict exists
-        if not reviewer.configuration:
-            reviewer.configuration = {}
-        elif isinstance(reviewer.configuration, str):
-            import json
-            try:
-                reviewer.configuration = json.loads(reviewer.configuration)
-            except:
-                reviewer.configuration = {}
-
-        # Create a copy to trigger SQLAlchemy change detection (though flag_modified is safer)
-        new_config = dict(reviewer.configuration)
-        new_config['active_track_id'] = submission_id
-        reviewer.configuration = new_config
+def _queue_order():
+    return (models.Submission.priority_value.desc(), models.Submission.submitted_at.asc())
 
-        # Explicitly flag as modified to ensure persistence of JSON changes
-        flag_modified(reviewer, "configuration")
+async def _lock_reviewer(db: AsyncSession, reviewer_id: int) -> bool:
+    """
+    Takes the reviewer row's write lock for the rest of the transaction, which
+    serializes playback transitions per reviewer (dashboard and Discord /next can
+    race). On Postgres this is a row lock; on SQLite it takes the database write
+    lock up front, so the reads that follow already see the winner's commit.
+    """
+    result = await db.execute(
+        update(models.Reviewer)
+        .where(models.Reviewer.id == reviewer_id)
+        .values(active_track_id=models.Reviewer.active_track_id)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount > 0
 
-        # We don't commit here, let the caller do it
+async def _set_active_track(db: AsyncSession, reviewer_id: int, submission_id: Optional[int]):
+    """Points the reviewer's active_track_id column at a submission (or clears it). Caller commits."""
+    await db.execute(
+        update(models.Reviewer)
+        .where(models.Reviewer.id == reviewer_id)
+        .values(active_track_id=submission_id)
+        .execution_options(synchronize_session=False)
+    )
 
-async def advance_queue(db: AsyncSession, reviewer_id: int) -> Optional[models.Submission]:
-    # First, find any currently playing tracks and reset them to pending
-    # This ensures we don't have multiple playing tracks
-    active_result = await db.execute(
+async def _load_submission(db: AsyncSession, submission_id: int) -> Optional[models.Submission]:
+    result = await db.execute(
         select(models.Submission)
-        .filter(
+        .options(joinedload(models.Submission.user))
+        .filter(models.Submission.id == submission_id)
+        .execution_options(populate_existing=True)
+    )
+    return result.scalars().first()
+
+async def _emit_queue(db: AsyncSession, reviewer_id: int):
+    new_queue = await get_pending_queue(db, reviewer_id)
+    zipped_queue = apply_zipper_merge(new_queue)
+    queue_schemas = [schemas.Submission.model_validate(s) for s in zipped_queue]
+    await broadcast_service.emit_queue_update(reviewer_id, [s.model_dump(mode='json') for s in queue_schemas])
+
+async def advance_queue(db: AsyncSession, reviewer_id: int) -> Optional[models.Submission]:
+    """
+    Moves the playing track to history and the top of the queue to 'playing' in a
+    single transaction:
+    1. lock the reviewer row (serializes concurrent "next" clicks),
+    2. UPDATE ... RETURNING the playing track(s) to 'played',
+    3. UPDATE ... RETURNING the top pending track to 'playing' (picked with
+       FOR UPDATE SKIP LOCKED on Postgres; SQLite ignores the locking clause),
+    4. point reviewers.active_track_id at it, then commit once.
+    """
+    await _lock_reviewer(db, reviewer_id)
+
+    played_result = await db.execute(
+        update(models.Submission)
+        .where(
             models.Submission.reviewer_id == reviewer_id,
             models.Submission.status == 'playing'
         )
+        .values(status='played')
+        .returning(models.Submission.id)
+        .execution_options(synchronize_session=False)
     )
-    active_tracks = active_result.scalars().all()
-    for track in active_tracks:
-        track.status = 'played' # Move to history so queue advances
+    played_ids = list(played_result.scalars().all())
 
-    # Get the next submission (now that playing ones are pending, the "next" one is the top of pending)
-    result = await db.execute(
-        select(models.Submission)
-        .options(joinedload(models.Submission.user))
-        .filter(
+    next_id = (
+        select(models.Submission.id)
+        .where(
             models.Submission.reviewer_id == reviewer_id,
             models.Submission.status == 'pending'
         )
-        .order_by(models.Submission.priority_value.desc(), models.Submission.submitted_at.asc())
+        .order_by(*_queue_order())
         .limit(1)
+        .with_for_update(skip_locked=True)
+        .scalar_subquery()
     )
-    submission = result.scalars().first()
+    playing_result = await db.execute(
+        update(models.Submission)
+        .where(models.Submission.id == next_id)
+        .values(status='playing')
+        .returning(models.Submission.id)
+        .execution_options(synchronize_session=False)
+    )
+    submission_id = playing_result.scalar()
 
-    if submission:
-        # Update status to playing so we can track the active submission in DB
-        submission.status = 'playing'
+    await _set_active_track(db, reviewer_id, submission_id)
+    await db.commit()
+    queue_index.discard(reviewer_id, played_ids)
 
-        # Update reviewer config pointer
-        await _update_reviewer_active_track(db, reviewer_id, submission.id)
+    if submission_id is None:
+        # Queue is empty
+        await broadcast_service.emit_current_track_update(reviewer_id, None)
+        if played_ids:
+            await _emit_queue(db, reviewer_id)
+        return None
 
-        await db.commit()
+    submission = await _load_submission(db, submission_id)
 
-        # Emit current track update so frontend knows what to play
-        submission_schema = schemas.Submission.model_validate(submission)
-        await broadcast_service.emit_current_track_update(reviewer_id, submission_schema.model_dump(mode='json'))
+    # Emit current track update so frontend knows what to play
+    submission_schema = schemas.Submission.model_validate(submission)
+    await broadcast_service.emit_current_track_update(reviewer_id, submission_schema.model_dump(mode='json'))
 
-        # Emit queue update as well since status changed
-        new_queue = await get_pending_queue(db, reviewer_id)
-        zipped_queue = apply_zipper_merge(new_queue)
-        queue_schemas = [schemas.Submission.model_validate(s) for s in zipped_queue]
-        await broadcast_service.emit_queue_update(reviewer_id, [s.model_dump(mode='json') for s in queue_schemas])
-    else:
-        # Clear active track if queue is empty
-        await _update_reviewer_active_track(db, reviewer_id, None)
-        await db.commit()
-        await broadcast_service.emit_current_track_update(reviewer_id, None)
+    # Emit queue update as well since status changed
+    await _emit_queue(db, reviewer_id)
 
     return submission
 
 async def set_track_playing(db: AsyncSession, reviewer_id: int, submission_id: int) -> Optional[models.Submission]:
-    # 1. Find and reset existing playing track (only if it was playing)
-    active_result = await db.execute(
-        select(models.Submission)
-        .filter(
-            models.Submission.reviewer_id == reviewer_id,
-            models.Submission.status == 'playing'
-        )
-    )
-    active_tracks = active_result.scalars().all()
-    for track in active_tracks:
-        if track.id != submission_id:
-            track.status = 'pending'
+    """
+    Makes a specific submission the active track in one transaction: the target
+    becomes 'playing', any other playing track goes back to 'pending' (keeping its
+    place), and reviewers.active_track_id is updated.
+    """
+    await _lock_reviewer(db, reviewer_id)
 
-    # 2. Set new track to playing
-    stmt = (
-        select(models.Submission)
-        .options(joinedload(models.Submission.user))
-        .filter(models.Submission.id == submission_id, models.Submission.reviewer_id == reviewer_id)
+    target_result = await db.execute(
+        update(models.Submission)
+        .where(
+            models.Submission.id == submission_id,
+            models.Submission.reviewer_id == reviewer_id
+        )
+        .values(status='playing')
+        .returning(models.Submission.id)
+        .execution_options(synchronize_session=False)
     )
-    result = await db.execute(stmt)
-    submission = result.scalars().first()
-
-    if not submission:
+    if target_result.scalar() is None:
+        await db.rollback()
         return None
 
-    # Always set status to playing when selected as active track
-    submission.status = 'playing'
-
-    # Update reviewer config pointer
-    await _update_reviewer_active_track(db, reviewer_id, submission.id)
-
-    await db.commit()
-    await db.commit()
-    
-    # Re-fetch submission with user to ensure it's loaded after commit (which expires objects)
-    stmt = (
-        select(models.Submission)
-        .options(joinedload(models.Submission.user))
-        .filter(models.Submission.id == submission_id)
+    await db.execute(
+        update(models.Submission)
+        .where(
+            models.Submission.reviewer_id == reviewer_id,
+            models.Submission.status == 'playing',
+            models.Submission.id != submission_id
+        )
+        .values(status='pending')
+        .execution_options(synchronize_session=False)
     )
-    result = await db.execute(stmt)
-    submission = result.scalars().first()
+    await _set_active_track(db, reviewer_id, submission_id)
+    await db.commit()
+
+    submission = await _load_submission(db, submission_id)
+    queue_index.sync(submission)
 
-    # 3. Broadcast updates
+    # Broadcast updates
     submission_schema = schemas.Submission.model_validate(submission)
     await broadcast_service.emit_current_track_update(reviewer_id, submission_schema.model_dump(mode='json'))
-
-    new_queue = await get_pending_queue(db, reviewer_id)
-    zipped_queue = apply_zipper_merge(new_queue)
-    queue_schemas = [schemas.Submission.model_validate(s) for s in zipped_queue]
-    await broadcast_service.emit_queue_update(reviewer_id, [s.model_dump(mode='json') for s in queue_schemas])
+    await _emit_queue(db, reviewer_id)
 
     return submission
 
@@ -328,7 +371,8 @@ async def return_active_to_queue(db: AsyncSession, reviewer_id: int):
     for track in playing_tracks:
         track.status = 'pending'
         # Keep original timestamp
-    
+
+    await _set_active_track(db, reviewer_id, None)
     await db.commit()
 
     # Emit updates
@@ -525,19 +569,53 @@ async def update_reviewer_settings(db: AsyncSession, reviewer_id: int, settings_
 
     return updated_reviewer
 
-async def get_submissions_by_user(db: AsyncSession, user_id: int) -> list[models.Submission]:
-    result = await db.execute(
-        select(models.Submission)
+def _submissions_by_user_stmt(Submission, user_id: int):
+    return (
+        select(Submission)
         .options(
-            joinedload(models.Submission.user),
-            joinedload(models.Submission.reviewer).options(
+            joinedload(Submission.user),
+            joinedload(Submission.reviewer).options(
                 joinedload(models.Reviewer.user),
                 selectinload(models.Reviewer.payment_configs),
                 selectinload(models.Reviewer.economy_configs)
             )
         )
-        .filter(models.Submission.user_id == user_id)
-        .order_by(models.Submission.submitted_at.desc())
+        .filter(Submission.user_id == user_id)
+    )
+
+async def get_submissions_by_user(db: AsyncSession, user_id: int) -> list[models.Submission]:
+    # History spans the hot and cold tables
+    Submission = archive_service.all_submissions()
+    result = await db.execute(
+        _submissions_by_user_stmt(Submission, user_id).order_by(Submission.submitted_at.desc())
+    )
+    return result.scalars().all()
+
+async def get_submissions_by_user_page(db: AsyncSession, user_id: int, limit: int = pagination.DEFAULT_LIMIT, cursor: Optional[str] = None, exclude_pending: bool = False) -> pagination.Page:
+    """Keyset-paginated get_submissions_by_user (same order)."""
+    Submission = archive_service.all_submissions()
+    stmt = _submissions_by_user_stmt(Submission, user_id).filter(Submission.submitted_at.isnot(None))
+    if exclude_pending:
+        stmt = stmt.filter(Submission.status != "pending")
+    return await pagination.paginate(db, stmt, ((Submission.submitted_at, True), (Submission.id, True)), limit, cursor)
+
+async def get_duplicate_candidates(db: AsyncSession, user_id: int, reviewer_id: int, track_urls: set, uploads: bool) -> list[models.Submission]:
+    """
+    Everything of the user's at this reviewer that a new submission could
+    duplicate, in one query: the links' URLs and, with `uploads`, anything with
+    a file hash (uploads are only hashed while streaming). Newest first.
+    """
+    matches = [models.Submission.track_url.in_(track_urls)] if track_urls else []
+    if uploads:
+        matches.append(models.Submission.file_hash.isnot(None))
+    if not matches:
+        return []
+    result = await db.execute(
+        select(models.Submission).options(joinedload(models.Submission.session)).filter(
+            models.Submission.user_id == user_id,
+            models.Submission.reviewer_id == reviewer_id,
+            or_(*matches)
+        ).order_by(models.Submission.submitted_at.desc())
     )
     return result.scalars().all()
 
@@ -552,6 +630,7 @@ async def toggle_bookmark(db: AsyncSession, submission_id: int) -> Optional[mode
         submission.bookmarked = not submission.bookmarked
         await db.commit()
         await db.refresh(submission)
+        state_versions.bump(submission.reviewer_id, state_versions.QUEUE)
     return submission
 
 async def toggle_spotlight(db: AsyncSession, submission_id: int) -> Optional[models.Submission]:
@@ -565,6 +644,8 @@ async def toggle_spotlight(db: AsyncSession, submission_id: int) -> Optional[mod
         submission.spotlighted = not submission.spotlighted
         await db.commit()
         await db.refresh(submission)
+        queue_index.sync(submission)
+        state_versions.bump(submission.reviewer_id, state_versions.QUEUE)
     return submission
 
 async def update_priority(db: AsyncSession, submission_id: int, priority_value: int) -> Optional[models.Submission]:
@@ -580,6 +661,7 @@ async def update_priority(db: AsyncSession, submission_id: int, priority_value:
         submission.is_priority = priority_value > 0
         await db.commit()
         await db.refresh(submission)
+        queue_index.sync(submission)
         
         # Emit queue update because order might change
         new_queue = await get_pending_queue(db, submission.reviewer_id)
@@ -601,10 +683,39 @@ async def get_played_queue(db: AsyncSession, reviewer_id: int) -> list[models.Su
     )
     return result.scalars().all()
 
+# Newest first; id breaks ties so cursors are stable
+HISTORY_KEYS = ((models.Submission.submitted_at, True), (models.Submission.id, True))
+
+async def get_played_page(db: AsyncSession, reviewer_id: int, limit: int = pagination.DEFAULT_LIMIT, cursor: Optional[str] = None) -> pagination.Page:
+    """Keyset-paginated get_played_queue (same order)."""
+    stmt = (
+        select(models.Submission)
+        .options(joinedload(models.Submission.user))
+        .filter(
+            models.Submission.reviewer_id == reviewer_id,
+            models.Submission.status.in_(['played', 'reviewed']),
+            models.Submission.submitted_at.isnot(None)
+        )
+    )
+    return await pagination.paginate(db, stmt, HISTORY_KEYS, limit, cursor)
+
 import logging
 
 logger = logging.getLogger(__name__)
 
+async def get_bookmarked_page(db: AsyncSession, reviewer_id: int, limit: int = pagination.DEFAULT_LIMIT, cursor: Optional[str] = None) -> pagination.Page:
+    """Keyset-paginated get_bookmarked_submissions (same order)."""
+    stmt = (
+        select(models.Submission)
+        .options(joinedload(models.Submission.user))
+        .filter(
+            models.Submission.reviewer_id == reviewer_id,
+            models.Submission.bookmarked == True,
+            models.Submission.submitted_at.isnot(None)
+        )
+    )
+    return await pagination.paginate(db, stmt, HISTORY_KEYS, limit, cursor)
+
 async def get_bookmarked_submissions(db: AsyncSession, reviewer_id: int) -> list[models.Submission]:
     try:
         result = await db.execute(
@@ -642,31 +753,16 @@ async def get_active_submission(db: AsyncSession, reviewer_id: int) -> Optional[
     return await get_current_track(db, reviewer_id)
 
 async def get_current_track(db: AsyncSession, reviewer_id: int) -> Optional[models.Submission]:
-    # 1. Check Reviewer Configuration for active_track_id
-    reviewer = await get_reviewer_by_id(db, reviewer_id)
-
-    active_id = None
-    if reviewer and reviewer.configuration:
-        # Configuration might be a dict or string depending on driver/model
-        config = reviewer.configuration
-        if isinstance(config, str):
-            import json
-            try:
-                config = json.loads(config)
-            except:
-                config = {}
-
-        active_id = config.get('active_track_id')
-
-    if active_id:
-        result = await db.execute(
-            select(models.Submission)
-            .options(joinedload(models.Submission.user))
-            .filter(models.Submission.id == active_id)
-        )
-        submission = result.scalars().first()
-        if submission:
-            return submission
+    # 1. The reviewer's active_track_id column (single join, no reviewer load)
+    result = await db.execute(
+        select(models.Submission)
+        .options(joinedload(models.Submission.user))
+        .join(models.Reviewer, models.Reviewer.active_track_id == models.Submission.id)
+        .filter(models.Reviewer.id == reviewer_id)
+    )
+    submission = result.scalars().first()
+    if submission:
+        return submission
 
     # 2. Fallback to 'playing' status
     result = await db.execute(
@@ -680,61 +776,12 @@ async def get_current_track(db: AsyncSession, reviewer_id: int) -> Optional[mode
     return result.scalars().first()
 
 async def get_initial_state(db: AsyncSession, reviewer_id: int) -> schemas.FullQueueState:
-    # Trigger Lottery Check (Lazy Load) - Now Community Goal Check
-    # We don't need to check time-based lottery if we are doing goal-based.
-    # But we might want to keep it as a fallback? 
-    # User said "it could either rotate or it could have a time".
-    # Let's stick to Goal-Based for now as requested.
-    # The listener updates the goal progress. We just need to read it.
-    
-    # Ensure goal exists in config
-    reviewer = await get_reviewer_by_id(db, reviewer_id)
-    config = _merge_reviewer_config(reviewer)
-    if reviewer.configuration != config.configuration:
-        reviewer.configuration = config.configuration
-        flag_modified(reviewer, "configuration")
-        await db.commit()
-
-    queue = await get_pending_queue(db, reviewer_id)
-    zipped_queue = apply_zipper_merge(queue)
-    history = await get_played_queue(db, reviewer_id)
-    bookmarks = await get_bookmarked_submissions(db, reviewer_id)
-    spotlight = await get_spotlighted_submissions(db, reviewer_id)
-    current_track = await get_current_track(db, reviewer_id)
-
-    # Logic for wait time is implicitly handled by frontend or can be added to a Stats object
-    # But since FullQueueState structure is fixed in schemas, we might need to add stats there if needed
-    # The user asked for "Live Stats" on the card. Frontend can calculate it from queue.length * 4.
-    # But let's make sure we export the constant or handle it.
-    # For now, frontend calculation is sufficient given the schema.
-
-    # Check for active LiveSession
-    is_live = False
-    reviewer = await get_reviewer_by_id(db, reviewer_id)
-    if reviewer:
-        stmt_live = select(models.LiveSession).filter(
-            models.LiveSession.user_id == reviewer.user_id,
-            models.LiveSession.status == 'LIVE'
-        )
-        result_live = await db.execute(stmt_live)
-        active_session = result_live.scalars().first()
-        if active_session:
-            is_live = True
-
-    # Get Giveaway State
-    giveaway_states = await giveaway_service.get_giveaway_states(db, reviewer_id)
-    # For backward compatibility, return the first one or None
-    giveaway_state = giveaway_states[0] if giveaway_states else None
-
-    return schemas.FullQueueState(
-        queue=[schemas.Submission.model_validate(s) for s in zipped_queue],
-        history=[schemas.Submission.model_validate(s) for s in history],
-        bookmarks=[schemas.Submission.model_validate(s) for s in bookmarks],
-        spotlight=[schemas.Submission.model_validate(s) for s in spotlight],
-        current_track=schemas.Submission.model_validate(current_track) if current_track else None,
-        is_live=is_live,
-        giveaway_state=giveaway_state
-    )
+    """
+    Returns the full queue state for a reviewer.
+    Served from the per-reviewer snapshot cache; see services/snapshot_service.py.
+    """
+    from services import snapshot_service
+    return await snapshot_service.get_initial_state(reviewer_id, db)
 
 async def get_giveaway_state(db: AsyncSession, reviewer_id: int) -> Optional[schemas.GiveawayState]:
     """
@@ -793,6 +840,7 @@ async def update_submission_details(db: AsyncSession, submission_id: int, update
 
     await db.commit()
     await db.refresh(submission)
+    state_versions.bump(submission.reviewer_id, state_versions.QUEUE)
 
     # Emit queue update because details changed
     # We need to know if it is in pending queue or history to emit to right channel?
@@ -846,96 +894,22 @@ async def review_submission(db: AsyncSession, submission_id: int, review: schema
 
     db.add(artist_user)
 
-    # --- CATEGORY A ACHIEVEMENTS CHECK (Review Time) ---
-    # 1. Critics Choice
-    if review.score >= 10:
-         await achievement_service.trigger_achievement(db, artist_user.id, "REVIEW_SCORE", 10) # Checks threshold
-
-    # 2. Win Streak (Certified Gold/Platinum)
-    # Fetch last N submissions for this user, ordered by date desc
-    history_stmt = select(models.Submission).filter(
-        models.Submission.user_id == artist_user.id,
-        models.Submission.score.isnot(None)
-    ).order_by(models.Submission.submitted_at.desc()).limit(10)
-    history = (await db.execute(history_stmt)).scalars().all()
-
-    # Calculate streak (including current one which is now in history effectively or about to be)
-    # The current submission has score but might not be in the query result if not committed yet?
-    # Actually we just set `submission.score` but didn't commit yet. So query might miss it if using DB snapshot.
-    # We should rely on `submission` object + history.
-
-    streak = 0
-    # Add current one
-    if submission.score >= 7: # Assuming 7+ is a "W"?
-        # Requirement says "Get a 'W' (Win)".
-        # Typically "W" is determined by Polls, but here we are in "Review".
-        # However, "Category A" table says "Get a 'W' (Win) on 3 consecutive submissions".
-        # Is 'W' from Poll or Review Score?
-        # "Crowd Fav" says ">90% W votes". That implies Poll.
-        # But "Certified Gold" is "3 Win Streak".
-        # If it's poll based, we can't trigger it here in `review_submission` (host score).
-        # We must trigger it when Poll results are finalized?
-        # But wait, usually Poll runs while track plays.
-        # Let's assume 'Win' here means Poll Win OR High Score?
-        # User clarification: "Community's votes via Polls".
-        # So "Certified Gold" likely refers to Poll Wins.
-        # I will implement it here IF we have poll result, but usually poll result comes from TikTok Listener/Bot.
-        # For now, I will check "The Comeback" which is Score based.
-        pass
-
-    # 3. The Comeback (Score <4 then >8)
-    if len(history) >= 1:
-        last_sub = history[0] # This is the previous one in DB (since current is not committed yet or just updated)
-        # Wait, if we haven't committed, `history` won't have the current one.
-        if last_sub.id != submission.id: # Ensure we are looking at previous
-            if last_sub.score and last_sub.score < 4 and submission.score > 8:
-                 await achievement_service.trigger_achievement(db, artist_user.id, "SCORE_SWING", 1)
+    # Review-time achievements and the queue/history broadcasts run from the
+    # outbox once this commits.
+    await outbox_service.enqueue(
+        db, "submission_reviewed", {"submission_id": submission.id}, partition=f"user:{artist_user.id}"
+    )
+    await outbox_service.enqueue(
+        db, "queue_broadcast", {"reviewer_id": submission.reviewer_id, "include_history": True},
+        partition=f"reviewer:{submission.reviewer_id}"
+    )
 
     await db.commit()
+    queue_index.sync(submission)
+    state_versions.bump(submission.reviewer_id, state_versions.QUEUE)
 
-    # Don't refresh, we have the object and updated it. Refreshing might strip relations if not careful.
-
-    # Emit a history update
-    new_history = await get_played_queue(db, submission.reviewer_id)
-    history_schemas = [schemas.Submission.model_validate(s) for s in new_history]
-    await broadcast_service.emit_history_update(submission.reviewer_id, [s.model_dump(mode='json') for s in history_schemas])
-
-    # Emit a queue update to remove the reviewed submission from the queue list
-    new_queue = await get_pending_queue(db, submission.reviewer_id)
-    zipped_queue = apply_zipper_merge(new_queue)
-    queue_schemas = [schemas.Submission.model_validate(s) for s in zipped_queue]
-    await broadcast_service.emit_queue_update(submission.reviewer_id, [s.model_dump(mode='json') for s in queue_schemas])
-
-    # Emit current track update (clearing it, or keeping it as reviewed? Usually we move to next, but for now let's just update it)
-    # Actually, if we just reviewed it, it's no longer "playing" in the sense of "waiting to be reviewed", but it might still be the current track until "Next" is clicked.
-    # However, the user wants it to move to history.
-    # If we change status to 'reviewed', get_current_track will return None.
-    # So we should emit a null current track update? Or let the frontend handle it?
-    # The frontend ReviewHub handles "Submit & Next".
-    # If we just submit, we might want to keep showing it until we click next.
-    # But the request says "submissions should only be removed from the queue and added to the list when that submission has the submit review and next track button pressed".
-    # Wait, "Submit & Next" is one button.
-    # So when that button is pressed, we call review_submission (which updates status) AND THEN we call next_track (which calls advance_queue).
-    # Actually, ReviewHub calls `handleSubmitReview` which calls `review_submission`.
-    # Then it calls `handleNextTrack` if not historical.
-    # So `review_submission` should indeed move it to history.
-    
-    # Emit current track update (clearing it, or keeping it as reviewed? Usually we move to next, but for now let's just update it)
-    # Actually, if we just reviewed it, it's no longer "playing" in the sense of "waiting to be reviewed", but it might still be the current track until "Next" is clicked.
-    # However, the user wants it to move to history.
-    # If we change status to 'reviewed', get_current_track will return None.
-    # So we should emit a null current track update? Or let the frontend handle it?
-    # The frontend ReviewHub handles "Submit & Next".
-    # If we just submit, we might want to keep showing it until we click next.
-    # But the request says "submissions should only be removed from the queue and added to the list when that submission has the submit review and next track button pressed".
-    # This implies the action is atomic or sequential.
-    # If I click "Submit & Next", it does both.
-    # If I just click "Save" (on played), it updates review.
-    
-    # Let's stick to the plan: review_submission sets status to 'reviewed'.
-    # And we emit history update.
-    # We should also probably emit current_track_update with the reviewed submission so clients see the score/notes?
-    # Yes.
+    # The current track goes out now: "Submit & Next" advances right after this,
+    # and a later outbox emit would switch clients back to the reviewed track
     submission_schema = schemas.Submission.model_validate(submission)
     await broadcast_service.emit_current_track_update(submission.reviewer_id, submission_schema.model_dump(mode='json'))
 
@@ -971,6 +945,8 @@ async def create_session(db: AsyncSession, reviewer_id: int, name: str, open_que
     await set_queue_status(db, reviewer_id, new_status)
 
     await db.commit()
+    # Open tiers feed the public line view
+    state_versions.bump(reviewer_id, state_versions.SETTINGS)
 
     # FIXED: Nested loading of submissions and their users
     result = await db.execute(
@@ -1022,13 +998,34 @@ async def activate_session(db: AsyncSession, reviewer_id: int, session_id: int)
 
     session.is_active = True
     await db.commit()
+    state_versions.bump(reviewer_id, state_versions.SETTINGS)
     return session
 
-async def archive_session(db: AsyncSession, reviewer_id: int, session_id: int) -> models.ReviewSession:
-    # FIXED: Nested loading
+ARCHIVABLE_STATUSES = ['pending', 'playing', 'played', 'reviewed']
+
+async def archive_session(
+    db: AsyncSession,
+    reviewer_id: int,
+    session_id: int,
+    move_to_cold: Optional[bool] = None,
+    chunk_size: Optional[int] = None,
+    on_progress: Optional[Callable[[int], Awaitable[None]]] = None
+) -> models.ReviewSession:
+    """
+    Closes a session and archives everything left in the reviewer's queue and history.
+
+    Works in set-based chunks (UPDATE ... WHERE id IN (next N ids)), committing
+    each chunk so memory and lock time stay bounded on long-running reviewers.
+    With move_to_cold, archived rows (including ones from earlier sessions) are
+    moved to submissions_archive instead of staying in the hot table, except
+    bookmarked/spotlighted ones.
+    """
+    if move_to_cold is None:
+        move_to_cold = settings.ARCHIVE_MOVE_TO_COLD
+    chunk_size = chunk_size or settings.ARCHIVE_CHUNK_SIZE
+
     result = await db.execute(
         select(models.ReviewSession)
-        .options(selectinload(models.ReviewSession.submissions).joinedload(models.Submission.user))
         .filter(models.ReviewSession.id == session_id, models.ReviewSession.reviewer_id == reviewer_id)
     )
     session = result.scalars().first()
@@ -1038,27 +1035,58 @@ async def archive_session(db: AsyncSession, reviewer_id: int, session_id: int) -
         raise HTTPException(status_code=404, detail="Session not found")
 
     session.is_active = False
-    
-    # Archive all pending submissions for this reviewer
-    # This effectively clears the queue
-    pending_result = await db.execute(
-        select(models.Submission)
-        .filter(
-            models.Submission.reviewer_id == reviewer_id,
-            models.Submission.status.in_(['pending', 'playing', 'played', 'reviewed'])
+    # Whatever was playing is being archived
+    await _set_active_track(db, reviewer_id, None)
+
+    selectable = models.Submission.status.in_(ARCHIVABLE_STATUSES)
+    if move_to_cold:
+        # Also sweep earlier archived rows; flagged ones stay hot (see archive_service)
+        selectable = selectable | (
+            (models.Submission.status == 'archived')
+            & (models.Submission.bookmarked == False)
+            & (models.Submission.spotlighted == False)
         )
-    )
-    pending_submissions = pending_result.scalars().all()
-    
-    for sub in pending_submissions:
-        sub.status = 'archived'
-        
-    await db.commit()
-    
+    processed = 0
+    while True:
+        chunk_ids = (await db.execute(
+            select(models.Submission.id)
+            .filter(models.Submission.reviewer_id == reviewer_id, selectable)
+            .order_by(models.Submission.id)
+            .limit(chunk_size)
+        )).scalars().all()
+        if not chunk_ids:
+            break
+
+        await db.execute(
+            update(models.Submission)
+            .where(models.Submission.id.in_(chunk_ids))
+            .values(status='archived')
+            .execution_options(synchronize_session=False)
+        )
+        if move_to_cold:
+            await archive_service.move_to_archive(db, chunk_ids)
+        await db.commit()
+
+        processed += len(chunk_ids)
+        logger.info(f"Archiving session {session_id} for reviewer {reviewer_id}: {processed} submissions done")
+        if on_progress:
+            await on_progress(processed)
+        if len(chunk_ids) < chunk_size:
+            break
+
+    await db.commit() # Nothing to archive: still persist the session change
+    queue_index.invalidate(reviewer_id)
+
     # Emit empty queue update
     await broadcast_service.emit_queue_update(reviewer_id, [])
-    
-    return session
+
+    result = await db.execute(
+        select(models.ReviewSession)
+        .options(selectinload(models.ReviewSession.submissions).joinedload(models.Submission.user))
+        .filter(models.ReviewSession.id == session_id)
+        .execution_options(populate_existing=True)
+    )
+    return result.scalars().first()
 
 async def update_session(db: AsyncSession, reviewer_id: int, session_id: int, session_update: schemas.ReviewSessionUpdate) -> models.ReviewSession:
     # FIXED: Nested loading
@@ -1086,6 +1114,7 @@ async def update_session(db: AsyncSession, reviewer_id: int, session_id: int, se
             await set_queue_status(db, reviewer_id, new_status)
 
     await db.commit()
+    state_versions.bump(reviewer_id, state_versions.SETTINGS)
     return session
 
 async def get_session_by_id(db: AsyncSession, session_id: int) -> Optional[models.ReviewSession]:
@@ -1099,10 +1128,11 @@ async def get_session_by_id(db: AsyncSession, session_id: int) -> Optional[model
 
 async def get_submissions_by_session(db: AsyncSession, session_id: int) -> list[models.Submission]:
     # FIXED: Load user
+    Submission = archive_service.all_submissions()
     result = await db.execute(
-        select(models.Submission)
-        .options(joinedload(models.Submission.user))
-        .filter(models.Submission.session_id == session_id)
+        select(Submission)
+        .options(joinedload(Submission.user))
+        .filter(Submission.session_id == session_id)
     )
     return result.scalars().all()
 
@@ -1118,6 +1148,7 @@ async def remove_submission(db: AsyncSession, submission_id: int) -> Optional[mo
         
     submission.status = 'rejected'
     await db.commit()
+    queue_index.sync(submission)
     
     # Emit queue update
     new_queue = await get_pending_queue(db, submission.reviewer_id)
@@ -0,0 +1,246 @@
+"""
+Low-bitrate preview renditions of large uploads.
+
+When a submission with an uploaded track is created, the outbox hands
+generate() to ffmpeg_runner.submit(): ffmpeg (in its bounded pool)
+transcodes uploads of at least PREVIEW_MIN_BYTES to PREVIEW_CODEC at
+PREVIEW_BITRATE, and the result is stored next to the original
+(`<object>.preview.m4a` / `.ogg`) when it is at most PREVIEW_MAX_RATIO of
+the original's size. R2 renditions carry the original's size in their
+metadata.
+
+/proxy/audio serves the rendition instead of the original unless the
+request asks for `?quality=original` or its Accept header rules out the
+rendition's type. Whether a track has a rendition is looked up once (HEAD /
+stat) and remembered; misses are rechecked after PREVIEW_MISS_TTL_SECONDS.
+
+meter() counts the bytes the proxy actually sends for uploads; for
+renditions it also counts what the same share of the original would have
+cost, which stats() reports as bytes_saved.
+"""
+import asyncio
+import logging
+import os
+import tempfile
+import time
+from collections import OrderedDict
+from typing import Callable, NamedTuple, Optional, Tuple
+
+from fastapi.responses import Response
+
+from config import settings
+from services import ffmpeg_runner
+
+logger = logging.getLogger(__name__)
+
+# codec -> (file suffix, media type, ffmpeg output options)
+CODECS = {
+    "aac": (".preview.m4a", "audio/mp4", ("-c:a", "aac", "-movflags", "+faststart", "-f", "mp4")),
+    "opus": (".preview.ogg", "audio/ogg", ("-c:a", "libopus", "-f", "ogg")),
+}
+SIDECAR_SUFFIXES = tuple(suffix for suffix, _, _ in CODECS.values())
+ORIGINAL_SIZE_METADATA = "original-size"
+KNOWN_TRACKS = 10000
+
+
+class Rendition(NamedTuple):
+    url: str # r2:// or /api/uploads/ URL, served like any other track URL
+    media_type: str
+    size: int
+    original_size: int
+
+
+_known: "OrderedDict[str, Tuple[Optional[Rendition], float]]" = OrderedDict() # track URL -> (rendition, checked at)
+_counters = {
+    "renditions_created": 0, "renditions_discarded": 0,
+    "preview_responses": 0, "original_responses": 0,
+    "preview_bytes_served": 0, "original_bytes_served": 0, "bytes_saved": 0,
+}
+
+
+def enabled() -> bool:
+    return settings.PREVIEW_ENABLED and settings.PREVIEW_CODEC in CODECS
+
+
+def rendition_url(track_url: Optional[str]) -> Optional[str]:
+    """Where an uploaded track's rendition lives, as a track URL; None for other tracks."""
+    if not track_url or not (track_url.startswith("r2://") or track_url.startswith("/api/uploads/")):
+        return None
+    return f"{track_url}{CODECS[settings.PREVIEW_CODEC][0]}"
+
+
+def _local(url: str) -> str:
+    return os.path.join("uploads", os.path.basename(url))
+
+
+async def _sizes(track_url: str, url: str) -> Optional[Tuple[int, int]]:
+    """(rendition size, original size) if the rendition exists."""
+    if url.startswith("r2://"):
+        from services.storage_service import storage_service
+        head = await storage_service.head_object(url)
+        if head is None:
+            return None
+        original_size = head["metadata"].get(ORIGINAL_SIZE_METADATA)
+        return head["size"], int(original_size) if original_size else head["size"]
+
+    def stat() -> Optional[Tuple[int, int]]:
+        try:
+            return os.path.getsize(_local(url)), os.path.getsize(_local(track_url))
+        except FileNotFoundError:
+            return None
+    return await asyncio.to_thread(stat)
+
+
+def _remember(track_url: str, rendition: Optional[Rendition]) -> None:
+    _known[track_url] = (rendition, time.monotonic())
+    _known.move_to_end(track_url)
+    while len(_known) > KNOWN_TRACKS:
+        _known.popitem(last=False)
+
+
+async def lookup(track_url: str) -> Optional[Rendition]:
+    """The track's rendition, if it has one."""
+    url = rendition_url(track_url)
+    if url is None or not enabled():
+        return None
+    known = _known.get(track_url)
+    if known is not None and (known[0] is not None or time.monotonic() - known[1] < settings.PREVIEW_MISS_TTL_SECONDS):
+        return known[0]
+    sizes = await _sizes(track_url, url)
+    rendition = Rendition(url, CODECS[settings.PREVIEW_CODEC][1], *sizes) if sizes else None
+    _remember(track_url, rendition)
+    return rendition
+
+
+def _accepts(accept: Optional[str], media_type: str) -> bool:
+    if not accept:
+        return True
+    major = media_type.split("/")[0]
+    for part in accept.split(","):
+        value, *params = [piece.strip() for piece in part.split(";")]
+        if value in ("*/*", f"{major}/*", media_type):
+            return not any(param.replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000") for param in params)
+    return False
+
+
+async def negotiate(track_url: str, quality: Optional[str], accept: Optional[str]) -> Optional[Rendition]:
+    """The rendition to serve for a proxy request, or None for the original."""
+    if quality == "original":
+        return None
+    rendition = await lookup(track_url)
+    if rendition is None or not _accepts(accept, rendition.media_type):
+        return None
+    return rendition
+
+
+class _Metered(Response):
+    """Passes `inner` through, reporting each body chunk's length to `on_bytes`."""
+
+    def __init__(self, inner: Response, on_bytes: Callable[[int], None]):
+        self.inner = inner
+        self.on_bytes = on_bytes
+        self.status_code = inner.status_code
+        self.background = None
+        self.raw_headers = inner.raw_headers
+
+    async def __call__(self, scope, receive, send):
+        async def counting_send(message):
+            if message["type"] == "http.response.body":
+                self.on_bytes(len(message.get("body", b"")))
+            await send(message)
+        await self.inner(scope, receive, counting_send)
+
+
+def meter(track_url: str, rendition: Optional[Rendition], response: Response) -> Response:
+    """Counts what `response` sends for an uploaded track (served as `rendition`, or the original)."""
+    if rendition is None:
+        if rendition_url(track_url) is None:
+            return response
+        _counters["original_responses"] += 1
+
+        def count(length: int) -> None:
+            _counters["original_bytes_served"] += length
+    else:
+        _counters["preview_responses"] += 1
+        scale = rendition.original_size / rendition.size if rendition.size else 1.0
+
+        def count(length: int) -> None:
+            _counters["preview_bytes_served"] += length
+            _counters["bytes_saved"] += max(0, round(length * scale) - length)
+    return _Metered(response, count)
+
+
+async def _original_size(track_url: str) -> Optional[int]:
+    if track_url.startswith("r2://"):
+        from services.storage_service import storage_service
+        head = await storage_service.head_object(track_url)
+        return head["size"] if head else None
+    path = ffmpeg_runner.local_path(track_url)
+    return os.path.getsize(path) if path else None
+
+
+async def _store(url: str, path: str, original_size: int) -> None:
+    media_type = CODECS[settings.PREVIEW_CODEC][1]
+    if url.startswith("r2://"):
+        from services.storage_service import storage_service
+
+        def read() -> bytes:
+            with open(path, "rb") as f:
+                return f.read()
+        data = await asyncio.to_thread(read)
+        await storage_service.put_object(url, data, media_type, metadata={ORIGINAL_SIZE_METADATA: str(original_size)})
+    else:
+        await asyncio.to_thread(os.replace, path, _local(url))
+
+
+async def generate(track_url: str) -> bool:
+    """Transcodes an uploaded track unless it is small or already has a rendition. True if one was stored."""
+    url = rendition_url(track_url)
+    if url is None or not enabled() or not ffmpeg_runner.available():
+        return False
+    if await lookup(track_url) is not None:
+        return False
+    original_size = await _original_size(track_url)
+    if original_size is None or original_size < settings.PREVIEW_MIN_BYTES:
+        return False
+    source = await ffmpeg_runner.input_for(track_url)
+    if not source:
+        return False
+
+    suffix, media_type, options = CODECS[settings.PREVIEW_CODEC]
+    # Local renditions are written beside the upload so they can be moved into place
+    directory = None if url.startswith("r2://") else os.path.dirname(_local(url))
+    fd, path = tempfile.mkstemp(suffix=suffix, dir=directory)
+    os.close(fd)
+    try:
+        async with ffmpeg_runner.process(
+            "-y", "-i", source, "-vn", "-map_metadata", "-1", "-b:a", settings.PREVIEW_BITRATE, *options, path
+        ) as proc:
+            await ffmpeg_runner.finish(proc)
+        size = os.path.getsize(path)
+        if size > original_size * settings.PREVIEW_MAX_RATIO:
+            # Already compact (e.g. a low-bitrate MP3): the original stays the only version
+            _counters["renditions_discarded"] += 1
+            logger.info(f"Preview of {track_url} saves too little ({size} of {original_size} bytes); discarded")
+            return False
+        await _store(url, path, original_size)
+    finally:
+        if os.path.exists(path):
+            os.remove(path)
+
+    _counters["renditions_created"] += 1
+    _remember(track_url, Rendition(url, media_type, size, original_size))
+    logger.info(f"Preview of {track_url}: {size} bytes instead of {original_size}")
+    return True
+
+
+def stats() -> dict:
+    sent = _counters["preview_bytes_served"] + _counters["original_bytes_served"]
+    return {
+        "enabled": enabled(),
+        "codec": settings.PREVIEW_CODEC,
+        "bitrate": settings.PREVIEW_BITRATE,
+        **_counters,
+        # Share of the upload bytes the proxy would have sent without renditions that it didn't send
+        "reduction_ratio": round(_counters["bytes_saved"] / (sent + _counters["bytes_saved"]), 4) if sent else 0.0,
+    }
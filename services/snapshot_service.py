@@ -0,0 +1,164 @@
+"""
+Builds the reviewer "initial state" snapshot used by the dashboard, the socket
+join handler and the public line page.
+
+The independent reads run concurrently, each on its own session, and the
+finished snapshot is cached per reviewer until a queue, settings or giveaway
+mutation bumps the reviewer's state version (see services/state_versions.py).
+Concurrent misses for the same reviewer share a single build.
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.pool import StaticPool
+
+import models
+import schemas
+from config import settings
+from services import giveaway_service
+from services import pagination
+from services import queue_service
+from services import state_versions
+from services.singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+# reviewer_id -> (versions, expires_at, state, json payload or None)
+_cache: Dict[int, Tuple[Tuple[int, ...], float, schemas.FullQueueState, Optional[dict]]] = {}
+_flights = SingleFlight()
+
+
+def invalidate(reviewer_id: Optional[int] = None) -> None:
+    """Drops cached snapshots (one reviewer, or all of them)."""
+    if reviewer_id is None:
+        _cache.clear()
+    else:
+        _cache.pop(int(reviewer_id), None)
+
+
+def _session_factory():
+    # Imported lazily so tests can point database.AsyncSessionLocal elsewhere
+    import database
+    return database.AsyncSessionLocal
+
+
+def _supports_concurrent_sessions(factory) -> bool:
+    # A StaticPool (in-memory SQLite) shares a single connection between sessions,
+    # so concurrent transactions on it would trip over each other.
+    bind = factory.kw.get("bind")
+    if bind is None:
+        return False
+    return not isinstance(bind.sync_engine.pool, StaticPool)
+
+
+async def _is_live(db: AsyncSession, reviewer_id: int) -> bool:
+    result = await db.execute(
+        select(models.LiveSession.id)
+        .join(models.Reviewer, models.Reviewer.user_id == models.LiveSession.user_id)
+        .filter(
+            models.Reviewer.id == reviewer_id,
+            models.LiveSession.status == 'LIVE'
+        )
+        .limit(1)
+    )
+    return result.scalar() is not None
+
+
+def _first_page(reader: Callable[[AsyncSession], Awaitable[list]], pager) -> Callable[[AsyncSession], Awaitable[pagination.Page]]:
+    page_size = settings.INITIAL_STATE_PAGE_SIZE
+    if page_size <= 0:
+        async def everything(s):
+            return pagination.Page(await reader(s), None)
+        return everything
+    return lambda s: pager(s, page_size)
+
+
+async def _build(reviewer_id: int, db: Optional[AsyncSession] = None) -> schemas.FullQueueState:
+    readers: Dict[str, Callable[[AsyncSession], Awaitable[Any]]] = {
+        "queue": lambda s: queue_service.get_pending_queue(s, reviewer_id),
+        "history": _first_page(
+            lambda s: queue_service.get_played_queue(s, reviewer_id),
+            lambda s, limit: queue_service.get_played_page(s, reviewer_id, limit)
+        ),
+        "bookmarks": _first_page(
+            lambda s: queue_service.get_bookmarked_submissions(s, reviewer_id),
+            lambda s, limit: queue_service.get_bookmarked_page(s, reviewer_id, limit)
+        ),
+        "spotlight": lambda s: queue_service.get_spotlighted_submissions(s, reviewer_id),
+        "current_track": lambda s: queue_service.get_current_track(s, reviewer_id),
+        "is_live": lambda s: _is_live(s, reviewer_id),
+        "goals": lambda s: giveaway_service.get_giveaway_states(s, reviewer_id),
+    }
+
+    factory = _session_factory()
+    if _supports_concurrent_sessions(factory):
+        async def run(reader):
+            async with factory() as session:
+                return await reader(session)
+
+        values = await asyncio.gather(*(run(reader) for reader in readers.values()))
+        data = dict(zip(readers.keys(), values))
+    elif db is not None:
+        data = {name: await reader(db) for name, reader in readers.items()}
+    else:
+        async with factory() as session:
+            data = {name: await reader(session) for name, reader in readers.items()}
+
+    current_track = data["current_track"]
+    goals = data["goals"]
+    return schemas.FullQueueState(
+        queue=[schemas.Submission.model_validate(s) for s in queue_service.apply_zipper_merge(data["queue"])],
+        history=[schemas.Submission.model_validate(s) for s in data["history"].items],
+        bookmarks=[schemas.Submission.model_validate(s) for s in data["bookmarks"].items],
+        spotlight=[schemas.Submission.model_validate(s) for s in data["spotlight"]],
+        current_track=schemas.Submission.model_validate(current_track) if current_track else None,
+        is_live=data["is_live"],
+        # For backward compatibility, giveaway_state is the first goal
+        giveaway_state=goals[0] if goals else None,
+        community_goals=goals,
+        history_cursor=data["history"].next_cursor,
+        bookmarks_cursor=data["bookmarks"].next_cursor,
+    )
+
+
+async def _get_entry(reviewer_id: int, db: Optional[AsyncSession] = None):
+    reviewer_id = int(reviewer_id)
+    versions = state_versions.snapshot(reviewer_id)
+    entry = _cache.get(reviewer_id)
+    if entry and entry[0] == versions and entry[1] > time.monotonic():
+        return entry
+
+    async def build():
+        state = await _build(reviewer_id, db)
+        new_entry = (versions, time.monotonic() + settings.INITIAL_STATE_CACHE_TTL_SECONDS, state, None)
+        # Only publish if nothing changed while we were reading
+        if state_versions.snapshot(reviewer_id) == versions:
+            _cache[reviewer_id] = new_entry
+        return new_entry
+
+    return await _flights.do((reviewer_id, versions), build)
+
+
+async def get_initial_state(reviewer_id: int, db: Optional[AsyncSession] = None) -> schemas.FullQueueState:
+    """
+    Returns the (possibly cached) initial-state snapshot for a reviewer.
+    The returned object is shared between callers and must not be mutated.
+    """
+    entry = await _get_entry(reviewer_id, db)
+    return entry[2]
+
+
+async def get_initial_state_payload(reviewer_id: int, db: Optional[AsyncSession] = None) -> dict:
+    """JSON-ready version of the snapshot, serialized once per cached snapshot."""
+    entry = await _get_entry(reviewer_id, db)
+    if entry[3] is not None:
+        return entry[3]
+    payload = entry[2].model_dump(mode='json')
+    cached = _cache.get(int(reviewer_id))
+    if cached is not None and cached[2] is entry[2]:
+        _cache[int(reviewer_id)] = (cached[0], cached[1], cached[2], payload)
+    return payload
@@ -1,12 +1,44 @@
 import httpx
 import re
 import logging
-from typing import Optional, Dict, Any
+import time
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Tuple
+
+from config import settings
+from services.audio_cache import normalize_url
+from services.singleflight import SingleFlight
+
+_flights = SingleFlight()
+_cache: "OrderedDict[str, Tuple[Dict[str, Any], float]]" = OrderedDict() # -> (metadata, expires at)
 
 async def get_track_metadata(url: str) -> Dict[str, Any]:
     """
     Fetches metadata for a SoundCloud track using OEmbed and page scraping.
+    Complete lookups are cached for RESOLVER_METADATA_TTL_SECONDS and
+    concurrent lookups of the same track share one fetch.
     """
+    key = normalize_url(url)
+    cached = _cache.get(key)
+    if cached is not None:
+        metadata, expires_at = cached
+        if expires_at > time.time():
+            _cache.move_to_end(key)
+            return dict(metadata)
+        del _cache[key]
+
+    async def run() -> Dict[str, Any]:
+        metadata, complete = await _fetch_track_metadata(url)
+        if complete: # Don't keep the placeholders of a failed lookup
+            _cache[key] = (metadata, time.time() + settings.RESOLVER_METADATA_TTL_SECONDS)
+            while len(_cache) > settings.RESOLVER_CACHE_SIZE:
+                _cache.popitem(last=False)
+        return metadata
+
+    return dict(await _flights.do(key, run))
+
+async def _fetch_track_metadata(url: str) -> Tuple[Dict[str, Any], bool]:
+    """The metadata and whether both lookups succeeded."""
     metadata = {
         "title": "Unknown Title",
         "artist": "Unknown Artist",
@@ -14,6 +46,7 @@ async def get_track_metadata(url: str) -> Dict[str, Any]:
         "waveform_url": None,
         "genre": None
     }
+    complete = True
 
     async with httpx.AsyncClient(follow_redirects=True) as client:
         # 1. OEmbed for basic info
@@ -32,9 +65,12 @@ async def get_track_metadata(url: str) -> Dict[str, Any]:
                     metadata["title"] = metadata["title"][len(metadata["artist"]) + 3:]
                 elif metadata["artist"] and metadata["title"].startswith(metadata["artist"] + "-"):
                      metadata["title"] = metadata["title"][len(metadata["artist"]) + 1:]
+            else:
+                complete = False
 
         except Exception as e:
             logging.error(f"SoundCloud OEmbed failed: {e}")
+            complete = False
 
         # 2. Page Scraping for Waveform and Genre
         try:
@@ -62,5 +98,6 @@ async def get_track_metadata(url: str) -> Dict[str, Any]:
 
         except Exception as e:
             logging.error(f"SoundCloud Page Scraping failed: {e}")
+            complete = False
 
-    return metadata
+    return metadata, complete
@@ -0,0 +1,87 @@
+"""
+In-process version counters for per-reviewer state.
+
+Every mutation that changes what clients see for a reviewer bumps one or more
+scopes here. Caches (initial-state snapshots, ETags, ...) compare versions
+instead of hitting the database to find out whether anything changed.
+"""
+import secrets
+from collections import defaultdict
+from typing import Dict, Optional, Tuple
+
+QUEUE = "queue"
+SETTINGS = "settings"
+GIVEAWAY = "giveaway"
+
+ALL_SCOPES = (QUEUE, SETTINGS, GIVEAWAY)
+
+_versions: Dict[int, Dict[str, int]] = defaultdict(lambda: dict.fromkeys(ALL_SCOPES, 0))
+
+# Counters restart at zero with the process, so ETags also carry a per-boot token
+_EPOCH = secrets.token_hex(4)
+
+# Lower-cased TikTok handle -> reviewer id, so public routes keyed by handle
+# can answer conditional requests without a lookup.
+_handles: Dict[str, int] = {}
+
+
+def bump(reviewer_id: int, *scopes: str) -> None:
+    """Marks the given scopes (default: all) of a reviewer's state as changed."""
+    if reviewer_id is None:
+        return
+    reviewer_id = int(reviewer_id)
+    counters = _versions[reviewer_id]
+    scopes = scopes or ALL_SCOPES
+    for scope in scopes:
+        counters[scope] = counters.get(scope, 0) + 1
+    if SETTINGS in scopes:
+        # The handle may have changed
+        for handle in [h for h, rid in _handles.items() if rid == reviewer_id]:
+            del _handles[handle]
+
+
+def get(reviewer_id: int, scope: str) -> int:
+    counters = _versions.get(int(reviewer_id))
+    return counters.get(scope, 0) if counters else 0
+
+
+def snapshot(reviewer_id: int, *scopes: str) -> Tuple[int, ...]:
+    """Returns a comparable tuple of the versions for the given scopes (default: all)."""
+    return tuple(get(reviewer_id, scope) for scope in (scopes or ALL_SCOPES))
+
+
+def remember_handle(handle: Optional[str], reviewer_id: int) -> None:
+    if handle:
+        _handles[handle.lower()] = int(reviewer_id)
+
+
+def resolve_handle(identifier: str) -> Optional[int]:
+    """Resolves a numeric id or a previously seen TikTok handle to a reviewer id."""
+    if identifier.isdigit():
+        return int(identifier)
+    return _handles.get(identifier.lower())
+
+
+def etag(reviewer_id: int, *scopes: str, extra: Optional[str] = None) -> str:
+    """Weak ETag derived purely from the in-memory counters."""
+    versions = ".".join(str(v) for v in snapshot(reviewer_id, *scopes))
+    tag = f"{_EPOCH}-{int(reviewer_id)}-{versions}"
+    if extra:
+        tag = f"{tag}-{extra}"
+    return f'W/"{tag}"'
+
+
+def etag_matches(if_none_match: Optional[str], current: str) -> bool:
+    """Weak comparison of an If-None-Match header against the current ETag."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    current_opaque = current[2:] if current.startswith("W/") else current
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == current_opaque:
+            return True
+    return False
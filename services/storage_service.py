@@ -1,4 +1,26 @@
+"""
+Cloudflare R2 (S3 API) storage.
+
+upload_file sends a file object in one call. upload_stream is for audio
+uploads: it reads the source in chunks, hashes it incrementally in a worker
+thread, and sends R2_UPLOAD_PART_SIZE parts with at most
+R2_UPLOAD_CONCURRENCY in flight, so an upload holds roughly
+part size x (concurrency + 1) bytes no matter how large the file is. The
+caller sees the SHA-256 before the upload is completed and can still
+abandon it (duplicates); the multipart upload is then aborted.
+
+Every call goes through one long-lived client (client(); opened by start()
+and closed by close() from the bot's lifecycle), and presigned GET URLs are
+kept in an LRU of R2_PRESIGN_CACHE_SIZE entries until they are within
+R2_PRESIGN_REFRESH_SECONDS of expiring. presign_many() signs a whole list.
+"""
+import asyncio
+import hashlib
 import logging
+import time
+from collections import OrderedDict
+from typing import AsyncIterator, Awaitable, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
 from config import settings
 try:
     import aioboto3
@@ -9,6 +31,35 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+READ_CHUNK_SIZE = 1024 * 1024
+MIN_PART_SIZE = 5 * 1024 * 1024 # S3/R2 minimum for every part but the last
+
+
+class StreamedUpload(NamedTuple):
+    uri: Optional[str] # None when before_complete declined the upload
+    sha256: str
+    size: int
+
+
+async def iter_file(file_obj, chunk_size: int = READ_CHUNK_SIZE) -> AsyncIterator[bytes]:
+    """Chunks from an object with an async read(size) (e.g. fastapi.UploadFile)."""
+    while True:
+        chunk = await file_obj.read(chunk_size)
+        if not chunk:
+            break
+        yield chunk
+
+
+async def iter_url(url: str, chunk_size: int = READ_CHUNK_SIZE) -> AsyncIterator[bytes]:
+    """Chunks of an HTTP download (e.g. a Discord attachment URL)."""
+    import aiohttp
+    async with aiohttp.ClientSession() as session:
+        async with session.get(url) as response:
+            response.raise_for_status()
+            async for chunk in response.content.iter_chunked(chunk_size):
+                yield chunk
+
+
 class StorageService:
     def __init__(self):
         if aioboto3:
@@ -18,6 +69,13 @@ class StorageService:
             logger.warning("aioboto3 not installed. R2 storage will not work.")
             
         self.endpoint_url = f"https://{settings.R2_ACCOUNT_ID}.r2.cloudflarestorage.com" if settings.R2_ACCOUNT_ID else None
+
+        # One S3 client (and its connection pool) for the whole process; see client()
+        self._s3 = None
+        self._client_cm = None
+        self._pool_lock = asyncio.Lock()
+        # (bucket, key) -> (presigned url, monotonic expiry), least recently used first
+        self._presigned: "OrderedDict[Tuple[str, str], Tuple[str, float]]" = OrderedDict()
         
     async def upload_file(self, file_obj, filename: str, content_type: str = "application/octet-stream", bucket_name: str = None) -> str:
         if not self.session:
@@ -31,26 +89,167 @@ class StorageService:
              raise ValueError("No R2 bucket configured")
 
         try:
-            from botocore.config import Config
-            config = Config(signature_version='s3v4', region_name='auto')
-            async with self.session.client("s3", 
-                endpoint_url=self.endpoint_url,
-                aws_access_key_id=settings.R2_ACCESS_KEY_ID,
-                aws_secret_access_key=settings.R2_SECRET_ACCESS_KEY,
-                config=config
-            ) as s3:
-                await s3.upload_fileobj(
-                    file_obj, 
-                    target_bucket, 
-                    filename,
-                    ExtraArgs={'ContentType': content_type}
-                )
-                return f"r2://{filename}"
+            s3 = await self.client()
+            await s3.upload_fileobj(
+                file_obj, 
+                target_bucket, 
+                filename,
+                ExtraArgs={'ContentType': content_type}
+            )
+            return f"r2://{filename}"
         except Exception as e:
             logger.error(f"Failed to upload file to R2: {e}")
             raise
 
-    async def generate_presigned_url(self, key: str, expiration: int = 3600) -> str:
+    def _client(self):
+        from botocore.config import Config
+        config = Config(
+            signature_version='s3v4', region_name='auto',
+            max_pool_connections=settings.R2_MAX_POOL_CONNECTIONS
+        )
+        return self.session.client("s3",
+            endpoint_url=self.endpoint_url,
+            aws_access_key_id=settings.R2_ACCESS_KEY_ID,
+            aws_secret_access_key=settings.R2_SECRET_ACCESS_KEY,
+            config=config
+        )
+
+    async def client(self):
+        """
+        The process-wide S3 client. Creating a client loads botocore's service
+        model and opens a fresh connection pool, so it is done once (on first
+        use or in start()) and reused until close().
+        """
+        if self._s3 is None:
+            async with self._pool_lock:
+                if self._s3 is None:
+                    cm = self._client()
+                    self._s3 = await cm.__aenter__()
+                    self._client_cm = cm
+        return self._s3
+
+    async def start(self) -> None:
+        """Opens the shared client at startup (no-op when R2 isn't configured)."""
+        if self.session and self._check_config():
+            await self.client()
+
+    async def close(self) -> None:
+        """Closes the shared client and forgets presigned URLs (they were signed by it)."""
+        cm, self._s3, self._client_cm = self._client_cm, None, None
+        self._presigned.clear()
+        self._pool_lock = asyncio.Lock() # The next client may live on another event loop
+        if cm is not None:
+            try:
+                await cm.__aexit__(None, None, None)
+            except Exception as e:
+                logger.warning(f"Failed to close S3 client: {e}")
+
+    async def upload_stream(
+        self,
+        chunks: AsyncIterator[bytes],
+        filename: str,
+        content_type: str = "application/octet-stream",
+        bucket_name: str = None,
+        before_complete: Optional[Callable[[str], Awaitable[bool]]] = None,
+        key_for: Optional[Callable[[str], str]] = None
+    ) -> StreamedUpload:
+        """
+        Streams `chunks` to R2 under `filename`. Once everything is read and
+        hashed, `before_complete(sha256)` decides whether to keep the object:
+        False (or an exception) aborts the upload and nothing is stored.
+        Files smaller than one part go up with a single put_object.
+
+        With `key_for`, the object ends up at key_for(sha256) instead: small
+        files are written there directly, multipart uploads are completed at
+        `filename` and copied over server-side.
+        """
+        if not self.session:
+            raise ImportError("aioboto3 is not installed")
+
+        if not self._check_config():
+            raise Exception("R2 configuration is missing")
+
+        target_bucket = bucket_name or settings.R2_BUCKET_NAME
+        if not target_bucket:
+             raise ValueError("No R2 bucket configured")
+
+        part_size = max(settings.R2_UPLOAD_PART_SIZE, MIN_PART_SIZE)
+        return await _stream_to(
+            await self.client(), chunks, target_bucket, filename, content_type, part_size,
+            max(1, settings.R2_UPLOAD_CONCURRENCY), before_complete, key_for
+        )
+
+    def content_key(self, sha256: str) -> str:
+        """Content-addressed object key: identical bytes always map to the same key."""
+        return f"blobs/sha256/{sha256[:2]}/{sha256}"
+
+    async def delete_object(self, key: str, bucket_name: str = None) -> None:
+        if not self.session:
+            raise ImportError("aioboto3 is not installed")
+        if key.startswith("r2://"):
+            key = key[5:]
+        bucket = bucket_name or settings.R2_BUCKET_NAME
+        s3 = await self.client()
+        await s3.delete_object(Bucket=bucket, Key=key)
+        self._presigned.pop((bucket, key), None)
+
+    async def put_object(
+        self, key: str, body: bytes, content_type: str = "application/octet-stream",
+        bucket_name: str = None, metadata: Optional[Dict[str, str]] = None
+    ) -> str:
+        """Writes a small object (e.g. a sidecar of an upload) in one request."""
+        if not self.session:
+            raise ImportError("aioboto3 is not installed")
+        if key.startswith("r2://"):
+            key = key[5:]
+        s3 = await self.client()
+        await s3.put_object(
+            Bucket=bucket_name or settings.R2_BUCKET_NAME, Key=key, Body=body, ContentType=content_type,
+            Metadata=metadata or {}
+        )
+        return f"r2://{key}"
+
+    async def head_object(self, key: str, bucket_name: str = None) -> Optional[dict]:
+        """{"size": int, "content_type": str, "metadata": dict} of an object, or None if there is no such key."""
+        if not self.session:
+            raise ImportError("aioboto3 is not installed")
+        if key.startswith("r2://"):
+            key = key[5:]
+        s3 = await self.client()
+        try:
+            response = await s3.head_object(Bucket=bucket_name or settings.R2_BUCKET_NAME, Key=key)
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("NoSuchKey", "404", "NotFound"):
+                return None
+            raise
+        return {
+            "size": response["ContentLength"],
+            "content_type": response.get("ContentType"),
+            "metadata": response.get("Metadata") or {},
+        }
+
+    async def get_object(self, key: str, bucket_name: str = None) -> Optional[bytes]:
+        """A small object's bytes, or None if there is no such key."""
+        if not self.session:
+            raise ImportError("aioboto3 is not installed")
+        if key.startswith("r2://"):
+            key = key[5:]
+        s3 = await self.client()
+        try:
+            response = await s3.get_object(Bucket=bucket_name or settings.R2_BUCKET_NAME, Key=key)
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("NoSuchKey", "404"):
+                return None
+            raise
+        async with response["Body"] as body:
+            return await body.read()
+
+    async def generate_presigned_url(self, key: str, expiration: int = 3600, bucket_name: str = None) -> str:
+        """
+        A GET URL for `key`. URLs are cached per (bucket, key) and handed out
+        again until less than R2_PRESIGN_REFRESH_SECONDS of their lifetime is
+        left, so callers may get one valid for less than `expiration`.
+        """
         if not self.session:
             return None
             
@@ -60,26 +259,81 @@ class StorageService:
         # Strip r2:// prefix if present
         if key.startswith("r2://"):
             key = key[5:]
+        bucket = bucket_name or settings.R2_BUCKET_NAME
 
+        url = self._cached_url(bucket, key)
+        if url is not None:
+            return url
         try:
-            from botocore.config import Config
-            config = Config(signature_version='s3v4', region_name='auto')
-            async with self.session.client("s3", 
-                endpoint_url=self.endpoint_url,
-                aws_access_key_id=settings.R2_ACCESS_KEY_ID,
-                aws_secret_access_key=settings.R2_SECRET_ACCESS_KEY,
-                config=config
-            ) as s3:
-                url = await s3.generate_presigned_url(
-                    'get_object',
-                    Params={'Bucket': settings.R2_BUCKET_NAME, 'Key': key},
-                    ExpiresIn=expiration
-                )
-                return url
+            return await self._presign(await self.client(), bucket, key, expiration)
         except Exception as e:
             logger.error(f"Failed to generate presigned URL: {e}")
             return None
 
+    async def presign_many(self, keys: Iterable[str], expiration: int = 3600, bucket_name: str = None) -> Dict[str, Optional[str]]:
+        """
+        generate_presigned_url for a list of keys (e.g. every avatar on a page):
+        duplicates are signed once, cached URLs are reused and the rest are
+        signed together on the shared client. Maps each key as given to its
+        URL, or None if it couldn't be signed.
+        """
+        keys = [key for key in dict.fromkeys(keys) if key]
+        if not keys or not self.session or not self._check_config():
+            return {key: None for key in keys}
+        bucket = bucket_name or settings.R2_BUCKET_NAME
+
+        urls: Dict[str, Optional[str]] = {}
+        missing: Dict[str, List[str]] = {}
+        for key in keys:
+            object_key = key[5:] if key.startswith("r2://") else key
+            urls[key] = self._cached_url(bucket, object_key)
+            if urls[key] is None:
+                missing.setdefault(object_key, []).append(key)
+        if not missing:
+            return urls
+
+        try:
+            s3 = await self.client()
+        except Exception as e:
+            logger.error(f"Failed to generate presigned URLs: {e}")
+            return urls
+        signed = await asyncio.gather(
+            *(self._presign(s3, bucket, object_key, expiration) for object_key in missing),
+            return_exceptions=True
+        )
+        for (object_key, originals), url in zip(missing.items(), signed):
+            if isinstance(url, BaseException):
+                logger.error(f"Failed to generate presigned URL for {object_key}: {url}")
+                continue
+            for key in originals:
+                urls[key] = url
+        return urls
+
+    def _cached_url(self, bucket: str, key: str) -> Optional[str]:
+        entry = self._presigned.get((bucket, key))
+        if entry is None:
+            return None
+        url, expires_at = entry
+        if expires_at - time.monotonic() <= settings.R2_PRESIGN_REFRESH_SECONDS:
+            del self._presigned[(bucket, key)] # Refresh before it expires in a client's hands
+            return None
+        self._presigned.move_to_end((bucket, key))
+        return url
+
+    async def _presign(self, s3, bucket: str, key: str, expiration: int) -> str:
+        signed_at = time.monotonic()
+        url = await s3.generate_presigned_url(
+            'get_object',
+            Params={'Bucket': bucket, 'Key': key},
+            ExpiresIn=expiration
+        )
+        if expiration > settings.R2_PRESIGN_REFRESH_SECONDS and settings.R2_PRESIGN_CACHE_SIZE > 0:
+            self._presigned[(bucket, key)] = (url, signed_at + expiration)
+            self._presigned.move_to_end((bucket, key))
+            while len(self._presigned) > settings.R2_PRESIGN_CACHE_SIZE:
+                self._presigned.popitem(last=False)
+        return url
+
     def _check_config(self) -> bool:
         return all([
             settings.R2_ACCOUNT_ID,
@@ -89,3 +343,89 @@ class StorageService:
         ])
 
 storage_service = StorageService()
+
+
+async def _stream_to(s3, chunks, bucket, key, content_type, part_size, concurrency, before_complete, key_for=None) -> StreamedUpload:
+    hasher = hashlib.sha256()
+    slots = asyncio.Semaphore(concurrency)
+    upload_id = None
+    tasks = []
+    size = 0
+    buffer = bytearray()
+
+    async def send_part(number: int, body: bytes):
+        try:
+            response = await s3.upload_part(Bucket=bucket, Key=key, UploadId=upload_id, PartNumber=number, Body=body)
+            return {"PartNumber": number, "ETag": response["ETag"]}
+        finally:
+            slots.release()
+
+    async def flush_part(body: bytes):
+        nonlocal upload_id
+        await asyncio.to_thread(hasher.update, body) # Off the event loop; overlaps the parts in flight
+        if upload_id is None:
+            created = await s3.create_multipart_upload(Bucket=bucket, Key=key, ContentType=content_type)
+            upload_id = created["UploadId"]
+        await slots.acquire() # Backpressure: at most `concurrency` parts in memory
+        failed = next((t for t in tasks if t.done() and t.exception()), None)
+        if failed is not None:
+            slots.release()
+            failed.result()
+        tasks.append(asyncio.create_task(send_part(len(tasks) + 1, body)))
+
+    try:
+        async for chunk in chunks:
+            size += len(chunk)
+            buffer += chunk
+            while len(buffer) >= part_size:
+                with memoryview(buffer) as view:
+                    body = bytes(view[:part_size]) # One copy; the slice itself would be another
+                del buffer[:part_size]
+                await flush_part(body)
+
+        if upload_id is None:
+            # Small file: one request
+            body = bytes(buffer)
+            await asyncio.to_thread(hasher.update, body)
+            digest = hasher.hexdigest()
+            if before_complete is not None and not await before_complete(digest):
+                return StreamedUpload(None, digest, size)
+            final_key = key_for(digest) if key_for else key
+            await s3.put_object(Bucket=bucket, Key=final_key, Body=body, ContentType=content_type)
+            return StreamedUpload(f"r2://{final_key}", digest, size)
+
+        if buffer:
+            await flush_part(bytes(buffer))
+            buffer.clear()
+        parts = await asyncio.gather(*tasks)
+        digest = hasher.hexdigest()
+        if before_complete is not None and not await before_complete(digest):
+            await _abort(s3, bucket, key, upload_id)
+            return StreamedUpload(None, digest, size)
+        await s3.complete_multipart_upload(
+            Bucket=bucket, Key=key, UploadId=upload_id, MultipartUpload={"Parts": list(parts)}
+        )
+        upload_id = None # Completed; nothing left to abort
+        if key_for is None:
+            return StreamedUpload(f"r2://{key}", digest, size)
+
+        # The hash is only known now: move the object to its content key (server-side copy)
+        final_key = key_for(digest)
+        await s3.copy_object(Bucket=bucket, Key=final_key, CopySource={"Bucket": bucket, "Key": key})
+        await s3.delete_object(Bucket=bucket, Key=key)
+        return StreamedUpload(f"r2://{final_key}", digest, size)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if upload_id is not None:
+            await _abort(s3, bucket, key, upload_id)
+        raise
+
+
+async def _abort(s3, bucket: str, key: str, upload_id: str) -> None:
+    try:
+        await s3.abort_multipart_upload(Bucket=bucket, Key=key, UploadId=upload_id)
+    except Exception as e:
+        # R2 also expires abandoned multipart uploads; just note it
+        logger.warning(f"Failed to abort multipart upload {upload_id} for {key}: {e}")
@@ -168,6 +168,16 @@ async def get_user_by_tiktok_username(db: AsyncSession, tiktok_username: str) ->
     result = await db.execute(select(models.User).filter(models.User.tiktok_username == tiktok_username))
     return result.scalars().first()
 
+async def get_latest_tiktok_interaction(db: AsyncSession, tiktok_account_id: int) -> models.TikTokInteraction | None:
+    """The TikTok account's most recent interaction in any host's live."""
+    result = await db.execute(
+        select(models.TikTokInteraction)
+        .where(models.TikTokInteraction.tiktok_account_id == tiktok_account_id)
+        .order_by(models.TikTokInteraction.timestamp.desc())
+        .limit(1)
+    )
+    return result.scalar_one_or_none()
+
 async def get_user_with_reviewer_profile(db: AsyncSession, discord_id: str) -> models.User | None:
     """Retrieves a user and their reviewer profile, if it exists."""
     result = await db.execute(select(models.User).filter(models.User.discord_id == discord_id))
@@ -0,0 +1,156 @@
+"""
+Precomputed waveform peaks for uploaded audio.
+
+When a submission with an uploaded track (r2:// or /api/uploads/) is
+created, the outbox hands generate() to ffmpeg_runner.submit(): ffmpeg
+decodes the file once to mono 16-bit PCM at PEAKS_SAMPLE_RATE, numpy reduces
+it to a (min, max) pair per PEAKS_BASE_SAMPLES samples, and PEAKS_LEVELS - 1
+coarser levels, each PEAKS_LEVEL_FACTOR times wider, are folded from those
+pairs. The result is stored next to the audio as `<object>.peaks` and served
+by GET /api/submissions/{id}/peaks, so the player draws the waveform without
+downloading and decoding the whole track. R2 uploads are content-addressed,
+so the same audio is decoded once however often it is submitted.
+
+Peaks file, little-endian:
+    b"WFPK", version u8, bits per value u8 (8), sample rate u32, level count u16
+    per level: samples per pair u32, pair count u32
+    per level, in the same order: pair count x (min int8, max int8)
+"""
+import asyncio
+import logging
+import os
+import struct
+from typing import AsyncIterator, List, Optional, Tuple
+
+from config import settings
+from services import ffmpeg_runner
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"WFPK"
+VERSION = 1
+SUFFIX = ".peaks"
+MEDIA_TYPE = "application/octet-stream"
+
+if np is None:
+    logger.warning("numpy not installed. Waveform peaks will not be generated.")
+
+
+def enabled() -> bool:
+    return settings.PEAKS_ENABLED and np is not None and ffmpeg_runner.available()
+
+
+def peaks_location(track_url: Optional[str]) -> Optional[str]:
+    """Where an uploaded track's peaks live (r2:// key or local path); None for other tracks."""
+    if not track_url:
+        return None
+    if track_url.startswith("r2://"):
+        return f"{track_url}{SUFFIX}"
+    if track_url.startswith("/api/uploads/"):
+        return os.path.join("uploads", os.path.basename(track_url) + SUFFIX)
+    return None
+
+
+def _pairs(samples: "np.ndarray", width: int) -> "np.ndarray":
+    blocks = samples.reshape(-1, width)
+    return np.stack([blocks.min(axis=1), blocks.max(axis=1)], axis=1)
+
+
+def _fold(pairs: "np.ndarray", factor: int) -> "np.ndarray":
+    if not len(pairs):
+        return pairs
+    count = -(-len(pairs) // factor)
+    padded = np.pad(pairs, ((0, count * factor - len(pairs)), (0, 0)), mode="edge").reshape(count, factor, 2)
+    return np.stack([padded[:, :, 0].min(axis=1), padded[:, :, 1].max(axis=1)], axis=1)
+
+
+def encode(sample_rate: int, levels: List[Tuple[int, "np.ndarray"]]) -> bytes:
+    """Serializes (samples per pair, int16 pairs) levels, scaled to 8 bits."""
+    header = struct.pack("<4sBBIH", MAGIC, VERSION, 8, sample_rate, len(levels))
+    index = b"".join(struct.pack("<II", width, len(pairs)) for width, pairs in levels)
+    values = b"".join((pairs.astype(np.int16) >> 8).astype(np.int8).tobytes() for _, pairs in levels)
+    return header + index + values
+
+
+async def compute(pcm: AsyncIterator[bytes], sample_rate: int) -> bytes:
+    """Peaks of a stream of mono s16le PCM; holds one chunk of samples at a time."""
+    width = max(1, settings.PEAKS_BASE_SAMPLES)
+    step = 2 * width
+    parts = []
+    pending = b""
+    async for chunk in pcm:
+        data = pending + chunk
+        usable = len(data) - len(data) % step
+        if usable:
+            parts.append(_pairs(np.frombuffer(data[:usable], dtype="<i2"), width))
+        pending = data[usable:]
+    if len(pending) >= 2:
+        tail = np.frombuffer(pending[:len(pending) - len(pending) % 2], dtype="<i2")
+        parts.append(np.array([[tail.min(), tail.max()]], dtype=np.int16))
+
+    pairs = np.concatenate(parts) if parts else np.zeros((0, 2), dtype=np.int16)
+    levels = [(width, pairs)]
+    factor = max(2, settings.PEAKS_LEVEL_FACTOR)
+    for _ in range(1, settings.PEAKS_LEVELS):
+        previous_width, previous = levels[-1]
+        levels.append((previous_width * factor, _fold(previous, factor)))
+    return encode(sample_rate, levels)
+
+
+async def load(track_url: str) -> Optional[bytes]:
+    """The stored peaks of an uploaded track, or None if they don't exist (yet)."""
+    location = peaks_location(track_url)
+    if location is None:
+        return None
+    if location.startswith("r2://"):
+        from services.storage_service import storage_service
+        return await storage_service.get_object(location)
+
+    def read() -> Optional[bytes]:
+        try:
+            with open(location, "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+    return await asyncio.to_thread(read)
+
+
+async def _store(location: str, data: bytes) -> None:
+    if location.startswith("r2://"):
+        from services.storage_service import storage_service
+        await storage_service.put_object(location, data, MEDIA_TYPE)
+        return
+
+    def write() -> None:
+        partial = f"{location}.tmp"
+        with open(partial, "wb") as f:
+            f.write(data)
+        os.replace(partial, location)
+    await asyncio.to_thread(write)
+
+
+async def generate(track_url: str) -> bool:
+    """Decodes an uploaded track and stores its peaks, unless they exist. True if it wrote them."""
+    location = peaks_location(track_url)
+    if location is None or not enabled():
+        return False
+    if await load(track_url) is not None:
+        return False
+    source = await ffmpeg_runner.input_for(track_url)
+    if not source:
+        logger.warning(f"Waveform peaks: can't read {track_url}")
+        return False
+
+    sample_rate = settings.PEAKS_SAMPLE_RATE
+    async with ffmpeg_runner.process(
+        "-i", source, "-vn", "-ac", "1", "-ar", str(sample_rate), "-f", "s16le", "-acodec", "pcm_s16le", "pipe:1"
+    ) as proc:
+        data = await compute(ffmpeg_runner.read(proc), sample_rate)
+        await ffmpeg_runner.finish(proc)
+    await _store(location, data)
+    logger.info(f"Waveform peaks for {track_url}: {len(data)} bytes")
+    return True
@@ -1,7 +1,7 @@
 from fastapi import HTTPException
 from sio_instance import sio
 import security
-from services import user_service, queue_service
+from services import user_service, queue_service, snapshot_service
 from database import AsyncSessionLocal
 import schemas
 
@@ -50,31 +50,10 @@ async def join_reviewer_room(sid, reviewer_id):
         await sio.enter_room(sid, room)
         logging.info(f"Client {sid} joined room {room}")
 
-        async with AsyncSessionLocal() as db:
-            # Fetch initial queue and history for the requested reviewer
-            pending_queue = await queue_service.get_pending_queue(db, reviewer_id)
-            played_history = await queue_service.get_played_queue(db, reviewer_id)
-            bookmarks = await queue_service.get_bookmarked_submissions(db, reviewer_id)
-            spotlight = await queue_service.get_spotlighted_submissions(db, reviewer_id)
-            current_track = await queue_service.get_current_track(db, reviewer_id)
-
-            # Serialize data
-            queue_schemas = [schemas.Submission.model_validate(s) for s in pending_queue]
-            history_schemas = [schemas.Submission.model_validate(s) for s in played_history]
-            bookmarks_schemas = [schemas.Submission.model_validate(s) for s in bookmarks]
-            spotlight_schemas = [schemas.Submission.model_validate(s) for s in spotlight]
-            current_track_schema = schemas.Submission.model_validate(current_track) if current_track else None
-
-            # Emit the initial state to the connecting client
-            initial_state = {
-                "queue": [s.model_dump(mode='json') for s in queue_schemas],
-                "history": [s.model_dump(mode='json') for s in history_schemas],
-                "bookmarks": [s.model_dump(mode='json') for s in bookmarks_schemas],
-                "spotlight": [s.model_dump(mode='json') for s in spotlight_schemas],
-                "current_track": current_track_schema.model_dump(mode='json') if current_track_schema else None,
-            }
-            await sio.emit("initial_state", initial_state, room=sid)
-            logging.info(f"Emitted 'initial_state' for reviewer {reviewer_id} to {sid}")
+        # Served from the per-reviewer snapshot cache (concurrent reads, shared builds)
+        initial_state = await snapshot_service.get_initial_state_payload(reviewer_id)
+        await sio.emit("initial_state", initial_state, room=sid)
+        logging.info(f"Emitted 'initial_state' for reviewer {reviewer_id} to {sid}")
     except Exception as e:
         logging.error(f"Error in join_reviewer_room: {e}")
         await sio.emit("error", {"message": f"Join failed: {str(e)}"}, room=sid)
@@ -0,0 +1,62 @@
+import os
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+
+import database
+from models import Base
+from sio_instance import sio
+
+# Set TEST_POSTGRES_URL (an empty, disposable postgresql+asyncpg database) to run the Postgres cases
+POSTGRES_URL = os.getenv("TEST_POSTGRES_URL")
+
+
+@pytest.fixture
+def anyio_backend():
+    return 'asyncio'
+
+
+@pytest.fixture
+async def session_factory(request, tmp_path, monkeypatch):
+    """
+    A fresh database with every table, installed as database.AsyncSessionLocal.
+
+    File-backed SQLite (each session really gets its own connection) unless the
+    test parametrizes this fixture indirectly with "postgresql". sio.emit calls
+    are recorded in factory.emitted as (event, data) and every statement sent
+    in factory.statements. Modules that need more (seed data, a running
+    service) override the fixture and build on this one.
+    """
+    dialect = getattr(request, "param", "sqlite")
+    if dialect == "sqlite":
+        url = f"sqlite+aiosqlite:///{tmp_path / 'test.db'}"
+    elif POSTGRES_URL:
+        url = POSTGRES_URL
+    else:
+        pytest.skip("TEST_POSTGRES_URL not set")
+
+    emitted = []
+    async def record_emit(event, data=None, **kwargs):
+        emitted.append((event, data))
+    monkeypatch.setattr(sio, "emit", record_emit)
+
+    engine = create_async_engine(url, echo=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    statements = []
+    event.listen(engine.sync_engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    factory = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False, autoflush=False)
+    factory.engine = engine
+    factory.dialect = dialect
+    factory.emitted = emitted
+    factory.statements = statements
+    monkeypatch.setattr(database, "AsyncSessionLocal", factory)
+    yield factory
+
+    if dialect != "sqlite":
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+    await engine.dispose()
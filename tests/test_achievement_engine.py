@@ -0,0 +1,140 @@
+import datetime
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from sqlalchemy import select, func
+
+from models import User, AchievementDefinition, UserAchievement
+from api import achievements_api
+from database import get_db
+from security import get_current_user
+from schemas import TokenData
+from services import achievement_service
+from services.achievement_service import Trigger
+
+
+@pytest.fixture
+async def session_factory(session_factory):
+    achievement_service.invalidate()
+    async with session_factory() as db:
+        db.add_all([User(id=1, username="a", discord_id="d1"), User(id=2, username="b", discord_id="d2")])
+        for slug, category, threshold in [
+            ("likes_1k", "LIFETIME_LIKES", 1000),
+            ("likes_10k", "LIFETIME_LIKES", 10000),
+            ("likes_100k", "LIFETIME_LIKES", 100000),
+            ("rainbow", "CHAT_RAINBOW", 1),
+            ("collector", "TOTAL_ACHIEVEMENTS", 3),
+        ]:
+            db.add(AchievementDefinition(id=slug, slug=slug, display_name=slug, category=category, threshold_value=threshold))
+        await db.commit()
+
+    yield session_factory
+    achievement_service.invalidate()
+
+
+async def _unlocked(factory, user_id):
+    async with factory() as db:
+        rows = await db.execute(select(UserAchievement.achievement_id).filter(UserAchievement.user_id == user_id))
+        return sorted(rows.scalars().all())
+
+
+@pytest.mark.anyio
+async def test_batch_unlocks_in_one_commit_and_chains_collector(session_factory):
+    statements = session_factory.statements
+    async with session_factory() as db:
+        statements.clear()
+        created = await achievement_service.evaluate(db, [
+            Trigger(1, "LIFETIME_LIKES", 15000),
+            Trigger(1, "CHAT_RAINBOW", slug="rainbow"),
+            Trigger(2, "LIFETIME_LIKES", 999),
+            Trigger(2, "CHAT_RAINBOW", slug="not_a_slug"),
+            Trigger(99, "LIFETIME_LIKES", 10 ** 9),  # Unknown user
+        ])
+
+    assert sorted(ua.achievement_id for ua in created) == ["collector", "likes_10k", "likes_1k", "rainbow"]
+    assert sum(1 for s in statements if s.startswith("INSERT INTO user_achievements ")) == 1
+    assert await _unlocked(session_factory, 1) == ["collector", "likes_10k", "likes_1k", "rainbow"]
+    assert await _unlocked(session_factory, 2) == []
+
+
+@pytest.mark.anyio
+async def test_cached_bitsets_make_repeat_triggers_free(session_factory):
+    async with session_factory() as db:
+        await achievement_service.trigger_achievement(db, 1, "LIFETIME_LIKES", 5000)
+        session_factory.statements.clear()
+        # Values at or below the recorded progress change nothing
+        for value in range(1000, 5001, 100):
+            await achievement_service.trigger_achievement(db, 1, "LIFETIME_LIKES", value)
+    assert session_factory.statements == []
+    assert await _unlocked(session_factory, 1) == ["likes_1k"]
+
+
+@pytest.mark.anyio
+async def test_stale_cache_does_not_duplicate_unlocks(session_factory):
+    async with session_factory() as db:
+        await achievement_service.trigger_achievement(db, 2, "LIFETIME_LIKES", 10)
+        # Another process unlocks behind our back
+        db.add(UserAchievement(id="x", user_id=2, achievement_id="likes_1k"))
+        await db.commit()
+        await achievement_service.trigger_achievement(db, 2, "LIFETIME_LIKES", 2000)
+    assert await _unlocked(session_factory, 2) == ["likes_1k"]
+
+
+@pytest.mark.anyio
+async def test_definitions_hot_reload_after_seed(session_factory):
+    async with session_factory() as db:
+        await achievement_service.trigger_achievement(db, 1, "LIFETIME_LIKES", 500)
+        db.add(AchievementDefinition(id="likes_500", slug="likes_500", display_name="x", category="LIFETIME_LIKES", threshold_value=500))
+        await achievement_service.mark_definitions_changed(db)
+        await db.commit()
+
+        await achievement_service.trigger_achievement(db, 1, "LIFETIME_LIKES", 500)
+    assert await _unlocked(session_factory, 1) == ["likes_500"]
+    async with session_factory() as db:
+        assert (await db.execute(select(func.count()).select_from(UserAchievement))).scalar() == 1
+
+
+@pytest.mark.anyio
+async def test_progress_vector_tracks_best_values(session_factory):
+    async with session_factory() as db:
+        await achievement_service.evaluate(db, [Trigger(1, "LIFETIME_LIKES", 700), Trigger(1, "CONCURRENT_VIEWERS", 40)])
+        await achievement_service.evaluate(db, [Trigger(1, "CONCURRENT_VIEWERS", 25)])  # A quieter session
+        await achievement_service.evaluate(db, [Trigger(1, "CHAT_RAINBOW", slug="rainbow")])
+        progress = await achievement_service.get_progress(db, 1)
+    assert {category: value for category, (value, _) in progress.items()} == {
+        "LIFETIME_LIKES": 700, "CONCURRENT_VIEWERS": 40, "TOTAL_ACHIEVEMENTS": 1
+    }
+
+
+@pytest.mark.anyio
+async def test_achievements_endpoint_is_read_only_and_supports_since(session_factory):
+    async with session_factory() as db:
+        await achievement_service.evaluate(db, [Trigger(1, "LIFETIME_LIKES", 2500)])
+        session_factory.statements.clear()
+
+    async def override_get_db():
+        async with session_factory() as session:
+            yield session
+
+    app = FastAPI()
+    app.include_router(achievements_api.router, prefix="/api/achievements")
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_current_user] = lambda: TokenData(discord_id="d1")
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        body = (await client.get("/api/achievements/user/achievements")).json()
+        assert not any(s.lstrip().upper().startswith(("INSERT", "UPDATE", "DELETE")) for s in session_factory.statements)
+
+        # Fan view hides streamer categories; the other badges read the progress vector
+        assert {b["slug"] for b in body["badges"]} == {"rainbow", "collector"}
+        collector = next(b for b in body["badges"] if b["slug"] == "collector")
+        assert collector["current_value"] == 1 and collector["progress"] == 33.3
+
+        async with session_factory() as db:
+            await achievement_service.evaluate(db, [Trigger(1, "CHAT_RAINBOW", slug="rainbow")])
+        changed = (await client.get("/api/achievements/user/achievements", params={"since": body["as_of"]})).json()
+        assert {b["slug"]: b["unlocked"] for b in changed["badges"]} == {"rainbow": True, "collector": False}
+
+        later = (datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(seconds=1)).isoformat()
+        assert (await client.get("/api/achievements/user/achievements", params={"since": later})).json()["badges"] == []
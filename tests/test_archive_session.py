@@ -0,0 +1,95 @@
+import datetime
+
+import pytest
+from sqlalchemy import select, func
+
+from models import User, Reviewer, ReviewSession, Submission, SubmissionArchive
+from services import queue_service, archive_service
+
+
+async def _seed(factory):
+    base = datetime.datetime(2025, 1, 1, tzinfo=datetime.timezone.utc)
+    statuses = ['pending'] * 7 + ['playing', 'played', 'reviewed', 'rejected', 'archived']
+    async with factory() as db:
+        user = User(discord_id="1", username="host")
+        db.add(user)
+        await db.flush()
+        reviewer = Reviewer(user_id=user.id, tiktok_handle="host")
+        db.add(reviewer)
+        await db.flush()
+        session = ReviewSession(reviewer_id=reviewer.id, name="Friday", is_active=True)
+        db.add(session)
+        await db.flush()
+        for i, status in enumerate(statuses):
+            db.add(Submission(
+                reviewer_id=reviewer.id, user_id=user.id, session_id=session.id, track_url=f"t{i}",
+                status=status, submitted_at=base + datetime.timedelta(minutes=i)
+            ))
+        await db.commit()
+        return reviewer.id, session.id
+
+
+async def _statuses(factory, model):
+    async with factory() as db:
+        rows = await db.execute(select(model.status, func.count()).group_by(model.status))
+        return dict(rows.all())
+
+
+@pytest.mark.anyio
+async def test_archive_runs_in_chunks_and_reports_progress(session_factory):
+    reviewer_id, session_id = await _seed(session_factory)
+    progress = []
+
+    async def on_progress(done):
+        progress.append(done)
+
+    async with session_factory() as db:
+        session = await queue_service.archive_session(db, reviewer_id, session_id, chunk_size=4, on_progress=on_progress)
+        assert session.is_active is False
+
+    assert progress == [4, 8, 10]
+    assert await _statuses(session_factory, Submission) == {"archived": 11, "rejected": 1}
+    async with session_factory() as db:
+        assert (await db.get(Reviewer, reviewer_id)).active_track_id is None
+
+
+@pytest.mark.anyio
+async def test_archive_can_move_rows_to_cold_table(session_factory):
+    reviewer_id, session_id = await _seed(session_factory)
+
+    async with session_factory() as db:
+        await queue_service.archive_session(db, reviewer_id, session_id, move_to_cold=True, chunk_size=5)
+
+    assert await _statuses(session_factory, Submission) == {"rejected": 1}
+    assert await _statuses(session_factory, SubmissionArchive) == {"archived": 11}
+    async with session_factory() as db:
+        moved = (await db.execute(select(SubmissionArchive).filter(SubmissionArchive.track_url == "t3"))).scalars().one()
+        assert moved.session_id == session_id and moved.submitted_at is not None
+
+
+@pytest.mark.anyio
+async def test_cold_mover_keeps_history_readable(session_factory, monkeypatch):
+    reviewer_id, session_id = await _seed(session_factory)
+    monkeypatch.setattr(archive_service.settings, "ARCHIVE_COLD_BATCH_SIZE", 1)
+    monkeypatch.setattr(archive_service.settings, "ARCHIVE_COLD_BATCH_PAUSE_SECONDS", 0)
+    async with session_factory() as db:
+        await queue_service.archive_session(db, reviewer_id, session_id)
+        flagged = (await db.execute(select(Submission).filter(Submission.track_url == "t0"))).scalars().one()
+        flagged.bookmarked = True
+        await db.commit()
+        user_id = flagged.user_id
+
+    assert await archive_service.run_cold_mover_once(session_factory) == 11
+    assert await _statuses(session_factory, Submission) == {"archived": 1}
+    assert await _statuses(session_factory, SubmissionArchive) == {"archived": 10, "rejected": 1}
+
+    async with session_factory() as db:
+        history = await queue_service.get_submissions_by_user(db, user_id)
+        assert len(history) == 12 and history[0].track_url == "t11" and history[0].user.username == "host"
+        assert len(await queue_service.get_submissions_by_session(db, session_id)) == 12
+        assert len(await queue_service.get_bookmarked_submissions(db, reviewer_id)) == 1
+
+        # New ids never collide with cold ones
+        db.add(Submission(reviewer_id=reviewer_id, user_id=user_id, track_url="new"))
+        await db.commit()
+        assert len(await queue_service.get_submissions_by_user(db, user_id)) == 13
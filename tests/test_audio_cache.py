@@ -0,0 +1,103 @@
+import asyncio
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+
+from api_main import app
+from services import audio_cache, audio_stream
+
+KB = 1024
+
+
+@pytest.fixture
+async def upstream(tmp_path, monkeypatch):
+    monkeypatch.setattr(audio_cache.settings, "AUDIO_CACHE_DIR", str(tmp_path / "cache"))
+    files = {f"/{name}.wav": os.urandom(size) for name, size in (("a", 512 * KB), ("b", 300 * KB), ("c", 300 * KB))}
+    fetched = []
+
+    class Handler(BaseHTTPRequestHandler):
+        """Sends files slowly, in small pieces, so readers catch up with the fill."""
+
+        def do_GET(self):
+            fetched.append(self.path)
+            data = files[self.path]
+            self.send_response(200)
+            self.send_header("Content-Type", "audio/wav")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            for start in range(0, len(data), 32 * KB):
+                self.wfile.write(data[start:start + 32 * KB])
+                time.sleep(0.005)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        yield client, base, files, fetched
+    server.shutdown()
+    await audio_cache.close()
+    await audio_stream.close()
+    for name in list(audio_cache._counters):
+        audio_cache._counters[name] = 0
+
+
+def _get(client, url, **headers):
+    return client.get("/api/proxy/audio", params={"url": url}, headers=headers)
+
+
+@pytest.mark.anyio
+async def test_concurrent_listeners_share_one_upstream_fetch(upstream):
+    client, base, files, fetched = upstream
+    data = files["/a.wav"]
+
+    responses = await asyncio.gather(
+        _get(client, f"{base}/a.wav"),
+        _get(client, f"{base}/a.wav#t=1"), # Same source after normalization
+        _get(client, f"{base.upper().replace('HTTP', 'http')}/a.wav", range="bytes=1000-1999"),
+        _get(client, f"{base}/a.wav", range="bytes=-100"),
+    )
+
+    assert fetched == ["/a.wav"]
+    assert [r.status_code for r in responses] == [200, 200, 206, 206]
+    assert responses[0].content == responses[1].content == data
+    assert responses[2].content == data[1000:2000] and responses[2].headers["content-range"] == f"bytes 1000-1999/{len(data)}"
+    assert responses[3].content == data[-100:]
+
+    # Complete now: served from the file, ranges included
+    again = await _get(client, f"{base}/a.wav", range="bytes=500000-")
+    assert again.status_code == 206 and again.content == data[500000:] and again.headers["x-cache"] == "HIT"
+    assert (await _get(client, f"{base}/a.wav", **{"if-none-match": again.headers["etag"]})).status_code == 304
+    assert (await _get(client, f"{base}/a.wav", range=f"bytes={len(data)}-")).status_code == 416
+    assert fetched == ["/a.wav"]
+
+    stats = audio_cache.stats()
+    assert (stats["misses"], stats["upstream_fetches"], stats["entries"]) == (1, 1, 1)
+    assert stats["hits"] == 6 and stats["hit_ratio"] == round(6 / 7, 4)
+    assert stats["bytes_from_cache"] == len(data) + 1000 + 100 + len(data) - 500000
+
+
+@pytest.mark.anyio
+async def test_lru_eviction_within_byte_budget_and_reload_from_disk(upstream, monkeypatch):
+    client, base, files, fetched = upstream
+    monkeypatch.setattr(audio_cache.settings, "AUDIO_CACHE_MAX_BYTES", 700 * KB)
+
+    for name in ("b", "c"):
+        assert (await _get(client, f"{base}/{name}.wav")).content == files[f"/{name}.wav"]
+    await _get(client, f"{base}/b.wav") # b is now the most recently used
+    await _get(client, f"{base}/a.wav") # 512 KB more: c goes, then b
+
+    stats = audio_cache.stats()
+    assert stats["evictions"] == 2 and stats["stored_bytes"] == 512 * KB and stats["entries"] == 1
+
+    # A restart keeps what's on disk
+    await audio_cache.close()
+    response = await _get(client, f"{base}/a.wav")
+    assert response.headers["x-cache"] == "HIT" and response.content == files["/a.wav"]
+    assert fetched == ["/b.wav", "/c.wav", "/a.wav"]
@@ -0,0 +1,101 @@
+import os
+import re
+import threading
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+
+from api_main import app
+from services import audio_stream
+
+MB = 1024 * 1024
+
+
+def _range_handler(path):
+    class Handler(BaseHTTPRequestHandler):
+        """A static file server that honours single byte ranges, like R2/CDNs."""
+        requests = []
+
+        def do_GET(self):
+            size = os.path.getsize(path)
+            Handler.requests.append(self.headers.get("Range"))
+            start, end, status = 0, size - 1, 200
+            match = re.fullmatch(r"bytes=(\d+)-(\d*)", self.headers.get("Range", ""))
+            if match:
+                start = int(match.group(1))
+                end = min(int(match.group(2) or size - 1), size - 1)
+                status = 206
+            self.send_response(status)
+            self.send_header("Content-Type", "audio/wav")
+            self.send_header("Content-Length", str(end - start + 1))
+            self.send_header("Accept-Ranges", "bytes")
+            if status == 206:
+                self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+            self.end_headers()
+            with open(path, "rb") as f:
+                f.seek(start)
+                remaining = end - start + 1
+                while remaining:
+                    chunk = f.read(min(MB, remaining))
+                    self.wfile.write(chunk)
+                    remaining -= len(chunk)
+
+        def log_message(self, *args):
+            pass
+    return Handler
+
+
+@pytest.fixture
+async def upstream(tmp_path):
+    path = tmp_path / "big.wav"
+    block = os.urandom(MB)
+    with open(path, "wb") as f:
+        for _ in range(64):
+            f.write(block)
+    handler = _range_handler(str(path))
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/big.wav", path.read_bytes, handler
+    server.shutdown()
+    await audio_stream.close()
+
+
+@pytest.mark.anyio
+async def test_seeks_stream_only_the_requested_range(upstream):
+    url, read, handler = upstream
+    data = read()
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        tracemalloc.start()
+        for offset in range(0, 64 * MB, 8 * MB): # The player seeking through the track
+            response = await client.get("/api/proxy/audio", params={"url": url},
+                                        headers={"Range": f"bytes={offset}-{offset + 256 * 1024 - 1}"})
+            assert response.status_code == 206
+            assert response.headers["content-range"] == f"bytes {offset}-{offset + 256 * 1024 - 1}/{64 * MB}"
+            assert response.content == data[offset:offset + 256 * 1024]
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    # The buffered approach held the whole 64 MB file per seek
+    assert peak < 8 * MB
+    assert len(handler.requests) == 8 and all(r.startswith("bytes=") for r in handler.requests)
+
+
+@pytest.mark.anyio
+async def test_local_uploads_answer_ranges(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("uploads")
+    with open("uploads/a.mp3", "wb") as f:
+        f.write(bytes(range(256)) * 4)
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        partial = await client.get("/api/proxy/audio", params={"url": "/api/uploads/a.mp3"}, headers={"Range": "bytes=10-19"})
+        whole = await client.get("/api/proxy/audio", params={"url": "/api/uploads/a.mp3"})
+        unsatisfiable = await client.get("/api/proxy/audio", params={"url": "/api/uploads/a.mp3"}, headers={"Range": "bytes=5000-"})
+
+    assert partial.status_code == 206 and partial.content == bytes(range(10, 20))
+    assert partial.headers["content-range"] == "bytes 10-19/1024"
+    assert whole.status_code == 200 and len(whole.content) == 1024 and whole.headers["accept-ranges"] == "bytes"
+    assert unsatisfiable.status_code == 416
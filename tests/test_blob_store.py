@@ -0,0 +1,152 @@
+import contextlib
+import datetime
+import hashlib
+
+import pytest
+from sqlalchemy import select, update
+
+from models import User, Reviewer, Blob
+from services import blob_service, queue_service, storage_service as storage
+
+
+class MemoryS3:
+    """Just enough of the S3 API, keeping objects in a dict."""
+
+    def __init__(self):
+        self.objects = {}
+        self.uploads = {}
+        self.writes = 0
+
+    async def put_object(self, Key, Body, **kwargs):
+        self.writes += 1
+        self.objects[Key] = Body
+
+    async def create_multipart_upload(self, Key, **kwargs):
+        self.uploads[Key] = {}
+        return {"UploadId": Key}
+
+    async def upload_part(self, UploadId, PartNumber, Body, **kwargs):
+        self.uploads[UploadId][PartNumber] = Body
+        return {"ETag": str(PartNumber)}
+
+    async def complete_multipart_upload(self, Key, UploadId, MultipartUpload, **kwargs):
+        self.writes += 1
+        parts = self.uploads.pop(UploadId)
+        self.objects[Key] = b"".join(parts[p["PartNumber"]] for p in MultipartUpload["Parts"])
+
+    async def abort_multipart_upload(self, UploadId, **kwargs):
+        self.uploads.pop(UploadId, None)
+
+    async def copy_object(self, Key, CopySource, **kwargs):
+        self.objects[Key] = self.objects[CopySource["Key"]]
+
+    async def delete_object(self, Key, **kwargs):
+        self.objects.pop(Key, None)
+
+
+@pytest.fixture
+async def env(session_factory, monkeypatch):
+    s3 = MemoryS3()
+    @contextlib.asynccontextmanager
+    async def client():
+        yield s3
+    monkeypatch.setattr(storage.storage_service, "session", object())
+    monkeypatch.setattr(storage.storage_service, "_client", client)
+    for name in ("R2_ACCOUNT_ID", "R2_ACCESS_KEY_ID", "R2_SECRET_ACCESS_KEY", "R2_BUCKET_NAME"):
+        monkeypatch.setattr(storage.settings, name, "x")
+    yield session_factory, s3
+    await storage.storage_service.close() # Drop the pooled fake client
+
+
+async def _chunks(data: bytes):
+    for start in range(0, len(data), 1024 * 1024):
+        yield data[start:start + 1024 * 1024]
+
+
+async def _submit(db, reviewer_id, user_id, data):
+    stored = await blob_service.store(db, _chunks(data), "audio/wav")
+    await queue_service.create_submission(
+        db, reviewer_id=reviewer_id, user_id=user_id, track_url=stored.uri, track_title="t",
+        archived_url=None, file_hash=stored.sha256
+    )
+    return stored
+
+
+@pytest.mark.anyio
+async def test_same_bytes_from_different_users_are_stored_once(env):
+    factory, s3 = env
+    big = bytes(range(256)) * (6 * 1024 * 1024 // 256) # Multipart
+    async with factory() as db:
+        users = [User(discord_id=str(i), username=f"u{i}") for i in range(3)]
+        db.add_all(users)
+        await db.flush()
+        reviewer = Reviewer(user_id=users[0].id, tiktok_handle="host")
+        db.add(reviewer)
+        await db.commit()
+
+        first = await _submit(db, reviewer.id, users[1].id, big)
+        second = await _submit(db, reviewer.id, users[2].id, big)
+        small = await _submit(db, reviewer.id, users[2].id, b"RIFF small")
+
+        stats = await blob_service.stats(db)
+
+    key = storage.storage_service.content_key(hashlib.sha256(big).hexdigest())
+    assert first.uri == second.uri == f"r2://{key}"
+    assert (first.deduplicated, second.deduplicated, small.deduplicated) == (False, True, False)
+    assert s3.writes == 2 and set(s3.objects) == {key, small.uri[5:]} and not s3.uploads
+    assert s3.objects[key] == big
+    assert stats == {"blobs": 2, "stored_bytes": len(big) + 10, "bytes_saved": len(big), "dedup_hits": 1, "unreferenced": 0}
+
+    async with factory() as db:
+        refs = dict((await db.execute(select(Blob.object_key, Blob.refcount))).all())
+    assert refs == {key: 2, small.uri[5:]: 1}
+
+
+@pytest.mark.anyio
+async def test_collector_removes_unreferenced_blobs_after_grace(env, monkeypatch):
+    factory, s3 = env
+    async with factory() as db:
+        orphan = await blob_service.store(db, _chunks(b"never submitted"), "audio/wav")
+        kept = await blob_service.store(db, _chunks(b"submitted"), "audio/wav")
+        await blob_service.add_reference(db, kept.uri)
+        await db.commit()
+        refs = dict((await db.execute(select(Blob.object_key, Blob.refcount))).all())
+    assert refs == {orphan.uri[5:]: 0, kept.uri[5:]: 1}
+
+    assert await blob_service.collect_garbage() == 0 # Still within the grace period
+
+    monkeypatch.setattr(blob_service.settings, "BLOB_GC_GRACE_SECONDS", -1)
+    assert await blob_service.collect_garbage() == 1
+    assert set(s3.objects) == {kept.uri[5:]}
+
+
+@pytest.mark.anyio
+async def test_stale_orphan_reused_during_collection_is_kept(env, monkeypatch):
+    factory, s3 = env
+    monkeypatch.setattr(blob_service.settings, "BLOB_GC_GRACE_SECONDS", 60)
+    async with factory() as db:
+        orphan = await blob_service.store(db, _chunks(b"uploaded, request failed"), "audio/wav")
+        await db.execute(update(Blob).values(updated_at=datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(hours=1)))
+        await db.commit()
+
+    reused = []
+
+    @contextlib.asynccontextmanager
+    async def collecting():
+        # The same bytes are uploaded again between the collector's scan and its claim
+        async with factory() as db:
+            execute = db.execute
+
+            async def execute_then_reuse(statement, *args, **kwargs):
+                result = await execute(statement, *args, **kwargs)
+                if not reused:
+                    async with factory() as other:
+                        reused.append(await blob_service.store(other, _chunks(b"uploaded, request failed"), "audio/wav"))
+                        await other.commit()
+                return result
+            db.execute = execute_then_reuse
+            yield db
+
+    assert await blob_service.collect_garbage(collecting) == 0
+    assert reused[0].deduplicated and reused[0].uri == orphan.uri
+    assert set(s3.objects) == {orphan.uri[5:]}
@@ -0,0 +1,94 @@
+import contextlib
+import io
+import json
+
+import pytest
+from fastapi import HTTPException, UploadFile
+from sqlalchemy import select
+
+from api import reviewer_api
+from models import User, Reviewer, Submission, OutboxEvent
+from services import storage_service as storage
+
+
+class MemoryS3:
+    def __init__(self):
+        self.objects = {}
+
+    async def put_object(self, Key, Body, **kwargs):
+        self.objects[Key] = Body
+
+
+@pytest.fixture
+async def env(session_factory, monkeypatch):
+    s3 = MemoryS3()
+    @contextlib.asynccontextmanager
+    async def client():
+        yield s3
+    monkeypatch.setattr(storage.storage_service, "session", object())
+    monkeypatch.setattr(storage.storage_service, "_client", client)
+    for name in ("R2_ACCOUNT_ID", "R2_ACCESS_KEY_ID", "R2_SECRET_ACCESS_KEY", "R2_BUCKET_NAME"):
+        monkeypatch.setattr(storage.settings, name, "x")
+
+    async with session_factory() as db:
+        host = User(discord_id="1", username="host")
+        artist = User(discord_id="2", username="artist", tiktok_username="artist_tt")
+        db.add_all([host, artist])
+        await db.flush()
+        reviewer = Reviewer(user_id=host.id, tiktok_handle="host", queue_status="open")
+        db.add(reviewer)
+        await db.commit()
+        ids = reviewer.id, artist.id
+    yield session_factory, s3, ids
+    await storage.storage_service.close()
+
+
+async def _submit(factory, reviewer_id, artist_id, items, files=None):
+    async with factory() as db:
+        artist = await db.get(User, artist_id)
+        return await reviewer_api.submit_smart(
+            reviewer_id, json.dumps({"submissions": items}), files=files, email=None, tiktok_handle=None,
+            force_upload=False, reuse_hash=None, current_user=artist, db=db
+        )
+
+
+@pytest.mark.anyio
+async def test_bundle_is_inserted_once_with_one_set_of_side_effects(env):
+    factory, s3, (reviewer_id, artist_id) = env
+    files = [UploadFile(io.BytesIO(b"RIFF one"), filename="a.wav"), UploadFile(io.BytesIO(b"RIFF two"), filename="b.wav")]
+    items = [
+        {"track_url": "blob:1", "track_title": "A", "sequence_order": 1},
+        {"track_url": "https://soundcloud.com/x/y", "track_title": "B", "sequence_order": 2},
+        {"track_url": "blob:2", "track_title": "C", "sequence_order": 3},
+    ]
+
+    created = await _submit(factory, reviewer_id, artist_id, items, files)
+
+    assert [s.track_title for s in created] == ["A", "B", "C"]
+    assert len({s.batch_id for s in created}) == 1 and created[0].batch_id
+    assert created[0].track_url.startswith("r2://blobs/") and created[1].file_hash is None
+    assert len(s3.objects) == 2
+    async with factory() as db:
+        events = (await db.execute(select(OutboxEvent).order_by(OutboxEvent.id))).scalars().all()
+    assert [e.kind for e in events] == ["xp", "submission_created", "queue_broadcast", "waveform_peaks", "preview_rendition"]
+    assert events[0].payload["amount"] == 30
+    assert events[1].payload["submission_ids"] == [s.id for s in created]
+    uploads = [s.track_url for s in created if s.track_url.startswith("r2://")]
+    assert events[3].payload["track_urls"] == events[4].payload["track_urls"] == uploads
+
+
+@pytest.mark.anyio
+async def test_active_duplicate_link_rejects_the_whole_request(env):
+    factory, s3, (reviewer_id, artist_id) = env
+    await _submit(factory, reviewer_id, artist_id, [{"track_url": "https://soundcloud.com/x/y"}])
+
+    with pytest.raises(HTTPException) as raised:
+        await _submit(factory, reviewer_id, artist_id, [
+            {"track_url": "https://soundcloud.com/new/one"},
+            {"track_url": "https://soundcloud.com/x/y"},
+        ])
+
+    assert raised.value.status_code == 409
+    assert json.loads(raised.value.detail)["type"] == "link"
+    async with factory() as db:
+        assert len((await db.execute(select(Submission))).scalars().all()) == 1
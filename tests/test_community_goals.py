@@ -0,0 +1,134 @@
+import asyncio
+
+import pytest
+from sqlalchemy import select
+
+from models import User, Reviewer, Submission, CommunityGoal, GoalTicket, GiveawayDraw, ReviewerLiveState, TikTokAccount
+from services import giveaway_service, lottery, queue_service
+
+
+async def _seed(factory, likes_target=None):
+    async with factory() as db:
+        host = User(discord_id="1", username="host")
+        artist = User(discord_id="2", username="artist")
+        db.add_all([host, artist])
+        await db.flush()
+        config = {"giveaway_settings": {"LIKES": {"base_target": likes_target}}} if likes_target else {}
+        reviewer = Reviewer(user_id=host.id, tiktok_handle="host", configuration=config)
+        db.add(reviewer)
+        await db.flush()
+        db.add(Submission(reviewer_id=reviewer.id, user_id=artist.id, track_url="t", status="pending", priority_value=0))
+        await db.commit()
+        return reviewer.id
+
+
+async def _goal(factory, reviewer_id, goal_type="LIKES"):
+    async with factory() as db:
+        return (await db.execute(select(CommunityGoal).filter_by(reviewer_id=reviewer_id, goal_type=goal_type))).scalar_one()
+
+
+@pytest.mark.anyio
+async def test_concurrent_increments_are_not_lost(session_factory):
+    reviewer_id = await _seed(session_factory)
+
+    async def like(holder):
+        async with session_factory() as db:
+            await giveaway_service.batch_update_community_goal_progress(db, reviewer_id, "LIKES", 3, {holder: 3})
+
+    await asyncio.gather(*(like(f"viewer{i % 4}") for i in range(20)))
+
+    goal = await _goal(session_factory, reviewer_id)
+    assert goal.current == 60
+    async with session_factory() as db:
+        tickets = dict((await db.execute(select(GoalTicket.holder, GoalTicket.count))).all())
+        assert tickets == {f"viewer{i}": 15 for i in range(4)}
+        # The reviewer's JSON is no longer touched by progress updates
+        assert "community_goals" not in ((await db.get(Reviewer, reviewer_id)).configuration or {})
+
+        states = await giveaway_service.get_giveaway_states(db, reviewer_id)
+    assert [s.type for s in states] == list(giveaway_service.DEFAULT_GOAL_TYPES)
+    assert states[0].progress == 60
+
+
+@pytest.mark.anyio
+async def test_goal_completion_draws_once_and_cools_down(session_factory, monkeypatch):
+    reviewer_id = await _seed(session_factory, likes_target=10)
+    skips = []
+    async def apply_free_skip(db, reviewer_id, user_id):
+        skips.append(user_id)
+        return True
+    monkeypatch.setattr(queue_service, "apply_free_skip", apply_free_skip)
+
+    async with session_factory() as db:
+        await giveaway_service.get_giveaway_states(db, reviewer_id)
+    goal = await _goal(session_factory, reviewer_id)
+
+    # Two writers both saw the goal complete in round 0; only one may draw
+    async with session_factory() as db:
+        await giveaway_service.batch_update_community_goal_progress(db, reviewer_id, "LIKES", 10, {"a": 10})
+    async with session_factory() as db:
+        reviewer = await db.get(Reviewer, reviewer_id)
+        await giveaway_service.trigger_giveaway_lottery(db, reviewer, "LIKES", goal.round)
+
+    assert len(skips) == 1
+    assert [event for event, _ in session_factory.emitted].count("giveaway_winner") == 1
+    goal = await _goal(session_factory, reviewer_id)
+    assert (goal.current, goal.round) == (0, 1) and goal.cooldown_end is not None
+    async with session_factory() as db:
+        assert (await db.execute(select(GoalTicket))).first() is None
+
+        # Cooling down: progress is ignored
+        await giveaway_service.batch_update_community_goal_progress(db, reviewer_id, "LIKES", 5, {"a": 5})
+    assert (await _goal(session_factory, reviewer_id)).current == 0
+
+
+@pytest.mark.anyio
+async def test_votes_upsert_live_state(session_factory):
+    reviewer_id = await _seed(session_factory)
+
+    async with session_factory() as db:
+        for vote in ("fire", "fire", "trash"):
+            await giveaway_service.record_vote(db, reviewer_id, vote)
+        state = await db.get(ReviewerLiveState, reviewer_id)
+        assert (state.fire_votes, state.trash_votes, state.vote_goal_current) == (2, 1, 0)
+
+        state.vote_goal_target = 10
+        await db.commit()
+        await giveaway_service.record_vote(db, reviewer_id, "fire")
+        await db.refresh(state)
+        assert (state.fire_votes, state.vote_goal_current) == (3, 1)
+
+
+@pytest.mark.anyio
+async def test_lottery_draws_a_ticket_holder_from_the_free_queue(session_factory, monkeypatch):
+    reviewer_id = await _seed(session_factory, likes_target=10)
+    async with session_factory() as db:
+        fan = User(discord_id="3", username="fan")
+        db.add(fan)
+        await db.flush()
+        db.add(TikTokAccount(handle_name="fan_tt", user_id=fan.id))
+        db.add(Submission(reviewer_id=reviewer_id, user_id=fan.id, track_url="f", status="pending", priority_value=0))
+        await db.commit()
+        fan_id = fan.id
+
+    skips = []
+    async def apply_free_skip(db, reviewer_id, user_id):
+        skips.append(user_id)
+        return True
+    monkeypatch.setattr(queue_service, "apply_free_skip", apply_free_skip)
+
+    async with session_factory() as db:
+        # "lurker" has most tickets but no submission, so it can't win
+        await giveaway_service.batch_update_community_goal_progress(db, reviewer_id, "LIKES", 10, {"lurker": 9, "fan_tt": 1})
+
+    assert skips == [fan_id]
+    winner = next(data for event, data in session_factory.emitted if event == "giveaway_winner")
+    assert (winner["username"], winner["tickets"]) == ("fan", 1) and winner["seed"]
+
+    # The audit row replays the draw
+    async with session_factory() as db:
+        draw = await db.get(GiveawayDraw, winner["draw_id"])
+    assert (draw.goal_type, draw.round, str(draw.seed)) == ("LIKES", 0, winner["seed"])
+    assert draw.tickets == {"lurker": 9, "fan_tt": 1} and draw.eligible_holders == ["fan_tt"]
+    assert draw.winner_user_id == fan_id
+    assert lottery.draw_winner(draw.tickets, set(draw.eligible_holders).__contains__, draw.seed) == draw.winner_holder == "fan_tt"
@@ -0,0 +1,82 @@
+import pytest
+import httpx
+from fastapi import FastAPI
+
+from models import User, Reviewer, Submission
+from database import get_db
+from api import reviewer_api, queue_line_api
+from services import snapshot_service, state_versions
+
+
+@pytest.fixture
+async def client(session_factory):
+    async with session_factory() as db:
+        owner = User(discord_id="10", username="host")
+        db.add(owner)
+        await db.flush()
+        reviewer = Reviewer(user_id=owner.id, tiktok_handle="etaghost")
+        db.add(reviewer)
+        await db.flush()
+        db.add(Submission(reviewer_id=reviewer.id, user_id=owner.id, track_url="https://youtu.be/x", status="playing"))
+        await db.commit()
+        reviewer_id = reviewer.id
+
+    async def override_get_db():
+        async with session_factory() as session:
+            yield session
+
+    app = FastAPI()
+    app.include_router(reviewer_api.router, prefix="/api")
+    app.include_router(queue_line_api.router, prefix="/api")
+    app.dependency_overrides[get_db] = override_get_db
+
+    snapshot_service.invalidate()
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as c:
+        c.reviewer_id = reviewer_id
+        c.statements = session_factory.statements
+        yield c
+
+    snapshot_service.invalidate()
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("path", ["/api/reviewer/{id}/queue/current", "/api/reviewer/{id}/giveaway/state", "/api/queue/line/{id}"])
+async def test_conditional_get_skips_database(client, path):
+    url = path.format(id=client.reviewer_id)
+    first = await client.get(url)
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+    assert "stale-while-revalidate" in first.headers["cache-control"]
+
+    client.statements.clear()
+    second = await client.get(url, headers={"If-None-Match": etag})
+    assert second.status_code == 304
+    assert second.headers["etag"] == etag
+    assert client.statements == []
+
+    state_versions.bump(client.reviewer_id)
+    third = await client.get(url, headers={"If-None-Match": etag})
+    assert third.status_code == 200
+    assert third.headers["etag"] != etag
+
+
+@pytest.mark.anyio
+async def test_line_view_by_handle_uses_cached_mapping(client):
+    first = await client.get("/api/queue/line/etaghost")
+    assert first.status_code == 200
+
+    client.statements.clear()
+    second = await client.get("/api/queue/line/EtagHost", headers={"If-None-Match": first.headers["etag"]})
+    assert second.status_code == 304
+    assert client.statements == []
+
+
+def test_etag_matching_is_weak_and_handles_lists():
+    tag = state_versions.etag(1, state_versions.QUEUE)
+    assert state_versions.etag_matches(tag, tag)
+    assert state_versions.etag_matches(tag[2:], tag)
+    assert state_versions.etag_matches(f'"other", {tag}', tag)
+    assert state_versions.etag_matches("*", tag)
+    assert not state_versions.etag_matches('"other"', tag)
+    assert not state_versions.etag_matches(None, tag)
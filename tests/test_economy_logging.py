@@ -9,9 +9,10 @@ import asyncio
 # Use an in-memory SQLite database for testing
 DATABASE_URL = "sqlite+aiosqlite:///:memory:"
 
-@pytest.fixture
-def anyio_backend():
-    return 'asyncio'
+@pytest.fixture(autouse=True)
+def log_dir(tmp_path, monkeypatch):
+    # economy_service appends to ./transactions.log; keep it out of the checkout
+    monkeypatch.chdir(tmp_path)
 
 @pytest.fixture
 async def async_db_session():
@@ -0,0 +1,102 @@
+import pytest
+from sqlalchemy import select
+
+from models import User, Reviewer, Submission, CommunityGoal, GoalTicket
+from services import giveaway_service, goal_engine, queue_service
+
+
+@pytest.fixture
+async def session_factory(session_factory, monkeypatch):
+    # Only explicit checkpoints and leading-edge broadcasts during the test
+    monkeypatch.setattr(goal_engine.settings, "GOAL_ENGINE_ENABLED", True)
+    monkeypatch.setattr(goal_engine.settings, "GOAL_BROADCAST_INTERVAL_SECONDS", 3600)
+    goal_engine.start()
+    yield session_factory
+    await goal_engine.stop()
+
+
+async def _seed(factory):
+    async with factory() as db:
+        host = User(discord_id="1", username="host")
+        artist = User(discord_id="2", username="artist")
+        db.add_all([host, artist])
+        await db.flush()
+        reviewer = Reviewer(
+            user_id=host.id, tiktok_handle="host",
+            configuration={"giveaway_settings": {"COMMENTS": {"base_target": 100}}}
+        )
+        db.add(reviewer)
+        await db.flush()
+        db.add(Submission(reviewer_id=reviewer.id, user_id=artist.id, track_url="t", status="pending", priority_value=0))
+        await db.commit()
+        return reviewer.id
+
+
+async def _stored(factory, reviewer_id, goal_type="COMMENTS"):
+    async with factory() as db:
+        return (await db.execute(select(CommunityGoal).filter_by(reviewer_id=reviewer_id, goal_type=goal_type))).scalar_one()
+
+
+@pytest.mark.anyio
+async def test_increments_stay_in_memory_until_checkpoint(session_factory):
+    reviewer_id = await _seed(session_factory)
+
+    for i in range(50):
+        await goal_engine.add(reviewer_id, "COMMENTS", 1, {f"viewer{i % 5}": 1})
+
+    assert (await _stored(session_factory, reviewer_id)).current == 0
+    async with session_factory() as db:
+        states = await giveaway_service.get_giveaway_states(db, reviewer_id)
+    assert next(s for s in states if s.type == "COMMENTS").progress == 50 # Read sees pending counts
+    updates = [data for event, data in session_factory.emitted if event == "giveaway_updated"]
+    assert len(updates) == 1 # Rate limited
+
+    await goal_engine.checkpoint()
+    assert (await _stored(session_factory, reviewer_id)).current == 50
+    async with session_factory() as db:
+        tickets = dict((await db.execute(select(GoalTicket.holder, GoalTicket.count))).all())
+    assert tickets == {f"viewer{i}": 10 for i in range(5)}
+
+
+@pytest.mark.anyio
+async def test_threshold_draws_immediately_and_adopts_other_writers(session_factory, monkeypatch):
+    reviewer_id = await _seed(session_factory)
+    skips = []
+    async def apply_free_skip(db, reviewer_id, user_id):
+        skips.append(user_id)
+        return True
+    monkeypatch.setattr(queue_service, "apply_free_skip", apply_free_skip)
+
+    await goal_engine.add(reviewer_id, "COMMENTS", 30)
+    # Another process writes straight to the table
+    async with session_factory() as db:
+        await giveaway_service.apply_progress(db, reviewer_id, "COMMENTS", 60, {})
+    await goal_engine.checkpoint()
+    assert (await _stored(session_factory, reviewer_id)).current == 90
+
+    await goal_engine.add(reviewer_id, "COMMENTS", 10) # Reaches 100 with no checkpoint tick
+    assert len(skips) == 1
+    goal = await _stored(session_factory, reviewer_id)
+    assert (goal.current, goal.round) == (0, 1) and goal.cooldown_end is not None
+
+    # Cooling down in memory too
+    await goal_engine.add(reviewer_id, "COMMENTS", 500)
+    await goal_engine.checkpoint()
+    assert (await _stored(session_factory, reviewer_id)).current == 0 and len(skips) == 1
+
+
+@pytest.mark.anyio
+async def test_cooldown_keeps_counts_earned_before_it(session_factory):
+    reviewer_id = await _seed(session_factory)
+    async with session_factory() as db:
+        await giveaway_service.load_goals(db, reviewer_id)
+
+    await goal_engine.add(reviewer_id, "COMMENTS", 40, {"viewer": 40})
+    async with session_factory() as db:
+        await giveaway_service.extend_cooldown(db, reviewer_id, minutes=5)
+
+    goal = await _stored(session_factory, reviewer_id)
+    assert goal.current == 40 and goal.cooldown_end is not None
+    async with session_factory() as db:
+        states = await giveaway_service.get_giveaway_states(db, reviewer_id)
+    assert next(s for s in states if s.type == "COMMENTS").progress == 40 # Not counted twice after the reload
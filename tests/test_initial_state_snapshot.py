@@ -0,0 +1,68 @@
+import asyncio
+import pytest
+
+from models import User, Reviewer, Submission
+from services import snapshot_service, state_versions
+
+
+@pytest.fixture
+async def session_factory(session_factory):
+    snapshot_service.invalidate()
+    yield session_factory
+    snapshot_service.invalidate()
+
+
+async def _seed(factory) -> int:
+    async with factory() as db:
+        owner = User(discord_id="1", username="host")
+        artist = User(discord_id="2", username="artist")
+        db.add_all([owner, artist])
+        await db.flush()
+        reviewer = Reviewer(user_id=owner.id, tiktok_handle="host")
+        db.add(reviewer)
+        await db.flush()
+        db.add_all([
+            Submission(reviewer_id=reviewer.id, user_id=artist.id, track_url="a", status="pending", priority_value=0),
+            Submission(reviewer_id=reviewer.id, user_id=artist.id, track_url="b", status="pending", priority_value=10),
+            Submission(reviewer_id=reviewer.id, user_id=artist.id, track_url="c", status="played", bookmarked=True),
+        ])
+        await db.commit()
+        return reviewer.id
+
+
+@pytest.mark.anyio
+async def test_snapshot_is_cached_until_state_changes(session_factory):
+    reviewer_id = await _seed(session_factory)
+
+    state = await snapshot_service.get_initial_state(reviewer_id)
+    assert [s.track_url for s in state.queue] == ["b", "a"]
+    assert [s.track_url for s in state.history] == ["c"]
+    assert [s.track_url for s in state.bookmarks] == ["c"]
+    assert len(state.community_goals) == 4
+
+    session_factory.statements.clear()
+    assert await snapshot_service.get_initial_state(reviewer_id) is state
+    assert session_factory.statements == []
+
+    state_versions.bump(reviewer_id, state_versions.QUEUE)
+    rebuilt = await snapshot_service.get_initial_state(reviewer_id)
+    assert rebuilt is not state
+    assert session_factory.statements
+
+
+@pytest.mark.anyio
+async def test_concurrent_misses_share_one_build(session_factory):
+    reviewer_id = await _seed(session_factory)
+    await snapshot_service.get_initial_state(reviewer_id)  # warm goal initialisation
+
+    state_versions.bump(reviewer_id)
+    session_factory.statements.clear()
+    await snapshot_service.get_initial_state(reviewer_id)
+    single_build = len(session_factory.statements)
+
+    state_versions.bump(reviewer_id)
+    session_factory.statements.clear()
+    results = await asyncio.gather(*(snapshot_service.get_initial_state(reviewer_id) for _ in range(10)))
+
+    assert len(session_factory.statements) == single_build
+    assert all(r is results[0] for r in results)
@@ -0,0 +1,127 @@
+import pytest
+
+from services import live_events
+
+
+@pytest.fixture(autouse=True)
+def clean_channels():
+    live_events._channels.clear()
+    yield
+    live_events._channels.clear()
+
+
+def _submission(sub_id, status="pending"):
+    return {
+        "id": sub_id, "reviewer_id": 1, "track_url": f"https://youtu.be/{sub_id}", "status": status,
+        "submitted_at": "2025-01-01T00:00:00", "user": {"id": 7, "username": "artist", "email": "hidden@example.com"},
+    }
+
+
+@pytest.mark.anyio
+async def test_subscriber_receives_state_and_updates():
+    live_events.publish_queue(1, [_submission(1), _submission(2)])
+    subscription, backlog = await live_events.subscribe(1)
+
+    names = {e.name for e in backlog}
+    assert names == {live_events.QUEUE_LENGTH, live_events.NOW_PLAYING}
+    now_playing = next(e for e in backlog if e.name == live_events.NOW_PLAYING)
+    assert '"id":1' in now_playing.data
+    assert "hidden@example.com" not in now_playing.data
+
+    live_events.publish_current_track(1, _submission(2, status="playing"))
+    events = await subscription.next_batch(timeout=0.1)
+    assert [e.name for e in events] == [live_events.NOW_PLAYING]
+    assert '"id":2' in events[0].data
+
+    assert await subscription.next_batch(timeout=0.01) == []
+    live_events.unsubscribe(1, subscription)
+    assert live_events.subscriber_count(1) == 0
+
+
+@pytest.mark.anyio
+async def test_slow_consumer_coalesces_per_key():
+    live_events.publish(1, live_events.QUEUE_LENGTH, {"length": 0})
+    subscription, _ = await live_events.subscribe(1)
+
+    for length in range(1, 500):
+        live_events.publish(1, live_events.QUEUE_LENGTH, {"length": length})
+    live_events.publish_giveaway(1, {"type": "LIKES", "progress": 5})
+
+    events = await subscription.next_batch(timeout=0.1)
+    assert [e.data for e in events] == ['{"length":499}', '{"type":"LIKES","progress":5}']
+
+
+@pytest.mark.anyio
+async def test_memory_cap_sheds_oldest_keys(monkeypatch):
+    monkeypatch.setattr(live_events.settings, "SSE_MAX_BUFFER_BYTES", 300)
+    live_events.publish(1, live_events.QUEUE_LENGTH, {"length": 0})
+    subscription, _ = await live_events.subscribe(1)
+
+    for goal in range(20):
+        live_events.publish_giveaway(1, {"type": f"GOAL{goal}", "progress": goal})
+
+    assert subscription.pending_bytes <= 300
+    assert subscription.dropped > 0
+    events = await subscription.next_batch(timeout=0.1)
+    assert events[-1].key == f"{live_events.GIVEAWAY_PROGRESS}:GOAL19"
+
+
+@pytest.mark.anyio
+async def test_last_event_id_resume_only_sends_newer_keys():
+    live_events.publish(1, live_events.QUEUE_LENGTH, {"length": 1})
+    live_events.publish_giveaway(1, {"type": "LIKES", "progress": 1})
+    first, backlog = await live_events.subscribe(1)
+    last_seen = backlog[-1].id
+    live_events.unsubscribe(1, first)
+
+    live_events.publish(1, live_events.QUEUE_LENGTH, {"length": 2})
+
+    _, resumed = await live_events.subscribe(1, last_event_id=last_seen)
+    assert [e.data for e in resumed] == ['{"length":2}']
+
+    # Ids from a previous server process trigger a full resync
+    _, resynced = await live_events.subscribe(1, last_event_id="deadbeef:1")
+    assert len(resynced) == 2
+
+
+class _Snapshot:
+    def __init__(self, payload):
+        self.payload = payload
+
+    def model_dump(self, mode=None):
+        return self.payload
+
+
+@pytest.mark.anyio
+async def test_giveaway_updates_before_first_subscriber_do_not_skip_the_seed(monkeypatch):
+    from services import snapshot_service
+    snapshot = {"current_track": None, "queue": [_submission(1), _submission(2)], "community_goals": [{"type": "LIKES", "progress": 1}]}
+
+    async def get_initial_state(reviewer_id):
+        # A like lands while the snapshot is being read
+        live_events.publish_giveaway(reviewer_id, {"type": "LIKES", "progress": 2})
+        return _Snapshot(snapshot)
+    monkeypatch.setattr(snapshot_service, "get_initial_state", get_initial_state)
+
+    live_events.publish_giveaway(1, {"type": "LIKES", "progress": 0})
+    subscription, backlog = await live_events.subscribe(1)
+
+    by_name = {e.name: e.data for e in backlog}
+    assert set(by_name) == {live_events.GIVEAWAY_PROGRESS, live_events.QUEUE_LENGTH, live_events.NOW_PLAYING}
+    assert by_name[live_events.GIVEAWAY_PROGRESS] == '{"type":"LIKES","progress":2}' # Live value kept
+    assert by_name[live_events.QUEUE_LENGTH] == '{"length":2}'
+    assert '"id":1' in by_name[live_events.NOW_PLAYING]
+
+
+@pytest.mark.anyio
+async def test_channels_without_state_are_dropped_on_unsubscribe(monkeypatch):
+    from services import snapshot_service
+
+    async def failing_snapshot(reviewer_id):
+        raise RuntimeError("no such reviewer")
+    monkeypatch.setattr(snapshot_service, "get_initial_state", failing_snapshot)
+
+    subscription, backlog = await live_events.subscribe(42)
+    assert backlog == []
+    live_events.unsubscribe(42, subscription)
+    assert 42 not in live_events._channels
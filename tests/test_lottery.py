@@ -0,0 +1,38 @@
+import random
+from collections import Counter
+
+from services import lottery
+
+
+def test_draws_follow_ticket_weights():
+    sampler = lottery.TicketSampler.from_tickets({"a": 1, "b": 3, "c": 0})
+    rng = random.Random(7)
+    counts = Counter(sampler.draw(rng) for _ in range(4000))
+
+    assert set(counts) == {"a", "b"}
+    assert 0.2 < counts["a"] / 4000 < 0.3
+
+
+def test_ineligible_holders_are_skipped_and_weights_restored():
+    sampler = lottery.TicketSampler()
+    for holder, count in [("a", 5), ("b", 100), ("c", 1)]:
+        sampler.add(holder, count)
+    sampler.add("b", -40)
+    assert (sampler.weight("b"), sampler.total()) == (60, 66)
+
+    rng = random.Random(1)
+    winners = {sampler.draw(rng, lambda h: h != "b") for _ in range(200)}
+    assert winners == {"a", "c"}
+    assert sampler.total() == 66
+    assert sampler.draw(rng, lambda h: False) is None
+
+
+def test_draws_replay_from_seed():
+    tickets = {f"viewer{i}": i % 7 + 1 for i in range(500)}
+    eligible = lambda h: int(h[6:]) % 3 == 0
+    seed = lottery.new_seed()
+
+    winner = lottery.draw_winner(tickets, eligible, seed)
+    assert eligible(winner)
+    # Insertion order doesn't matter, only the tickets and the seed
+    assert lottery.draw_winner(dict(reversed(list(tickets.items()))), eligible, seed) == winner
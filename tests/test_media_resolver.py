@@ -0,0 +1,73 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from services import media_resolver
+
+
+@pytest.fixture
+def extractor():
+    calls = []
+    lock = threading.Lock()
+    results = {}
+
+    def fake(url, options):
+        with lock:
+            calls.append((url, options.get("format")))
+        time.sleep(0.05) # Blocking, like yt-dlp
+        return results[url]
+
+    fake.calls = calls
+    fake.results = results
+    media_resolver.set_extractor(fake)
+    yield fake
+    media_resolver.set_extractor(None)
+
+
+@pytest.mark.anyio
+async def test_concurrent_lookups_share_one_extraction_off_the_loop(extractor):
+    extractor.results["https://soundcloud.com/a/b"] = {"title": "Song", "duration": 180, "formats": ["large"] * 100}
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.005)
+            ticks += 1
+
+    task = asyncio.create_task(ticker())
+    infos = await asyncio.gather(*(media_resolver.metadata("https://soundcloud.com/a/b") for _ in range(5)))
+    task.cancel()
+
+    assert len(extractor.calls) == 1 and ticks >= 3 # The loop kept running during the extraction
+    assert infos[0] == {"title": "Song", "duration": 180} # Only the kept fields are cached
+    assert await media_resolver.metadata("https://SoundCloud.com/a/b#x") == infos[0]
+    # Other profiles are separate lookups
+    await media_resolver.probe("https://soundcloud.com/a/b")
+    assert len(extractor.calls) == 2
+
+
+@pytest.mark.anyio
+async def test_stream_urls_are_cached_until_their_embedded_expiry(extractor, monkeypatch):
+    now = [1_700_000_000.0]
+    monkeypatch.setattr(media_resolver.time, "time", lambda: now[0])
+    monkeypatch.setattr(media_resolver.settings, "RESOLVER_EXPIRY_MARGIN_SECONDS", 60)
+    stream = f"https://rr1.googlevideo.com/videoplayback?expire={int(now[0]) + 600}&sig=x"
+    extractor.results["https://youtu.be/x"] = {"url": stream, "http_headers": {"User-Agent": "yt"}}
+
+    assert await media_resolver.resolve_stream("https://youtu.be/x") == (stream, {"User-Agent": "yt"})
+    now[0] += 500
+    await media_resolver.resolve_stream("https://youtu.be/x")
+    assert len(extractor.calls) == 1
+    now[0] += 60 # Within the margin of its expiry
+    await media_resolver.resolve_stream("https://youtu.be/x")
+    assert len(extractor.calls) == 2 and extractor.calls[0][1] == "bestaudio/best"
+
+
+def test_stream_expiry_formats():
+    assert media_resolver.stream_expiry("https://cdn.discordapp.com/a.mp3?ex=6553f100&is=1&hm=2") == 0x6553f100
+    assert media_resolver.stream_expiry("https://x.r2.cloudflarestorage.com/k?X-Amz-Date=20240101T000000Z&X-Amz-Expires=3600") == 1704070800
+    assert media_resolver.stream_expiry("https://cf-media.sndcdn.com/a.mp3?Policy=p&Expires=1700000000") == 1700000000
+    assert media_resolver.stream_expiry("https://example.com/a.mp3") is None
@@ -0,0 +1,141 @@
+import pytest
+from sqlalchemy import select
+
+import schemas
+from models import User, Reviewer, OutboxEvent, AchievementDefinition, UserAchievement
+from services import outbox_service, outbox_handlers, queue_service, achievement_service  # noqa: F401 (registers handlers)
+from sio_instance import sio
+
+
+@pytest.fixture
+async def session_factory(session_factory, monkeypatch):
+    achievement_service.invalidate()
+
+    emitted = []
+
+    async def record_emit(event, data=None, room=None, **kwargs):
+        emitted.append((event, room))
+    monkeypatch.setattr(sio, "emit", record_emit)
+    session_factory.emitted = emitted
+
+    yield session_factory
+    achievement_service.invalidate()
+
+
+async def _seed(factory):
+    async with factory() as db:
+        owner = User(discord_id="1", username="host")
+        artist = User(discord_id="2", username="artist", xp=0)
+        db.add_all([owner, artist])
+        await db.flush()
+        reviewer = Reviewer(user_id=owner.id, tiktok_handle="host")
+        db.add(reviewer)
+        db.add(AchievementDefinition(id="a1", slug="demo_tape", display_name="Demo Tape", category="SUBMISSION_COUNT", threshold_value=1))
+        await db.commit()
+        return reviewer.id, artist.id
+
+
+async def _events(factory):
+    async with factory() as db:
+        return (await db.execute(select(OutboxEvent).order_by(OutboxEvent.id))).scalars().all()
+
+
+@pytest.mark.anyio
+async def test_create_submission_defers_side_effects_until_drained(session_factory):
+    reviewer_id, artist_id = await _seed(session_factory)
+
+    async with session_factory() as db:
+        await queue_service.create_submission(db, reviewer_id, artist_id, "https://soundcloud.com/a/b", "Song", None)
+
+    events = await _events(session_factory)
+    assert [e.kind for e in events] == ["xp", "submission_created", "queue_broadcast"]
+    assert all(e.status == "pending" for e in events)
+    assert session_factory.emitted == []
+    async with session_factory() as db:
+        assert (await db.get(User, artist_id)).xp == 0
+
+    pool = outbox_service.OutboxWorkerPool(2, session_factory)
+    await pool.drain()
+
+    assert all(e.status == "done" for e in await _events(session_factory))
+    assert pool.processed == 3
+    async with session_factory() as db:
+        assert (await db.get(User, artist_id)).xp == 10
+        unlocked = (await db.execute(select(UserAchievement.achievement_id))).scalars().all()
+        assert unlocked == ["a1"]
+    assert ("queue_updated", f"reviewer_room_{reviewer_id}") in session_factory.emitted
+
+    # Nothing is redelivered once done
+    await pool.drain()
+    async with session_factory() as db:
+        assert (await db.get(User, artist_id)).xp == 10
+
+
+@pytest.mark.anyio
+async def test_review_then_next_leaves_the_next_track_current(session_factory, monkeypatch):
+    reviewer_id, artist_id = await _seed(session_factory)
+    async with session_factory() as db:
+        first = await queue_service.create_submission(db, reviewer_id, artist_id, "https://soundcloud.com/a/1", "One", None)
+        second = await queue_service.create_submission(db, reviewer_id, artist_id, "https://soundcloud.com/a/2", "Two", None)
+        await queue_service.advance_queue(db, reviewer_id)
+
+    current = []
+    async def record_emit(event, data=None, room=None, **kwargs):
+        if event == "current_track_updated":
+            current.append(data and data["id"])
+    monkeypatch.setattr(sio, "emit", record_emit)
+
+    # "Submit & Next": the review, then an immediate advance, before the outbox runs
+    async with session_factory() as db:
+        await queue_service.review_submission(db, first.id, schemas.ReviewCreate(score=8))
+        await queue_service.advance_queue(db, reviewer_id)
+    await outbox_service.OutboxWorkerPool(2, session_factory).drain()
+
+    assert current == [first.id, second.id]
+
+
+@pytest.mark.anyio
+async def test_events_follow_the_transaction(session_factory):
+    _, artist_id = await _seed(session_factory)
+
+    async with session_factory() as db:
+        await outbox_service.enqueue(db, "xp", {"user_id": artist_id, "amount": 5}, key="once")
+        await db.rollback()
+    assert await _events(session_factory) == []
+
+    for _ in range(2):
+        async with session_factory() as db:
+            await outbox_service.enqueue(db, "xp", {"user_id": artist_id, "amount": 5}, key="once")
+            await db.commit()
+    assert len(await _events(session_factory)) == 1
+
+
+@pytest.mark.anyio
+async def test_failures_retry_then_park_as_dead(session_factory, monkeypatch):
+    monkeypatch.setattr(outbox_service, "MAX_BACKOFF_SECONDS", 0)
+    monkeypatch.setattr(outbox_service.settings, "OUTBOX_MAX_ATTEMPTS", 3)
+    calls = []
+
+    @outbox_service.handler("test_flaky")
+    async def flaky(db, payload):
+        calls.append(payload["n"])
+        if calls.count(payload["n"]) < payload["fail_times"]:
+            raise RuntimeError("boom")
+
+    async with session_factory() as db:
+        await outbox_service.enqueue(db, "test_flaky", {"n": 1, "fail_times": 2})
+        await outbox_service.enqueue(db, "test_flaky", {"n": 2, "fail_times": 99}, partition="p")
+        await db.commit()
+
+    pool = outbox_service.OutboxWorkerPool(1, session_factory)
+    for _ in range(4):
+        await pool.drain()
+
+    first, second = await _events(session_factory)
+    assert first.status == "done" and first.attempts == 2
+    assert second.status == "dead" and second.attempts == 3 and "boom" in second.last_error
+    assert pool.counters()["dead"] == 1
+
+    async with session_factory() as db:
+        stats = await outbox_service.stats(db)
+    assert stats["backlog"] == {"done": 1, "dead": 1}
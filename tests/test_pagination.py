@@ -0,0 +1,112 @@
+import datetime
+
+import httpx
+import pytest
+from fastapi import FastAPI, HTTPException
+
+import security
+from api import user_api
+from database import get_db
+from models import User, Reviewer, Submission, Transaction
+from services import pagination, queue_service, snapshot_service
+
+
+@pytest.fixture
+async def session_factory(session_factory):
+    snapshot_service.invalidate()
+    yield session_factory
+    snapshot_service.invalidate()
+
+
+async def _seed(factory):
+    base = datetime.datetime(2025, 1, 1, tzinfo=datetime.timezone.utc)
+    async with factory() as db:
+        owner = User(discord_id="1", username="host")
+        artist = User(discord_id="2", username="artist")
+        db.add_all([owner, artist])
+        await db.flush()
+        reviewer = Reviewer(user_id=owner.id, tiktok_handle="host")
+        db.add(reviewer)
+        await db.flush()
+        for i in range(7):
+            # Two rows per timestamp so the id tie-breaker matters
+            db.add(Submission(
+                reviewer_id=reviewer.id, user_id=artist.id, track_url=f"t{i}", status="played",
+                submitted_at=base + datetime.timedelta(minutes=i // 2)
+            ))
+        for i in range(5):
+            db.add(Transaction(reviewer_id=reviewer.id, user_id=artist.id, amount=i + 1, reason=f"r{i}", timestamp=base))
+        await db.commit()
+        return reviewer.id, artist.id
+
+
+@pytest.mark.anyio
+async def test_played_pages_walk_history_in_legacy_order(session_factory):
+    reviewer_id, _ = await _seed(session_factory)
+
+    async with session_factory() as db:
+        legacy = [s.track_url for s in await queue_service.get_played_queue(db, reviewer_id)]
+        seen, sizes, cursor = [], [], None
+        while True:
+            page = await queue_service.get_played_page(db, reviewer_id, limit=3, cursor=cursor)
+            seen += [s.track_url for s in page.items]
+            sizes.append(len(page.items))
+            cursor = page.next_cursor
+            if not cursor:
+                break
+
+        with pytest.raises(HTTPException) as error:
+            await queue_service.get_played_page(db, reviewer_id, cursor="not-a-cursor")
+        assert error.value.status_code == 400
+
+    assert sizes == [3, 3, 1]
+    assert sorted(seen) == sorted(legacy) and len(set(seen)) == 7
+    assert seen == ["t6", "t5", "t4", "t3", "t2", "t1", "t0"]
+
+
+@pytest.mark.anyio
+async def test_snapshot_holds_first_history_page(session_factory, monkeypatch):
+    reviewer_id, _ = await _seed(session_factory)
+    monkeypatch.setattr(snapshot_service.settings, "INITIAL_STATE_PAGE_SIZE", 4)
+
+    state = await snapshot_service.get_initial_state(reviewer_id)
+    assert [s.track_url for s in state.history] == ["t6", "t5", "t4", "t3"]
+    assert state.history_cursor and state.bookmarks_cursor is None
+
+    async with session_factory() as db:
+        rest = await queue_service.get_played_page(db, reviewer_id, cursor=state.history_cursor)
+    assert [s.track_url for s in rest.items] == ["t2", "t1", "t0"] and rest.next_cursor is None
+
+
+@pytest.mark.anyio
+async def test_transactions_endpoint_uses_cursor_header(session_factory):
+    _, artist_id = await _seed(session_factory)
+
+    async def override_get_db():
+        async with session_factory() as session:
+            yield session
+
+    async def current_user():
+        async with session_factory() as session:
+            return await session.get(User, artist_id)
+
+    app = FastAPI()
+    app.include_router(user_api.router, prefix="/api")
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[security.get_current_active_user] = current_user
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        amounts, params = [], {"limit": 2}
+        while True:
+            response = await client.get("/api/user/me/transactions", params=params)
+            assert response.status_code == 200
+            amounts += [t["amount"] for t in response.json()]
+            cursor = response.headers.get(pagination.NEXT_CURSOR_HEADER)
+            if not cursor:
+                break
+            params = {"limit": 2, "cursor": cursor}
+
+        legacy = (await client.get("/api/user/me/transactions", params={"legacy": True})).json()
+
+    assert amounts == [5, 4, 3, 2, 1]
+    assert sorted(t["amount"] for t in legacy) == [1, 2, 3, 4, 5]
@@ -0,0 +1,94 @@
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+
+from api_main import app
+from services import audio_cache, audio_stream, prefetcher
+
+KB = 1024
+
+
+@pytest.fixture
+async def upstream(tmp_path, monkeypatch):
+    monkeypatch.setattr(audio_cache.settings, "AUDIO_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(prefetcher.settings, "PREFETCH_DELAY_SECONDS", 0)
+    monkeypatch.setattr(prefetcher.settings, "PREFETCH_TOP_K", 3)
+    monkeypatch.setattr(prefetcher.settings, "PREFETCH_MAX_BYTES", 500 * KB)
+    files = {f"/{name}.wav": os.urandom(300 * KB) for name in "abcd"}
+    fetched = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            fetched.append(self.path)
+            data = files[self.path]
+            self.send_response(200)
+            self.send_header("Content-Type", "audio/wav")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        yield client, base, files, fetched
+    server.shutdown()
+    await prefetcher.stop()
+    await audio_cache.close()
+    await audio_stream.close()
+    for counters in (audio_cache._counters, prefetcher._counters):
+        for name in counters:
+            counters[name] = 0
+    for samples in prefetcher._ttfb.values():
+        samples.clear()
+
+
+def _queue(base, *names, playing=None):
+    queue = [{"id": 99, "status": "playing", "track_url": f"{base}/{playing}.wav"}] if playing else []
+    return queue + [{"id": i, "status": "pending", "track_url": f"{base}/{name}.wav"} for i, name in enumerate(names)]
+
+
+@pytest.mark.anyio
+async def test_prefetches_upcoming_tracks_within_the_byte_budget(upstream):
+    client, base, files, fetched = upstream
+
+    prefetcher.schedule(1, _queue(base, "a", "b", "c", "d", playing="d"))
+    await prefetcher._tasks[1]
+
+    # Top 3 pending, nearest first; the 500 KB budget is spent after two tracks
+    assert fetched == ["/a.wav", "/b.wav"]
+    stats = prefetcher.stats()
+    assert stats["tracks_warmed"] == 2 and stats["bytes_warmed"] == 600 * KB and stats["over_budget"] == 1
+
+    # The same upcoming tracks again: nothing to do
+    prefetcher.schedule(1, _queue(base, "a", "b", "c"))
+    assert prefetcher._tasks[1].done()
+
+    # "next" starts a prefetched track: its first byte comes from the cache and is timed
+    prefetcher.mark_next(f"{base}/a.wav")
+    response = await client.get("/api/proxy/audio", params={"url": f"{base}/a.wav"})
+    assert response.headers["x-cache"] == "HIT" and response.content == files["/a.wav"]
+    assert fetched == ["/a.wav", "/b.wav"]
+    ttfb = prefetcher.stats()["next_ttfb"]
+    assert ttfb["cached"]["count"] == 1 and ttfb["uncached"]["count"] == 0
+
+
+@pytest.mark.anyio
+async def test_queue_change_cancels_the_pending_pass(upstream, monkeypatch):
+    client, base, files, fetched = upstream
+    monkeypatch.setattr(prefetcher.settings, "PREFETCH_DELAY_SECONDS", 60)
+
+    prefetcher.schedule(1, _queue(base, "a", "b"))
+    first = prefetcher._tasks[1]
+    prefetcher.schedule(1, _queue(base, "c"))
+    second = prefetcher._tasks[1]
+
+    await prefetcher.stop()
+    assert first.cancelled() and second.cancelled()
+    assert prefetcher.stats()["cancelled"] == 1 and fetched == []
@@ -0,0 +1,78 @@
+import contextlib
+
+import pytest
+
+from services import storage_service as storage
+
+
+class SigningS3:
+    """Counts clients opened and URLs signed."""
+
+    def __init__(self):
+        self.signed = []
+
+    async def generate_presigned_url(self, operation, Params, ExpiresIn):
+        self.signed.append(Params["Key"])
+        return f"https://r2.test/{Params['Bucket']}/{Params['Key']}?n={len(self.signed)}"
+
+
+@pytest.fixture
+async def service(monkeypatch):
+    for name in ("R2_ACCOUNT_ID", "R2_ACCESS_KEY_ID", "R2_SECRET_ACCESS_KEY", "R2_BUCKET_NAME"):
+        monkeypatch.setattr(storage.settings, name, "x")
+    s3 = SigningS3()
+    opened = []
+    @contextlib.asynccontextmanager
+    async def client():
+        opened.append(s3)
+        yield s3
+
+    svc = storage.StorageService()
+    svc.session = object()
+    svc._client = client
+    svc.opened = opened
+    yield svc, s3
+    await svc.close()
+
+
+@pytest.mark.anyio
+async def test_presigned_urls_are_cached_and_refreshed_before_expiry(service, monkeypatch):
+    svc, s3 = service
+    clock = [1000.0]
+    monkeypatch.setattr(storage.time, "monotonic", lambda: clock[0])
+    monkeypatch.setattr(storage.settings, "R2_PRESIGN_REFRESH_SECONDS", 600)
+
+    first = await svc.generate_presigned_url("r2://avatars/a.png")
+    assert await svc.generate_presigned_url("avatars/a.png") == first
+    clock[0] += 2900 # 700s left: still handed out
+    assert await svc.generate_presigned_url("r2://avatars/a.png") == first
+    clock[0] += 200 # Within the refresh window: signed again
+    assert await svc.generate_presigned_url("r2://avatars/a.png") != first
+
+    assert s3.signed == ["avatars/a.png", "avatars/a.png"]
+    assert len(svc.opened) == 1 # One pooled client for every call
+
+
+@pytest.mark.anyio
+async def test_cache_evicts_least_recently_used(service, monkeypatch):
+    svc, s3 = service
+    monkeypatch.setattr(storage.settings, "R2_PRESIGN_CACHE_SIZE", 2)
+
+    for key in ("a", "b", "a", "c"): # "b" is the least recently used when "c" arrives
+        await svc.generate_presigned_url(key)
+    await svc.generate_presigned_url("a")
+    await svc.generate_presigned_url("b")
+
+    assert s3.signed == ["a", "b", "c", "b"]
+
+
+@pytest.mark.anyio
+async def test_presign_many_signs_each_key_once(service):
+    svc, s3 = service
+    await svc.generate_presigned_url("r2://cached")
+
+    urls = await svc.presign_many(["r2://cached", "r2://x", "x", "r2://x", "r2://y"])
+
+    assert set(urls) == {"r2://cached", "r2://x", "x", "r2://y"}
+    assert urls["r2://x"] == urls["x"] and all(urls.values())
+    assert sorted(s3.signed) == ["cached", "x", "y"]
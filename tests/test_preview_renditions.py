@@ -0,0 +1,82 @@
+import os
+import struct
+import wave
+
+import httpx
+import pytest
+
+from api_main import app
+from services import ffmpeg_runner, rendition_service
+
+KB = 1024
+
+
+def _reset():
+    rendition_service._known.clear()
+    for name in rendition_service._counters:
+        rendition_service._counters[name] = 0
+
+
+@pytest.fixture
+async def uploads(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "uploads").mkdir()
+    _reset() # Other proxy tests count original uploads too
+    yield tmp_path / "uploads"
+    _reset()
+
+
+@pytest.mark.anyio
+async def test_proxy_serves_the_rendition_unless_the_original_is_asked_for(uploads):
+    original, preview = os.urandom(400 * KB), os.urandom(100 * KB)
+    (uploads / "song.wav").write_bytes(original)
+    (uploads / "song.wav.preview.m4a").write_bytes(preview)
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        def get(**params):
+            headers = params.pop("headers", {})
+            return client.get("/api/proxy/audio", params={"url": "/api/uploads/song.wav", **params}, headers=headers)
+
+        default = await get()
+        assert default.content == preview and default.headers["content-type"] == "audio/mp4"
+        assert default.headers["vary"] == "Accept"
+
+        seek = await get(headers={"Range": "bytes=0-9999"})
+        assert seek.status_code == 206 and seek.content == preview[:10000]
+
+        assert (await get(quality="original")).content == original
+        assert (await get(headers={"Accept": "audio/wav"})).content == original # Can't play the rendition
+
+    stats = rendition_service.stats()
+    assert (stats["preview_responses"], stats["original_responses"]) == (2, 2)
+    assert stats["preview_bytes_served"] == 100 * KB + 10000
+    assert stats["original_bytes_served"] == 800 * KB
+    # The same share of a 4x larger original
+    assert stats["bytes_saved"] == 300 * KB + 30000
+
+
+@pytest.mark.anyio
+async def test_large_upload_is_transcoded_once(uploads, monkeypatch):
+    if not ffmpeg_runner.available():
+        pytest.skip("ffmpeg not installed")
+    monkeypatch.setattr(rendition_service.settings, "PREVIEW_MIN_BYTES", 100 * KB)
+    with wave.open(str(uploads / "take.wav"), "wb") as f:
+        f.setnchannels(2)
+        f.setsampwidth(2)
+        f.setframerate(44100)
+        f.writeframes(b"".join(struct.pack("<hh", (i * 37) % 20000, -(i * 37) % 20000) for i in range(3 * 44100)))
+    with wave.open(str(uploads / "short.wav"), "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(8000)
+        f.writeframes(b"\0\0" * 8000)
+
+    assert await rendition_service.generate("/api/uploads/take.wav")
+    assert not await rendition_service.generate("/api/uploads/take.wav") # Already there
+    assert not await rendition_service.generate("/api/uploads/short.wav") # Below PREVIEW_MIN_BYTES
+
+    rendition = await rendition_service.lookup("/api/uploads/take.wav")
+    original_size = os.path.getsize(uploads / "take.wav")
+    assert rendition.url == "/api/uploads/take.wav.preview.m4a" and rendition.original_size == original_size
+    assert rendition.size == os.path.getsize(uploads / "take.wav.preview.m4a") <= original_size * 0.5
+    assert sorted(os.listdir(uploads)) == ["short.wav", "take.wav", "take.wav.preview.m4a"]
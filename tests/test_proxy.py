@@ -97,8 +97,8 @@ async def test_proxy_audio_success():
     bot_instance.bot_ready = asyncio.Event()
     bot_instance.bot_ready.set()
     
-    # Mock httpx to return audio data
-    with patch("httpx.AsyncClient.get") as mock_get, \
+    # Mock httpx to return audio data (streamed: the proxy reads aiter_raw)
+    with patch("httpx.AsyncClient.send") as mock_send, \
          patch("yt_dlp.YoutubeDL") as mock_ytdl:
         
         # Mock yt_dlp context manager
@@ -106,11 +106,15 @@ async def test_proxy_audio_success():
         mock_ytdl.return_value.__enter__.return_value = mock_ydl_instance
         mock_ydl_instance.extract_info.return_value = {"url": "http://example.com/audio.mp3"}
 
+        async def aiter_raw(chunk_size=None):
+            yield b"audio data"
+
         mock_response = MagicMock()
         mock_response.status_code = 200
-        mock_response.content = b"audio data"
-        mock_response.headers = {"Content-Type": "audio/mpeg"}
-        mock_get.return_value = mock_response
+        mock_response.aiter_raw = aiter_raw
+        mock_response.aclose = AsyncMock()
+        mock_response.headers = {"content-type": "audio/mpeg"}
+        mock_send.return_value = mock_response
         
         response = client.get("/api/proxy/audio?url=https://discord.com/channels/123/456/789")
         assert response.status_code == 200
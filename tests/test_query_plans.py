@@ -0,0 +1,142 @@
+"""
+Plan regression tests for the hot queries.
+
+Each query is run through the real service code while the SQL it sends is
+recorded, then every recorded statement is re-run under EXPLAIN. A full
+scan of a hot table fails the test; scanning a partial index is fine since
+it only holds the rows being listed.
+
+SQLite runs everywhere. Set TEST_POSTGRES_URL (an empty, disposable
+postgresql+asyncpg database) to also check Postgres plans on seeded data.
+"""
+import datetime
+import os
+import re
+
+import pytest
+from fastapi import Response
+from sqlalchemy import event, select, text
+
+import models
+from models import Base, User, Reviewer, Transaction
+from api import admin_api, spotlight_api
+from services import economy_service, pagination, queue_service, user_service
+
+HOT_TABLES = ("submissions", "transactions", "tiktok_interactions")
+PARTIAL_INDEXES = {
+    index.name
+    for table in Base.metadata.tables.values()
+    for index in table.indexes
+    if index.dialect_options["sqlite"].get("where") is not None
+}
+
+BACKENDS = ["sqlite"] + (["postgresql"] if os.getenv("TEST_POSTGRES_URL") else [])
+
+
+pytestmark = pytest.mark.parametrize("session_factory", BACKENDS, indirect=True)
+
+
+@pytest.fixture
+async def session_factory(session_factory):
+    # Postgres gets enough rows that the planner prefers indexes over seq scans
+    session_factory.ids = await _seed(session_factory, 200 if session_factory.dialect == "sqlite" else 20000)
+    engine = session_factory.engine
+    async with engine.begin() as conn:
+        await conn.execute(text("ANALYZE"))
+
+    recorded = []
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            recorded.append((statement, parameters))
+    event.listen(engine.sync_engine, "before_cursor_execute", record)
+    session_factory.recorded = recorded
+    return session_factory
+
+
+async def _seed(factory, rows: int):
+    base = datetime.datetime(2025, 1, 1, tzinfo=datetime.timezone.utc)
+    statuses = ["archived", "archived", "rejected", "reviewed", "played", "pending"]
+    async with factory() as db:
+        users = [User(discord_id=str(i), username=f"u{i}") for i in range(20)]
+        db.add_all(users)
+        await db.flush()
+        reviewers = [Reviewer(user_id=users[i].id, tiktok_handle=f"host{i}") for i in range(5)]
+        db.add_all(reviewers)
+        await db.flush()
+        await db.execute(models.Submission.__table__.insert(), [
+            {
+                "reviewer_id": reviewers[i % 5].id, "user_id": users[i % 20].id, "track_url": f"https://t/{i}",
+                "file_hash": f"h{i}", "status": statuses[i % len(statuses)], "priority_value": i % 3,
+                "bookmarked": i % 97 == 0, "spotlighted": i % 89 == 0, "sequence_order": 1,
+                "submitted_at": base + datetime.timedelta(minutes=i)
+            }
+            for i in range(rows)
+        ])
+        await db.execute(models.Transaction.__table__.insert(), [
+            {
+                "reviewer_id": reviewers[i % 5].id, "user_id": users[i % 20].id, "amount": 1, "reason": "r",
+                "timestamp": base + datetime.timedelta(minutes=i)
+            }
+            for i in range(rows)
+        ])
+        await db.execute(models.TikTokInteraction.__table__.insert(), [
+            {
+                "host_handle": f"host{i % 5}", "interaction_type": ("VIEWER_COUNT_UPDATE", "GIFT", "LIKE")[i % 3],
+                "value": str(i % 500), "coin_value": 0, "user_level": 0,
+                "timestamp": base + datetime.timedelta(seconds=i)
+            }
+            for i in range(rows)
+        ])
+        await db.commit()
+        return reviewers[0].id, users[0].id
+
+
+async def _plan(db, dialect: str, statement: str, parameters) -> str:
+    conn = await db.connection()
+    raw = await conn.get_raw_connection()
+    driver = raw.driver_connection
+    if dialect == "sqlite":
+        cursor = await driver.execute(f"EXPLAIN QUERY PLAN {statement}", parameters)
+        return "\n".join(row[-1] for row in await cursor.fetchall())
+    rows = await driver.fetch(f"EXPLAIN {statement}", *parameters)
+    return "\n".join(row[0] for row in rows)
+
+
+def _full_scans(dialect: str, plan: str) -> list:
+    if dialect == "sqlite":
+        scans = re.findall(r"^SCAN (\w+)(?: USING (?:COVERING )?INDEX (\w+))?", plan, re.MULTILINE)
+        return [table for table, index in scans if table in HOT_TABLES and index not in PARTIAL_INDEXES]
+    return [table for table in re.findall(r"Seq Scan on (\w+)", plan) if table in HOT_TABLES]
+
+
+HOT_QUERIES = {
+    "pending_queue": lambda db, r, u: queue_service.get_pending_queue(db, r),
+    "played_page": lambda db, r, u: queue_service.get_played_page(db, r),
+    "bookmarks": lambda db, r, u: queue_service.get_bookmarked_page(db, r),
+    "spotlight_reviewer": lambda db, r, u: queue_service.get_spotlighted_submissions(db, r),
+    "spotlight_all": lambda db, r, u: spotlight_api.get_spotlight(Response(), pagination.DEFAULT_LIMIT, None, False, db),
+    "user_submissions": lambda db, r, u: queue_service.get_submissions_by_user_page(db, u),
+    # submit_smart's duplicate check, for a link and for an upload
+    "duplicate_link": lambda db, r, u: queue_service.get_duplicate_candidates(db, u, r, {"https://t/0"}, uploads=False),
+    "duplicate_upload": lambda db, r, u: queue_service.get_duplicate_candidates(db, u, r, set(), uploads=True),
+    "transactions": lambda db, r, u: pagination.paginate(
+        db, select(Transaction).filter(Transaction.user_id == u), economy_service.TRANSACTION_KEYS
+    ),
+    "viewer_stats_accounts": lambda db, r, u: admin_api.get_tiktok_accounts(db),
+    "viewer_stats_reviewers": lambda db, r, u: admin_api.get_all_users_admin(db),
+    "latest_interaction": lambda db, r, u: user_service.get_latest_tiktok_interaction(db, 1),
+}
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("name", HOT_QUERIES)
+async def test_hot_query_has_no_full_scan(session_factory, name):
+    reviewer_id, user_id = session_factory.ids
+    async with session_factory() as db:
+        await HOT_QUERIES[name](db, reviewer_id, user_id)
+        recorded = list(session_factory.recorded)
+        assert recorded
+
+        for statement, parameters in recorded:
+            plan = await _plan(db, session_factory.dialect, statement, parameters)
+            assert not _full_scans(session_factory.dialect, plan), f"{name}: full scan in\n{plan}\nfor\n{statement}"
@@ -0,0 +1,67 @@
+import datetime
+import random
+from types import SimpleNamespace
+
+from services import queue_index
+from services.queue_service import apply_zipper_merge
+from services.fenwick import FenwickTree
+
+
+def _expected_positions(subs):
+    ordered = sorted(subs.values(), key=lambda s: (-s.priority_value, s.submitted_at, s.id))
+    return {s.id: pos for pos, s in enumerate(apply_zipper_merge(ordered), start=1)}
+
+
+def test_fenwick_prefix_sums_and_find():
+    values = [3, 0, 5, 1, 0, 2]
+    tree = FenwickTree.from_values(values)
+    assert [tree.prefix_sum(i) for i in range(len(values) + 1)] == [0, 3, 3, 8, 9, 9, 11]
+    # Unit k belongs to the first position whose inclusive prefix exceeds k
+    assert [tree.find(k) for k in range(tree.total())] == [0, 0, 0, 2, 2, 2, 2, 2, 3, 5, 5]
+    tree.grow(40)
+    tree.add(39, 4)
+    assert tree.total() == 15
+    assert tree.find(14) == 39
+
+
+def test_positions_match_zipper_merge_under_random_mutations():
+    rng = random.Random(1234)
+    base = datetime.datetime(2025, 1, 1, tzinfo=datetime.timezone.utc)
+    index = queue_index.ReviewerQueueIndex()
+    subs = {}
+
+    for step in range(600):
+        action = rng.random()
+        if action < 0.55 or not subs:
+            sub = SimpleNamespace(
+                id=step + 1,
+                user_id=rng.randint(1, 15),
+                priority_value=rng.choice([0, 0, 0, 3, 10, 25, 50]),
+                submitted_at=base + datetime.timedelta(seconds=step),
+            )
+            subs[sub.id] = sub
+            assert index.insert(sub.id, sub.priority_value, sub.user_id, sub.submitted_at)
+        elif action < 0.8:
+            sub_id = rng.choice(list(subs))
+            del subs[sub_id]
+            index.remove(sub_id)
+        else:
+            sub = subs[rng.choice(list(subs))]
+            sub.priority_value = rng.choice([0, 3, 10, 25, 50])
+            index.change_priority(sub.id, sub.priority_value)
+
+        if step % 25 == 0:
+            expected = _expected_positions(subs)
+            assert {sub_id: index.position(sub_id) for sub_id in subs} == expected
+            user_id = rng.randint(1, 15)
+            mine = sorted((sid, pos) for sid, pos in expected.items() if subs[sid].user_id == user_id)
+            assert sorted(index.user_positions(user_id)) == mine
+
+    assert len(index) == len(subs)
+
+
+def test_out_of_order_insert_is_rejected():
+    index = queue_index.ReviewerQueueIndex()
+    now = datetime.datetime(2025, 1, 1, tzinfo=datetime.timezone.utc)
+    assert index.insert(2, 0, 1, now)
+    assert not index.insert(1, 0, 1, now - datetime.timedelta(minutes=1))
@@ -0,0 +1,97 @@
+import asyncio
+import datetime
+
+import pytest
+from sqlalchemy import select, func
+
+from models import User, Reviewer, Submission
+from services import queue_service
+
+# The Postgres cases run when TEST_POSTGRES_URL is set
+pytestmark = pytest.mark.parametrize("session_factory", ["sqlite", "postgresql"], indirect=True)
+
+
+async def _seed(factory, count: int) -> int:
+    base = datetime.datetime(2025, 1, 1, tzinfo=datetime.timezone.utc)
+    async with factory() as db:
+        user = User(discord_id="1", username="host")
+        db.add(user)
+        await db.flush()
+        reviewer = Reviewer(user_id=user.id, tiktok_handle="host")
+        db.add(reviewer)
+        await db.flush()
+        for i in range(count):
+            db.add(Submission(
+                reviewer_id=reviewer.id, user_id=user.id, track_url=f"t{i}", status="pending",
+                priority_value=0, submitted_at=base + datetime.timedelta(minutes=i)
+            ))
+        await db.commit()
+        return reviewer.id
+
+
+async def _status_counts(factory, reviewer_id):
+    async with factory() as db:
+        rows = await db.execute(
+            select(Submission.status, func.count()).filter(Submission.reviewer_id == reviewer_id).group_by(Submission.status)
+        )
+        counts = dict(rows.all())
+        reviewer = await db.get(Reviewer, reviewer_id)
+        playing = (await db.execute(
+            select(Submission.id).filter(Submission.reviewer_id == reviewer_id, Submission.status == 'playing')
+        )).scalars().all()
+        return counts, reviewer.active_track_id, playing
+
+
+async def _advance(factory, reviewer_id):
+    async with factory() as db:
+        return await queue_service.advance_queue(db, reviewer_id)
+
+
+@pytest.mark.anyio
+async def test_advance_moves_top_to_playing_and_previous_to_played(session_factory):
+    reviewer_id = await _seed(session_factory, 3)
+
+    first = await _advance(session_factory, reviewer_id)
+    assert first.track_url == "t0" and first.status == "playing"
+    second = await _advance(session_factory, reviewer_id)
+    assert second.track_url == "t1"
+
+    counts, active_id, playing = await _status_counts(session_factory, reviewer_id)
+    assert counts == {"played": 1, "playing": 1, "pending": 1}
+    assert playing == [second.id] and active_id == second.id
+
+    async with session_factory() as db:
+        current = await queue_service.get_current_track(db, reviewer_id)
+        assert current.id == second.id
+
+
+@pytest.mark.anyio
+async def test_concurrent_next_clicks_never_double_play(session_factory):
+    reviewer_id = await _seed(session_factory, 10)
+
+    results = await asyncio.gather(*(_advance(session_factory, reviewer_id) for _ in range(6)))
+
+    counts, active_id, playing = await _status_counts(session_factory, reviewer_id)
+    assert len(playing) == 1
+    assert active_id == playing[0]
+    assert counts == {"played": 5, "playing": 1, "pending": 4}
+    # Every click advanced to a distinct track
+    assert len({r.id for r in results}) == 6
+
+
+@pytest.mark.anyio
+async def test_set_track_playing_returns_previous_to_queue(session_factory):
+    reviewer_id = await _seed(session_factory, 3)
+    first = await _advance(session_factory, reviewer_id)
+
+    async with session_factory() as db:
+        target_id = (await db.execute(select(Submission.id).filter(Submission.track_url == "t2"))).scalar_one()
+        chosen = await queue_service.set_track_playing(db, reviewer_id, target_id)
+        assert chosen.id == target_id
+        assert await queue_service.set_track_playing(db, reviewer_id, 999999) is None
+
+    counts, active_id, playing = await _status_counts(session_factory, reviewer_id)
+    assert playing == [target_id] and active_id == target_id
+    assert counts == {"playing": 1, "pending": 2}
+    async with session_factory() as db:
+        assert (await db.get(Submission, first.id)).status == "pending"
@@ -0,0 +1,103 @@
+import asyncio
+import hashlib
+import io
+
+import pytest
+
+from services import storage_service
+
+
+class FakeS3:
+    """Records what the S3 client is asked to do."""
+
+    def __init__(self, fail_part=None):
+        self.parts = {}
+        self.put = None
+        self.completed = None
+        self.aborted = False
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.fail_part = fail_part
+
+    async def create_multipart_upload(self, **kwargs):
+        return {"UploadId": "u1"}
+
+    async def upload_part(self, PartNumber, Body, **kwargs):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(0.01)
+            if PartNumber == self.fail_part:
+                raise RuntimeError("part failed")
+            self.parts[PartNumber] = Body
+            return {"ETag": f"e{PartNumber}"}
+        finally:
+            self.in_flight -= 1
+
+    async def complete_multipart_upload(self, MultipartUpload, **kwargs):
+        self.completed = [p["PartNumber"] for p in MultipartUpload["Parts"]]
+
+    async def abort_multipart_upload(self, **kwargs):
+        self.aborted = True
+
+    async def put_object(self, Body, **kwargs):
+        self.put = Body
+
+
+PART = 5 * 1024 * 1024
+
+
+class _AsyncFile:
+    def __init__(self, data: bytes):
+        self.file = io.BytesIO(data)
+
+    async def read(self, size: int) -> bytes:
+        return self.file.read(size)
+
+
+async def _stream(s3, data: bytes, before_complete=None):
+    return await storage_service._stream_to(
+        s3, storage_service.iter_file(_AsyncFile(data), 300 * 1024), "bucket", "k.wav", "audio/wav",
+        PART, 2, before_complete
+    )
+
+
+@pytest.mark.anyio
+async def test_multipart_upload_hashes_and_bounds_parts_in_flight():
+    data = bytes(range(256)) * (PART * 3 // 256 + 1000) # A bit over 3 parts
+    s3 = FakeS3()
+
+    uploaded = await _stream(s3, data)
+
+    assert uploaded == ("r2://k.wav", hashlib.sha256(data).hexdigest(), len(data))
+    assert s3.completed == [1, 2, 3, 4]
+    assert b"".join(s3.parts[n] for n in s3.completed) == data
+    assert all(len(s3.parts[n]) == PART for n in (1, 2, 3))
+    assert s3.max_in_flight <= 2
+
+
+@pytest.mark.anyio
+async def test_duplicate_or_failure_aborts_the_upload():
+    data = b"x" * (PART + 10)
+    seen = []
+
+    async def is_new(file_hash):
+        seen.append(file_hash)
+        return False
+
+    s3 = FakeS3()
+    uploaded = await _stream(s3, data, is_new)
+    assert uploaded.uri is None and seen == [hashlib.sha256(data).hexdigest()]
+    assert s3.aborted and s3.completed is None
+
+    s3 = FakeS3(fail_part=1)
+    with pytest.raises(RuntimeError):
+        await _stream(s3, data)
+    assert s3.aborted and s3.completed is None
+
+
+@pytest.mark.anyio
+async def test_small_file_uses_single_put():
+    s3 = FakeS3()
+    uploaded = await _stream(s3, b"RIFF....WAVE")
+    assert uploaded.uri == "r2://k.wav" and s3.put == b"RIFF....WAVE" and not s3.parts
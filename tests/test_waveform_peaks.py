@@ -0,0 +1,203 @@
+import asyncio
+import contextlib
+import struct
+import sys
+import wave
+
+import httpx
+import pytest
+from botocore.exceptions import ClientError
+from sqlalchemy import select
+
+from api_main import app
+from models import User, Reviewer, OutboxEvent
+from services import archive_service, ffmpeg_runner, queue_service, storage_service as storage, waveform_service
+
+
+class Body:
+    def __init__(self, data):
+        self.data = data
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def read(self):
+        return self.data
+
+
+class MemoryS3:
+    def __init__(self):
+        self.objects = {}
+
+    async def put_object(self, Key, Body, **kwargs):
+        self.objects[Key] = Body
+
+    async def get_object(self, Key, **kwargs):
+        if Key not in self.objects:
+            raise ClientError({"Error": {"Code": "NoSuchKey"}}, "GetObject")
+        return {"Body": Body(self.objects[Key])}
+
+
+@pytest.fixture
+async def env(session_factory, monkeypatch):
+    monkeypatch.setattr(app, "dependency_overrides", {}) # get_db, not another test's override
+
+    s3 = MemoryS3()
+    @contextlib.asynccontextmanager
+    async def client():
+        yield s3
+    monkeypatch.setattr(storage.storage_service, "session", object())
+    monkeypatch.setattr(storage.storage_service, "_client", client)
+    yield session_factory, s3
+    await storage.storage_service.close()
+
+
+def _parse(data):
+    magic, version, bits, sample_rate, count = struct.unpack_from("<4sBBIH", data)
+    offset = struct.calcsize("<4sBBIH")
+    index = [struct.unpack_from("<II", data, offset + 8 * i) for i in range(count)]
+    offset += 8 * count
+    levels = []
+    for width, pairs in index:
+        values = struct.unpack_from(f"<{2 * pairs}b", data, offset)
+        levels.append((width, list(zip(values[::2], values[1::2]))))
+        offset += 2 * pairs
+    assert offset == len(data)
+    return (magic, version, bits, sample_rate), levels
+
+
+@pytest.mark.anyio
+async def test_peaks_are_served_once_generated(env):
+    factory, s3 = env
+    async with factory() as db:
+        user = User(discord_id="1", username="u")
+        db.add(user)
+        await db.flush()
+        reviewer = Reviewer(user_id=user.id, tiktok_handle="host")
+        db.add(reviewer)
+        await db.commit()
+        uploaded = await queue_service.create_submission(
+            db, reviewer_id=reviewer.id, user_id=user.id, track_url="r2://blobs/sha256/ab/abc", track_title="t", archived_url=None
+        )
+        linked = await queue_service.create_submission(
+            db, reviewer_id=reviewer.id, user_id=user.id, track_url="https://soundcloud.com/a/b", track_title="s", archived_url=None
+        )
+        events = (await db.execute(select(OutboxEvent.payload).where(OutboxEvent.kind == "waveform_peaks"))).scalars().all()
+
+    # Only the upload gets a peaks job
+    assert events == [{"track_urls": ["r2://blobs/sha256/ab/abc"]}]
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        pending = await client.get(f"/api/submissions/{uploaded.id}/peaks")
+        assert pending.status_code == 404
+
+        s3.objects["blobs/sha256/ab/abc.peaks"] = b"WFPK..."
+        ready = await client.get(f"/api/submissions/{uploaded.id}/peaks")
+        assert ready.status_code == 200 and ready.content == b"WFPK..."
+        assert ready.headers["content-type"] == "application/octet-stream"
+
+        revalidated = await client.get(f"/api/submissions/{uploaded.id}/peaks", headers={"If-None-Match": ready.headers["etag"]})
+        assert revalidated.status_code == 304
+
+        assert (await client.get(f"/api/submissions/{linked.id}/peaks")).status_code == 404
+        assert (await client.get("/api/submissions/9999/peaks")).status_code == 404
+
+        async with factory() as db:
+            assert await archive_service.move_to_archive(db, [uploaded.id]) == 1
+            await db.commit()
+        archived = await client.get(f"/api/submissions/{uploaded.id}/peaks")
+        assert archived.status_code == 200 and archived.content == b"WFPK..."
+
+
+@pytest.mark.anyio
+async def test_levels_hold_min_and_max_of_each_window(monkeypatch):
+    np = pytest.importorskip("numpy")
+    monkeypatch.setattr(waveform_service.settings, "PEAKS_BASE_SAMPLES", 4)
+    monkeypatch.setattr(waveform_service.settings, "PEAKS_LEVELS", 3)
+    monkeypatch.setattr(waveform_service.settings, "PEAKS_LEVEL_FACTOR", 2)
+    samples = (np.sin(np.arange(37) * 0.7) * 30000).astype("<i2")
+
+    async def pcm():
+        data = samples.tobytes()
+        for start in range(0, len(data), 10): # Chunks that split samples and windows
+            yield data[start:start + 10]
+
+    header, levels = _parse(await waveform_service.compute(pcm(), 8000))
+
+    assert header == (b"WFPK", 1, 8, 8000)
+    assert [(width, len(pairs)) for width, pairs in levels] == [(4, 10), (8, 5), (16, 3)]
+    for width, pairs in levels:
+        expected = [
+            (int(samples[start:start + width].min()) >> 8, int(samples[start:start + width].max()) >> 8)
+            for start in range(0, len(samples), width)
+        ]
+        assert pairs == expected
+
+
+@pytest.mark.anyio
+async def test_local_upload_is_decoded_with_ffmpeg(tmp_path, monkeypatch):
+    pytest.importorskip("numpy")
+    if not ffmpeg_runner.available():
+        pytest.skip("ffmpeg not installed")
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "uploads").mkdir()
+    with wave.open(str(tmp_path / "uploads" / "tone.wav"), "wb") as f:
+        f.setnchannels(2)
+        f.setsampwidth(2)
+        f.setframerate(44100)
+        f.writeframes(struct.pack("<hh", 20000, -20000) * 44100)
+
+    assert await waveform_service.generate("/api/uploads/tone.wav")
+    assert not await waveform_service.generate("/api/uploads/tone.wav") # Already there
+
+    header, levels = _parse((tmp_path / "uploads" / "tone.wav.peaks").read_bytes())
+    assert header[3] == waveform_service.settings.PEAKS_SAMPLE_RATE
+    assert len(levels) == waveform_service.settings.PEAKS_LEVELS
+
+
+@pytest.mark.anyio
+async def test_outbox_handler_only_schedules_the_job(monkeypatch):
+    from services import outbox_handlers
+    release, calls = asyncio.Event(), []
+
+    async def generate(track_url):
+        calls.append(track_url)
+        await release.wait()
+    monkeypatch.setattr(waveform_service, "generate", generate)
+
+    # Returns (and lets the outbox commit) while ffmpeg would still be running
+    await outbox_handlers.generate_waveform_peaks(None, {"track_urls": ["/api/uploads/a.wav", "/api/uploads/a.wav"]})
+    await asyncio.sleep(0)
+    assert calls == ["/api/uploads/a.wav"] # One job per track at a time
+
+    release.set()
+    await ffmpeg_runner.drain()
+
+
+@pytest.mark.anyio
+async def test_noisy_or_hung_ffmpeg_does_not_hold_a_slot(tmp_path, monkeypatch):
+    fake = tmp_path / "ffmpeg"
+    # Far more than a pipe buffer on stderr before any output, then a failure
+    fake.write_text(
+        f"#!{sys.executable}\nimport sys, time\n"
+        "if 'hang' in sys.argv: time.sleep(60)\n"
+        "sys.stderr.write('bad frame\\n' * 100000); sys.stdout.write('x' * 1000); sys.exit(1)\n"
+    )
+    fake.chmod(0o755)
+    monkeypatch.setattr(ffmpeg_runner.settings, "FFMPEG_PATH", str(fake))
+    monkeypatch.setattr(ffmpeg_runner.settings, "FFMPEG_JOB_TIMEOUT_SECONDS", 0.5)
+
+    async def decode(track_url):
+        async with ffmpeg_runner.process(track_url) as proc:
+            output = b"".join([chunk async for chunk in ffmpeg_runner.read(proc)])
+            await ffmpeg_runner.finish(proc)
+        return output
+
+    with pytest.raises(RuntimeError, match="exited with 1:\\s+bad frame"):
+        await asyncio.wait_for(decode("noisy"), 10)
+
+    ffmpeg_runner.submit(decode, "hang")
+    await asyncio.wait_for(ffmpeg_runner.drain(), 10) # Cancelled (and killed) at the job timeout
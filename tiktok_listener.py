@@ -10,7 +10,7 @@ from sqlalchemy import select, update
 from sqlalchemy.orm import joinedload
 # Import achievement service
 from services import achievement_service
-from services import giveaway_service
+from services import goal_engine
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -166,8 +166,7 @@ class ReviewerListener:
             self.buffer.user_chat_activity[user_id]['shares_sent'] += 1
 
             # Community Goal: SHARES
-            async with AsyncSessionLocal() as db:
-                await giveaway_service.update_community_goal_progress(db, self.reviewer_id, 'SHARES', 1, username=event.user.unique_id)
+            await goal_engine.add(self.reviewer_id, 'SHARES', 1)
 
         # Fallback for Polls: Chat Emoji Tracking
         @self.client.on("comment")
@@ -181,8 +180,7 @@ class ReviewerListener:
                 self.buffer.add_emoji_vote(is_positive=False)
 
             # Community Goal: COMMENTS
-            async with AsyncSessionLocal() as db:
-                await giveaway_service.update_community_goal_progress(db, self.reviewer_id, 'COMMENTS', 1, username=event.user.unique_id, user_id=event.user.unique_id)
+            await goal_engine.add(self.reviewer_id, 'COMMENTS', 1, {event.user.unique_id: 1})
 
             # --- TRACKING FOR ACHIEVEMENTS (Rainbow, Town Crier, Emoji Chef) ---
             user_id = event.user.unique_id
@@ -280,8 +278,8 @@ class ReviewerListener:
                             if activity['likes_sent'] > 0:
                                 user_likes_map[uid] = activity['likes_sent']
                         
-                        await giveaway_service.batch_update_community_goal_progress(
-                            db, self.reviewer_id, 'LIKES', likes_to_add, user_likes_map
+                        await goal_engine.add(
+                            self.reviewer_id, 'LIKES', likes_to_add, user_likes_map
                         )
 
                 # 2. Update Active Submission Stats (Average Viewers & Polls)